@@ -1,18 +1,32 @@
 from __future__ import annotations
 
+import asyncio
+import json
 import os
 from pathlib import Path
+from typing import Any, AsyncIterator
 
-from fastapi import FastAPI, HTTPException
+from fastapi import APIRouter, Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, Field
 
+from agent.admission import PRIORITY_HEADER, AdmissionRejected, normalize_priority
+from agent.profiling import PROFILE_HEADER
+from agent.query_guard import QueryGuardError
+from agent.result_handles import RESULT_FORMATS, ResultHandleError, encode_page
+from apps.zoho_agent_service.api.registry import AppRegistry, UnknownAppError
 from apps.zoho_agent_service.api.service import AgentService
 
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
 
 class AskRequest(BaseModel):
     question: str = Field(min_length=1)
     session_id: str = Field(default="default")
     max_rows: int = Field(default=30, ge=1, le=200)
+    # Allow aggregates over large tables to be estimated from a sample.
+    approximate: bool = False
 
 
 class AskResponse(BaseModel):
@@ -23,47 +37,226 @@ class AskResponse(BaseModel):
     evidence_columns: list[str]
     generated_at: str
     model: str
+    answer_path: str = "llm"
+    summary_source: str = "llm"
+    result_shape: str | None = None
+    result_handle: str | None = None
+    follow_up: bool = False
+    # Sample fraction, confidence and per-column error bounds when the figures were estimated.
+    approximation: dict | None = None
+    # Seconds per stage, LLM token counts and cache hits for this request.
+    timings: dict | None = None
+    # Python stack samples and DuckDB query profiles, only when the request asked to be profiled.
+    profile: dict | None = None
+
+
+class BatchRequest(BaseModel):
+    questions: list[str] = Field(min_length=1)
+    # Only used to share the LLM queue fairly with other clients; batch answers skip session history.
+    session_id: str = Field(default="batch")
+    max_rows: int = Field(default=30, ge=1, le=200)
+    approximate: bool = False
 
 
 class SessionRequest(BaseModel):
     session_id: str = Field(min_length=1)
 
 
-def create_app() -> FastAPI:
-    config_path = Path(os.getenv("APP_CONFIG_PATH", "config/app.yaml"))
-    service = AgentService(config_path=config_path)
+def wants_profile(value: str | None, service: AgentService) -> bool:
+    """The profile header is ignored unless the app's config opts in to it."""
+    if not service.app_config.profiling.allow_profile_header:
+        return False
+    return (value or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def request_priority(value: str | None, default: str) -> str:
+    try:
+        return normalize_priority(value, default)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+def overloaded(exc: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=exc.status_code,
+        detail=exc.to_detail(),
+        headers={"Retry-After": str(exc.retry_after_seconds)},
+    )
+
+
+def format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def registry_from_env() -> AppRegistry:
+    """`APP_CONFIG_PATHS` (os.pathsep-separated) serves several apps; otherwise the one at `APP_CONFIG_PATH`."""
+    paths = [Path(p) for p in os.getenv("APP_CONFIG_PATHS", "").split(os.pathsep) if p.strip()]
+    if not paths:
+        config_path = Path(os.getenv("APP_CONFIG_PATH", "config/app.yaml"))
+        return AppRegistry.single(AgentService(config_path=config_path))
+    return AppRegistry.from_paths(
+        paths,
+        memory_budget_bytes=int(float(os.getenv("APP_MEMORY_BUDGET_MB", "1024")) * 1024 * 1024),
+        max_loaded_apps=int(os.getenv("APP_MAX_LOADED", "0")),
+    )
+
+
+def create_app(service: AgentService | None = None, registry: AppRegistry | None = None) -> FastAPI:
+    if registry is None:
+        registry = AppRegistry.single(service) if service is not None else registry_from_env()
 
     app = FastAPI(
         title="Zoho Creator AI Agent API",
         version="0.1.0",
         description="Session-aware Q&A API over synced Zoho Creator data.",
     )
+    app.state.registry = registry
+
+    async def app_service(request: Request) -> AsyncIterator[AgentService]:
+        """The routed app's service, leased until the response (streams included) has been sent."""
+        try:
+            name = registry.resolve(request.path_params.get("app_name"))
+        except UnknownAppError as exc:
+            raise HTTPException(status_code=exc.status_code, detail=exc.to_detail()) from exc
+        async with registry.lease(name) as service:
+            yield service
+
+    # Mounted at the root for the default app and under /apps/{app_name} for every app.
+    router = APIRouter()
 
     @app.get("/health")
-    def health() -> dict:
+    async def health() -> dict:
         return {"ok": True}
 
-    @app.get("/status")
-    def status() -> dict:
-        return service.status()
+    @app.get("/apps")
+    async def apps() -> dict:
+        return registry.stats()
+
+    @app.get("/metrics")
+    async def metrics() -> Response:
+        # Rendering walks every loaded service and its caches; keep it off the event loop.
+        content = await asyncio.to_thread(registry.metrics_text)
+        return Response(content=content, media_type=PROMETHEUS_CONTENT_TYPE)
 
-    @app.post("/chat", response_model=AskResponse)
-    def chat(req: AskRequest) -> AskResponse:
+    @router.get("/status")
+    async def status(service: AgentService = Depends(app_service)) -> dict:
+        return await asyncio.to_thread(service.status)
+
+    @router.post("/chat", response_model=AskResponse)
+    async def chat(
+        req: AskRequest,
+        service: AgentService = Depends(app_service),
+        profile: str | None = Header(default=None, alias=PROFILE_HEADER),
+        priority: str | None = Header(default=None, alias=PRIORITY_HEADER),
+    ) -> dict:
         try:
-            payload = service.ask(
+            payload = await service.aask(
                 question=req.question,
                 session_id=req.session_id,
                 max_rows=req.max_rows,
+                approximate=req.approximate,
+                profile=wants_profile(profile, service),
+                priority=request_priority(priority, "api"),
             )
+        except AdmissionRejected as exc:
+            raise overloaded(exc) from exc
+        except QueryGuardError as exc:
+            raise HTTPException(status_code=exc.status_code, detail=exc.to_detail()) from exc
         except Exception as exc:
             raise HTTPException(status_code=400, detail=str(exc)) from exc
-        return AskResponse.model_validate(payload)
+        # response_model validates the payload once on the way out; no second model pass here.
+        return payload
+
+    @router.post("/chat/stream")
+    async def chat_stream(
+        req: AskRequest,
+        service: AgentService = Depends(app_service),
+        profile: str | None = Header(default=None, alias=PROFILE_HEADER),
+        priority: str | None = Header(default=None, alias=PRIORITY_HEADER),
+    ) -> StreamingResponse:
+        # Streaming is what the chat UI uses, so it defaults to the interactive class.
+        stream_priority = request_priority(priority, "interactive")
+
+        async def events() -> AsyncIterator[str]:
+            try:
+                async for event, data in service.aask_stream(
+                    question=req.question,
+                    session_id=req.session_id,
+                    max_rows=req.max_rows,
+                    approximate=req.approximate,
+                    profile=wants_profile(profile, service),
+                    priority=stream_priority,
+                ):
+                    yield format_sse(event, data)
+            except (AdmissionRejected, QueryGuardError) as exc:
+                yield format_sse("error", {"detail": exc.to_detail()})
+            except Exception as exc:
+                yield format_sse("error", {"detail": str(exc)})
+
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @router.post("/chat/batch")
+    async def chat_batch(
+        req: BatchRequest,
+        service: AgentService = Depends(app_service),
+        priority: str | None = Header(default=None, alias=PRIORITY_HEADER),
+    ) -> StreamingResponse:
+        limit = service.app_config.query.batch_max_questions
+        if len(req.questions) > limit:
+            raise HTTPException(status_code=422, detail=f"At most {limit} questions per batch.")
+        batch_priority = request_priority(priority, "batch")
+
+        async def lines() -> AsyncIterator[str]:
+            try:
+                async for line in service.aask_batch(
+                    questions=req.questions,
+                    session_id=req.session_id,
+                    max_rows=req.max_rows,
+                    approximate=req.approximate,
+                    priority=batch_priority,
+                ):
+                    yield json.dumps(line, default=str) + "\n"
+            except Exception as exc:
+                yield json.dumps({"type": "error", "detail": str(exc)}) + "\n"
+
+        return StreamingResponse(lines(), media_type=NDJSON_CONTENT_TYPE, headers={"X-Accel-Buffering": "no"})
+
+    @router.get("/results/{handle}")
+    async def results(
+        handle: str,
+        request: Request,
+        service: AgentService = Depends(app_service),
+        cursor: str | None = None,
+        page_size: int | None = Query(default=None, ge=1),
+        format: str = Query(default="json", pattern="^(" + "|".join(RESULT_FORMATS) + ")$"),
+        compression: str | None = None,
+    ) -> Response:
+        try:
+            page = await service.aresult_page(handle, cursor=cursor, page_size=page_size)
+            body, media_type, headers = encode_page(
+                page,
+                format,
+                compression=compression,
+                accept_encoding=request.headers.get("accept-encoding", ""),
+            )
+        except (ResultHandleError, QueryGuardError) as exc:
+            raise HTTPException(status_code=exc.status_code, detail=exc.to_detail()) from exc
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return Response(content=body, media_type=media_type, headers=headers)
 
-    @app.post("/session/clear")
-    def clear_session(req: SessionRequest) -> dict:
-        service.clear_session(req.session_id)
+    @router.post("/session/clear")
+    async def clear_session(req: SessionRequest, service: AgentService = Depends(app_service)) -> dict:
+        # A shared session store may have to wait for its write lock; keep that off the loop.
+        await asyncio.to_thread(service.clear_session, req.session_id)
         return {"ok": True, "session_id": req.session_id}
 
+    app.include_router(router)
+    app.include_router(router, prefix="/apps/{app_name}")
     return app
 
 
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable
+
+from agent.metrics import METRICS
+from agent.session_store import InMemorySessionStore, SessionStore
+from agent.settings import load_app_config
+from apps.zoho_agent_service.api.service import AgentService
+
+
+class UnknownAppError(KeyError):
+    status_code = 404
+    code = "unknown_app"
+
+    def __init__(self, app_name: str, known: list[str]) -> None:
+        super().__init__(app_name)
+        self.app_name = app_name
+        self.known = known
+
+    def to_detail(self) -> dict[str, Any]:
+        return {"code": self.code, "message": f"Unknown app '{self.app_name}'.", "apps": self.known}
+
+
+class AppRegistry:
+    """Serves several app configs from one process, building each AgentService on first use.
+
+    Loaded apps are kept in LRU order. Idle apps are evicted from the least recently used end
+    while the loaded apps' estimated memory is over `memory_budget_bytes`, or more than
+    `max_loaded_apps` are loaded. The check runs after a request that loaded an app, and
+    otherwise at most every `eviction_interval_seconds`. The next request for an evicted app
+    loads it again. An evicted app's in-memory session store is kept and handed to its next
+    load, so conversations survive eviction. The budget does not count it: `sessions.max_sessions`
+    bounds it instead. Loads run under a per-app lock off the event loop, so other apps keep
+    serving meanwhile.
+    """
+
+    def __init__(
+        self,
+        config_paths: dict[str, Path],
+        default_app: str | None = None,
+        memory_budget_bytes: int = 1024 * 1024 * 1024,
+        max_loaded_apps: int = 0,
+        factory: Callable[..., AgentService] | None = None,
+        eviction_interval_seconds: float = 5.0,
+    ) -> None:
+        if not config_paths:
+            raise ValueError("At least one app config is required.")
+        self.config_paths = dict(config_paths)
+        self.default_app = default_app or next(iter(self.config_paths))
+        self.memory_budget_bytes = memory_budget_bytes
+        self.max_loaded_apps = max_loaded_apps
+        self.eviction_interval_seconds = eviction_interval_seconds
+        # Called as factory(config_path, sessions=<kept store or None>).
+        self._factory = factory or (lambda path, sessions: AgentService(config_path=path, sessions=sessions))
+        self._lock = threading.Lock()
+        self._load_locks = {name: threading.Lock() for name in self.config_paths}
+        # Least recently used first.
+        self._loaded: OrderedDict[str, AgentService] = OrderedDict()
+        self._in_flight: dict[str, int] = {name: 0 for name in self.config_paths}
+        self._pinned: set[str] = set()
+        self._loads: dict[str, int] = {name: 0 for name in self.config_paths}
+        self._kept_sessions: dict[str, SessionStore] = {}
+        self._eviction_pending = False
+        self._last_eviction_check = 0.0
+
+    @classmethod
+    def from_paths(cls, paths: list[Path], **kwargs: Any) -> AppRegistry:
+        """Key each config by its `app_name`; the first one answers the unprefixed routes."""
+        return cls({load_app_config(path).app_name: path for path in paths}, **kwargs)
+
+    @classmethod
+    def single(cls, service: AgentService) -> AppRegistry:
+        """Wrap an already built service; it stays loaded for the life of the process."""
+        name = service.app_config.app_name
+        registry = cls({name: Path()}, memory_budget_bytes=0)
+        registry._loaded[name] = service
+        registry._loads[name] = 1
+        registry._pinned.add(name)
+        return registry
+
+    @property
+    def app_names(self) -> list[str]:
+        return list(self.config_paths)
+
+    def resolve(self, app_name: str | None) -> str:
+        name = app_name or self.default_app
+        if name not in self.config_paths:
+            raise UnknownAppError(name, self.app_names)
+        return name
+
+    def _loaded_service(self, name: str, checkout: bool = False) -> AgentService | None:
+        with self._lock:
+            service = self._loaded.get(name)
+            if service is not None:
+                self._loaded.move_to_end(name)
+                if checkout:
+                    self._in_flight[name] += 1
+            return service
+
+    def _load(self, name: str, checkout: bool = False) -> AgentService:
+        """Load the app unless it already is; with `checkout`, count the caller in flight under the
+        same lock that publishes the service, so no eviction can run between the two."""
+        with self._load_locks[name]:
+            service = self._loaded_service(name, checkout)
+            if service is not None:
+                return service
+            with self._lock:
+                sessions = self._kept_sessions.get(name)
+            service = self._factory(self.config_paths[name], sessions=sessions)
+            with self._lock:
+                self._kept_sessions.pop(name, None)
+                self._loaded[name] = service
+                self._loads[name] += 1
+                if checkout:
+                    self._in_flight[name] += 1
+                self._eviction_pending = True
+            METRICS.incr("apps_loaded_total", app=name)
+            return service
+
+    def _check_in(self, name: str) -> None:
+        with self._lock:
+            self._in_flight[name] -= 1
+
+    def _release_abandoned_load(self, name: str, load: asyncio.Future[AgentService]) -> None:
+        # The load finishes on its thread even when the request is gone, and counted it in flight.
+        if not load.cancelled() and load.exception() is None:
+            self._check_in(name)
+
+    def get(self, app_name: str | None = None) -> AgentService:
+        name = self.resolve(app_name)
+        return self._loaded_service(name) or self._load(name)
+
+    @asynccontextmanager
+    async def lease(self, app_name: str | None = None) -> AsyncIterator[AgentService]:
+        """The app's service for one request; an app is never evicted while a lease on it is open."""
+        name = self.resolve(app_name)
+        service = self._loaded_service(name, checkout=True)
+        if service is None:
+            load = asyncio.ensure_future(asyncio.to_thread(self._load, name, True))
+            try:
+                service = await asyncio.shield(load)
+            except asyncio.CancelledError:
+                load.add_done_callback(lambda done: self._release_abandoned_load(name, done))
+                raise
+        try:
+            yield service
+        finally:
+            self._check_in(name)
+            if self._eviction_due():
+                evicted = await asyncio.to_thread(self._pick_evictions)
+                if evicted:
+                    await asyncio.to_thread(self._close_evicted, evicted)
+
+    def _eviction_due(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if not self._eviction_pending and now - self._last_eviction_check < self.eviction_interval_seconds:
+                return False
+            self._eviction_pending = False
+            self._last_eviction_check = now
+            return True
+
+    def evict_over_budget(self) -> list[str]:
+        """Evict idle apps, least recently used first, until the budget and the app cap are met."""
+        evicted = self._pick_evictions()
+        self._close_evicted(evicted)
+        return [name for name, _, _ in evicted]
+
+    def _pick_evictions(self) -> list[tuple[str, AgentService, str]]:
+        with self._lock:
+            if len(self._loaded) <= len(self._pinned):
+                return []
+            loaded = list(self._loaded.items())
+        # Sizing walks every app's caches; keep it outside the lock that every request takes.
+        sizes = {name: service.memory_bytes() for name, service in loaded}
+        with self._lock:
+            total = sum(sizes.get(name, 0) for name in self._loaded)
+            evicted: list[tuple[str, AgentService, str]] = []
+            # The most recently used app stays, even when it alone is over budget.
+            for name in list(self._loaded)[:-1]:
+                over_memory = self.memory_budget_bytes > 0 and total > self.memory_budget_bytes
+                over_count = self.max_loaded_apps > 0 and len(self._loaded) > self.max_loaded_apps
+                if not over_memory and not over_count:
+                    break
+                if self._in_flight[name] or name in self._pinned:
+                    continue
+                service = self._loaded.pop(name)
+                if isinstance(service.sessions, InMemorySessionStore):
+                    # Conversations outlive the eviction; the next load of this app picks them up.
+                    self._kept_sessions[name] = service.sessions
+                evicted.append((name, service, "memory" if over_memory else "count"))
+                total -= sizes.get(name, 0)
+            return evicted
+
+    def _close_evicted(self, evicted: list[tuple[str, AgentService, str]]) -> None:
+        for name, service, reason in evicted:
+            service.close(keep_sessions=isinstance(service.sessions, InMemorySessionStore))
+            METRICS.incr("apps_evicted_total", app=name, reason=reason)
+
+    def metrics_text(self) -> str:
+        with self._lock:
+            services = list(self._loaded.values())
+        gauges: dict = {}
+        for service in services:
+            gauges.update(service.metrics_gauges())
+        return METRICS.render_prometheus(gauges)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            loaded = list(self._loaded.items())
+            in_flight = dict(self._in_flight)
+            loads = dict(self._loads)
+        memory = {name: service.memory_bytes() for name, service in loaded}
+        return {
+            "default_app": self.default_app,
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "memory_bytes": sum(memory.values()),
+            "apps": {
+                name: {
+                    "loaded": name in memory,
+                    "memory_bytes": memory.get(name, 0),
+                    "in_flight": in_flight[name],
+                    "loads": loads[name],
+                }
+                for name in self.config_paths
+            },
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            services = list(self._loaded.values())
+            kept = list(self._kept_sessions.values())
+            self._loaded.clear()
+            self._kept_sessions.clear()
+        for service in services:
+            service.close()
+        for sessions in kept:
+            sessions.close()
@@ -1,64 +1,604 @@
 from __future__ import annotations
 
-from collections import defaultdict, deque
+import asyncio
+import json
+import time
 from pathlib import Path
-from threading import Lock
+from typing import Any, AsyncIterator, Iterator
 
+from agent.admission import AdmissionTicket, LLMAdmission
+from agent.answer_cache import AnswerCache, AsyncSingleFlight, SingleFlight, answer_cache_key
+from agent.async_query_engine import AsyncQueryEngine, get_db_executor
+from agent.batch import run_batch
 from agent.cache_manager import CacheManager
+from agent.db_pool import ReadOnlyConnectionPool
+from agent.fast_path import IntentMatcher
+from agent.follow_up import looks_like_follow_up
+from agent.hedging import HedgePolicy, LLMHedger
+from agent.indexes import FilterUsage, index_status
+from agent.metrics import METRICS, gauge_key
+from agent.model_catalog import get_model_catalog
 from agent.models import QueryRequest
-from agent.query_engine import QueryEngine
+from agent.profiling import RequestProfiler, SlowQueryLog, slowlog_entry
+from agent.query_engine import QueryEngine, SupportsInvoke
+from agent.query_guard import QueryGuard
+from agent.result_cache import ResultCache
+from agent.result_handles import ResultHandleRegistry, ResultPage, decode_cursor, encode_cursor
+from agent.rollups import RollupRewriter, rollups_from_payload
+from agent.sampling import Sampler, samples_from_payload
+from agent.session_store import SessionStore, create_session_store
 from agent.settings import load_app_config, load_settings
+from agent.value_index import ValueIndex
 
 
 class AgentService:
     """Thin service wrapper that provides session-aware question answering."""
 
-    def __init__(self, config_path: Path, context_window: int = 6) -> None:
+    def __init__(
+        self,
+        config_path: Path,
+        context_window: int = 6,
+        llm: SupportsInvoke | None = None,
+        sessions: SessionStore | None = None,
+    ) -> None:
         self.settings = load_settings()
         self.app_config = load_app_config(config_path)
         self.cache = CacheManager(Path(".cache") / self.app_config.app_name)
         self.context_window = context_window
-        self._sessions: dict[str, deque[str]] = defaultdict(lambda: deque(maxlen=self.context_window))
-        self._lock = Lock()
+        session_settings = self.app_config.sessions
+        # History lines plus the last answer's SQL and columns, the relation follow-up questions refine.
+        # A multi-app server passes back the store of an earlier, evicted instance of this app.
+        self.sessions = sessions
+        if self.sessions is None:
+            self.sessions = create_session_store(
+                session_settings.backend,
+                self.cache.root / "sessions.sqlite",
+                context_window=context_window,
+                ttl_seconds=session_settings.ttl_seconds,
+                max_sessions=session_settings.max_sessions,
+                path=Path(session_settings.path) if session_settings.path else None,
+            )
+        self.llm = llm
+        self.metrics = METRICS
+        self.result_cache = ResultCache(max_bytes=self.app_config.query.result_cache_max_bytes)
+        self.answer_cache = AnswerCache(
+            ttl_seconds=self.app_config.query.answer_cache_ttl_seconds,
+            max_entries=self.app_config.query.answer_cache_max_entries,
+        )
+        self.model_catalog = get_model_catalog(
+            ttl_seconds=self.app_config.llm.model_catalog_ttl_seconds,
+            failure_threshold=self.app_config.llm.breaker_failure_threshold,
+            reset_after_seconds=self.app_config.llm.breaker_reset_seconds,
+        )
+        llm_settings = self.app_config.llm
+        self.hedger: LLMHedger | None = None
+        if llm_settings.hedging_enabled:
+            self.hedger = LLMHedger(
+                HedgePolicy(
+                    percentile=llm_settings.hedge_percentile,
+                    min_samples=llm_settings.hedge_min_samples,
+                    min_delay_seconds=llm_settings.hedge_min_delay_seconds,
+                    max_extra_ratio=llm_settings.hedge_max_extra_ratio,
+                )
+            )
+        # Shared by every request this process serves, so bursts queue here instead of at the provider.
+        self.llm_admission: LLMAdmission | None = None
+        if llm_settings.max_concurrent_calls > 0:
+            self.llm_admission = LLMAdmission(
+                max_concurrent=llm_settings.max_concurrent_calls,
+                max_queue_depth=llm_settings.max_queue_depth,
+                max_wait_seconds=llm_settings.max_queue_wait_seconds,
+            )
+        self.query_guard = QueryGuard(
+            max_estimated_rows=self.app_config.query.query_max_estimated_rows,
+            timeout_seconds=self.app_config.query.query_timeout_seconds,
+            max_threads=self.app_config.query.query_max_threads,
+        )
+        self.result_handles = ResultHandleRegistry(
+            max_entries=self.app_config.query.result_handle_max_entries,
+            ttl_seconds=self.app_config.query.result_handle_ttl_seconds,
+        )
+        self.filter_usage: FilterUsage | None = None
+        if self.app_config.indexes.enabled:
+            self.filter_usage = FilterUsage(
+                self.cache.filter_usage_file,
+                flush_every=self.app_config.indexes.usage_flush_every,
+            )
+        self.slowlog = SlowQueryLog(
+            self.cache.slowlog_file,
+            max_bytes=self.app_config.profiling.slowlog_max_bytes,
+            backups=self.app_config.profiling.slowlog_backups,
+        )
+        self._in_flight = SingleFlight()
+        self._async_in_flight = AsyncSingleFlight()
+        self._schema_summary: (
+            tuple[str | None, dict, IntentMatcher | None, RollupRewriter, ValueIndex | None, Sampler] | None
+        ) = None
+        self._schema_summary_bytes = 0
+
+    def _current_snapshot_id(self) -> str | None:
+        snap = self.cache.read_snapshot()
+        return snap.snapshot_id if snap else None
+
+    def _snapshot_artifacts(self, snapshot_id: str | None) -> tuple:
+        """The schema summary and the lookups built from it, loaded once per snapshot."""
+        cached_summary = self._schema_summary
+        if cached_summary is None or cached_summary[0] != snapshot_id:
+            schema_summary = self.cache.read_schema_summary()
+            matcher = None
+            if self.app_config.query.fast_path_enabled:
+                matcher = IntentMatcher.from_schema(
+                    schema_summary,
+                    self.app_config.allowed_tables,
+                    self.app_config.business_definitions,
+                    min_confidence=self.app_config.query.fast_path_min_confidence,
+                )
+            rollups = RollupRewriter(rollups_from_payload(self.cache.read_rollups()))
+            if self.filter_usage is not None:
+                self.filter_usage.bind(schema_summary, self.cache.read_indexes())
+            value_index = None
+            if self.app_config.value_index.enabled:
+                value_index = ValueIndex.from_db(
+                    self.cache.db_path,
+                    max_phrase_words=self.app_config.value_index.max_phrase_words,
+                    max_matches=self.app_config.value_index.max_matches,
+                )
+            sampling = self.app_config.sampling
+            sampler = Sampler(
+                samples_from_payload(self.cache.read_samples()),
+                confidence=sampling.confidence,
+                max_relative_error=sampling.max_relative_error,
+            )
+            cached_summary = (snapshot_id, schema_summary, matcher, rollups, value_index, sampler)
+            self._schema_summary = cached_summary
+            self._schema_summary_bytes = len(json.dumps(schema_summary, default=str))
+        return cached_summary
 
-    def _build_engine(self) -> QueryEngine:
+    async def _abuild_engine(
+        self,
+        snapshot_id: str | None,
+        profiler: RequestProfiler | None = None,
+        admission: AdmissionTicket | None = None,
+        connection_pool: ReadOnlyConnectionPool | None = None,
+    ) -> QueryEngine:
+        cached_summary = self._schema_summary
+        if cached_summary is None or cached_summary[0] != snapshot_id:
+            # A new snapshot means reading its files and building the value index from DuckDB.
+            await asyncio.to_thread(self._snapshot_artifacts, snapshot_id)
+        return self._build_engine(snapshot_id, AsyncQueryEngine, profiler, admission, connection_pool)
+
+    def _build_engine(
+        self,
+        snapshot_id: str | None,
+        engine_cls: type[QueryEngine] = QueryEngine,
+        profiler: RequestProfiler | None = None,
+        admission: AdmissionTicket | None = None,
+        connection_pool: ReadOnlyConnectionPool | None = None,
+    ) -> QueryEngine:
         if not self.cache.db_path.exists():
             raise RuntimeError("No local DuckDB found. Run sync first.")
-        schema_summary = self.cache.read_schema_summary()
-        return QueryEngine(
+        _, schema_summary, fast_path, rollups, value_index, sampler = self._snapshot_artifacts(snapshot_id)
+        # A newly published sync drops every cached result in one swap.
+        self.result_cache.bind_snapshot(snapshot_id)
+        extra: dict[str, Any] = {}
+        if issubclass(engine_cls, AsyncQueryEngine):
+            extra["executor"] = get_db_executor(self.app_config.query.db_max_workers)
+        return engine_cls(
             settings=self.settings,
             db_path=self.cache.db_path,
             schema_summary=schema_summary,
             allowed_tables=self.app_config.allowed_tables,
             business_definitions=self.app_config.business_definitions,
+            llm=self.llm,
+            # A forced profile has to run the query to see its plan.
+            result_cache=None if profiler is not None and profiler.forced else self.result_cache,
+            snapshot_id=snapshot_id,
+            model_catalog=self.model_catalog,
+            hedger=self.hedger,
+            fast_path=fast_path,
+            template_summaries=self.app_config.query.template_summaries_enabled,
+            query_guard=self.query_guard,
+            rollups=rollups,
+            filter_usage=self.filter_usage,
+            value_index=value_index,
+            sampler=sampler,
+            profiler=profiler,
+            admission=admission,
+            connection_pool=connection_pool,
+            **extra,
         )
 
-    def ask(self, question: str, session_id: str | None = None, max_rows: int = 30) -> dict:
+    def _prepare(
+        self,
+        question: str,
+        session_id: str | None,
+        max_rows: int,
+        approximate: bool = False,
+    ) -> tuple[str, QueryRequest, str | None, tuple]:
         sid = session_id or "default"
-        with self._lock:
-            history = list(self._sessions[sid])
-
-        engine = self._build_engine()
-        answer = engine.answer(
-            QueryRequest(
-                question=question,
-                max_evidence_rows=max_rows,
-                conversation_context=history,
-            )
+        session = self.sessions.get(sid)
+        history, previous_sql, previous_columns = session.history, session.previous_sql, session.previous_columns
+        snapshot_id = self._current_snapshot_id()
+        # Only a follow-up reads the session; any other question shares its answer across sessions and repeats.
+        context = history + [previous_sql] if previous_sql and looks_like_follow_up(question) else None
+        key = answer_cache_key(question, max_rows, snapshot_id, context, approximate)
+        request = QueryRequest(
+            question=question,
+            max_evidence_rows=max_rows,
+            conversation_context=history,
+            previous_sql=previous_sql,
+            previous_columns=previous_columns,
+            approximate=approximate,
         )
-        payload = answer.model_dump(mode="json")
+        return sid, request, snapshot_id, key
+
+    def _ticket(self, sid: str, priority: str) -> AdmissionTicket | None:
+        return self.llm_admission.ticket(sid, priority) if self.llm_admission is not None else None
+
+    def _cached(self, key: tuple) -> dict | None:
+        payload = self.answer_cache.get(key)
+        if payload is not None:
+            self.metrics.incr("answer_cache_hits_total")
+        return payload
+
+    def _with_handle(self, payload: dict, snapshot_id: str | None) -> dict:
+        # Registered on cache hits too, so an evicted handle comes back with the answer.
+        if not payload.get("sql"):
+            return payload
+        return {**payload, "result_handle": self.result_handles.register(payload["sql"], snapshot_id)}
+
+    def _with_timings(self, payload: dict, started: float, cached: bool, write_seconds: float, mode: str) -> dict:
+        """Service-level view on top of the engine's breakdown; cache hits report only what this call did."""
+        engine_timings = {} if cached else payload.get("timings") or {}
+        total = time.perf_counter() - started
+        self.metrics.observe("agent_ask_seconds", total, mode=mode, answer_cache="hit" if cached else "miss")
+        timings = {
+            "total_seconds": round(total, 6),
+            "stages": {**engine_timings.get("stages", {}), "write_last_answer": round(write_seconds, 6)},
+            "tokens": engine_timings.get("tokens", {}),
+            "cache": {**engine_timings.get("cache", {}), "answer_cache": cached},
+        }
+        return {**payload, "timings": timings}
+
+    def _start_profiler(self, forced: bool) -> RequestProfiler | None:
+        settings = self.app_config.profiling
+        if not forced and settings.slow_query_seconds <= 0 and settings.profile_after_seconds <= 0:
+            return None
+        profiler = RequestProfiler(
+            interval_seconds=settings.sample_interval_seconds,
+            forced=forced,
+            start_after_seconds=settings.profile_after_seconds,
+            # Every query is profiled cheaply; _finish_profile keeps the profiles only of slow requests.
+            capture_queries=settings.capture_query_profiles and settings.slow_query_seconds > 0,
+        )
+        profiler.begin()
+        return profiler
+
+    def _finish_profile(self, payload: dict, profiler: RequestProfiler | None) -> dict:
+        """Attach a forced profile to the answer and log the request if it was slow."""
+        if profiler is None:
+            return payload
+        profiler.finish()
+        threshold = self.app_config.profiling.slow_query_seconds
+        slow = threshold > 0 and payload["timings"]["total_seconds"] >= threshold
+        if not slow and not profiler.forced:
+            # A fast request's query profiles are dropped unparsed.
+            return payload
+        profile = profiler.to_payload()
+        self.slowlog.write(slowlog_entry(payload, profile))
+        return {**payload, "profile": profile} if profiler.forced else payload
+
+    def ask(
+        self,
+        question: str,
+        session_id: str | None = None,
+        max_rows: int = 30,
+        approximate: bool = False,
+        profile: bool = False,
+        priority: str = "api",
+    ) -> dict:
+        started = time.perf_counter()
+        sid, request, snapshot_id, key = self._prepare(question, session_id, max_rows, approximate)
+        ticket = self._ticket(sid, priority)
+        profiler = self._start_profiler(profile)
+        try:
+            # A forced profile skips the caches and coalescing: it exists to watch the work happen.
+            payload = None if profile else self._cached(key)
+            cached = payload is not None
+            if payload is None and profile:
+                payload = self._answer(request, snapshot_id, key, profiler, ticket)
+            elif payload is None:
+                payload, shared = self._in_flight.do(
+                    key, lambda: self._answer(request, snapshot_id, key, profiler, ticket)
+                )
+                if shared:
+                    self.metrics.incr("answer_coalesced_total")
+            payload = self._with_handle(payload, snapshot_id)
+            write_seconds = self._remember(sid, question, payload)
+            payload = self._with_timings(payload, started, cached, write_seconds, "sync")
+            return self._finish_profile(payload, profiler)
+        finally:
+            if profiler is not None:
+                profiler.finish()
+
+    async def aask(
+        self,
+        question: str,
+        session_id: str | None = None,
+        max_rows: int = 30,
+        approximate: bool = False,
+        profile: bool = False,
+        priority: str = "api",
+    ) -> dict:
+        started = time.perf_counter()
+        # Session stores and the snapshot file do blocking I/O (SQLite, disk); keep it off the loop.
+        sid, request, snapshot_id, key = await asyncio.to_thread(
+            self._prepare, question, session_id, max_rows, approximate
+        )
+        ticket = self._ticket(sid, priority)
+        profiler = self._start_profiler(profile)
+        try:
+            payload = None if profile else self._cached(key)
+            cached = payload is not None
+            if payload is None and profile:
+                payload = await self._aanswer(request, snapshot_id, key, profiler, ticket)
+            elif payload is None:
+                payload, shared = await self._async_in_flight.do(
+                    key, lambda: self._aanswer(request, snapshot_id, key, profiler, ticket)
+                )
+                if shared:
+                    self.metrics.incr("answer_coalesced_total")
+            payload = self._with_handle(payload, snapshot_id)
+            write_seconds = await asyncio.to_thread(self._remember, sid, question, payload)
+            payload = self._with_timings(payload, started, cached, write_seconds, "async")
+            return await asyncio.to_thread(self._finish_profile, payload, profiler)
+        finally:
+            if profiler is not None:
+                profiler.finish()
+
+    def ask_stream(
+        self,
+        question: str,
+        session_id: str | None = None,
+        max_rows: int = 30,
+        approximate: bool = False,
+        priority: str = "interactive",
+    ) -> Iterator[tuple[str, Any]]:
+        """Stream stage events, summary tokens and the final answer payload."""
+        started = time.perf_counter()
+        sid, request, snapshot_id, key = self._prepare(question, session_id, max_rows, approximate)
+        ticket = self._ticket(sid, priority)
+        # Consumers may resume the generator on any thread, so sync streams only get query profiles.
+        profiler = self._start_profiler(False)
+        try:
+            payload = self._cached(key)
+            cached = payload is not None
+            if payload is None:
+                self.metrics.incr("answer_computed_total")
+                engine = self._build_engine(snapshot_id, profiler=profiler, admission=ticket)
+                for event, data in engine.answer_stream(request):
+                    if event == "answer":
+                        payload = data.model_dump(mode="json")
+                        self.answer_cache.put(key, payload)
+                        break
+                    yield event, data
+            payload = self._with_handle(payload, snapshot_id)
+            write_seconds = self._remember(sid, question, payload)
+            payload = self._with_timings(payload, started, cached, write_seconds, "stream")
+            yield "answer", self._finish_profile(payload, profiler)
+        finally:
+            if profiler is not None:
+                profiler.finish()
+
+    async def aask_stream(
+        self,
+        question: str,
+        session_id: str | None = None,
+        max_rows: int = 30,
+        approximate: bool = False,
+        profile: bool = False,
+        priority: str = "interactive",
+    ) -> AsyncIterator[tuple[str, Any]]:
+        started = time.perf_counter()
+        # Session stores and the snapshot file do blocking I/O (SQLite, disk); keep it off the loop.
+        sid, request, snapshot_id, key = await asyncio.to_thread(
+            self._prepare, question, session_id, max_rows, approximate
+        )
+        ticket = self._ticket(sid, priority)
+        profiler = self._start_profiler(profile)
+        try:
+            payload = None if profile else self._cached(key)
+            cached = payload is not None
+            if payload is None:
+                self.metrics.incr("answer_computed_total")
+                engine = await self._abuild_engine(snapshot_id, profiler, ticket)
+                async for event, data in engine.aanswer_stream(request):
+                    if event == "answer":
+                        payload = data.model_dump(mode="json")
+                        self.answer_cache.put(key, payload)
+                        break
+                    yield event, data
+            payload = self._with_handle(payload, snapshot_id)
+            write_seconds = await asyncio.to_thread(self._remember, sid, question, payload)
+            payload = self._with_timings(payload, started, cached, write_seconds, "async_stream")
+            yield "answer", await asyncio.to_thread(self._finish_profile, payload, profiler)
+        finally:
+            if profiler is not None:
+                profiler.finish()
+
+    async def aask_batch(
+        self,
+        questions: list[str],
+        session_id: str | None = None,
+        max_rows: int = 30,
+        approximate: bool = False,
+        priority: str = "batch",
+        concurrency: int | None = None,
+    ) -> AsyncIterator[dict]:
+        """Answer many independent questions at once, yielding result lines in completion order.
+
+        Batch questions neither read nor extend the session history, so an answer does not depend on
+        which of its neighbours finished first. Their SQL shares one read-only connection pool.
+        """
+        if not self.cache.db_path.exists():
+            raise RuntimeError("No local DuckDB found. Run sync first.")
+        query_settings = self.app_config.query
+        ticket = self._ticket(session_id or "batch", priority)
+        snapshot_id = await asyncio.to_thread(self._current_snapshot_id)
+        pool = await asyncio.to_thread(
+            ReadOnlyConnectionPool, self.cache.db_path, query_settings.db_max_workers, query_settings.query_max_threads
+        )
+        # Runs on the batch's pool die with the batch, so they stay out of the service-wide map: a /chat
+        # request coalesced onto one would fail once this batch's client disconnects.
+        in_flight = AsyncSingleFlight()
+
+        async def answer(question: str) -> dict:
+            started = time.perf_counter()
+            key = answer_cache_key(question, max_rows, snapshot_id, [], approximate)
+            payload = self._cached(key)
+            cached = payload is not None
+            if payload is None:
+                request = QueryRequest(question=question, max_evidence_rows=max_rows, approximate=approximate)
+                payload, shared = await in_flight.do(
+                    key, lambda: self._aanswer(request, snapshot_id, key, None, ticket, pool)
+                )
+                if shared:
+                    self.metrics.incr("answer_coalesced_total")
+            payload = self._with_handle(payload, snapshot_id)
+            return self._with_timings(payload, started, cached, 0.0, "batch")
+
+        try:
+            async for line in run_batch(questions, answer, concurrency or query_settings.batch_concurrency):
+                yield line
+        finally:
+            # Waits for, or interrupts, queries still running on the pool's cursors.
+            await asyncio.to_thread(pool.close)
+
+    def _remember(self, sid: str, question: str, payload: dict) -> float:
+        """Record the answer for the session and `agent explain`; returns the seconds spent writing it."""
+        write_started = time.perf_counter()
         self.cache.write_last_answer(payload)
+        write_seconds = time.perf_counter() - write_started
+        self.metrics.observe("agent_stage_seconds", write_seconds, stage="write_last_answer")
+        summary = payload.get("summary") or ""
+        summary_line = summary.splitlines()[0] if summary else ""
+        last_result = (payload["sql"], list(payload.get("evidence_columns") or [])) if payload.get("sql") else None
+        self.sessions.record(sid, [f"User: {question}", f"Assistant: {summary_line}"], last_result)
+        return write_seconds
 
-        with self._lock:
-            self._sessions[sid].append(f"User: {question}")
-            summary_line = answer.summary.splitlines()[0] if answer.summary else ""
-            self._sessions[sid].append(f"Assistant: {summary_line}")
+    def _answer(
+        self,
+        request: QueryRequest,
+        snapshot_id: str | None,
+        key: tuple,
+        profiler: RequestProfiler | None = None,
+        ticket: AdmissionTicket | None = None,
+    ) -> dict:
+        self.metrics.incr("answer_computed_total")
+        engine = self._build_engine(snapshot_id, profiler=profiler, admission=ticket)
+        if profiler is None:
+            answer = engine.answer(request)
+        else:
+            answer = profiler.run_attached(engine.answer, request)
+        payload = answer.model_dump(mode="json")
+        self.answer_cache.put(key, payload)
+        return payload
 
+    async def _aanswer(
+        self,
+        request: QueryRequest,
+        snapshot_id: str | None,
+        key: tuple,
+        profiler: RequestProfiler | None = None,
+        ticket: AdmissionTicket | None = None,
+        connection_pool: ReadOnlyConnectionPool | None = None,
+    ) -> dict:
+        self.metrics.incr("answer_computed_total")
+        engine = await self._abuild_engine(snapshot_id, profiler, ticket, connection_pool)
+        # Blocking steps are sampled on their executor threads; the event loop itself is shared.
+        answer = await engine.aanswer(request)
+        payload = answer.model_dump(mode="json")
+        self.answer_cache.put(key, payload)
         return payload
 
+    def result_page(self, handle: str, cursor: str | None = None, page_size: int | None = None) -> ResultPage:
+        """Read one page of the full result behind an answer; never goes through the LLM."""
+        query_settings = self.app_config.query
+        size = max(1, min(page_size or query_settings.result_page_size, query_settings.result_page_max_rows))
+        offset = decode_cursor(cursor)
+        snapshot_id = self._current_snapshot_id()
+        entry = self.result_handles.resolve(handle, snapshot_id)
+        engine = self._build_engine(snapshot_id)
+        # One extra row tells us whether another page exists without a COUNT(*).
+        batch = engine.execute_page(entry.sql, offset, size + 1)
+        has_more = batch.num_rows > size
+        self.metrics.incr("result_pages_served_total")
+        return ResultPage(
+            handle=handle,
+            evidence=batch.head(size),
+            offset=offset,
+            next_cursor=encode_cursor(offset + size) if has_more else None,
+        )
+
+    async def aresult_page(self, handle: str, cursor: str | None = None, page_size: int | None = None) -> ResultPage:
+        executor = get_db_executor(self.app_config.query.db_max_workers)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.result_page, handle, cursor, page_size)
+
     def clear_session(self, session_id: str) -> None:
-        with self._lock:
-            self._sessions.pop(session_id, None)
+        self.sessions.clear(session_id)
+
+    def metrics_text(self) -> str:
+        """Prometheus exposition of the live registry plus the last sync's per-step seconds."""
+        return self.metrics.render_prometheus(self.metrics_gauges())
+
+    def metrics_gauges(self) -> dict:
+        """This app's gauges: the last sync's per-step seconds and its live queue and session counts."""
+        app = self.app_config.app_name
+        gauges: dict = {}
+        snap = self.cache.read_snapshot()
+        if snap is not None:
+            for step, name, label in (
+                ("load", "last_sync_table_load_seconds", "table"),
+                ("profile", "sync_table_profile_seconds", "table"),
+                ("fetch", "sync_report_fetch_seconds", "report"),
+                ("stages", "sync_stage_seconds", "stage"),
+            ):
+                for target, seconds in snap.timings.get(step, {}).items():
+                    gauges[gauge_key(name, app=snap.app_name, **{label: target})] = seconds
+            gauges[gauge_key("sync_last_success_timestamp_seconds", app=snap.app_name)] = snap.synced_at.timestamp()
+        gauges[gauge_key("sessions_active", app=app)] = self.sessions.stats()["sessions"]
+        gauges[gauge_key("app_memory_bytes", app=app)] = self.memory_bytes()
+        if self.llm_admission is not None:
+            admission = self.llm_admission.stats()
+            gauges[gauge_key("llm_in_flight", app=app)] = admission["in_flight"]
+            for priority, depth in admission["queued"].items():
+                gauges[gauge_key("llm_queue_depth", app=app, priority=priority)] = depth
+        return gauges
+
+    def memory_bytes(self) -> int:
+        """Estimated bytes held by this app's caches and indexes; what the multi-app memory budget counts."""
+        value_index = self._schema_summary[4] if self._schema_summary is not None else None
+        return (
+            self.result_cache.stats()["bytes"]
+            # Answers carry at most max_rows evidence rows; a flat per-entry guess is close enough here.
+            + len(self.answer_cache) * 16 * 1024
+            + self._schema_summary_bytes
+            + (value_index.approx_bytes if value_index is not None else 0)
+        )
+
+    def close(self, keep_sessions: bool = False) -> None:
+        """Release what this service holds; called when a multi-app server evicts it.
+
+        With `keep_sessions`, the session store stays open for the app's next instance.
+        """
+        if self.filter_usage is not None:
+            self.filter_usage.flush()
+        if not keep_sessions:
+            self.sessions.close()
+        self.result_cache.clear()
+        self.answer_cache.clear()
+        self._schema_summary = None
 
     def status(self) -> dict:
         snap = self.cache.read_snapshot()
@@ -74,4 +614,17 @@ class AgentService:
             "source": snap.source,
             "tables": sorted(snap.row_counts.keys()),
             "row_counts": snap.row_counts,
+            "snapshot_id": snap.snapshot_id,
+            "result_cache": self.result_cache.stats(),
+            "result_handles": self.result_handles.stats(),
+            "rollups": [r["name"] for r in self.cache.read_rollups()],
+            "samples": self.cache.read_samples(),
+            "indexes": index_status(
+                self.cache.read_indexes(),
+                self.filter_usage.snapshot() if self.filter_usage else {},
+            ),
+            "model_catalog": self.model_catalog.stats(),
+            "llm_admission": self.llm_admission.stats() if self.llm_admission is not None else None,
+            "sessions": self.sessions.stats(),
+            "metrics": self.metrics.snapshot(),
         }
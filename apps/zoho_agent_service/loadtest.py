@@ -0,0 +1,397 @@
+"""HTTP load driver for the API: concurrency sweeps over `/chat`, `/status` and `/session/clear` with a stub LLM.
+
+Run `python -m apps.zoho_agent_service.loadtest --help` from the repository root.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterator
+
+import httpx
+import typer
+from fastapi import FastAPI
+from rich.console import Console
+from rich.table import Table
+
+from agent.bench import QUESTIONS, StubLLM, latency_summary, prepare_workspace, sync_workspace
+from apps.zoho_agent_service.api.main import create_app
+from apps.zoho_agent_service.api.service import AgentService
+
+REPORT_VERSION = 1
+MIXES = ("repeat", "unique")
+ENDPOINTS = ("chat", "status", "clear")
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def create_stub_app() -> FastAPI:
+    """uvicorn `--factory` target: the API over `APP_CONFIG_PATH` with a stub LLM."""
+    latency_ms = float(os.getenv("LOADTEST_LLM_LATENCY_MS", "0"))
+    service = AgentService(
+        config_path=Path(os.getenv("APP_CONFIG_PATH", "config/app.yaml")), llm=StubLLM(latency_ms / 1000)
+    )
+    return create_app(service)
+
+
+def _rss_bytes(pid: int) -> int | None:
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    if pid == os.getpid():
+        # No /proc (macOS): the process-lifetime peak is the best available figure; ru_maxrss is bytes there.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return None
+
+
+class RSSSampler:
+    """Peak resident set size of `pid` while the block runs, sampled every `interval_seconds`."""
+
+    def __init__(self, pid: int | None, interval_seconds: float = 0.05) -> None:
+        self.pid = pid
+        self.interval_seconds = interval_seconds
+        self.peak_bytes: int | None = None
+        self._stop = threading.Event()
+
+    def _sample(self) -> None:
+        rss = _rss_bytes(self.pid) if self.pid is not None else None
+        if rss is not None:
+            self.peak_bytes = max(self.peak_bytes or 0, rss)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            self._sample()
+
+    @contextlib.contextmanager
+    def running(self) -> Iterator[RSSSampler]:
+        self._sample()
+        thread = threading.Thread(target=self._loop, name="rss-sampler", daemon=True)
+        thread.start()
+        try:
+            yield self
+        finally:
+            self._stop.set()
+            thread.join()
+            self._sample()
+
+    @property
+    def peak_mb(self) -> float | None:
+        return round(self.peak_bytes / 1024 / 1024, 1) if self.peak_bytes else None
+
+
+def plan_requests(
+    count: int, mix: str, weights: tuple[float, float, float], seed: int, level: int
+) -> list[tuple[str, dict[str, Any] | None]]:
+    """(endpoint, JSON body) per request.
+
+    `repeat` cycles the benchmark questions, each on a fresh session, so the answer cache can serve them.
+    `unique` makes every question text distinct, so every `/chat` runs the full pipeline.
+    `/session/clear` clears the session of an earlier request.
+    """
+    rng = random.Random(f"{seed}-{mix}-{level}")
+    plan: list[tuple[str, dict[str, Any] | None]] = []
+    for i in range(count):
+        endpoint = rng.choices(ENDPOINTS, weights=weights)[0]
+        if endpoint == "chat":
+            question = QUESTIONS[i % len(QUESTIONS)].question
+            if mix == "unique":
+                question = f"{question} (load {level}-{i})"
+            plan.append((endpoint, {"question": question, "session_id": f"load-{mix}-{level}-{i}"}))
+        elif endpoint == "clear":
+            plan.append((endpoint, {"session_id": f"load-{mix}-{level}-{rng.randrange(max(1, i))}"}))
+        else:
+            plan.append((endpoint, None))
+    return plan
+
+
+async def _send(client: httpx.AsyncClient, endpoint: str, body: dict[str, Any] | None) -> httpx.Response:
+    if endpoint == "chat":
+        return await client.post("/chat", json=body)
+    if endpoint == "clear":
+        return await client.post("/session/clear", json=body)
+    return await client.get("/status")
+
+
+async def run_level(
+    client: httpx.AsyncClient, concurrency: int, plan: list[tuple[str, dict[str, Any] | None]]
+) -> dict[str, Any]:
+    """Send `plan` with `concurrency` requests in flight (closed loop); latency and errors per endpoint."""
+    latencies: dict[str, list[float]] = {endpoint: [] for endpoint in ENDPOINTS}
+    outcomes: dict[str, Counter[str]] = {endpoint: Counter() for endpoint in ENDPOINTS}
+    pending = iter(plan)
+
+    async def worker() -> None:
+        for endpoint, body in pending:
+            began = time.perf_counter()
+            try:
+                response = await _send(client, endpoint, body)
+                outcome = str(response.status_code)
+            except httpx.HTTPError as exc:
+                outcome = type(exc).__name__
+            latencies[endpoint].append(time.perf_counter() - began)
+            outcomes[endpoint][outcome] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    all_outcomes = sum(outcomes.values(), Counter())
+    errors = sum(count for outcome, count in all_outcomes.items() if not outcome.startswith("2"))
+    return {
+        "concurrency": concurrency,
+        "requests": len(plan),
+        "seconds": round(wall, 3),
+        **latency_summary([s for samples in latencies.values() for s in samples], wall),
+        "errors": errors,
+        "error_rate": round(errors / len(plan), 4) if plan else 0.0,
+        "outcomes": dict(all_outcomes),
+        "endpoints": {
+            endpoint: {**latency_summary(samples), "outcomes": dict(outcomes[endpoint])}
+            for endpoint, samples in latencies.items()
+            if samples
+        },
+    }
+
+
+def find_saturation(levels: list[dict[str, Any]], tolerance: float = 0.05) -> dict[str, dict[str, Any]]:
+    """Per mix, the lowest concurrency whose throughput is within `tolerance` of the best level's.
+
+    Beyond that point more concurrency only adds queueing latency.
+    """
+    saturation: dict[str, dict[str, Any]] = {}
+    for mix in dict.fromkeys(level["mix"] for level in levels):
+        rows = sorted((level for level in levels if level["mix"] == mix), key=lambda level: level["concurrency"])
+        best = max(level.get("throughput_per_s", 0.0) for level in rows)
+        knee = next(level for level in rows if level.get("throughput_per_s", 0.0) >= best * (1 - tolerance))
+        saturation[mix] = {
+            "concurrency": knee["concurrency"],
+            "throughput_per_s": knee.get("throughput_per_s"),
+            "p95_ms": knee.get("p95_ms"),
+            "best_throughput_per_s": best,
+        }
+    return saturation
+
+
+async def sweep(
+    client: httpx.AsyncClient,
+    levels: list[int],
+    mixes: list[str],
+    requests_per_level: int,
+    weights: tuple[float, float, float],
+    seed: int,
+    rss_pid: int | None,
+) -> list[dict[str, Any]]:
+    results: list[dict[str, Any]] = []
+    for mix in mixes:
+        for concurrency in levels:
+            plan = plan_requests(requests_per_level, mix, weights, seed, concurrency)
+            sampler = RSSSampler(rss_pid)
+            with sampler.running():
+                level = await run_level(client, concurrency, plan)
+            results.append({"mix": mix, **level, "peak_rss_mb": sampler.peak_mb})
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def localhost_server(
+    config_path: Path, llm_latency_ms: float, timeout_seconds: float = 60.0
+) -> Iterator[tuple[str, int]]:
+    """One uvicorn worker in a child process; yields its base URL and pid."""
+    port = _free_port()
+    env = {
+        **os.environ,
+        "APP_CONFIG_PATH": str(config_path),
+        "LOADTEST_LLM_LATENCY_MS": str(llm_latency_ms),
+        "PYTHONPATH": os.pathsep.join([str(REPO_ROOT), str(REPO_ROOT / "src"), os.getenv("PYTHONPATH", "")]),
+    }
+    command = [sys.executable, "-m", "uvicorn", "--factory", "apps.zoho_agent_service.loadtest:create_stub_app"]
+    command += ["--host", "127.0.0.1", "--port", str(port), "--workers", "1", "--log-level", "warning"]
+    process = subprocess.Popen(command, cwd=config_path.parent, env=env)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + timeout_seconds
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"API server exited with status {process.returncode}")
+            try:
+                if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError("API server did not become healthy")
+            time.sleep(0.1)
+        yield base_url, process.pid
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+@contextlib.asynccontextmanager
+async def _client(
+    transport: str, config_path: Path | None, url: str | None, llm_latency_ms: float, max_connections: int
+) -> AsyncIterator[tuple[httpx.AsyncClient, int | None]]:
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=120, limits=limits) as client:
+            yield client, None
+    elif transport == "inprocess":
+        app = create_app(AgentService(config_path=config_path, llm=StubLLM(llm_latency_ms / 1000)))
+        asgi = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=asgi, base_url="http://loadtest", timeout=120) as client:
+            yield client, os.getpid()
+    else:
+        with localhost_server(config_path, llm_latency_ms) as (base_url, pid):
+            async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+                yield client, pid
+
+
+def run_loadtest(
+    work_dir: Path,
+    transport: str = "inprocess",
+    url: str | None = None,
+    server_pid: int | None = None,
+    rows: int = 10_000,
+    wide_columns: int = 10,
+    levels: list[int] | None = None,
+    mixes: list[str] | None = None,
+    requests_per_level: int = 200,
+    llm_latency_ms: float = 200.0,
+    weights: tuple[float, float, float] = (0.8, 0.1, 0.1),
+    seed: int = 42,
+) -> dict[str, Any]:
+    """Sweep concurrency levels and question mixes against the API; returns a JSON-able report.
+
+    Without `url`, the bench's synthetic data is generated and synced under `work_dir` first, and the API runs
+    in this process (`inprocess`) or as one uvicorn worker on localhost (`localhost`).
+    """
+    levels = levels or [1, 2, 4, 8, 16, 32]
+    mixes = mixes or list(MIXES)
+    unknown = set(mixes) - set(MIXES)
+    if unknown:
+        raise ValueError(f"Unknown question mix: {', '.join(sorted(unknown))}")
+
+    config_path: Path | None = None
+    if url is None:
+        workspace = prepare_workspace(work_dir, rows, wide_columns, seed)
+        sync_workspace(workspace)
+        config_path = workspace.root / "app.yaml"
+
+    async def drive() -> list[dict[str, Any]]:
+        async with _client(transport, config_path, url, llm_latency_ms, max(levels)) as (client, pid):
+            return await sweep(client, levels, mixes, requests_per_level, weights, seed, server_pid or pid)
+
+    # The service resolves its cache relative to the working directory.
+    with contextlib.chdir(config_path.parent if config_path else Path.cwd()):
+        results = asyncio.run(drive())
+
+    return {
+        "version": REPORT_VERSION,
+        "generated_at": datetime.now(UTC).isoformat(),
+        "config": {
+            "transport": "url" if url else transport,
+            "rows": None if url else rows,
+            "levels": levels,
+            "mixes": mixes,
+            "requests_per_level": requests_per_level,
+            "llm_latency_ms": None if url else llm_latency_ms,
+            "weights": dict(zip(ENDPOINTS, weights)),
+            "seed": seed,
+        },
+        "levels": results,
+        "saturation": find_saturation(results),
+    }
+
+
+cli = typer.Typer(help="Load-test the Zoho agent API")
+console = Console()
+
+
+@cli.command()
+def main(
+    transport: str = typer.Option("inprocess", help="inprocess (ASGI, no sockets) or localhost (one uvicorn worker)"),
+    url: str | None = typer.Option(None, help="Drive an already running API instead; its data must be synced"),
+    server_pid: int | None = typer.Option(None, help="With --url, sample this process's RSS"),
+    rows: int = typer.Option(10_000, min=1_000, max=10_000_000, help="Rows in the synthetic appointments report"),
+    wide_columns: int = typer.Option(10, min=0, help="Extra custom fields on the appointments report"),
+    levels: str = typer.Option("1,2,4,8,16,32", help="Comma-separated concurrency levels"),
+    mixes: str = typer.Option("repeat,unique", help="Question mixes: repeat (cache-friendly), unique"),
+    requests: int = typer.Option(200, min=1, help="Requests per level"),
+    llm_latency_ms: float = typer.Option(200.0, min=0.0, help="Latency of each stub LLM call"),
+    chat_weight: float = typer.Option(0.8, min=0.0, help="Share of /chat requests"),
+    status_weight: float = typer.Option(0.1, min=0.0, help="Share of /status requests"),
+    clear_weight: float = typer.Option(0.1, min=0.0, help="Share of /session/clear requests"),
+    seed: int = typer.Option(42, help="Seed for the data and the request mix"),
+    workdir: Path | None = typer.Option(None, help="Keep the generated data here"),
+    output: Path | None = typer.Option(None, help="Write the JSON report here"),
+) -> None:
+    """Sweep concurrency levels and question mixes; report throughput, latency, errors and peak RSS per level."""
+    if transport not in {"inprocess", "localhost"}:
+        raise typer.BadParameter("--transport must be inprocess or localhost")
+    with tempfile.TemporaryDirectory(prefix="agent-loadtest-") as tmp:
+        report = run_loadtest(
+            (workdir or Path(tmp)).resolve(),
+            transport=transport,
+            url=url,
+            server_pid=server_pid,
+            rows=rows,
+            wide_columns=wide_columns,
+            levels=[int(level) for level in levels.split(",") if level.strip()],
+            mixes=[mix.strip() for mix in mixes.split(",") if mix.strip()],
+            requests_per_level=requests,
+            llm_latency_ms=llm_latency_ms,
+            weights=(chat_weight, status_weight, clear_weight),
+            seed=seed,
+        )
+    if output:
+        output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    table = Table(title="Load test")
+    for column in ["Mix", "Concurrency", "Req/s", "p50 ms", "p95 ms", "p99 ms", "Error rate", "Peak RSS MB"]:
+        table.add_column(column)
+    for level in report["levels"]:
+        table.add_row(
+            level["mix"],
+            str(level["concurrency"]),
+            f"{level.get('throughput_per_s', 0):g}",
+            f"{level.get('p50_ms', 0):g}",
+            f"{level.get('p95_ms', 0):g}",
+            f"{level.get('p99_ms', 0):g}",
+            f"{level['error_rate']:.2%}",
+            "-" if level["peak_rss_mb"] is None else f"{level['peak_rss_mb']:g}",
+        )
+    console.print(table)
+    for mix, knee in report["saturation"].items():
+        console.print(
+            f"[green]{mix}:[/green] saturates at concurrency {knee['concurrency']} "
+            f"({knee['throughput_per_s']:g} req/s, p95 {knee['p95_ms']:g} ms)"
+        )
+
+
+if __name__ == "__main__":
+    cli()
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import json
 import os
+from typing import Any, Iterator
 
 import requests
 import streamlit as st
@@ -13,6 +15,23 @@ st.set_page_config(page_title="Zoho Agent Chat", page_icon="🤖", layout="cente
 st.title("Zoho Creator Agent")
 st.caption("Ask questions in natural language")
 
+
+def _iter_sse(response: requests.Response) -> Iterator[tuple[str, Any]]:
+    event = "message"
+    data_lines: list[str] = []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if not line:
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+
+
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
@@ -27,22 +46,39 @@ if question:
         st.markdown(question)
 
     with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            try:
-                response = requests.post(
-                    f"{API_BASE_URL}/chat",
-                    json={
-                        "question": question,
-                        "session_id": DEFAULT_SESSION_ID,
-                        "max_rows": 20,
-                    },
-                    timeout=120,
-                )
+        stage = st.empty()
+        body = st.empty()
+        answer = "No answer generated."
+        stage.caption("Thinking...")
+        try:
+            with requests.post(
+                f"{API_BASE_URL}/chat/stream",
+                json={
+                    "question": question,
+                    "session_id": DEFAULT_SESSION_ID,
+                    "max_rows": 20,
+                },
+                headers={"X-Agent-Priority": "interactive"},
+                stream=True,
+                timeout=120,
+            ) as response:
                 response.raise_for_status()
-                data = response.json()
-                answer = data.get("summary", "No answer generated.")
-            except Exception as exc:  # pragma: no cover
-                answer = f"Error: {exc}"
+                streamed = ""
+                for event, data in _iter_sse(response):
+                    if event == "sql_generated":
+                        stage.caption("Looking up your data...")
+                    elif event == "rows_ready":
+                        stage.caption("Writing the answer...")
+                    elif event == "token":
+                        streamed += data.get("text", "")
+                        body.markdown(streamed)
+                    elif event == "answer":
+                        answer = data.get("summary", answer)
+                    elif event == "error":
+                        answer = f"Error: {data.get('detail', 'unknown error')}"
+        except Exception as exc:  # pragma: no cover
+            answer = f"Error: {exc}"
 
-        st.markdown(answer)
+        stage.empty()
+        body.markdown(answer)
         st.session_state.messages.append({"role": "assistant", "content": answer})
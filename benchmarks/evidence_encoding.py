@@ -0,0 +1,93 @@
+"""Compare row-dict evidence with the columnar batch + header/rows prompt encoding.
+
+Run from the repo root:
+
+    python benchmarks/evidence_encoding.py --rows 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from datetime import date
+from typing import Any, Callable
+
+import duckdb
+
+from agent.evidence import encode_evidence, evidence_from_cursor
+
+
+def _tokens(text: str) -> int:
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # Rough OpenAI-style estimate when tiktoken or its vocabulary download is unavailable.
+        return len(text) // 4
+    return len(encoding.encode(text))
+
+
+def _best_of(fn: Callable[[], Any], repeat: int) -> tuple[float, Any]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def _build_db(rows: int) -> duckdb.DuckDBPyConnection:
+    conn = duckdb.connect()
+    conn.execute(
+        f"""
+        CREATE TABLE appointments_report AS
+        SELECT
+            'APT-' || lpad(CAST(range AS VARCHAR), 6, '0') AS appointment_id,
+            'Patient ' || CAST(range % 97 AS VARCHAR) AS patient_name,
+            'Dr. ' || ['Sarah Lee', 'Omar Khan', 'Li Wei', 'Ana Costa'][range % 4 + 1] AS doctor_name,
+            ['Cardiology', 'Neurology', 'Orthopedics'][range % 3 + 1] AS department,
+            DATE '{date(2026, 1, 1)}' + CAST(range % 180 AS INTEGER) AS appointment_date,
+            ['Scheduled', 'Completed', 'Cancelled'][range % 3 + 1] AS status,
+            CAST(100 + (range * 37) % 900 AS DECIMAL(10, 2)) AS fee
+        FROM range({rows})
+        """
+    )
+    return conn
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    conn = _build_db(args.rows)
+    sql = f"SELECT * FROM appointments_report LIMIT {args.rows}"
+
+    def legacy() -> str:
+        cursor = conn.execute(sql)
+        cols = [d[0] for d in cursor.description]
+        rows = [dict(zip(cols, row)) for row in cursor.fetchall()]
+        return json.dumps(rows, default=str)
+
+    def columnar() -> str:
+        return encode_evidence(evidence_from_cursor(conn.execute(sql)), args.rows)
+
+    legacy_s, legacy_text = _best_of(legacy, args.repeat)
+    columnar_s, columnar_text = _best_of(columnar, args.repeat)
+
+    report = {
+        "rows": args.rows,
+        "legacy": {"bytes": len(legacy_text.encode()), "tokens": _tokens(legacy_text), "ms": legacy_s * 1000},
+        "columnar": {"bytes": len(columnar_text.encode()), "tokens": _tokens(columnar_text), "ms": columnar_s * 1000},
+    }
+    for key in ("bytes", "tokens", "ms"):
+        before, after = report["legacy"][key], report["columnar"][key]
+        report.setdefault("saved_pct", {})[key] = round(100 * (before - after) / before, 1) if before else 0.0
+    print(json.dumps(report, indent=2, default=lambda v: round(v, 3)))
+
+
+if __name__ == "__main__":
+    main()
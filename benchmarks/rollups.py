@@ -0,0 +1,98 @@
+"""Time aggregate questions on a synthetic appointments table with and without rollups.
+
+Run from the repo root (builds a temporary DuckDB file):
+
+    python benchmarks/rollups.py --rows 10000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+
+from agent.rollups import RollupRewriter, materialize_rollups
+from agent.settings import RollupSpec
+
+QUERIES = {
+    "count_by_status": "SELECT status, COUNT(*) AS appointments FROM appointments_report GROUP BY status ORDER BY status",
+    "revenue_by_department": (
+        "SELECT department, SUM(fee) AS revenue, AVG(fee) AS avg_fee FROM appointments_report "
+        "GROUP BY department ORDER BY revenue DESC"
+    ),
+    "filtered_count": (
+        "SELECT department, COUNT(*) AS cancelled FROM appointments_report "
+        "WHERE status = 'Cancelled' GROUP BY department ORDER BY cancelled DESC"
+    ),
+    "total": "SELECT COUNT(*) AS appointments, MAX(fee) AS top_fee FROM appointments_report",
+}
+
+
+def _build(db_path: Path, rows: int) -> None:
+    conn = duckdb.connect(str(db_path))
+    conn.execute(
+        f"""
+        CREATE TABLE appointments_report AS
+        SELECT
+            range AS appointment_id,
+            ['Scheduled', 'Completed', 'Cancelled', 'No Show'][range % 4 + 1] AS status,
+            ['Cardiology', 'Neurology', 'Orthopedics', 'Pediatrics', 'Oncology', 'ENT'][(range * 7) % 6 + 1]
+                AS department,
+            'Dr. ' || CAST(range % 250 AS VARCHAR) AS doctor_name,
+            CAST(50 + (range * 37) % 950 AS DECIMAL(10, 2)) AS fee
+        FROM range({rows})
+        """
+    )
+    conn.close()
+
+
+def _best_of(conn: duckdb.DuckDBPyConnection, sql: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(sql).fetchall()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.duckdb"
+        _build(db_path, args.rows)
+        started = time.perf_counter()
+        rollups = materialize_rollups(
+            db_path,
+            [
+                RollupSpec(table="appointments_report", dimensions=["status"], measures=["fee"]),
+                RollupSpec(table="appointments_report", dimensions=["department", "status"], measures=["fee"]),
+            ],
+        )
+        build_s = time.perf_counter() - started
+        rewriter = RollupRewriter(rollups)
+
+        conn = duckdb.connect(str(db_path), read_only=True)
+        report: dict = {"rows": args.rows, "rollup_build_s": round(build_s, 3), "queries": {}}
+        for name, sql in QUERIES.items():
+            rewritten = rewriter.rewrite(sql)
+            base_ms = _best_of(conn, sql, args.repeat) * 1000
+            rollup_ms = _best_of(conn, rewritten, args.repeat) * 1000 if rewritten else None
+            report["queries"][name] = {
+                "base_ms": round(base_ms, 2),
+                "rollup_ms": round(rollup_ms, 2) if rollup_ms is not None else None,
+                "speedup": round(base_ms / rollup_ms, 1) if rollup_ms else None,
+            }
+        conn.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
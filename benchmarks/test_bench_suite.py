@@ -0,0 +1,57 @@
+"""pytest-benchmark suite over synthetic Zoho data with a stub LLM.
+
+Not part of the default test run. From the repo root:
+
+    pip install -e '.[dev]'
+    pytest benchmarks --benchmark-only --benchmark-json bench.json
+    BENCH_ROWS=1000000 pytest benchmarks --benchmark-only --benchmark-compare
+
+BENCH_ROWS, BENCH_WIDE_COLUMNS and BENCH_LLM_LATENCY_MS scale the workload.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from agent.bench import (  # noqa: E402
+    QUESTIONS,
+    BenchAsker,
+    StubLLM,
+    prepare_workspace,
+    profile_workspace,
+    sync_workspace,
+)
+
+ROWS = int(os.getenv("BENCH_ROWS", "100000"))
+WIDE_COLUMNS = int(os.getenv("BENCH_WIDE_COLUMNS", "10"))
+LLM_LATENCY_MS = float(os.getenv("BENCH_LLM_LATENCY_MS", "0"))
+
+
+@pytest.fixture(scope="module")
+def workspace(tmp_path_factory: pytest.TempPathFactory):
+    ws = prepare_workspace(tmp_path_factory.mktemp("bench"), ROWS, WIDE_COLUMNS)
+    sync_workspace(ws)
+    return ws
+
+
+def test_sync(benchmark, workspace) -> None:
+    snapshot = benchmark.pedantic(sync_workspace, args=(workspace,), rounds=3, iterations=1)
+    assert snapshot.row_counts["appointments_report"] == ROWS
+
+
+def test_profile(benchmark, workspace) -> None:
+    summaries = benchmark.pedantic(profile_workspace, args=(workspace,), rounds=3, iterations=1)
+    assert {s.table_name for s in summaries} == {"appointments_report", "patients_report", "doctors_report"}
+
+
+@pytest.mark.parametrize("question", QUESTIONS, ids=[q.name for q in QUESTIONS])
+def test_ask(benchmark, workspace, question) -> None:
+    asker = BenchAsker(workspace, StubLLM(LLM_LATENCY_MS / 1000))
+    asker.ask(question.question)
+    answer = benchmark(asker.ask, question.question)
+    assert answer.evidence_columns
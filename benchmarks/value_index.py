@@ -0,0 +1,68 @@
+"""Time question-time value lookups against an index of 1M distinct values.
+
+Run from the repo root:
+
+    python benchmarks/value_index.py --values 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from agent.value_index import ValueIndex, normalize_value
+
+QUESTIONS = [
+    "How many appointments were cancelled in cardiology last month?",
+    "Total fees paid by UPI for patients with blood group O+",
+    "Show visits to the neurolgy department by Dr. Patient 482113",
+    "Which doctors in orthopedics have the most no show appointments?",
+]
+LOW_CARDINALITY = {
+    "department": ["Cardiology", "Neurology", "Orthopedics", "Pediatrics", "Oncology", "ENT"],
+    "status": ["Scheduled", "Completed", "Cancelled", "No Show"],
+    "payment_mode": ["UPI", "Cash", "Card", "Insurance"],
+    "blood_group": ["O+", "O-", "A+", "A-", "B+", "B-", "AB+", "AB-"],
+}
+
+
+def _rows(values: int) -> list[tuple[str, str, str, str, bool]]:
+    rows = [
+        (normalize_value(v), v, "appointments_report", column, True)
+        for column, options in LOW_CARDINALITY.items()
+        for v in options
+    ]
+    rows.extend(
+        (normalize_value(f"Patient {i}"), f"Patient {i}", "patients_report", "patient_name", False)
+        for i in range(values)
+    )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--values", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    rows = _rows(args.values)
+    started = time.perf_counter()
+    index = ValueIndex(rows)
+    load_s = time.perf_counter() - started
+
+    report: dict = {"values": len(index), "load_s": round(load_s, 2), "questions": {}}
+    for question in QUESTIONS:
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            matches = index.lookup(question)
+        per_lookup_us = (time.perf_counter() - started) / args.repeat * 1e6
+        report["questions"][question] = {
+            "lookup_us": round(per_lookup_us, 1),
+            "matches": [f"{m.table}.{m.column}={m.value}" for m in matches],
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Iterator
+
+from agent.metrics import METRICS
+
+# Highest first. Interactive sessions (the chat UI) are admitted ahead of API and batch clients.
+PRIORITIES = ("interactive", "api", "batch")
+PRIORITY_HEADER = "X-Agent-Priority"
+
+
+def normalize_priority(value: str | None, default: str = "api") -> str:
+    priority = (value or default).strip().lower()
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority '{value}'; expected one of {', '.join(PRIORITIES)}")
+    return priority
+
+
+class AdmissionRejected(RuntimeError):
+    """The LLM queue shed this call; clients should retry after `retry_after_seconds`."""
+
+    status_code = 429
+    code = "llm_overloaded"
+
+    def __init__(self, message: str, reason: str, retry_after_seconds: int) -> None:
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after_seconds = retry_after_seconds
+
+    def to_detail(self) -> dict[str, Any]:
+        return {
+            "code": self.code,
+            "message": str(self),
+            "reason": self.reason,
+            "retry_after_seconds": self.retry_after_seconds,
+        }
+
+
+class _Waiter:
+    __slots__ = ("priority", "session_id", "granted", "rejected", "_event", "_future", "_loop")
+
+    def __init__(self, priority: str, session_id: str, loop: asyncio.AbstractEventLoop | None = None) -> None:
+        self.priority = priority
+        self.session_id = session_id
+        self.granted = False
+        self.rejected: str | None = None
+        self._loop = loop
+        self._future: asyncio.Future[None] | None = loop.create_future() if loop is not None else None
+        self._event = threading.Event() if loop is None else None
+
+    def wake(self) -> None:
+        if self._event is not None:
+            self._event.set()
+            return
+        future = self._future
+
+        def resolve() -> None:
+            if not future.done():
+                future.set_result(None)
+
+        self._loop.call_soon_threadsafe(resolve)
+
+
+class LLMAdmission:
+    """Bounded LLM concurrency with a priority queue that is fair across sessions.
+
+    At most `max_concurrent` calls hold a slot. Waiting calls are served strictly by priority,
+    and round-robin across `session_id`s within a priority, so one chatty session cannot starve the rest.
+    When `max_queue_depth` calls are already waiting, a new call evicts the newest waiter of a lower
+    priority or, failing that, is rejected at once; calls also give up after `max_wait_seconds`.
+    Works from threads and from the event loop alike.
+    """
+
+    def __init__(self, max_concurrent: int = 8, max_queue_depth: int = 64, max_wait_seconds: float = 30.0) -> None:
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue_depth = max(0, max_queue_depth)
+        self.max_wait_seconds = max_wait_seconds
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._waiting = 0
+        self._queues: dict[str, OrderedDict[str, deque[_Waiter]]] = {p: OrderedDict() for p in PRIORITIES}
+        # Smoothed seconds a call holds its slot, for Retry-After.
+        self._hold_seconds = 1.0
+
+    def ticket(self, session_id: str, priority: str = "api") -> AdmissionTicket:
+        return AdmissionTicket(self, session_id, normalize_priority(priority))
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self._hold_seconds * (self._waiting + 1) / self.max_concurrent))
+
+    def _dequeue(self, waiter: _Waiter) -> None:
+        sessions = self._queues[waiter.priority]
+        queue = sessions.get(waiter.session_id)
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        if not queue:
+            del sessions[waiter.session_id]
+        self._waiting -= 1
+
+    def _eviction_victim(self, priority: str) -> _Waiter | None:
+        for lower in reversed(PRIORITIES[PRIORITIES.index(priority) + 1 :]):
+            sessions = self._queues[lower]
+            if sessions:
+                return next(reversed(sessions.values()))[-1]
+        return None
+
+    def _enter(self, waiter: _Waiter) -> tuple[bool, _Waiter | None, int | None]:
+        """Under the lock: (admitted now, evicted waiter, retry-after if rejected)."""
+        if self._in_flight < self.max_concurrent and self._waiting == 0:
+            self._in_flight += 1
+            waiter.granted = True
+            return True, None, None
+        victim = None
+        if self._waiting >= self.max_queue_depth:
+            victim = self._eviction_victim(waiter.priority)
+            if victim is None:
+                return False, None, self._retry_after()
+            self._dequeue(victim)
+            victim.rejected = "evicted"
+        self._queues[waiter.priority].setdefault(waiter.session_id, deque()).append(waiter)
+        self._waiting += 1
+        return False, victim, None
+
+    def _grant_next(self) -> list[_Waiter]:
+        granted: list[_Waiter] = []
+        while self._waiting and self._in_flight < self.max_concurrent:
+            sessions = next(self._queues[p] for p in PRIORITIES if self._queues[p])
+            session_id, queue = next(iter(sessions.items()))
+            waiter = queue.popleft()
+            if queue:
+                sessions.move_to_end(session_id)
+            else:
+                del sessions[session_id]
+            self._waiting -= 1
+            self._in_flight += 1
+            waiter.granted = True
+            granted.append(waiter)
+        return granted
+
+    def _give_up(self, waiter: _Waiter, reason: str) -> bool:
+        """After a timeout or cancellation: True when the slot was granted in the meantime."""
+        with self._lock:
+            if waiter.granted:
+                return True
+            if waiter.rejected is None:
+                self._dequeue(waiter)
+                waiter.rejected = reason
+            return False
+
+    def _reject(self, waiter: _Waiter, retry_after: int | None = None) -> AdmissionRejected:
+        reason = waiter.rejected or "queue_full"
+        METRICS.incr("llm_admission_rejected_total", priority=waiter.priority, reason=reason)
+        with self._lock:
+            retry = retry_after if retry_after is not None else self._retry_after()
+        return AdmissionRejected(f"LLM capacity exhausted ({reason}); retry in {retry}s.", reason, retry)
+
+    def _admitted(self, waiter: _Waiter, started: float) -> None:
+        METRICS.observe("llm_queue_wait_seconds", time.perf_counter() - started, priority=waiter.priority)
+
+    def acquire(self, session_id: str, priority: str) -> None:
+        started = time.perf_counter()
+        waiter = _Waiter(priority, session_id)
+        with self._lock:
+            admitted, victim, retry_after = self._enter(waiter)
+        if victim is not None:
+            victim.wake()
+        if retry_after is not None:
+            waiter.rejected = "queue_full"
+            raise self._reject(waiter, retry_after)
+        if not admitted and not waiter._event.wait(self.max_wait_seconds):
+            self._give_up(waiter, "timeout")
+        if not waiter.granted:
+            raise self._reject(waiter)
+        self._admitted(waiter, started)
+
+    async def aacquire(self, session_id: str, priority: str) -> None:
+        started = time.perf_counter()
+        waiter = _Waiter(priority, session_id, asyncio.get_running_loop())
+        with self._lock:
+            admitted, victim, retry_after = self._enter(waiter)
+        if victim is not None:
+            victim.wake()
+        if retry_after is not None:
+            waiter.rejected = "queue_full"
+            raise self._reject(waiter, retry_after)
+        if not admitted:
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter._future), self.max_wait_seconds)
+            except TimeoutError:
+                self._give_up(waiter, "timeout")
+            except asyncio.CancelledError:
+                if self._give_up(waiter, "cancelled"):
+                    self.release(0.0)
+                raise
+        if not waiter.granted:
+            raise self._reject(waiter)
+        self._admitted(waiter, started)
+
+    def release(self, held_seconds: float) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if held_seconds > 0:
+                self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * held_seconds
+            granted = self._grant_next()
+        for waiter in granted:
+            waiter.wake()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "in_flight": self._in_flight,
+                "queue_depth": self._waiting,
+                "queued": {p: sum(len(q) for q in self._queues[p].values()) for p in PRIORITIES},
+                "queued_sessions": sum(len(self._queues[p]) for p in PRIORITIES),
+            }
+
+
+@dataclass(frozen=True)
+class AdmissionTicket:
+    """One request's identity in the LLM queue; engines hold a slot per LLM call through it."""
+
+    controller: LLMAdmission
+    session_id: str
+    priority: str
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        self.controller.acquire(self.session_id, self.priority)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.controller.release(time.perf_counter() - started)
+
+    @asynccontextmanager
+    async def aslot(self) -> AsyncIterator[None]:
+        await self.controller.aacquire(self.session_id, self.priority)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.controller.release(time.perf_counter() - started)
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Event, Lock
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+def answer_cache_key(
+    question: str,
+    max_rows: int,
+    snapshot_id: str | None,
+    conversation_context: list[str] | None = None,
+    approximate: bool = False,
+) -> tuple[str, int, str | None, str | None, bool]:
+    normalized = " ".join(question.lower().split()).rstrip("?.! ")
+    context_digest = None
+    if conversation_context:
+        # Follow-ups depend on their session history, so they only share with identical histories.
+        context_digest = hashlib.sha256("\n".join(conversation_context).encode("utf-8")).hexdigest()[:16]
+    return normalized, max_rows, snapshot_id, context_digest, approximate
+
+
+class AnswerCache:
+    """Short-lived TTL cache for finished answers."""
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 512) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = Lock()
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Any | None:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+@dataclass
+class _Call:
+    done: Event = field(default_factory=Event)
+    result: Any = None
+    error: BaseException | None = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key onto one execution."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._calls: dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> tuple[T, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+@dataclass
+class _AsyncCall:
+    task: asyncio.Future[Any]
+    waiters: int = 0
+
+
+class AsyncSingleFlight:
+    """Event-loop flavour of SingleFlight.
+
+    The work runs in its own task that every caller, the first one included, awaits through a
+    shield: a caller that is cancelled (a client disconnect) leaves the others waiting on the same
+    run. The run itself is cancelled only once no caller is left to want it.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, _AsyncCall] = {}
+
+    def _forget(self, key: Hashable, call: _AsyncCall) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        call = self._calls.get(key)
+        leader = call is None
+        if call is None:
+            call = _AsyncCall(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task), not leader
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def in_flight(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AbstractAsyncContextManager, nullcontext
+from threading import Lock
+from typing import Any, AsyncIterator
+
+import httpx
+
+from agent.evidence import EvidenceBatch
+from agent.model_catalog import OPENROUTER_MODELS_URL
+from agent.models import AgentAnswer, QueryRequest
+from agent.query_engine import QueryEngine, _stringify_response
+from agent.timings import StageTimings
+
+_DB_EXECUTORS: dict[int, ThreadPoolExecutor] = {}
+_DB_EXECUTOR_LOCK = Lock()
+
+
+def get_db_executor(max_workers: int = 4) -> ThreadPoolExecutor:
+    """Process-wide bounded pool that DuckDB work is offloaded to from the event loop.
+
+    One pool per size: apps configured with the same `db_max_workers` share it, and a different
+    size gets its own pool instead of silently reusing the first one built.
+    """
+    with _DB_EXECUTOR_LOCK:
+        executor = _DB_EXECUTORS.get(max_workers)
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="duckdb")
+            _DB_EXECUTORS[max_workers] = executor
+        return executor
+
+
+class AsyncQueryEngine(QueryEngine):
+    """QueryEngine variant whose LLM and HTTP calls never block the event loop."""
+
+    def __init__(self, *args: Any, executor: ThreadPoolExecutor | None = None, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.executor = executor or get_db_executor()
+
+    async def _run_blocking(self, fn: Any, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        if self.profiler is not None:
+            return await loop.run_in_executor(self.executor, self.profiler.run_attached, fn, *args)
+        return await loop.run_in_executor(self.executor, fn, *args)
+
+    async def _acall(self, llm: Any, prompt: str) -> Any:
+        if hasattr(llm, "ainvoke"):
+            return await llm.ainvoke(prompt)
+        # Sync-only LLMs still must not hold the loop; use the default pool, not the DB one.
+        return await asyncio.to_thread(llm.invoke, prompt)
+
+    async def _adiscover_model_ids(self) -> list[str]:
+        async with httpx.AsyncClient(timeout=20) as client:
+            response = await client.get(OPENROUTER_MODELS_URL, headers=self._models_endpoint_headers())
+            response.raise_for_status()
+            return self._model_ids_from_payload(response.json())
+
+    async def _ahedge_backup(self, prompt: str) -> tuple[str, Any] | None:
+        backup = self._pick_hedge_backup(await self.model_catalog.amodel_ids(self._adiscover_model_ids))
+        if backup is None:
+            return None
+
+        async def call() -> Any:
+            try:
+                response = await self._acall(self._build_llm(backup), prompt)
+            except Exception:
+                self.model_catalog.record_failure(backup)
+                raise
+            else:
+                self.model_catalog.record_success(backup)
+            finally:
+                # Also reached when a losing backup is cancelled.
+                self.model_catalog.release_probe(backup)
+            return response
+
+        return backup, call
+
+    async def _acall_primary(self, prompt: str) -> tuple[str, Any]:
+        if self.hedger is None:
+            return self.settings.openrouter_model, await self._acall(self.llm, prompt)
+        return await self.hedger.acall(
+            self.settings.openrouter_model,
+            lambda: self._acall(self.llm, prompt),
+            lambda: self._ahedge_backup(prompt),
+        )
+
+    def _allm_slot(self) -> AbstractAsyncContextManager[None]:
+        return self.admission.aslot() if self.admission is not None else nullcontext()
+
+    async def _ainvoke_llm(self, prompt: str) -> Any:
+        async with self._allm_slot():
+            return await self._ainvoke_llm_with_fallback(prompt)
+
+    async def _ainvoke_llm_with_fallback(self, prompt: str) -> Any:
+        catalog = self.model_catalog
+        primary = self.settings.openrouter_model
+        original: Exception | None = None
+        primary_open = not catalog.is_available(primary)
+        if not primary_open:
+            try:
+                answered, response = await self._acall_primary(prompt)
+            except Exception as exc:
+                if not self._is_model_unavailable_error(exc):
+                    raise
+                catalog.record_failure(primary)
+                original = exc
+            else:
+                if answered == primary:
+                    catalog.record_success(primary)
+                return response
+            finally:
+                # Errors that say nothing about the model still end a half-open probe.
+                catalog.release_probe(primary)
+
+        tried_models: list[str] = []
+        for model_id in self._candidate_models(await catalog.amodel_ids(self._adiscover_model_ids)):
+            if not catalog.is_available(model_id):
+                # Another request is already probing this half-open model.
+                continue
+            try:
+                response = await self._acall(self._build_llm(model_id), prompt)
+            except Exception:
+                catalog.record_failure(model_id)
+                tried_models.append(model_id)
+                continue
+            else:
+                catalog.record_success(model_id, sticky=True)
+                return response
+            finally:
+                # A request cancelled mid-probe (the client went away) must not hold the probe.
+                catalog.release_probe(model_id)
+
+        if primary_open and not tried_models:
+            response = await self._acall(self.llm, prompt)
+            catalog.record_success(primary)
+            return response
+        raise self._fallback_error(tried_models, original) from original
+
+    async def _achunks(self, prompt: str) -> AsyncIterator[Any]:
+        if hasattr(self.llm, "astream"):
+            async for chunk in self.llm.astream(prompt):
+                yield chunk
+            return
+        # Drive a sync-only stream one chunk at a time off the loop.
+        iterator = iter(self.llm.stream(prompt))
+        done = object()
+        while True:
+            chunk = await asyncio.to_thread(next, iterator, done)
+            if chunk is done:
+                return
+            yield chunk
+
+    async def _astream_llm(self, prompt: str) -> AsyncIterator[str]:
+        async with self._allm_slot():
+            if not hasattr(self.llm, "astream") and not hasattr(self.llm, "stream"):
+                yield _stringify_response(await self._ainvoke_llm_with_fallback(prompt))
+                return
+            started = False
+            try:
+                async for chunk in self._achunks(prompt):
+                    text = _stringify_response(chunk)
+                    if text:
+                        started = True
+                        yield text
+            except Exception:
+                if started:
+                    raise
+                yield _stringify_response(await self._ainvoke_llm_with_fallback(prompt))
+
+    async def agenerate_sql(self, request: QueryRequest) -> str:
+        with self.timings.stage("sql_generation"):
+            prompt = self._sql_prompt(request)
+            response = await self._ainvoke_llm(prompt)
+        self.timings.record_tokens("sql_generation", prompt, response)
+        return self._planned_sql(request, response)
+
+    async def aexecute_evidence(self, sql: str, max_rows: int) -> EvidenceBatch:
+        return await self._run_blocking(self.execute_evidence, sql, max_rows)
+
+    async def aexecute_safe_query(self, sql: str, max_rows: int) -> tuple[list[dict[str, Any]], list[str]]:
+        evidence = await self.aexecute_evidence(sql, max_rows)
+        return evidence.to_rows(), evidence.columns
+
+    async def _atry_fast_path(self, request: QueryRequest) -> AgentAnswer | None:
+        if self.fast_path is None or self._is_follow_up(request):
+            return None
+        return await self._run_blocking(self._try_fast_path, request)
+
+    async def aanswer(self, request: QueryRequest) -> AgentAnswer:
+        self.timings = StageTimings()
+        fast = await self._atry_fast_path(request)
+        if fast is not None:
+            return fast
+        sql = await self.agenerate_sql(request)
+        evidence, approximation = await self._run_blocking(self._request_evidence, request, sql)
+        templated, shape = self._template_answer(request, sql, evidence, approximation)
+        if templated is not None:
+            return templated
+        answer_prompt = self._answer_prompt(request, sql, evidence)
+        with self.timings.stage("answer_llm"):
+            response = await self._ainvoke_llm(answer_prompt)
+        self.timings.record_tokens("answer_llm", answer_prompt, response)
+        summary = self._finalize_summary(_stringify_response(response))
+        return self._build_answer(request, sql, summary, evidence, result_shape=shape, approximation=approximation)
+
+    async def aanswer_stream(self, request: QueryRequest) -> AsyncIterator[tuple[str, Any]]:
+        self.timings = StageTimings()
+        fast = await self._atry_fast_path(request)
+        if fast is not None:
+            yield "sql_generated", {"sql": fast.sql}
+            yield "rows_ready", {"row_count": len(fast.evidence), "columns": fast.evidence_columns}
+            yield "answer", fast
+            return
+        sql = await self.agenerate_sql(request)
+        yield "sql_generated", {"sql": sql}
+        evidence, approximation = await self._run_blocking(self._request_evidence, request, sql)
+        yield "rows_ready", {"row_count": evidence.num_rows, "columns": evidence.columns}
+        templated, shape = self._template_answer(request, sql, evidence, approximation)
+        if templated is not None:
+            yield "answer", templated
+            return
+        answer_prompt = self._answer_prompt(request, sql, evidence)
+        parts: list[str] = []
+        with self.timings.stage("answer_llm"):
+            async for text in self._astream_llm(answer_prompt):
+                parts.append(text)
+                yield "token", {"text": text}
+        self.timings.record_tokens("answer_llm", answer_prompt, None, "".join(parts))
+        summary = self._finalize_summary("".join(parts))
+        yield "answer", self._build_answer(request, sql, summary, evidence, result_shape=shape, approximation=approximation)
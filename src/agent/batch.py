@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from agent.metrics import METRICS
+
+
+@dataclass
+class BatchItem:
+    """One distinct question and every position in the submitted list that asked it."""
+
+    question: str
+    indexes: list[int] = field(default_factory=list)
+
+
+def normalize_question(question: str) -> str:
+    return " ".join(question.split()).casefold()
+
+
+def dedupe_questions(questions: list[str]) -> list[BatchItem]:
+    """Group questions that differ only in case and whitespace; blank entries are dropped."""
+    items: dict[str, BatchItem] = {}
+    for index, question in enumerate(questions):
+        key = normalize_question(question)
+        if not key:
+            continue
+        items.setdefault(key, BatchItem(question=question.strip())).indexes.append(index)
+    return list(items.values())
+
+
+def error_detail(exc: Exception) -> Any:
+    to_detail = getattr(exc, "to_detail", None)
+    return to_detail() if callable(to_detail) else str(exc)
+
+
+async def run_batch(
+    questions: list[str],
+    answer: Callable[[str], Awaitable[dict]],
+    concurrency: int,
+) -> AsyncIterator[dict]:
+    """Answer each distinct question once, `concurrency` at a time, yielding results as they complete.
+
+    Every result line carries the `indexes` it answers; a failed question yields an error line and
+    the rest carry on. The last line is a summary of the whole batch.
+    """
+    started = time.perf_counter()
+    items = dedupe_questions(questions)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(item: BatchItem) -> dict:
+        async with semaphore:
+            item_started = time.perf_counter()
+            line: dict[str, Any] = {"type": "result", "indexes": item.indexes, "question": item.question}
+            try:
+                line.update(ok=True, answer=await answer(item.question))
+            except Exception as exc:
+                line.update(ok=False, error=error_detail(exc))
+            line["seconds"] = round(time.perf_counter() - item_started, 6)
+            METRICS.incr("batch_questions_total", result="ok" if line["ok"] else "error")
+            return line
+
+    tasks = [asyncio.ensure_future(run(item)) for item in items]
+    failed = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            line = await next_done
+            failed += 0 if line["ok"] else 1
+            yield line
+    finally:
+        # A client that disconnects mid-batch must not leave questions running.
+        for task in tasks:
+            task.cancel()
+    duplicates = sum(len(item.indexes) - 1 for item in items)
+    if duplicates:
+        METRICS.incr("batch_questions_total", duplicates, result="deduplicated")
+    yield {
+        "type": "summary",
+        "questions": len(questions),
+        "unique": len(items),
+        "failed": failed,
+        "seconds": round(time.perf_counter() - started, 6),
+    }
@@ -0,0 +1,421 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import re
+import statistics
+import time
+import zipfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import duckdb
+import yaml
+
+from agent.cache_manager import CacheManager
+from agent.ingestion import ingest_zip_to_duckdb
+from agent.models import AgentAnswer, QueryRequest, SchemaSummary, SyncSnapshot
+from agent.query_engine import QueryEngine
+from agent.result_cache import ResultCache
+from agent.schema_summary import build_schema_summaries, schema_summaries_to_json_payload
+from agent.settings import AppConfig, Settings
+from agent.sync_pipeline import engine_options, finish_sync
+from agent.timings import timed
+
+BENCH_APP = "bench_app"
+REPORT_VERSION = 2
+
+DEPARTMENTS = ["Cardiology", "Neurology", "Orthopedics", "Pediatrics", "Oncology", "ENT", "Dermatology", "Radiology"]
+STATUSES = ["Scheduled", "Completed", "Cancelled", "No Show"]
+PAYMENT_MODES = ["Card", "Cash", "UPI", "Insurance"]
+CITIES = ["Chennai", "Bengaluru", "Mumbai", "Delhi", "Hyderabad", "Pune", "Kolkata", "Kochi"]
+
+
+@dataclass(frozen=True)
+class BenchQuestion:
+    name: str
+    question: str
+    sql: str
+
+
+QUESTIONS = [
+    BenchQuestion(
+        "revenue_by_department",
+        "What is the total fee collected per department?",
+        "SELECT Department, SUM(Fee) AS revenue FROM appointments_report GROUP BY Department ORDER BY revenue DESC",
+    ),
+    BenchQuestion(
+        "status_breakdown",
+        "How are appointments split across statuses?",
+        "SELECT Status, COUNT(*) AS appointments FROM appointments_report GROUP BY Status ORDER BY appointments DESC",
+    ),
+    BenchQuestion(
+        "top_doctors",
+        "Which ten doctors saw the most patients?",
+        "SELECT d.Doctor_Name, COUNT(*) AS appointments FROM appointments_report a "
+        "JOIN doctors_report d ON a.Doctor_ID = d.Doctor_ID GROUP BY d.Doctor_Name ORDER BY appointments DESC LIMIT 10",
+    ),
+    BenchQuestion(
+        "cancelled_by_city",
+        "Where do cardiology patients cancel the most?",
+        "SELECT p.City, COUNT(*) AS cancelled FROM appointments_report a JOIN patients_report p "
+        "ON a.Patient_ID = p.Patient_ID WHERE a.Department = 'Cardiology' AND a.Status = 'Cancelled' "
+        "GROUP BY p.City ORDER BY cancelled DESC",
+    ),
+    BenchQuestion(
+        "patient_history",
+        "Show the appointments of patient 3000000000000000042",
+        "SELECT Appointment_ID, Doctor, Department, Status, Fee FROM appointments_report "
+        "WHERE Patient_ID = 3000000000000000042 ORDER BY Appointment_Date",
+    ),
+]
+
+_QUESTION_RE = re.compile(r"Question:\s*(.+)")
+
+
+def _zoho_id(table_offset: int) -> str:
+    # Zoho record IDs are 19-digit numbers; each report gets its own range.
+    return f"CAST({table_offset} + range AS BIGINT)"
+
+
+def _pick(values: list[str], expr: str) -> str:
+    quoted = ", ".join(f"'{v}'" for v in values)
+    return f"[{quoted}][({expr}) % {len(values)} + 1]"
+
+
+def synthetic_tables(rows: int, wide_columns: int = 10, seed: int = 42) -> dict[str, str]:
+    """DuckDB SELECTs for the synthetic Zoho reports, keyed by export file name.
+
+    `Appointments_Report` has `rows` rows and `wide_columns` extra custom fields. It also has lookup fields
+    that reference `Patients_Report` (rows / 10) and `Doctors_Report` (rows / 1000): each lookup has a
+    display-value column and its `_ID` column.
+    """
+    doctors = max(10, rows // 1000)
+    patients = max(100, rows // 10)
+    # Seeded and stable across runs, so every run benchmarks the same data.
+    mix = f"CAST(hash(range + {int(seed)}) % 1000000007 AS BIGINT)"
+    tables = {
+        "Doctors_Report": f"""
+            SELECT {_zoho_id(4_000_000_000_000_000_000)} AS Doctor_ID,
+                'Dr. ' || CAST(range AS VARCHAR) AS Doctor_Name,
+                {_pick(DEPARTMENTS, mix)} AS Department,
+                TIMESTAMP '2024-01-01' + INTERVAL (range % 700) DAY AS Added_Time
+            FROM range({doctors})
+        """,
+        "Patients_Report": f"""
+            SELECT {_zoho_id(3_000_000_000_000_000_000)} AS Patient_ID,
+                'Patient ' || CAST(range AS VARCHAR) AS Patient_Name,
+                {_pick(CITIES, mix)} AS City,
+                {_pick(["A+", "A-", "B+", "B-", "O+", "O-", "AB+", "AB-"], f"{mix} // 7")} AS Blood_Group,
+                CAST(1 + {mix} % 90 AS INTEGER) AS Age
+            FROM range({patients})
+        """,
+    }
+    custom = ",\n".join(
+        f"{_pick(['Alpha', 'Beta', 'Gamma', 'Delta'], f'{mix} // {i + 2}')} AS Custom_Text_{i}"
+        if i % 2 == 0
+        else f"CAST(({mix} // {i + 2}) % 10000 AS DOUBLE) / 100 AS Custom_Number_{i}"
+        for i in range(wide_columns)
+    )
+    tables["Appointments_Report"] = f"""
+        SELECT {_zoho_id(2_000_000_000_000_000_000)} AS Appointment_ID,
+            'Patient ' || CAST({mix} % {patients} AS VARCHAR) AS Patient,
+            CAST(3000000000000000000 + {mix} % {patients} AS BIGINT) AS Patient_ID,
+            'Dr. ' || CAST(({mix} // 13) % {doctors} AS VARCHAR) AS Doctor,
+            CAST(4000000000000000000 + ({mix} // 13) % {doctors} AS BIGINT) AS Doctor_ID,
+            {_pick(DEPARTMENTS, f"{mix} // 17")} AS Department,
+            {_pick(STATUSES, f"{mix} // 19")} AS Status,
+            {_pick(PAYMENT_MODES, f"{mix} // 23")} AS Payment_Mode,
+            CAST(100 + ({mix} // 29) % 1900 AS DECIMAL(10, 2)) AS Fee,
+            DATE '2024-01-01' + CAST(({mix} // 31) % 730 AS INTEGER) AS Appointment_Date
+            {"," + custom if custom else ""}
+        FROM range({rows})
+    """
+    return tables
+
+
+def synthetic_app_config() -> dict[str, Any]:
+    """App config payload for the synthetic reports; report link names are `All_<Name>`."""
+    return {
+        "app_name": BENCH_APP,
+        "reports": [
+            {
+                "name": name,
+                "report_link_name": f"All_{name}",
+                "table_name": f"{name.lower()}_report",
+                "key_columns": [key],
+            }
+            for name, key in (("Appointments", "Appointment_ID"), ("Patients", "Patient_ID"), ("Doctors", "Doctor_ID"))
+        ],
+        "allowed_tables": ["appointments_report", "patients_report", "doctors_report"],
+        "join_hints": [
+            "appointments_report.Patient_ID = patients_report.Patient_ID",
+            "appointments_report.Doctor_ID = doctors_report.Doctor_ID",
+        ],
+    }
+
+
+def generate_export(out_dir: Path, rows: int, wide_columns: int = 10, seed: int = 42) -> tuple[Path, dict[str, Any]]:
+    """Write a Zoho-style bulk export ZIP (one CSV per report) and the app config payload that describes it."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    zip_path = out_dir / "bench_export.zip"
+    conn = duckdb.connect()
+    try:
+        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+            for name, sql in synthetic_tables(rows, wide_columns, seed).items():
+                csv_path = out_dir / f"{name}.csv"
+                conn.execute(f"COPY ({sql}) TO '{csv_path}' (HEADER)")
+                zf.write(csv_path, arcname=csv_path.name)
+                csv_path.unlink()
+    finally:
+        conn.close()
+    return zip_path, synthetic_app_config()
+
+
+class StubLLM:
+    """Deterministic LLM stand-in: canned SQL per benchmark question after a fixed latency."""
+
+    def __init__(self, latency_seconds: float = 0.0, questions: list[BenchQuestion] = QUESTIONS) -> None:
+        self.latency_seconds = latency_seconds
+        self._sql = {q.question: q.sql for q in questions}
+        self.calls = 0
+
+    def _respond(self, prompt: str) -> str:
+        self.calls += 1
+        if "SQL:" not in prompt:
+            return "- Benchmark summary line."
+        asked = _QUESTION_RE.findall(prompt)
+        question = asked[-1].strip() if asked else ""
+        # Load tests make questions unique with a suffix; they still map to the base question's SQL.
+        return next((sql for text, sql in self._sql.items() if question.startswith(text)), QUESTIONS[0].sql)
+
+    def invoke(self, prompt: str) -> str:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return self._respond(prompt)
+
+    async def ainvoke(self, prompt: str) -> str:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return self._respond(prompt)
+
+
+def latency_summary(samples: list[float], wall_seconds: float | None = None) -> dict[str, float]:
+    """Count, throughput and p50/p95/p99 (milliseconds) of a list of latencies in seconds."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pct(p: float) -> float:
+        # Nearest-rank percentile: always an observed latency.
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100 * len(ordered)) - 1))] * 1000
+
+    wall = wall_seconds if wall_seconds is not None else sum(samples)
+    return {
+        "count": len(samples),
+        "throughput_per_s": round(len(samples) / wall, 2) if wall > 0 else 0.0,
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "p50_ms": round(pct(50), 3),
+        "p95_ms": round(pct(95), 3),
+        "p99_ms": round(pct(99), 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+@dataclass
+class BenchWorkspace:
+    root: Path
+    zip_path: Path
+    app_config: AppConfig
+    cache: CacheManager
+
+
+def prepare_workspace(work_dir: Path, rows: int, wide_columns: int = 10, seed: int = 42) -> BenchWorkspace:
+    """Generate the export and its app config under `work_dir`; the cache lives in `work_dir/.cache`."""
+    root = work_dir.resolve()
+    zip_path, app_payload = generate_export(root / "export", rows, wide_columns, seed)
+    (root / "app.yaml").write_text(yaml.safe_dump(app_payload, sort_keys=False), encoding="utf-8")
+    app_config = AppConfig.model_validate(app_payload)
+    return BenchWorkspace(root, zip_path, app_config, CacheManager(root / ".cache" / app_config.app_name))
+
+
+def sync_workspace(workspace: BenchWorkspace) -> SyncSnapshot:
+    """Run what `agent sync --from-zip` runs: ingest, then every derived artifact, then publish."""
+    workspace.cache.db_path.unlink(missing_ok=True)
+    stages: dict[str, float] = {}
+    with timed(stages, "ingest"):
+        snapshot = ingest_zip_to_duckdb(
+            workspace.zip_path, workspace.cache.db_path, workspace.app_config, source="bench"
+        )
+    finish_sync(workspace.cache, workspace.app_config, snapshot, stages)
+    return snapshot
+
+
+def profile_workspace(workspace: BenchWorkspace) -> list[SchemaSummary]:
+    """Rebuild just the schema summary, for timing profiling on its own."""
+    summaries = build_schema_summaries(workspace.cache.db_path, workspace.app_config)
+    payload = schema_summaries_to_json_payload(summaries, workspace.app_config.app_name)
+    workspace.cache.write_schema_summary(payload)
+    return summaries
+
+
+class BenchAsker:
+    """Answers benchmark questions the way `agent ask` does, with a fresh engine per request."""
+
+    def __init__(self, workspace: BenchWorkspace, llm: StubLLM, caches: bool = False) -> None:
+        self.workspace = workspace
+        self.llm = llm
+        # Rollups, value index, sampler and the rest, built from the synced artifacts as `agent ask` does.
+        self.options = engine_options(workspace.app_config, workspace.cache)
+        snapshot = workspace.cache.read_snapshot()
+        self.snapshot_id = snapshot.snapshot_id if snapshot else None
+        # Repeated questions would be result-cache hits; leave it out to time the full path.
+        query_settings = workspace.app_config.query
+        self.result_cache = ResultCache(max_bytes=query_settings.result_cache_max_bytes) if caches else None
+        self.settings = Settings.model_validate({"OPENROUTER_MODEL": "mistralai/mistral-7b-instruct"})
+
+    def ask(self, question: str) -> AgentAnswer:
+        engine = QueryEngine(
+            settings=self.settings,
+            db_path=self.workspace.cache.db_path,
+            llm=self.llm,
+            result_cache=self.result_cache,
+            snapshot_id=self.snapshot_id,
+            **self.options,
+        )
+        return engine.answer(QueryRequest(question=question))
+
+
+def run_benchmark(
+    work_dir: Path,
+    rows: int = 100_000,
+    wide_columns: int = 10,
+    llm_latency_ms: float = 0.0,
+    iterations: int = 100,
+    concurrency: int = 4,
+    caches: bool = False,
+    seed: int = 42,
+) -> dict[str, Any]:
+    """Generate data, then time the full sync and ask; returns a JSON-able report.
+
+    `sync` covers ingest and every derived artifact, with per-stage seconds; `profile` is its schema summary stage.
+    """
+    started = time.perf_counter()
+    workspace = prepare_workspace(work_dir, rows, wide_columns, seed)
+    generate_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    snapshot = sync_workspace(workspace)
+    sync_seconds = time.perf_counter() - started
+    stages = snapshot.timings["stages"]
+
+    asker = BenchAsker(workspace, StubLLM(llm_latency_ms / 1000), caches=caches)
+    per_question: dict[str, list[float]] = {q.name: [] for q in QUESTIONS}
+    paths: dict[str, Counter[str]] = {q.name: Counter() for q in QUESTIONS}
+
+    def timed_ask(i: int) -> None:
+        question = QUESTIONS[i % len(QUESTIONS)]
+        began = time.perf_counter()
+        answer = asker.ask(question.question)
+        per_question[question.name].append(time.perf_counter() - began)
+        paths[question.name][answer.answer_path] += 1
+
+    # One untimed pass warms the DuckDB file cache and the model catalog.
+    for question in QUESTIONS:
+        asker.ask(question.question)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        list(pool.map(timed_ask, range(iterations)))
+    ask_wall = time.perf_counter() - started
+
+    total_rows = sum(snapshot.row_counts.values())
+    return {
+        "version": REPORT_VERSION,
+        "generated_at": datetime.now(UTC).isoformat(),
+        "config": {
+            "rows": rows,
+            "wide_columns": wide_columns,
+            "llm_latency_ms": llm_latency_ms,
+            "iterations": iterations,
+            "concurrency": concurrency,
+            "caches": caches,
+            "seed": seed,
+        },
+        "generate": {"seconds": round(generate_seconds, 3)},
+        "sync": {
+            "seconds": round(sync_seconds, 3),
+            "rows_per_second": round(total_rows / sync_seconds) if sync_seconds else None,
+            "tables": snapshot.row_counts,
+            "stages": {name: round(seconds, 3) for name, seconds in stages.items()},
+        },
+        "profile": {
+            "seconds": round(stages["schema_summary"], 3),
+            "tables": snapshot.timings["profile"],
+        },
+        "ask": {
+            "overall": latency_summary([s for samples in per_question.values() for s in samples], ask_wall),
+            "questions": {
+                name: {**latency_summary(samples), "answer_paths": dict(paths[name])}
+                for name, samples in per_question.items()
+            },
+        },
+    }
+
+
+# (report path, higher is better) for each compared metric.
+COMPARED_METRICS = [
+    (("sync", "seconds"), False),
+    (("profile", "seconds"), False),
+    (("ask", "overall", "throughput_per_s"), True),
+    (("ask", "overall", "p50_ms"), False),
+    (("ask", "overall", "p95_ms"), False),
+    (("ask", "overall", "p99_ms"), False),
+]
+
+
+def _lookup(report: dict[str, Any], path: tuple[str, ...]) -> float | None:
+    value: Any = report
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+def compare_reports(baseline: dict[str, Any], current: dict[str, Any], max_regression: float = 0.2) -> list[dict]:
+    """Metrics that got worse than the baseline by more than `max_regression` (relative).
+
+    Raises ValueError when the reports come from different report versions or bench settings,
+    since their numbers are not comparable.
+    """
+    if baseline.get("version") != current.get("version"):
+        versions = f"baseline {baseline.get('version')}, current {current.get('version')}"
+        raise ValueError(f"Report versions differ: {versions}; rerun the baseline with this version.")
+    before_config, after_config = baseline.get("config") or {}, current.get("config") or {}
+    differing = sorted(
+        key for key in set(before_config) | set(after_config) if before_config.get(key) != after_config.get(key)
+    )
+    if differing:
+        details = ", ".join(f"{key}: {before_config.get(key)!r} -> {after_config.get(key)!r}" for key in differing)
+        raise ValueError(f"Reports were run with different settings ({details}); rerun the baseline with these.")
+    regressions: list[dict] = []
+    for path, higher_is_better in COMPARED_METRICS:
+        before, after = _lookup(baseline, path), _lookup(current, path)
+        if not before or after is None:
+            continue
+        change = (after - before) / before
+        worse = -change if higher_is_better else change
+        if worse > max_regression:
+            regressions.append(
+                {"metric": ".".join(path), "baseline": before, "current": after, "change": round(change, 3)}
+            )
+    return regressions
+
+
+def load_report(path: Path) -> dict[str, Any]:
+    return json.loads(path.read_text(encoding="utf-8"))
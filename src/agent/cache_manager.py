@@ -13,6 +13,11 @@ class CacheManager:
         self.root.mkdir(parents=True, exist_ok=True)
         self.metadata_file = self.root / "sync_metadata.json"
         self.summary_file = self.root / "schema_summary.json"
+        self.rollups_file = self.root / "rollups.json"
+        self.indexes_file = self.root / "indexes.json"
+        self.samples_file = self.root / "samples.json"
+        self.filter_usage_file = self.root / "filter_usage.json"
+        self.slowlog_file = self.root / "slowlog.jsonl"
 
     @property
     def db_path(self) -> Path:
@@ -41,6 +46,30 @@ class CacheManager:
             return {}
         return json.loads(self.summary_file.read_text(encoding="utf-8"))
 
+    def write_rollups(self, payload: list[dict]) -> None:
+        self.rollups_file.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+    def read_rollups(self) -> list[dict]:
+        if not self.rollups_file.exists():
+            return []
+        return json.loads(self.rollups_file.read_text(encoding="utf-8"))
+
+    def write_indexes(self, payload: list[dict]) -> None:
+        self.indexes_file.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+    def read_indexes(self) -> list[dict]:
+        if not self.indexes_file.exists():
+            return []
+        return json.loads(self.indexes_file.read_text(encoding="utf-8"))
+
+    def write_samples(self, payload: list[dict]) -> None:
+        self.samples_file.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+    def read_samples(self) -> list[dict]:
+        if not self.samples_file.exists():
+            return []
+        return json.loads(self.samples_file.read_text(encoding="utf-8"))
+
     def write_last_answer(self, payload: dict) -> None:
         state_dir = Path(".agent_state")
         state_dir.mkdir(exist_ok=True)
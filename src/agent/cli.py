@@ -1,21 +1,36 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import sys
+import tempfile
+import zipfile
 from pathlib import Path
 from typing import Any
 
 import typer
+import uvicorn
 import yaml
 from rich.console import Console
 from rich.table import Table
 
+from agent.admission import LLMAdmission
+from agent.async_query_engine import AsyncQueryEngine, get_db_executor
+from agent.batch import run_batch
+from agent.bench import compare_reports, load_report, run_benchmark
 from agent.cache_manager import CacheManager
+from agent.db_pool import ReadOnlyConnectionPool
+from agent.indexes import index_status, load_filter_usage
 from agent.ingestion import ingest_multiple_zips_to_duckdb, ingest_report_payloads_to_duckdb, ingest_zip_to_duckdb
 from agent.models import QueryRequest
+from agent.profiling import read_slowlog, summarize_slowlog
 from agent.query_engine import QueryEngine
-from agent.schema_summary import build_schema_summaries, schema_summaries_to_json_payload
+from agent.query_guard import QueryGuardError
 from agent.settings import load_app_config, load_settings
+from agent.sync_pipeline import engine_options, finish_sync
+from agent.timings import timed
 from agent.zoho_client import ZohoConfigError, ZohoCreatorClient
+from agent.zoho_mock import MockZohoSettings, create_mock_app
 
 app = typer.Typer(help="Zoho Creator terminal AI agent")
 console = Console()
@@ -87,40 +102,70 @@ def bootstrap_config(
 def sync(
     config: Path = typer.Option(Path("config/app.yaml"), exists=True, help="App config YAML"),
     from_zip: list[Path] | None = typer.Option(None, "--from-zip", help="One or more local bulk ZIP files"),
+    bulk: bool = typer.Option(False, "--bulk", help="Export reports through Zoho bulk read jobs"),
 ) -> None:
     """Sync data into DuckDB using Zoho Creator v2.1 API or local ZIPs."""
     settings = load_settings()
     app_config = load_app_config(config)
     cache = CacheManager(Path(".cache") / app_config.app_name)
 
+    stages: dict[str, float] = {}
+    fetch: dict[str, float] = {}
     if from_zip:
         zip_paths = [p.resolve() for p in from_zip]
-        if len(zip_paths) == 1:
-            snapshot = ingest_zip_to_duckdb(zip_paths[0], cache.db_path, app_config, source="local_zip")
-        else:
-            snapshot = ingest_multiple_zips_to_duckdb(zip_paths, cache.db_path, app_config, source="local_zip_multi")
+        with timed(stages, "ingest"):
+            if len(zip_paths) == 1:
+                snapshot = ingest_zip_to_duckdb(zip_paths[0], cache.db_path, app_config, source="local_zip")
+            else:
+                snapshot = ingest_multiple_zips_to_duckdb(
+                    zip_paths, cache.db_path, app_config, source="local_zip_multi"
+                )
+    elif bulk:
+        client = ZohoCreatorClient(settings, sync=app_config.sync)
+        bulk_dir = cache.db_path.parent / "_bulk"
+        bulk_dir.mkdir(parents=True, exist_ok=True)
+        zip_path = bulk_dir / "bulk_export.zip"
+        with timed(stages, "fetch"):
+            with zipfile.ZipFile(zip_path, "w") as zf:
+                for report in app_config.report_models:
+                    console.print(f"[cyan]Bulk exporting report (v2.1)[/cyan] {report.report_link_name}")
+                    csv_path = bulk_dir / f"{report.table_name}.csv"
+                    try:
+                        with timed(fetch, report.report_link_name):
+                            client.bulk_export_report(report.report_link_name, csv_path)
+                    except ZohoConfigError as exc:
+                        raise typer.BadParameter(str(exc)) from exc
+                    zf.write(csv_path, arcname=csv_path.name)
+                    csv_path.unlink()
+        with timed(stages, "ingest"):
+            snapshot = ingest_zip_to_duckdb(zip_path, cache.db_path, app_config, source="zoho_v2_1_bulk")
     else:
-        client = ZohoCreatorClient(settings)
-        report_payloads: dict[str, list[dict]] = {}
-        for report in app_config.report_models:
-            console.print(f"[cyan]Fetching report data (v2.1)[/cyan] {report.report_link_name}")
+        client = ZohoCreatorClient(settings, sync=app_config.sync)
+        links = [report.report_link_name for report in app_config.report_models]
+        console.print(f"[cyan]Fetching report data (v2.1)[/cyan] {', '.join(links)}")
+        with timed(stages, "fetch"):
             try:
-                rows = client.fetch_report_rows(report.report_link_name)
+                report_payloads = client.fetch_reports(links, fetch_seconds=fetch)
             except ZohoConfigError as exc:
                 raise typer.BadParameter(str(exc)) from exc
-            report_payloads[report.report_link_name] = rows
-        snapshot = ingest_report_payloads_to_duckdb(
-            report_payloads=report_payloads,
-            db_path=cache.db_path,
-            app_config=app_config,
-            source="zoho_v2_1_data",
-        )
-
-    cache.write_snapshot(snapshot)
-
-    summaries = build_schema_summaries(cache.db_path, app_config)
-    payload = schema_summaries_to_json_payload(summaries, app_config.app_name)
-    cache.write_schema_summary(payload)
+        with timed(stages, "ingest"):
+            snapshot = ingest_report_payloads_to_duckdb(
+                report_payloads=report_payloads,
+                db_path=cache.db_path,
+                app_config=app_config,
+                source="zoho_v2_1_data",
+            )
+
+    artifacts = finish_sync(cache, app_config, snapshot, stages, fetch)
+    if artifacts.rollups:
+        console.print(f"[green]Rollups built:[/green] {', '.join(r.name for r in artifacts.rollups)}")
+    if artifacts.indexes:
+        names = ", ".join(i.name for i in artifacts.indexes)
+        console.print(f"[green]Indexes built for frequent filters:[/green] {names}")
+    if artifacts.value_index_entries is not None:
+        console.print(f"[green]Value index entries:[/green] {artifacts.value_index_entries}")
+    if artifacts.samples:
+        console.print(f"[green]Samples built:[/green] {', '.join(s.name for s in artifacts.samples)}")
 
     console.print("[green]Sync complete[/green]")
     console.print(json.dumps(snapshot.model_dump(mode="json"), indent=2, default=str))
@@ -147,12 +192,168 @@ def status(config: Path = typer.Option(Path("config/app.yaml"), exists=True)) ->
     console.print(table)
 
 
+@app.command()
+def indexes(config: Path = typer.Option(Path("config/app.yaml"), exists=True)) -> None:
+    """Show built indexes with their build cost and how often queries filtered on them."""
+    app_config = load_app_config(config)
+    cache = CacheManager(Path(".cache") / app_config.app_name)
+    report = index_status(cache.read_indexes(), load_filter_usage(cache.filter_usage_file))
+
+    table = Table(title="Indexes")
+    for column in ["Index", "Table", "Column", "Reason", "Build ms", "Rows", "Uses"]:
+        table.add_column(column)
+    for item in report["indexes"]:
+        table.add_row(
+            item["name"],
+            item["table"],
+            item["column"],
+            item["reason"],
+            f"{item['build_ms']:.1f}",
+            str(item["table_rows"]),
+            str(item["uses"]),
+        )
+    console.print(table)
+
+    if report["unindexed_filters"]:
+        filters = Table(title="Filtered columns without an index")
+        filters.add_column("Column")
+        filters.add_column("Uses")
+        for key, uses in report["unindexed_filters"].items():
+            filters.add_row(key, str(uses))
+        console.print(filters)
+
+
+@app.command()
+def slowlog(
+    config: Path = typer.Option(Path("config/app.yaml"), exists=True),
+    limit: int = typer.Option(10, help="How many of the slowest requests to list"),
+) -> None:
+    """Summarize the slow-query log: latency, where the time went, and the slowest requests."""
+    app_config = load_app_config(config)
+    cache = CacheManager(Path(".cache") / app_config.app_name)
+    entries = read_slowlog(cache.slowlog_file)
+    if not entries:
+        console.print(f"No slow requests logged (threshold {app_config.profiling.slow_query_seconds:g}s).")
+        return
+    report = summarize_slowlog(entries, top=limit)
+    console.print(
+        f"[bold]{report['entries']}[/bold] logged requests: p50 {report['p50_seconds']:.2f}s, "
+        f"p95 {report['p95_seconds']:.2f}s, max {report['max_seconds']:.2f}s"
+    )
+
+    stages = Table(title="Time by stage")
+    stages.add_column("Stage")
+    stages.add_column("Seconds")
+    stages.add_column("Share")
+    total = sum(report["stage_seconds"].values()) or 1.0
+    for stage, seconds in report["stage_seconds"].items():
+        stages.add_row(stage, f"{seconds:.2f}", f"{seconds / total:.0%}")
+    console.print(stages)
+
+    slowest = Table(title="Slowest requests")
+    for column in ["Logged at", "Seconds", "Slowest stage", "Slowest operator", "Profiled", "Question"]:
+        slowest.add_column(column)
+    for item in report["slowest"]:
+        slowest.add_row(
+            str(item["logged_at"])[:19],
+            f"{item['total_seconds'] or 0:.2f}",
+            item["slowest_stage"] or "-",
+            item["slowest_operator"] or "-",
+            "yes" if item["profiled"] else "no",
+            item["question"] or "",
+        )
+    console.print(slowest)
+
+
+@app.command()
+def bench(
+    rows: int = typer.Option(100_000, min=1_000, max=10_000_000, help="Rows in the synthetic appointments report"),
+    wide_columns: int = typer.Option(10, min=0, help="Extra custom fields on the appointments report"),
+    llm_latency_ms: float = typer.Option(0.0, min=0.0, help="Latency of each stub LLM call"),
+    iterations: int = typer.Option(100, min=1, help="Timed questions"),
+    concurrency: int = typer.Option(4, min=1, help="Questions in flight at once"),
+    caches: bool = typer.Option(False, "--caches/--no-caches", help="Keep the result cache on between questions"),
+    seed: int = typer.Option(42, help="Seed for the synthetic data"),
+    workdir: Path | None = typer.Option(None, help="Keep the generated export and DuckDB here"),
+    output: Path | None = typer.Option(None, help="Write the JSON report here"),
+    baseline: Path | None = typer.Option(None, exists=True, help="Earlier report to compare against"),
+    max_regression: float = typer.Option(0.2, help="Fail when a metric is this much worse than the baseline"),
+) -> None:
+    """Benchmark sync, profiling and ask on synthetic Zoho data with a stub LLM."""
+    with tempfile.TemporaryDirectory(prefix="agent-bench-") as tmp:
+        report = run_benchmark(
+            workdir or Path(tmp),
+            rows=rows,
+            wide_columns=wide_columns,
+            llm_latency_ms=llm_latency_ms,
+            iterations=iterations,
+            concurrency=concurrency,
+            caches=caches,
+            seed=seed,
+        )
+    text = json.dumps(report, indent=2)
+    if output:
+        output.write_text(text + "\n", encoding="utf-8")
+    console.print_json(text)
+
+    if baseline:
+        try:
+            regressions = compare_reports(load_report(baseline), report, max_regression)
+        except ValueError as exc:
+            raise typer.BadParameter(str(exc), param_hint="--baseline") from exc
+        if regressions:
+            table = Table(title=f"Regressions over {max_regression:.0%}")
+            for column in ["Metric", "Baseline", "Current", "Change"]:
+                table.add_column(column)
+            for item in regressions:
+                table.add_row(item["metric"], f"{item['baseline']:g}", f"{item['current']:g}", f"{item['change']:+.0%}")
+            console.print(table)
+            raise typer.Exit(code=1)
+        console.print(f"[green]No regressions over {max_regression:.0%} against {baseline}[/green]")
+
+
+@app.command("zoho-mock")
+def zoho_mock(
+    host: str = typer.Option("127.0.0.1", help="Bind address"),
+    port: int = typer.Option(8765, help="Bind port"),
+    rows: int = typer.Option(10_000, min=1_000, max=10_000_000, help="Rows in the synthetic appointments report"),
+    wide_columns: int = typer.Option(10, min=0, help="Extra custom fields on the appointments report"),
+    seed: int = typer.Option(42, help="Seed for the synthetic data and injected faults"),
+    latency_ms: float = typer.Option(0.0, min=0.0, help="Latency added to every response"),
+    page_size: int = typer.Option(1000, min=1, help="Largest page the data endpoint returns"),
+    rate_limit_rate: float = typer.Option(0.0, min=0.0, max=1.0, help="Fraction of API calls answered 429"),
+    retry_after: float = typer.Option(1.0, min=0.0, help="Retry-After seconds sent with 429s"),
+    error_rate: float = typer.Option(0.0, min=0.0, max=1.0, help="Fraction of API calls answered 500"),
+    bulk_job_seconds: float = typer.Option(0.0, min=0.0, help="How long bulk read jobs stay in progress"),
+) -> None:
+    """Serve a local Zoho Creator v2.1 stand-in with synthetic reports for offline sync and load tests."""
+    mock = create_mock_app(
+        MockZohoSettings(
+            rows=rows,
+            wide_columns=wide_columns,
+            seed=seed,
+            latency_ms=latency_ms,
+            max_page_size=page_size,
+            rate_limit_rate=rate_limit_rate,
+            retry_after_seconds=retry_after,
+            error_rate=error_rate,
+            bulk_job_seconds=bulk_job_seconds,
+        )
+    )
+    base_url = f"http://{host}:{port}"
+    console.print(f"[green]Zoho mock on {base_url}[/green] reports: {', '.join(mock.state.zoho.reports)}")
+    console.print(f"Set ZOHO_ACCOUNTS_URL={base_url} and ZOHO_BASE_URL={base_url}")
+    console.print(f"Request counts: {base_url}/__mock/stats")
+    uvicorn.run(mock, host=host, port=port, log_level="warning")
+
+
 @app.command()
 def ask(
     question: str = typer.Argument(..., help="Natural-language question"),
     config: Path = typer.Option(Path("config/app.yaml"), exists=True),
     max_rows: int = typer.Option(30, help="Max evidence rows"),
     table: bool = typer.Option(False, "--table/--no-table", help="Show evidence table output"),
+    approximate: bool = typer.Option(False, "--approximate", help="Estimate large aggregates from a sample"),
 ) -> None:
     """Ask one question and get bullet-point summary (table optional)."""
     settings = load_settings()
@@ -163,17 +364,19 @@ def ask(
         console.print("No local DuckDB found. Run `agent sync` first.")
         raise typer.Exit(code=1)
 
-    schema_summary = cache.read_schema_summary()
-    engine = QueryEngine(
-        settings=settings,
-        db_path=cache.db_path,
-        schema_summary=schema_summary,
-        allowed_tables=app_config.allowed_tables,
-        business_definitions=app_config.business_definitions,
-    )
+    options = engine_options(app_config, cache)
+    filter_usage = options["filter_usage"]
+    engine = QueryEngine(settings=settings, db_path=cache.db_path, **options)
 
-    with console.status("[cyan]Analyzing data and generating answer...[/cyan]", spinner="dots"):
-        answer = engine.answer(QueryRequest(question=question, max_evidence_rows=max_rows))
+    try:
+        with console.status("[cyan]Analyzing data and generating answer...[/cyan]", spinner="dots"):
+            answer = engine.answer(QueryRequest(question=question, max_evidence_rows=max_rows, approximate=approximate))
+    except QueryGuardError as exc:
+        console.print(f"[red]{exc}[/red]")
+        raise typer.Exit(code=1) from exc
+    finally:
+        if filter_usage is not None:
+            filter_usage.flush()
     cache.write_last_answer(answer.model_dump(mode="json"))
 
     console.print("\n[bold]Summary[/bold]")
@@ -189,6 +392,81 @@ def ask(
         console.print(evidence)
 
 
+@app.command("ask-batch")
+def ask_batch(
+    questions_file: Path = typer.Argument(..., exists=True, help="One question per line"),
+    config: Path = typer.Option(Path("config/app.yaml"), exists=True),
+    max_rows: int = typer.Option(30, help="Max evidence rows"),
+    approximate: bool = typer.Option(False, "--approximate", help="Estimate large aggregates from a sample"),
+    concurrency: int | None = typer.Option(None, min=1, help="Questions in flight (default: query.batch_concurrency)"),
+    output: Path | None = typer.Option(None, help="Write NDJSON here instead of stdout"),
+) -> None:
+    """Answer a file of questions concurrently, one NDJSON line per result as it completes."""
+    settings = load_settings()
+    app_config = load_app_config(config)
+    cache = CacheManager(Path(".cache") / app_config.app_name)
+    if not cache.db_path.exists():
+        console.print("No local DuckDB found. Run `agent sync` first.")
+        raise typer.Exit(code=1)
+
+    questions = questions_file.read_text(encoding="utf-8").splitlines()
+    options = engine_options(app_config, cache)
+    llm_settings = app_config.llm
+    ticket = None
+    if llm_settings.max_concurrent_calls > 0:
+        admission = LLMAdmission(
+            max_concurrent=llm_settings.max_concurrent_calls,
+            max_queue_depth=llm_settings.max_queue_depth,
+            max_wait_seconds=llm_settings.max_queue_wait_seconds,
+        )
+        ticket = admission.ticket("batch", "batch")
+    executor = get_db_executor(app_config.query.db_max_workers)
+    # One LLM client for the whole batch, so its HTTP connections are reused across questions.
+    shared: dict[str, Any] = {}
+
+    async def run(sink: Any) -> dict:
+        summary: dict = {}
+        with ReadOnlyConnectionPool(
+            cache.db_path, app_config.query.db_max_workers, app_config.query.query_max_threads
+        ) as pool:
+
+            async def answer(question: str) -> dict:
+                engine = AsyncQueryEngine(
+                    settings=settings,
+                    db_path=cache.db_path,
+                    llm=shared.get("llm"),
+                    admission=ticket,
+                    connection_pool=pool,
+                    executor=executor,
+                    **options,
+                )
+                shared.setdefault("llm", engine.llm)
+                request = QueryRequest(question=question, max_evidence_rows=max_rows, approximate=approximate)
+                return (await engine.aanswer(request)).model_dump(mode="json")
+
+            async for line in run_batch(questions, answer, concurrency or app_config.query.batch_concurrency):
+                sink.write(json.dumps(line, default=str) + "\n")
+                sink.flush()
+                summary = line
+        return summary
+
+    try:
+        if output is None:
+            summary = asyncio.run(run(sys.stdout))
+        else:
+            with output.open("w", encoding="utf-8") as sink:
+                summary = asyncio.run(run(sink))
+            console.print(
+                f"{summary['unique']} distinct of {summary['questions']} questions in {summary['seconds']:.1f}s, "
+                f"{summary['failed']} failed; results in {output}"
+            )
+    finally:
+        if options["filter_usage"] is not None:
+            options["filter_usage"].flush()
+    if summary["failed"]:
+        raise typer.Exit(code=1)
+
+
 @app.command()
 def chat(config: Path = typer.Option(Path("config/app.yaml"), exists=True)) -> None:
     """Start interactive terminal chat."""
@@ -197,7 +475,7 @@ def chat(config: Path = typer.Option(Path("config/app.yaml"), exists=True)) -> N
         q = typer.prompt("agent>")
         if q.strip().lower() in {"exit", "quit"}:
             break
-        ask(question=q, config=config)
+        ask(question=q, config=config, approximate=False)
 
 
 @app.command()
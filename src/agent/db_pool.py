@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import duckdb
+
+from agent.query_guard import apply_thread_cap
+
+
+class ReadOnlyConnectionPool:
+    """Up to `size` cursors over one read-only DuckDB handle, shared by concurrent queries.
+
+    Opening the database file once and handing out cursors skips the per-query connect and
+    catalog load, and every cursor sees the same snapshot of the file. Cursors are created on
+    first use and returned for reuse; callers block while all `size` are borrowed. `threads`
+    caps DuckDB's worker threads once, on the handle, for every cursor.
+    """
+
+    def __init__(self, db_path: Path, size: int = 4, threads: int = 0) -> None:
+        self.db_path = db_path
+        self.size = max(1, size)
+        self._root = duckdb.connect(str(db_path), read_only=True)
+        apply_thread_cap(self._root, threads)
+        # None is the closed marker: it wakes callers still waiting for a cursor.
+        self._idle: queue.LifoQueue[duckdb.DuckDBPyConnection | None] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._returned = threading.Condition(self._lock)
+        self._borrowed: set[duckdb.DuckDBPyConnection] = set()
+        self._created = 0
+        self._closed = False
+        self._root_closed = False
+
+    def _borrow(self) -> duckdb.DuckDBPyConnection:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed.")
+            if self._idle.empty() and self._created < self.size:
+                self._created += 1
+                conn = self._root.cursor()
+                self._borrowed.add(conn)
+                return conn
+        conn = self._idle.get()
+        with self._lock:
+            if conn is None or self._closed:
+                self._idle.put(None)
+                if conn is not None:
+                    conn.close()
+                raise RuntimeError("Connection pool is closed.")
+            self._borrowed.add(conn)
+        return conn
+
+    def _return(self, conn: duckdb.DuckDBPyConnection) -> None:
+        with self._lock:
+            self._borrowed.discard(conn)
+            if not self._closed:
+                self._idle.put(conn)
+                return
+            conn.close()
+            self._returned.notify_all()
+            # close() gave up waiting for this cursor and left the handle to the last one back.
+            close_root = not self._borrowed and not self._root_closed
+            self._root_closed = self._root_closed or close_root
+        if close_root:
+            self._root.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        conn = self._borrow()
+        try:
+            yield conn
+        finally:
+            self._return(conn)
+
+    def close(self, timeout_seconds: float = 5.0) -> None:
+        """Close idle cursors, interrupt borrowed ones and close the handle once they are all back.
+
+        Queries still running on borrowed cursors (a batch whose client went away) are interrupted,
+        and the handle is closed only after every cursor has come back, never under a live query.
+        If some are still out after `timeout_seconds`, the last one returned closes the handle.
+        """
+        with self._lock:
+            self._closed = True
+            while not self._idle.empty():
+                conn = self._idle.get_nowait()
+                if conn is not None:
+                    conn.close()
+            self._idle.put(None)
+            deadline = time.monotonic() + timeout_seconds
+            while self._borrowed and time.monotonic() < deadline:
+                # Again on every pass: a guarded query runs EXPLAIN first, then the query itself.
+                for conn in self._borrowed:
+                    conn.interrupt()
+                self._returned.wait(min(0.05, max(0.0, deadline - time.monotonic())))
+            if self._borrowed or self._root_closed:
+                return
+            self._root_closed = True
+        self._root.close()
+
+    def __enter__(self) -> ReadOnlyConnectionPool:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
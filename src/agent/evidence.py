@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+@dataclass(frozen=True)
+class EvidenceBatch:
+    """Columnar query result; rows become dicts only where a caller needs them (API edge, templates)."""
+
+    table: pa.Table
+
+    @classmethod
+    def from_rows(cls, rows: list[dict[str, Any]], columns: list[str]) -> "EvidenceBatch":
+        data = {col: [row.get(col) for row in rows] for col in columns}
+        return cls(pa.table(data) if columns else pa.table({}))
+
+    @property
+    def columns(self) -> list[str]:
+        return list(self.table.column_names)
+
+    @property
+    def num_rows(self) -> int:
+        return self.table.num_rows
+
+    @property
+    def nbytes(self) -> int:
+        return self.table.nbytes
+
+    def head(self, n: int) -> "EvidenceBatch":
+        return self if n >= self.num_rows else EvidenceBatch(self.table.slice(0, n))
+
+    def to_rows(self) -> list[dict[str, Any]]:
+        return self.table.to_pylist()
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+
+def evidence_from_cursor(cursor: Any) -> EvidenceBatch:
+    result = cursor.arrow()
+    # DuckDB >= 1.4 hands back a RecordBatchReader, older releases a Table.
+    if isinstance(result, pa.RecordBatchReader):
+        result = result.read_all()
+    return EvidenceBatch(result)
+
+
+def _json_ready(column: pa.ChunkedArray) -> list[Any]:
+    kind = column.type
+    if pa.types.is_decimal(kind):
+        column = pc.cast(column, pa.float64())
+    elif not (
+        pa.types.is_integer(kind)
+        or pa.types.is_floating(kind)
+        or pa.types.is_boolean(kind)
+        or pa.types.is_string(kind)
+        or pa.types.is_null(kind)
+    ):
+        # Dates, timestamps, etc. are cast once per column instead of per value via default=str.
+        column = pc.cast(column, pa.string())
+    return column.to_pylist()
+
+
+def encode_evidence(evidence: EvidenceBatch, row_cap: int) -> str:
+    """Header line plus one JSON array per row, so column names are sent once instead of per row."""
+    capped = evidence.head(row_cap)
+    columns = [_json_ready(column) for column in capped.table.columns]
+    lines = [json.dumps(capped.columns)]
+    lines.extend(json.dumps(values, default=str) for values in zip(*columns))
+    return "\n".join(lines)
@@ -0,0 +1,385 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+from agent.result_summary import format_value, humanize_column
+
+NUMERIC_TYPES = ("INT", "DECIMAL", "DOUBLE", "FLOAT", "REAL", "NUMERIC")
+GENERIC_TABLE_WORDS = {"all", "report", "reports", "table", "list", "data"}
+# Words that signal a question needs more than the handful of templates below.
+COMPLEX_TERMS = {
+    "average", "avg", "mean", "median", "why", "compare", "versus", "vs", "trend", "between",
+    "last", "previous", "month", "week", "year", "today", "yesterday", "percent", "percentage",
+    "share", "ratio", "than", "join", "and", "or", "not", "without", "except",
+}
+# Question scaffolding that carries no meaning of its own. Every other word must be explained by a
+# table, column, synonym or value, otherwise the question says something the templates would drop.
+FILLER_WORDS = {
+    "a", "an", "the", "of", "in", "on", "for", "with", "to", "is", "are", "was", "were", "be", "there",
+    "have", "has", "do", "does", "did", "we", "our", "my", "me", "i", "you", "what", "which", "whose",
+    "s", "show", "give", "get", "find", "tell", "list", "please", "how", "many", "much", "number",
+    "count", "total", "sum", "top", "by", "per", "each", "all", "details", "detail", "info",
+    "information", "profile", "record", "records", "overall",
+}
+
+_WORD_RE = re.compile(r"[a-z0-9][a-z0-9+\-./]*")
+_TOP_RE = re.compile(r"\btop\s+(\d{1,3})\b")
+_COUNT_RE = re.compile(r"\b(how many|count of|count|number of)\b")
+_TOTAL_RE = re.compile(r"\b(total|sum of|sum)\b")
+_LOOKUP_RE = re.compile(r"\b(details|detail|info|information|profile|record)\b")
+_ID_RE = re.compile(r"\b([a-z]{1,4}-?\d{2,})\b")
+
+
+def _sql_literal(value: Any) -> str:
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _contains_phrase(text: str, phrase: str) -> bool:
+    if not phrase:
+        return False
+    return _phrase_re(phrase).search(text) is not None
+
+
+def _phrase_re(phrase: str) -> re.Pattern[str]:
+    return re.compile(rf"(?<![a-z0-9]){re.escape(phrase)}(?![a-z0-9+\-])")
+
+
+def _remove_phrase(text: str, phrase: str) -> str:
+    """Blank out whole-token occurrences only, so removing "won" leaves "wonderful" intact."""
+    return _phrase_re(phrase).sub(" ", text) if phrase else text
+
+
+@dataclass
+class _Column:
+    name: str
+    dtype: str
+    phrase: str
+
+    @property
+    def is_numeric(self) -> bool:
+        return any(t in self.dtype.upper() for t in NUMERIC_TYPES)
+
+
+@dataclass
+class _Table:
+    name: str
+    aliases: set[str]
+    columns: list[_Column]
+    key_columns: list[str]
+    is_grouped_report: bool
+
+    @property
+    def subject(self) -> str:
+        base = [w for w in self.name.split("_") if w not in GENERIC_TABLE_WORDS]
+        return " ".join(base) or self.name
+
+
+@dataclass
+class FastPathPlan:
+    intent: str
+    sql: str
+    confidence: float
+    table: str
+    subject: str
+    group_column: str | None = None
+    measure_column: str | None = None
+    filters: list[tuple[str, Any]] = field(default_factory=list)
+    limit: int | None = None
+    # Question words no table, column, synonym or value accounted for; any of them sinks confidence.
+    unexplained: list[str] = field(default_factory=list)
+
+
+class IntentMatcher:
+    """Compile simple aggregate and lookup questions straight to SQL, without the LLM."""
+
+    def __init__(self, tables: list[_Table], synonyms: dict[str, tuple[str, str]], min_confidence: float = 0.75) -> None:
+        self.tables = tables
+        self.synonyms = synonyms
+        self.min_confidence = min_confidence
+        self._values: list[tuple[str, str, str, Any]] = []
+        self._by_name = {t.name: t for t in tables}
+
+    @classmethod
+    def from_schema(
+        cls,
+        schema_summary: dict,
+        allowed_tables: list[str],
+        business_definitions: dict[str, str] | None = None,
+        min_confidence: float = 0.75,
+    ) -> "IntentMatcher":
+        allowed = {t.lower() for t in allowed_tables}
+        tables: list[_Table] = []
+        values: list[tuple[str, str, str, Any]] = []
+        for item in schema_summary.get("tables", []):
+            name = str(item.get("table_name", ""))
+            if not name or (allowed and name.lower() not in allowed):
+                continue
+            columns = [
+                _Column(name=c["name"], dtype=str(c.get("dtype", "")), phrase=c["name"].lower().replace("_", " "))
+                for c in item.get("columns", [])
+            ]
+            words = [w for w in name.lower().split("_") if w and w not in GENERIC_TABLE_WORDS]
+            head = words[: words.index("by")] if "by" in words else words
+            aliases: set[str] = set()
+            if head:
+                phrase = " ".join(head)
+                aliases.update({phrase, phrase.rstrip("s"), phrase.rstrip("s") + "s"})
+            tables.append(
+                _Table(
+                    name=name,
+                    aliases={a for a in aliases if a},
+                    columns=columns,
+                    key_columns=list(item.get("key_columns") or []),
+                    is_grouped_report="_by_" in name.lower(),
+                )
+            )
+            for col in item.get("columns", []):
+                for value in col.get("sample_values") or []:
+                    if isinstance(value, str) and 2 <= len(value.strip()) <= 60:
+                        values.append((value.strip().lower(), name, col["name"], value))
+
+        # Business definitions that point at a column ("revenue": "bills_report.amount") act as synonyms.
+        synonyms: dict[str, tuple[str, str]] = {}
+        known = {(t.name, c.name) for t in tables for c in t.columns}
+        for term, definition in (business_definitions or {}).items():
+            target = str(definition).strip()
+            if "." in target:
+                table_name, col_name = target.split(".", 1)
+                if (table_name, col_name) in known:
+                    synonyms[term.lower()] = (table_name, col_name)
+
+        matcher = cls(tables, synonyms, min_confidence=min_confidence)
+        # Longest values first so "o+" does not shadow a longer match.
+        matcher._values = sorted(values, key=lambda v: -len(v[0]))
+        return matcher
+
+    def _explicit_tables(self, text: str) -> list[_Table]:
+        hits = [t for t in self.tables if any(_contains_phrase(text, a) for a in t.aliases)]
+        # Raw tables answer aggregates better than Zoho's pre-grouped "X by Y" reports.
+        return sorted(hits, key=lambda t: (t.is_grouped_report, -max(len(a) for a in t.aliases)))
+
+    def _value_filters(self, text: str) -> list[list[tuple[str, str, Any]]]:
+        """Return, per value mentioned in the question, every (table, column, value) it could mean."""
+        matched: dict[str, list[tuple[str, str, Any]]] = {}
+        consumed = text
+        for norm, table, column, original in self._values:
+            if norm in matched:
+                matched[norm].append((table, column, original))
+            elif _contains_phrase(consumed, norm):
+                matched[norm] = [(table, column, original)]
+                consumed = _remove_phrase(consumed, norm)
+        return list(matched.values())
+
+    def _unexplained(self, text: str, table: _Table, values: list[str], plan: FastPathPlan) -> list[str]:
+        """Words of the question that nothing in the plan's vocabulary accounts for."""
+        phrases = set(values) | set(table.aliases) | set(GENERIC_TABLE_WORDS)
+        phrases.update(term for term, (syn_table, _) in self.synonyms.items() if syn_table == table.name)
+        for col in table.columns:
+            phrases.update({col.phrase, col.phrase + "s"})
+        if plan.limit is not None:
+            phrases.add(f"top {plan.limit}")
+        if plan.intent == "lookup":
+            phrases.update(str(value).lower() for _, value in plan.filters)
+        rest = text
+        for phrase in sorted(phrases, key=len, reverse=True):
+            rest = _remove_phrase(rest, phrase)
+        return [word for word in rest.split() if word not in FILLER_WORDS]
+
+    def _column_in(self, table: _Table, text: str, numeric: bool | None = None) -> _Column | None:
+        for term, (syn_table, syn_col) in self.synonyms.items():
+            if syn_table == table.name and _contains_phrase(text, term):
+                return next(c for c in table.columns if c.name == syn_col)
+        candidates = [c for c in table.columns if numeric is None or c.is_numeric == numeric]
+        for col in sorted(candidates, key=lambda c: -len(c.phrase)):
+            if _contains_phrase(text, col.phrase):
+                return col
+        return None
+
+    def _group_column(self, table: _Table, text: str) -> _Column | None:
+        match = re.search(r"\b(?:by|per|for each|each)\s+(.+)$", text)
+        if not match:
+            return None
+        return self._column_in(table, match.group(1))
+
+    def match(self, question: str) -> FastPathPlan | None:
+        text = " ".join(_WORD_RE.findall(question.lower()))
+        if not text:
+            return None
+
+        top = _TOP_RE.search(text)
+        if top:
+            intent = "top_n"
+        elif _COUNT_RE.search(text):
+            intent = "count"
+        elif _TOTAL_RE.search(text):
+            intent = "total"
+        elif _LOOKUP_RE.search(text) or _ID_RE.search(text):
+            intent = "lookup"
+        elif re.search(r"\b(by|per)\b", text):
+            intent = "count"
+        else:
+            return None
+        confidence = 0.4 if intent != "count" or _COUNT_RE.search(text) else 0.3
+
+        value_filters = self._value_filters(text)
+        explicit = self._explicit_tables(text)
+        if explicit:
+            table = explicit[0]
+            confidence += 0.4
+        elif value_filters:
+            options = sorted(value_filters[0], key=lambda v: self._by_name[v[0]].is_grouped_report)
+            table = self._by_name[options[0][0]]
+            confidence += 0.25
+        else:
+            table = self._table_by_columns(text)
+            if table is None:
+                return None
+            confidence += 0.25
+
+        filters: list[tuple[str, Any]] = []
+        for options in value_filters:
+            in_table = [(col, val) for t, col, val in options if t == table.name]
+            if in_table:
+                filters.append(in_table[0])
+            else:
+                # A value we recognised but cannot place in this table: let the LLM handle it.
+                confidence -= 0.3
+        words = set(text.split())
+        if words & COMPLEX_TERMS:
+            confidence -= 0.5
+
+        plan = self._compile(intent, table, text, filters, int(top.group(1)) if top else None)
+        if plan is None:
+            return None
+        # "deals over 200", "in 2024", "did Ravi close": a qualifier the SQL would silently drop.
+        mentioned = [str(options[0][2]).strip().lower() for options in value_filters]
+        plan.unexplained = self._unexplained(text, table, mentioned, plan)
+        if plan.unexplained:
+            confidence -= 0.6
+        plan.confidence = round(max(0.0, min(1.0, confidence + plan.confidence)), 2)
+        return plan
+
+    def _table_by_columns(self, text: str) -> _Table | None:
+        scored = []
+        for table in self.tables:
+            hits = sum(1 for c in table.columns if _contains_phrase(text, c.phrase))
+            if hits:
+                scored.append((hits, not table.is_grouped_report, table))
+        if not scored:
+            return None
+        scored.sort(key=lambda s: (s[0], s[1]), reverse=True)
+        return scored[0][2]
+
+    def _where(self, filters: list[tuple[str, Any]]) -> str:
+        if not filters:
+            return ""
+        return " WHERE " + " AND ".join(f"{_quote_ident(c)} = {_sql_literal(v)}" for c, v in filters)
+
+    def _compile(
+        self,
+        intent: str,
+        table: _Table,
+        text: str,
+        filters: list[tuple[str, Any]],
+        limit: int | None,
+    ) -> FastPathPlan | None:
+        where = self._where(filters)
+        source = f"FROM {table.name}{where}"
+        group = self._group_column(table, text)
+        base = {"table": table.name, "subject": table.subject, "filters": filters}
+
+        if intent == "lookup":
+            id_match = _ID_RE.search(text)
+            if not filters and id_match and table.key_columns:
+                filters = [(table.key_columns[0], id_match.group(1).upper())]
+                base["filters"] = filters
+                source = f"FROM {table.name}{self._where(filters)}"
+            if not filters:
+                return None
+            return FastPathPlan(intent="lookup", sql=f"SELECT * {source} LIMIT 20", confidence=0.2, **base)
+
+        if intent == "count":
+            if group:
+                g = _quote_ident(group.name)
+                sql = f"SELECT {g}, COUNT(*) AS count {source} GROUP BY {g} ORDER BY count DESC, {g}"
+                return FastPathPlan(intent="count_by", sql=sql, confidence=0.2, group_column=group.name, **base)
+            return FastPathPlan(intent="count", sql=f"SELECT COUNT(*) AS count {source}", confidence=0.2, **base)
+
+        measure = self._column_in(table, text.split(" by ")[0] if group else text, numeric=True)
+        if intent == "total":
+            if measure is None:
+                return None
+            m = _quote_ident(measure.name)
+            if group:
+                g = _quote_ident(group.name)
+                sql = f"SELECT {g}, SUM({m}) AS total {source} GROUP BY {g} ORDER BY total DESC, {g}"
+                return FastPathPlan(
+                    intent="total_by", sql=sql, confidence=0.2, group_column=group.name, measure_column=measure.name, **base
+                )
+            return FastPathPlan(
+                intent="total", sql=f"SELECT SUM({m}) AS total {source}", confidence=0.2, measure_column=measure.name, **base
+            )
+
+        # top_n: "top 5 <dimension> by <measure>", falling back to record counts.
+        head = text.split(" by ")[0]
+        dimension = self._column_in(table, head, numeric=False)
+        if dimension is None:
+            return None
+        d = _quote_ident(dimension.name)
+        if measure is not None and " by " in text:
+            m = _quote_ident(measure.name)
+            agg, measure_name = f"SUM({m}) AS total", measure.name
+        else:
+            agg, measure_name = "COUNT(*) AS total", None
+        sql = f"SELECT {d}, {agg} {source} GROUP BY {d} ORDER BY total DESC, {d} LIMIT {limit}"
+        return FastPathPlan(
+            intent="top_n",
+            sql=sql,
+            confidence=0.2,
+            group_column=dimension.name,
+            measure_column=measure_name,
+            limit=limit,
+            **base,
+        )
+
+
+def render_fast_path_summary(plan: FastPathPlan, rows: list[dict[str, Any]], cols: list[str]) -> str:
+    filter_text = "".join(f" with {humanize_column(c).lower()} {v}" for c, v in plan.filters)
+    if not rows:
+        return f"- No matching {plan.subject} found{filter_text}."
+
+    if plan.intent == "count":
+        return f"- There are {format_value(rows[0].get('count'))} {plan.subject}{filter_text}."
+    if plan.intent == "total":
+        measure = humanize_column(plan.measure_column or "total").lower()
+        return f"- Total {measure} is {format_value(rows[0].get('total'))}{filter_text}."
+    if plan.intent == "lookup":
+        lines = [f"- Found {len(rows)} matching {plan.subject}{filter_text}."] if len(rows) > 1 else []
+        for col in cols:
+            value = rows[0].get(col)
+            if value is None or value == "":
+                continue
+            lines.append(f"- {humanize_column(col)}: {value}")
+            if len(lines) >= 8:
+                break
+        return "\n".join(lines)
+
+    value_col = "count" if "count" in cols else "total"
+    if value_col == "total" and plan.measure_column:
+        measure = humanize_column(plan.measure_column).lower()
+        lines = [f"- {row.get(plan.group_column)}: total {measure} {format_value(row.get(value_col))}" for row in rows[:8]]
+    else:
+        lines = [f"- {row.get(plan.group_column)}: {format_value(row.get(value_col))} {plan.subject}" for row in rows[:8]]
+    if len(rows) > 8:
+        lines.append(f"- {len(rows) - 8} more groups not shown.")
+    return "\n".join(lines)
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import re
+
+PREVIOUS_RELATION = "previous_result"
+
+# Explicit pointers back at the last answer.
+_REFERENCE_RE = re.compile(
+    r"\b(those|these|them|that result|those results|that list|the above|of them|among them|"
+    r"from (?:that|those|these)|that one|those ones|which of (?:them|those|these))\b",
+    re.IGNORECASE,
+)
+_OBJECT = r"(?:it|them|that|those|these|the (?:ones|results?|list|rows))"
+# Refinement verbs that only make sense against a previous result: "sort by amount", "only the
+# ones that were won", "limit it to 5". Fresh questions that merely open with a verb ("Sort
+# doctors by experience", "Last 7 days appointments") are left alone.
+_LEADING_RE = re.compile(
+    rf"^\s*(?:(?:sort|order|rank)\s+(?:{_OBJECT}\s+)?by\b|"
+    rf"(?:only|just|keep only|show only)\s+(?:the\s+)?(?:ones|rows|results?)\b|"
+    rf"(?:filter|exclude|narrow|limit|drop|remove)\s+{_OBJECT}\b|"
+    r"limit\s+to\b|narrow\s+down\b|what about\b|how about\b)",
+    re.IGNORECASE,
+)
+_LEADING_WITH_RE = re.compile(r"^\s*WITH(?P<recursive>\s+RECURSIVE)?\s+", re.IGNORECASE)
+
+
+def looks_like_follow_up(question: str) -> bool:
+    """Refinements point back at the last answer ("those", "them") or open with a verb that needs one."""
+    return bool(_REFERENCE_RE.search(question) or _LEADING_RE.search(question))
+
+
+def compose_follow_up_sql(previous_sql: str, follow_up_sql: str) -> str:
+    """Bind the previous answer's SQL as a materialized CTE the follow-up reads from."""
+    base = f"{PREVIOUS_RELATION} AS MATERIALIZED ({previous_sql.strip().rstrip(';')})"
+    follow_up = follow_up_sql.strip().rstrip(";")
+    leading_with = _LEADING_WITH_RE.match(follow_up)
+    if leading_with:
+        # Join the follow-up's own WITH list; RECURSIVE has to stay right after WITH.
+        keyword = "WITH RECURSIVE" if leading_with.group("recursive") else "WITH"
+        return f"{keyword} {base}, {follow_up[leading_with.end():]}"
+    return f"WITH {base} {follow_up}"
+
+
+def build_follow_up_prompt(
+    question: str,
+    previous_sql: str,
+    previous_columns: list[str],
+    allowed_tables: list[str],
+) -> str:
+    return (
+        "You are a SQL planner for DuckDB. Output ONLY SQL.\n"
+        f"The user is refining their previous answer. Its rows are available as the relation {PREVIOUS_RELATION}.\n"
+        "Rules:\n"
+        "- Use exactly one SELECT statement.\n"
+        "- Never use INSERT/UPDATE/DELETE/DDL/PRAGMA.\n"
+        f"- Read from {PREVIOUS_RELATION}; join an allowed table only if the question needs a column it lacks.\n"
+        "- Prefer explicit column names and deterministic ordering.\n\n"
+        f"Allowed tables: {allowed_tables}\n"
+        f"{PREVIOUS_RELATION} columns: {previous_columns}\n"
+        f"{PREVIOUS_RELATION} was produced by: {previous_sql}\n\n"
+        f"Question: {question}\n"
+        "SQL:"
+    )
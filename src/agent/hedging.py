@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Awaitable, Callable
+
+from agent.metrics import METRICS
+
+BackupFactory = Callable[[], "tuple[str, Callable[[], Any]] | None"]
+AsyncBackupFactory = Callable[[], Awaitable["tuple[str, Callable[[], Awaitable[Any]]] | None"]]
+
+
+@dataclass
+class HedgePolicy:
+    percentile: float = 0.9
+    min_samples: int = 20
+    min_delay_seconds: float = 0.5
+    # Hedged requests allowed per primary request, e.g. 0.1 = at most ~10% extra spend.
+    max_extra_ratio: float = 0.1
+    burst: float = 2.0
+
+
+class LatencyTracker:
+    def __init__(self, window: int = 200) -> None:
+        self._lock = Lock()
+        self._samples: dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, model_id: str, seconds: float) -> None:
+        with self._lock:
+            self._samples[model_id].append(seconds)
+
+    def percentile(self, model_id: str, pct: float, min_samples: int = 1) -> float | None:
+        with self._lock:
+            samples = sorted(self._samples.get(model_id, ()))
+        if len(samples) < max(1, min_samples):
+            return None
+        idx = min(len(samples) - 1, max(0, math.ceil(pct * len(samples)) - 1))
+        return samples[idx]
+
+
+class HedgeBudget:
+    """Token bucket: every primary call earns max_extra_ratio tokens, every hedge spends one."""
+
+    def __init__(self, ratio: float, burst: float) -> None:
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = burst
+        self._lock = Lock()
+
+    def earn(self) -> None:
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+
+class _Race:
+    """Latency samples of one sync hedged call: every successful attempt leaves exactly one."""
+
+    def __init__(self, latencies: LatencyTracker) -> None:
+        self._latencies = latencies
+        self._lock = Lock()
+        self._running: dict[int, tuple[str, float]] = {}
+
+    def timed(self, model_id: str, fn: Callable[[], Any]) -> Callable[[], Any]:
+        def run() -> Any:
+            key = id(run)
+            with self._lock:
+                self._running[key] = (model_id, time.monotonic())
+            try:
+                result = fn()
+            finally:
+                with self._lock:
+                    started = self._running.pop(key, None)
+            # Nothing to record once `censor` has taken this attempt's sample, or after a failure.
+            if started is not None:
+                self._latencies.record(model_id, time.monotonic() - started[1])
+            return result
+
+        return run
+
+    def censor(self) -> None:
+        """Record every attempt still running at its elapsed time, as the async path does for cancelled tasks."""
+        now = time.monotonic()
+        with self._lock:
+            running, self._running = self._running, {}
+        for model_id, started in running.values():
+            self._latencies.record(model_id, now - started)
+
+
+class LLMHedger:
+    """Fire a backup request once the primary is slower than its observed percentile."""
+
+    def __init__(self, policy: HedgePolicy | None = None, executor: ThreadPoolExecutor | None = None) -> None:
+        self.policy = policy or HedgePolicy()
+        self.latencies = LatencyTracker()
+        self.budget = HedgeBudget(self.policy.max_extra_ratio, self.policy.burst)
+        self._executor = executor or ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+    def hedge_delay(self, model_id: str) -> float | None:
+        observed = self.latencies.percentile(model_id, self.policy.percentile, self.policy.min_samples)
+        if observed is None:
+            return None
+        return max(self.policy.min_delay_seconds, observed)
+
+    def call(self, model_id: str, primary: Callable[[], Any], backup_factory: BackupFactory) -> tuple[str, Any]:
+        """The model that answered and its response."""
+        self.budget.earn()
+        delay = self.hedge_delay(model_id)
+        race = _Race(self.latencies)
+        timed_primary = race.timed(model_id, primary)
+        if delay is None:
+            return model_id, timed_primary()
+
+        primary_future = self._executor.submit(timed_primary)
+        done, _ = wait([primary_future], timeout=delay)
+        if done:
+            return model_id, primary_future.result()
+        backup = backup_factory()
+        if backup is None or not self.budget.try_spend():
+            return model_id, primary_future.result()
+
+        backup_model, backup_fn = backup
+        METRICS.incr("llm_hedges_fired_total")
+        backup_future = self._executor.submit(race.timed(backup_model, backup_fn))
+        return self._first_success(race, {primary_future: model_id, backup_future: backup_model})
+
+    @staticmethod
+    def _first_success(race: _Race, models: dict[Future[Any], str]) -> tuple[str, Any]:
+        primary, backup = models
+        pending = set(models)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # Threads cannot be interrupted; an unstarted loser is cancelled, a running one
+                    # is left to finish and its result dropped.
+                    for loser in pending:
+                        loser.cancel()
+                    race.censor()
+                    if future is backup:
+                        METRICS.incr("llm_hedges_won_total")
+                    return models[future], future.result()
+        # Both failed: surface the primary error so the fallback cascade can classify it.
+        return models[primary], primary.result()
+
+    async def acall(
+        self,
+        model_id: str,
+        primary: Callable[[], Awaitable[Any]],
+        backup_factory: AsyncBackupFactory,
+    ) -> tuple[str, Any]:
+        """The model that answered and its response."""
+        self.budget.earn()
+        delay = self.hedge_delay(model_id)
+
+        async def timed(name: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+            started = time.monotonic()
+            result = await fn()
+            self.latencies.record(name, time.monotonic() - started)
+            return result
+
+        if delay is None:
+            return model_id, await timed(model_id, primary)
+
+        primary_started = time.monotonic()
+        primary_task = asyncio.ensure_future(timed(model_id, primary))
+        done, _ = await asyncio.wait({primary_task}, timeout=delay)
+        if done:
+            return model_id, primary_task.result()
+        backup = await backup_factory()
+        if backup is None or not self.budget.try_spend():
+            return model_id, await primary_task
+
+        backup_model, backup_fn = backup
+        METRICS.incr("llm_hedges_fired_total")
+        backup_started = time.monotonic()
+        backup_task = asyncio.ensure_future(timed(backup_model, backup_fn))
+        pending = {primary_task, backup_task}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup_task:
+                            METRICS.incr("llm_hedges_won_total")
+                            return backup_model, task.result()
+                        return model_id, task.result()
+            return model_id, primary_task.result()
+        finally:
+            now = time.monotonic()
+            for name, task, started in (
+                (model_id, primary_task, primary_started),
+                (backup_model, backup_task, backup_started),
+            ):
+                if not task.done():
+                    task.cancel()
+                    # A censored sample: the loser took at least this long. Dropping it would leave
+                    # only the fast calls in the window and pull the percentile, and the delay, down.
+                    self.latencies.record(name, now - started)
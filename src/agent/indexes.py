@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from threading import Lock
+from typing import Any, Iterator
+
+import duckdb
+
+try:
+    import fcntl
+except ImportError:  # Windows: flushes stay atomic, but concurrent workers may drop each other's counts.
+    fcntl = None  # type: ignore[assignment]
+
+from agent.metrics import METRICS
+from agent.settings import AppConfig, IndexSettings
+
+INDEX_CATALOG = "__indexes"
+_CATALOG_COLUMNS = (
+    "name VARCHAR, table_name VARCHAR, column_name VARCHAR, reason VARCHAR, "
+    "build_ms DOUBLE, table_rows BIGINT, built_at TIMESTAMP"
+)
+KEY = "key"
+FILTER = "filter"
+# ART indexes only cover scalar columns; nested values and booleans gain nothing from a lookup.
+UNINDEXABLE_TYPES = ("[]", "STRUCT", "MAP", "UNION", "BOOLEAN", "BLOB")
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_IDENT = r'(?:"[^"]+"|[a-zA-Z_][a-zA-Z0-9_]*)'
+_RELATION_RE = re.compile(
+    rf"\b(?:from|join)\s+(?P<table>{_IDENT})(?:\s+(?:as\s+)?(?P<alias>(?!(?:where|on|join|left|right|inner|full|"
+    rf"cross|group|order|limit|using|natural)\b){_IDENT}))?",
+    re.IGNORECASE,
+)
+_WHERE_RE = re.compile(
+    r"\bwhere\b(?P<body>.+?)(?=\bgroup\s+by\b|\border\s+by\b|\bhaving\b|\blimit\b|\bqualify\b|\bwindow\b|"
+    r"\bunion\b|$)",
+    re.IGNORECASE | re.DOTALL,
+)
+_PREDICATE_RE = re.compile(
+    rf"(?:(?P<qualifier>{_IDENT})\s*\.\s*)?(?P<column>{_IDENT})\s*"
+    r"(?:=|<>|!=|<=|>=|<|>|\bnot\s+in\b|\bin\b|\bnot\s+like\b|\blike\b|\bilike\b|\bbetween\b|\bis\b)",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class IndexTarget:
+    table: str
+    column: str
+    reason: str
+
+
+@dataclass(frozen=True)
+class IndexInfo:
+    name: str
+    table: str
+    column: str
+    reason: str
+    build_ms: float
+    table_rows: int
+
+
+def _unquote(identifier: str) -> str:
+    return identifier[1:-1] if identifier.startswith('"') else identifier
+
+
+def index_name(table: str, column: str) -> str:
+    safe = "".join(ch if ch.isalnum() else "_" for ch in column.lower()).strip("_") or "col"
+    return f"idx_{table}__{safe}"
+
+
+def key_index_targets(app_config: AppConfig) -> list[IndexTarget]:
+    return [
+        IndexTarget(report.table_name, column, KEY)
+        for report in app_config.report_models
+        for column in report.key_columns or []
+    ]
+
+
+def reset_index_catalog(conn: duckdb.DuckDBPyConnection) -> None:
+    """Ingestion replaces every table, which drops their indexes along with them."""
+    conn.execute(f"CREATE OR REPLACE TABLE {INDEX_CATALOG} ({_CATALOG_COLUMNS})")
+
+
+def create_indexes(conn: duckdb.DuckDBPyConnection, targets: list[IndexTarget]) -> list[IndexInfo]:
+    """Build an ART index per target that names an existing scalar column and record its build cost."""
+    tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+    catalogued = {row[0] for row in conn.execute(f"SELECT name FROM {INDEX_CATALOG}").fetchall()}
+    built: list[IndexInfo] = []
+    for target in targets:
+        if target.table not in tables:
+            continue
+        columns = {row[0].lower(): (row[0], row[1]) for row in conn.execute(f"DESCRIBE {target.table}").fetchall()}
+        found = columns.get(target.column.lower())
+        if found is None or any(kind in str(found[1]).upper() for kind in UNINDEXABLE_TYPES):
+            continue
+        column = found[0]
+        name = index_name(target.table, column)
+        if name in catalogued:
+            continue
+        started = time.perf_counter()
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {target.table} ("{column}")')
+        build_ms = (time.perf_counter() - started) * 1000
+        table_rows = int(conn.execute(f"SELECT COUNT(*) FROM {target.table}").fetchone()[0])
+        info = IndexInfo(name, target.table, column, target.reason, round(build_ms, 3), table_rows)
+        conn.execute(
+            f"INSERT INTO {INDEX_CATALOG} VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [info.name, info.table, info.column, info.reason, info.build_ms, info.table_rows, datetime.now(UTC)],
+        )
+        catalogued.add(name)
+        built.append(info)
+    return built
+
+
+def build_indexes(db_path: Path, targets: list[IndexTarget]) -> list[IndexInfo]:
+    conn = duckdb.connect(str(db_path), read_only=False)
+    try:
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {INDEX_CATALOG} ({_CATALOG_COLUMNS})")
+        return create_indexes(conn, targets)
+    finally:
+        conn.close()
+
+
+def read_index_catalog(db_path: Path) -> list[IndexInfo]:
+    conn = duckdb.connect(str(db_path), read_only=True)
+    try:
+        tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+        if INDEX_CATALOG not in tables:
+            return []
+        rows = conn.execute(
+            f"SELECT name, table_name, column_name, reason, build_ms, table_rows FROM {INDEX_CATALOG} ORDER BY name"
+        ).fetchall()
+    finally:
+        conn.close()
+    return [IndexInfo(*row) for row in rows]
+
+
+def indexes_to_payload(indexes: list[IndexInfo]) -> list[dict[str, Any]]:
+    return [
+        {
+            "name": i.name,
+            "table": i.table,
+            "column": i.column,
+            "reason": i.reason,
+            "build_ms": i.build_ms,
+            "table_rows": i.table_rows,
+        }
+        for i in indexes
+    ]
+
+
+def _columns_by_table(schema_summary: dict) -> dict[str, dict[str, str]]:
+    return {
+        table["table_name"]: {col["name"].lower(): col["name"] for col in table.get("columns", [])}
+        for table in schema_summary.get("tables", [])
+    }
+
+
+def filtered_columns(sql: str, columns_by_table: dict[str, dict[str, str]]) -> set[tuple[str, str]]:
+    """(table, column) pairs compared directly in a WHERE clause; wrapped expressions cannot use an index."""
+    text = _LITERAL_RE.sub("?", sql)
+    aliases: dict[str, str] = {}
+    for match in _RELATION_RE.finditer(text):
+        table = _unquote(match.group("table"))
+        if table not in columns_by_table:
+            continue
+        aliases[table.lower()] = table
+        if match.group("alias"):
+            aliases[_unquote(match.group("alias")).lower()] = table
+    referenced = set(aliases.values())
+
+    found: set[tuple[str, str]] = set()
+    for where in _WHERE_RE.finditer(text):
+        for predicate in _PREDICATE_RE.finditer(where.group("body")):
+            column = _unquote(predicate.group("column")).lower()
+            qualifier = predicate.group("qualifier")
+            if qualifier:
+                candidates = [aliases[_unquote(qualifier).lower()]] if _unquote(qualifier).lower() in aliases else []
+            else:
+                candidates = sorted(referenced)
+            for table in candidates:
+                name = columns_by_table[table].get(column)
+                if name is not None:
+                    found.add((table, name))
+    return found
+
+
+def _usage_key(table: str, column: str) -> str:
+    return f"{table}.{column}"
+
+
+def load_filter_usage(path: Path) -> dict[str, dict[str, int]]:
+    if not path.exists():
+        return {"filters": {}, "index_hits": {}}
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    return {"filters": payload.get("filters", {}), "index_hits": payload.get("index_hits", {})}
+
+
+@contextmanager
+def _usage_file_lock(path: Path) -> Iterator[None]:
+    """Exclusive across processes: every service worker merges its counts into the same file."""
+    if fcntl is None:
+        yield
+        return
+    with open(path.with_name(f"{path.name}.lock"), "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _write_atomically(path: Path, text: str) -> None:
+    # Readers (`agent sync`, /status) see the old file or the new one, never a half-written one.
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            handle.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class FilterUsage:
+    """Counts the columns executed SQL filters on and how often a filter lands on an index.
+
+    Counts are merged into a JSON file every `flush_every` queries so `agent sync`
+    (a separate process) can index the columns the service filters on most.
+    """
+
+    def __init__(self, path: Path | None = None, flush_every: int = 20) -> None:
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self._lock = Lock()
+        self._columns: dict[str, dict[str, str]] = {}
+        self._indexed: dict[tuple[str, str], str] = {}
+        self._filters: Counter[str] = Counter()
+        self._index_hits: Counter[str] = Counter()
+        self._pending = 0
+
+    def bind(self, schema_summary: dict, indexes: list[dict[str, Any]]) -> None:
+        with self._lock:
+            self._columns = _columns_by_table(schema_summary)
+            self._indexed = {(i["table"], i["column"]): i["name"] for i in indexes}
+
+    def record(self, sql: str) -> set[tuple[str, str]]:
+        with self._lock:
+            columns, indexed = self._columns, self._indexed
+        found = filtered_columns(sql, columns)
+        if not found:
+            return found
+        hits = [indexed[pair] for pair in found if pair in indexed]
+        for name in hits:
+            METRICS.incr("index_filter_hits_total", index=name)
+        with self._lock:
+            self._filters.update(_usage_key(t, c) for t, c in found)
+            self._index_hits.update(hits)
+            self._pending += 1
+            due = self._pending >= self.flush_every
+        if due:
+            self.flush()
+        return found
+
+    def snapshot(self) -> dict[str, dict[str, int]]:
+        """Persisted counts plus the ones not flushed yet."""
+        totals = load_filter_usage(self.path) if self.path else {"filters": {}, "index_hits": {}}
+        with self._lock:
+            filters = Counter(totals["filters"]) + self._filters
+            hits = Counter(totals["index_hits"]) + self._index_hits
+        return {"filters": dict(filters.most_common()), "index_hits": dict(hits.most_common())}
+
+    def flush(self) -> None:
+        if self.path is None:
+            return
+        with self._lock, _usage_file_lock(self.path):
+            filters, hits = self._filters, self._index_hits
+            self._filters, self._index_hits, self._pending = Counter(), Counter(), 0
+            # Read, merge and replace under the file lock, or another worker's flush in between is lost.
+            totals = load_filter_usage(self.path)
+            payload = {
+                "filters": dict((Counter(totals["filters"]) + filters).most_common()),
+                "index_hits": dict((Counter(totals["index_hits"]) + hits).most_common()),
+            }
+            _write_atomically(self.path, json.dumps(payload, indent=2))
+
+
+def advise_indexes(
+    usage: dict[str, dict[str, int]],
+    schema_summary: dict,
+    settings: IndexSettings,
+) -> list[IndexTarget]:
+    """Frequently filtered columns whose values are selective enough for DuckDB to take an index scan."""
+    tables = {table["table_name"]: table for table in schema_summary.get("tables", [])}
+    targets: list[IndexTarget] = []
+    for key, uses in usage.get("filters", {}).items():
+        table_name, _, column = key.partition(".")
+        table = tables.get(table_name)
+        if table is None or uses < settings.min_filter_uses:
+            continue
+        row_count = int(table.get("row_count") or 0)
+        if row_count < settings.min_table_rows:
+            continue
+        col = next((c for c in table.get("columns", []) if c["name"] == column), None)
+        distinct = (col or {}).get("distinct_count_estimate") or 0
+        if not distinct or row_count / distinct > settings.max_rows_per_value:
+            continue
+        targets.append(IndexTarget(table_name, column, FILTER))
+    return targets
+
+
+def index_status(indexes: list[dict[str, Any]], usage: dict[str, dict[str, int]]) -> dict[str, Any]:
+    """Per-index build cost and filter hits, plus the most filtered columns that have no index yet."""
+    hits = usage.get("index_hits", {})
+    indexed = {_usage_key(i["table"], i["column"]) for i in indexes}
+    return {
+        "indexes": [{**i, "uses": int(hits.get(i["name"], 0))} for i in indexes],
+        "unindexed_filters": {
+            key: uses for key, uses in usage.get("filters", {}).items() if key not in indexed
+        },
+    }
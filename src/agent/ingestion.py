@@ -3,12 +3,15 @@ from __future__ import annotations
 import hashlib
 import json
 import shutil
+import time
 import zipfile
 from datetime import UTC, datetime
 from pathlib import Path
 
 import duckdb
 
+from agent.indexes import create_indexes, key_index_targets, reset_index_catalog
+from agent.metrics import METRICS
 from agent.models import SyncSnapshot
 from agent.settings import AppConfig
 
@@ -24,7 +27,9 @@ def _hash_schema(conn: duckdb.DuckDBPyConnection, table_name: str) -> str:
     return hashlib.sha256(signature.encode("utf-8")).hexdigest()
 
 
-def _load_file_into_table(conn: duckdb.DuckDBPyConnection, file_path: Path, table_name: str) -> None:
+def _load_file_into_table(conn: duckdb.DuckDBPyConnection, file_path: Path, table_name: str) -> float:
+    """Load one extracted file; returns the seconds the load took."""
+    started = time.perf_counter()
     suffix = file_path.suffix.lower()
     if suffix == ".csv":
         conn.execute(
@@ -38,12 +43,16 @@ def _load_file_into_table(conn: duckdb.DuckDBPyConnection, file_path: Path, tabl
         )
     else:
         raise ValueError(f"Unsupported extracted file type: {file_path}")
+    seconds = time.perf_counter() - started
+    METRICS.observe("sync_table_load_seconds", seconds, table=table_name)
+    return seconds
 
 
 def _ingest_extracted_dir(
     extracted: Path,
     conn: duckdb.DuckDBPyConnection,
     app_config: AppConfig,
+    load_seconds: dict[str, float] | None = None,
 ) -> tuple[dict[str, int], dict[str, str]]:
     row_counts: dict[str, int] = {}
     schema_hashes: dict[str, str] = {}
@@ -61,7 +70,9 @@ def _ingest_extracted_dir(
         if raw_name in configured_table_map:
             table_name = raw_name
 
-        _load_file_into_table(conn, file_path, table_name)
+        seconds = _load_file_into_table(conn, file_path, table_name)
+        if load_seconds is not None:
+            load_seconds[table_name] = round(seconds, 6)
         row_count = conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
         row_counts[table_name] = int(row_count)
         schema_hashes[table_name] = _hash_schema(conn, table_name)
@@ -69,6 +80,13 @@ def _ingest_extracted_dir(
     return row_counts, schema_hashes
 
 
+def _index_key_columns(conn: duckdb.DuckDBPyConnection, app_config: AppConfig) -> None:
+    # Point lookups on report keys ("details of patient P-1042") otherwise scan the whole table.
+    reset_index_catalog(conn)
+    if app_config.indexes.enabled:
+        create_indexes(conn, key_index_targets(app_config))
+
+
 def ingest_zip_to_duckdb(zip_path: Path, db_path: Path, app_config: AppConfig, source: str = "bulk_zip") -> SyncSnapshot:
     db_path.parent.mkdir(parents=True, exist_ok=True)
     extracted = db_path.parent / "_extract"
@@ -92,7 +110,12 @@ def ingest_zip_to_duckdb(zip_path: Path, db_path: Path, app_config: AppConfig, s
         """
     )
 
-    row_counts, schema_hashes = _ingest_extracted_dir(extracted=extracted, conn=conn, app_config=app_config)
+    load_seconds: dict[str, float] = {}
+    row_counts, schema_hashes = _ingest_extracted_dir(
+        extracted=extracted, conn=conn, app_config=app_config, load_seconds=load_seconds
+    )
+
+    _index_key_columns(conn, app_config)
 
     sync = SyncSnapshot(
         app_name=app_config.app_name,
@@ -100,6 +123,7 @@ def ingest_zip_to_duckdb(zip_path: Path, db_path: Path, app_config: AppConfig, s
         row_counts=row_counts,
         schema_hashes=schema_hashes,
         source=source,
+        timings={"load": load_seconds},
     )
 
     conn.execute(
@@ -138,6 +162,7 @@ def ingest_multiple_zips_to_duckdb(
 
     all_rows: dict[str, int] = {}
     all_hashes: dict[str, str] = {}
+    load_seconds: dict[str, float] = {}
     base_extract = db_path.parent / "_extract"
     if base_extract.exists():
         shutil.rmtree(base_extract)
@@ -148,16 +173,19 @@ def ingest_multiple_zips_to_duckdb(
         step_extract.mkdir(parents=True, exist_ok=True)
         with zipfile.ZipFile(zip_path, "r") as zf:
             zf.extractall(step_extract)
-        rows, hashes = _ingest_extracted_dir(step_extract, conn, app_config)
+        rows, hashes = _ingest_extracted_dir(step_extract, conn, app_config, load_seconds)
         all_rows.update(rows)
         all_hashes.update(hashes)
 
+    _index_key_columns(conn, app_config)
+
     sync = SyncSnapshot(
         app_name=app_config.app_name,
         synced_at=datetime.now(UTC),
         row_counts=all_rows,
         schema_hashes=all_hashes,
         source=source,
+        timings={"load": load_seconds},
     )
     conn.execute(
         "INSERT INTO __sync_snapshots VALUES (?, ?, ?, ?, ?)",
@@ -189,6 +217,7 @@ def ingest_report_payloads_to_duckdb(
 
     row_counts: dict[str, int] = {}
     schema_hashes: dict[str, str] = {}
+    load_seconds: dict[str, float] = {}
     temp_dir = db_path.parent / "_api_extract"
     if temp_dir.exists():
         shutil.rmtree(temp_dir)
@@ -198,17 +227,20 @@ def ingest_report_payloads_to_duckdb(
         rows = report_payloads.get(report.report_link_name, [])
         json_path = temp_dir / f"{report.table_name}.json"
         json_path.write_text(json.dumps(rows), encoding="utf-8")
-        _load_file_into_table(conn, json_path, report.table_name)
+        load_seconds[report.table_name] = round(_load_file_into_table(conn, json_path, report.table_name), 6)
         row_count = conn.execute(f"SELECT COUNT(*) FROM {report.table_name}").fetchone()[0]
         row_counts[report.table_name] = int(row_count)
         schema_hashes[report.table_name] = _hash_schema(conn, report.table_name)
 
+    _index_key_columns(conn, app_config)
+
     sync = SyncSnapshot(
         app_name=app_config.app_name,
         synced_at=datetime.now(UTC),
         row_counts=row_counts,
         schema_hashes=schema_hashes,
         source=source,
+        timings={"load": load_seconds},
     )
     conn.execute(
         "INSERT INTO __sync_snapshots VALUES (?, ?, ?, ?, ?)",
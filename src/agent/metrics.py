@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import math
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, Iterator
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_Labels = tuple[tuple[str, str], ...]
+
+
+def _metric_key(name: str, labels: dict[str, str]) -> str:
+    if not labels:
+        return name
+    inner = ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+    return f"{name}{{{inner}}}"
+
+
+def _labels(labels: dict[str, Any]) -> _Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _prom_labels(labels: _Labels, extra: tuple[tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _prom_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Small thread-safe counter and histogram registry shared by the agent and the API."""
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._counters: dict[tuple[str, _Labels], float] = defaultdict(float)
+        self._histograms: dict[tuple[str, _Labels], _Histogram] = {}
+
+    def incr(self, name: str, value: float = 1.0, **labels: str) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] += value
+
+    def get(self, name: str, **labels: str) -> float:
+        with self._lock:
+            return self._counters.get((name, _labels(labels)), 0.0)
+
+    def observe(self, name: str, value: float, buckets: tuple[float, ...] = DEFAULT_BUCKETS, **labels: str) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def time(self, name: str, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def histogram(self, name: str, **labels: str) -> dict[str, float]:
+        with self._lock:
+            histogram = self._histograms.get((name, _labels(labels)))
+            if histogram is None:
+                return {"count": 0, "sum": 0.0}
+            return {"count": histogram.count, "sum": histogram.total}
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            counters = {_metric_key(name, dict(labels)): value for (name, labels), value in self._counters.items()}
+            for (name, labels), histogram in self._histograms.items():
+                counters[_metric_key(f"{name}_count", dict(labels))] = histogram.count
+                counters[_metric_key(f"{name}_sum", dict(labels))] = round(histogram.total, 6)
+        return dict(sorted(counters.items()))
+
+    def render_prometheus(self, gauges: dict[tuple[str, _Labels], float] | None = None) -> str:
+        """Prometheus text exposition (format 0.0.4) of every counter, histogram and the given gauges."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                ((key, (h.buckets, list(h.counts), h.total, h.count)) for key, h in self._histograms.items()),
+                key=lambda item: item[0],
+            )
+        lines: list[str] = []
+        typed: set[str] = set()
+
+        def declare(name: str, kind: str) -> None:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            declare(name, "counter")
+            lines.append(f"{name}{_prom_labels(labels)} {_prom_value(value)}")
+        for (name, labels), (buckets, counts, total, count) in histograms:
+            declare(name, "histogram")
+            cumulative = 0
+            for bound, observed in zip(buckets + (math.inf,), counts):
+                cumulative += observed
+                lines.append(f"{name}_bucket{_prom_labels(labels, (('le', _prom_value(bound)),))} {cumulative}")
+            lines.append(f"{name}_sum{_prom_labels(labels)} {_prom_value(total)}")
+            lines.append(f"{name}_count{_prom_labels(labels)} {count}")
+        for (name, labels), value in sorted((gauges or {}).items()):
+            declare(name, "gauge")
+            lines.append(f"{name}{_prom_labels(labels)} {_prom_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+METRICS = MetricsRegistry()
+
+
+def gauge_key(name: str, **labels: Any) -> tuple[str, _Labels]:
+    return name, _labels(labels)
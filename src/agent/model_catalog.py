@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import weakref
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Awaitable, Callable
+
+OPENROUTER_MODELS_URL = "https://openrouter.ai/api/v1/models"
+
+
+@dataclass
+class CircuitBreaker:
+    failure_threshold: int = 2
+    reset_after_seconds: float = 300.0
+    failures: int = 0
+    opened_at: float | None = None
+    # When the single half-open probe was let through; None while no probe is out.
+    probe_started_at: float | None = None
+
+    def _probe_out(self, now: float) -> bool:
+        # A probe that never reports back (its caller used another model) expires after a cool-down.
+        return self.probe_started_at is not None and now - self.probe_started_at < self.reset_after_seconds
+
+    def available(self, now: float) -> bool:
+        """Closed, or half-open with no probe out; does not claim the probe."""
+        if self.opened_at is None:
+            return True
+        return now - self.opened_at >= self.reset_after_seconds and not self._probe_out(now)
+
+    def allow(self, now: float) -> bool:
+        """Like `available`, but a half-open breaker lets only this caller through to probe the model."""
+        if not self.available(now):
+            return False
+        if self.opened_at is not None:
+            self.probe_started_at = now
+        return True
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started_at = None
+
+    def release_probe(self) -> None:
+        """End a probe that gave no verdict on the model, e.g. a call rejected for its prompt."""
+        self.probe_started_at = None
+
+    def record_failure(self, now: float) -> None:
+        self.failures += 1
+        self.probe_started_at = None
+        if self.failures >= self.failure_threshold:
+            self.opened_at = now
+
+
+class ModelCatalog:
+    """Process-wide OpenRouter model list with a TTL, per-model breakers and a sticky fallback."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = 600.0,
+        failure_threshold: int = 2,
+        reset_after_seconds: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.failure_threshold = failure_threshold
+        self.reset_after_seconds = reset_after_seconds
+        self._clock = clock
+        self._lock = Lock()
+        self._fetch_lock = Lock()
+        # An asyncio.Lock binds to the loop it is first used on, and the catalog outlives any one loop.
+        self._async_fetch_locks: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._model_ids: list[str] = []
+        self._fetched_at: float | None = None
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self.sticky_model: str | None = None
+        self.discovery_calls = 0
+
+    def _fresh(self) -> bool:
+        return self._fetched_at is not None and self._clock() - self._fetched_at < self.ttl_seconds
+
+    def _store(self, ids: list[str]) -> list[str]:
+        with self._lock:
+            self.discovery_calls += 1
+            self._model_ids = ids
+            # Failures are cached too, so an outage costs one discovery call per TTL.
+            self._fetched_at = self._clock()
+            return list(ids)
+
+    def model_ids(self, fetch: Callable[[], list[str]]) -> list[str]:
+        if self._fresh():
+            return list(self._model_ids)
+        with self._fetch_lock:
+            if self._fresh():
+                return list(self._model_ids)
+            try:
+                ids = fetch()
+            except Exception:
+                ids = []
+            return self._store(ids)
+
+    def _async_fetch_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            lock = self._async_fetch_locks.get(loop)
+            if lock is None:
+                lock = self._async_fetch_locks[loop] = asyncio.Lock()
+            return lock
+
+    async def amodel_ids(self, fetch: Callable[[], Awaitable[list[str]]]) -> list[str]:
+        if self._fresh():
+            return list(self._model_ids)
+        async with self._async_fetch_lock():
+            if self._fresh():
+                return list(self._model_ids)
+            try:
+                ids = await fetch()
+            except Exception:
+                ids = []
+            return self._store(ids)
+
+    def _breaker(self, model_id: str) -> CircuitBreaker:
+        breaker = self._breakers.get(model_id)
+        if breaker is None:
+            breaker = CircuitBreaker(self.failure_threshold, self.reset_after_seconds)
+            self._breakers[model_id] = breaker
+        return breaker
+
+    def is_available(self, model_id: str) -> bool:
+        """Whether to call the model now; claims the half-open probe, so report the outcome after."""
+        with self._lock:
+            return self._breaker(model_id).allow(self._clock())
+
+    def record_success(self, model_id: str, sticky: bool = False) -> None:
+        with self._lock:
+            self._breaker(model_id).record_success()
+            if sticky:
+                self.sticky_model = model_id
+
+    def release_probe(self, model_id: str) -> None:
+        """Let the next caller probe a half-open model; a no-op once the outcome was recorded."""
+        with self._lock:
+            self._breaker(model_id).release_probe()
+
+    def record_failure(self, model_id: str) -> None:
+        with self._lock:
+            self._breaker(model_id).record_failure(self._clock())
+            if self.sticky_model == model_id:
+                self.sticky_model = None
+
+    def order_candidates(self, candidates: list[str]) -> list[str]:
+        with self._lock:
+            now = self._clock()
+            ordered = list(candidates)
+            if self.sticky_model:
+                ordered = [self.sticky_model] + [m for m in ordered if m != self.sticky_model]
+            # Filtering only: each candidate claims its probe through is_available right before its call.
+            return [m for m in ordered if self._breaker(m).available(now)]
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            now = self._clock()
+            return {
+                "model_ids": len(self._model_ids),
+                "fetched_age_seconds": None if self._fetched_at is None else round(now - self._fetched_at, 1),
+                "discovery_calls": self.discovery_calls,
+                "sticky_model": self.sticky_model,
+                "open_breakers": sorted(m for m, b in self._breakers.items() if not b.available(now)),
+            }
+
+
+_CATALOGS: dict[tuple[float, int, float], ModelCatalog] = {}
+_CATALOG_LOCK = Lock()
+
+
+def get_model_catalog(
+    ttl_seconds: float = 600.0,
+    failure_threshold: int = 2,
+    reset_after_seconds: float = 300.0,
+) -> ModelCatalog:
+    """Return the process-wide catalog for this configuration.
+
+    Engines and apps configured alike share one model list and one set of breakers; an app with
+    different catalog settings gets its own catalog rather than silently reusing another's.
+    """
+    key = (float(ttl_seconds), int(failure_threshold), float(reset_after_seconds))
+    with _CATALOG_LOCK:
+        catalog = _CATALOGS.get(key)
+        if catalog is None:
+            catalog = ModelCatalog(ttl_seconds, failure_threshold, reset_after_seconds)
+            _CATALOGS[key] = catalog
+        return catalog
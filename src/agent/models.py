@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import hashlib
+import json
 from dataclasses import dataclass
 from datetime import datetime
+from functools import cached_property
 from typing import Any
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, computed_field
+
+from agent.evidence import EvidenceBatch
 
 
 class ColumnSummary(BaseModel):
@@ -25,12 +30,19 @@ class SchemaSummary(BaseModel):
     columns: list[ColumnSummary] = Field(default_factory=list)
     join_hints: list[str] = Field(default_factory=list)
     generated_at: datetime
+    # Kept out of the payload: the schema summary is sent to the LLM verbatim.
+    profile_seconds: float | None = Field(default=None, exclude=True)
 
 
 class QueryRequest(BaseModel):
     question: str
     max_evidence_rows: int = 30
     conversation_context: list[str] = Field(default_factory=list)
+    # SQL and columns behind the session's last answer; follow-ups are planned over it.
+    previous_sql: str | None = None
+    previous_columns: list[str] = Field(default_factory=list)
+    # Opt-in: aggregates over large tables may be estimated from a sample.
+    approximate: bool = False
 
 
 class ValidatedSQL(BaseModel):
@@ -39,14 +51,47 @@ class ValidatedSQL(BaseModel):
     reason: str | None = None
 
 
+class Approximation(BaseModel):
+    sample_fraction: float
+    confidence: float
+    # Worst relative half-width of the confidence interval per estimated column.
+    error_bounds: dict[str, float]
+
+
+class AnswerTimings(BaseModel):
+    total_seconds: float
+    # Monotonic seconds per stage, e.g. sql_generation, validation, execution, answer_llm.
+    stages: dict[str, float] = Field(default_factory=dict)
+    # Per LLM stage: input/output tokens, `estimated` when the provider returned no usage data.
+    tokens: dict[str, dict[str, Any]] = Field(default_factory=dict)
+    cache: dict[str, bool] = Field(default_factory=dict)
+
+
 class AgentAnswer(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     question: str
     summary: str
     sql: str
-    evidence_rows: list[dict[str, Any]] = Field(default_factory=list)
+    # Columnar evidence; row dicts are only built when the answer is serialized or read.
+    evidence: EvidenceBatch = Field(default_factory=lambda: EvidenceBatch.from_rows([], []), exclude=True, repr=False)
     evidence_columns: list[str] = Field(default_factory=list)
     generated_at: datetime
     model: str
+    # "fast_path" when a deterministic template answered without the LLM, else "llm".
+    answer_path: str = "llm"
+    # "template" when the bullets were rendered from the result shape instead of the answer LLM call.
+    summary_source: str = "llm"
+    result_shape: str | None = None
+    # True when the SQL refines the previous answer's result instead of re-planning from the base tables.
+    follow_up: bool = False
+    approximation: Approximation | None = None
+    timings: AnswerTimings | None = None
+
+    @computed_field  # type: ignore[prop-decorator]
+    @cached_property
+    def evidence_rows(self) -> list[dict[str, Any]]:
+        return self.evidence.to_rows()
 
 
 class SyncSnapshot(BaseModel):
@@ -55,6 +100,16 @@ class SyncSnapshot(BaseModel):
     row_counts: dict[str, int]
     schema_hashes: dict[str, str]
     source: str
+    # Seconds per step: "load" and "profile" by table, "fetch" by report, "stages" for the whole sync.
+    timings: dict[str, dict[str, float]] = Field(default_factory=dict)
+
+    @property
+    def snapshot_id(self) -> str:
+        signature = json.dumps(
+            [self.synced_at.isoformat(), self.source, self.row_counts, self.schema_hashes],
+            sort_keys=True,
+        )
+        return hashlib.sha256(signature.encode("utf-8")).hexdigest()[:16]
 
 
 @dataclass
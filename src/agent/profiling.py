@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import json
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import duckdb
+
+from agent.metrics import METRICS
+
+PROFILE_HEADER = "X-Agent-Profile"
+MAX_STACK_DEPTH = 64
+
+
+def _frame_label(frame: Any) -> str:
+    code = frame.f_code
+    path = code.co_filename.replace("\\", "/")
+    for marker in ("/site-packages/", "/src/", "/lib/python"):
+        if marker in path:
+            path = path.split(marker, 1)[1]
+            break
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+def _stack(frame: Any) -> tuple[str, ...]:
+    labels: list[str] = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return tuple(reversed(labels))
+
+
+class RequestProfiler:
+    """Opt-in profile of one request: Python stack samples plus DuckDB's JSON profile of each query.
+
+    Only threads that `attach()` are sampled. Forced profiles start sampling immediately;
+    otherwise sampling starts once the request has run for `start_after_seconds` (0 never starts it),
+    so only pathologically slow requests pay for it. DuckDB's profile is taken of every query of a
+    forced profile, or of every query with `capture_queries`, since a query that makes a request
+    slow usually starts early. The cheap `no_output` mode is used and the JSON is only parsed when
+    the caller keeps the profile once the request is done (`to_payload`).
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float = 0.005,
+        forced: bool = False,
+        start_after_seconds: float = 0.0,
+        capture_queries: bool = False,
+    ) -> None:
+        self.interval_seconds = interval_seconds
+        self.forced = forced
+        self.start_after_seconds = start_after_seconds
+        self.capture_queries = capture_queries
+        # (sql, DuckDB's JSON profile as text) per query; parsed only when the profile is kept.
+        self._queries: list[tuple[str, str]] = []
+        self._threads: Counter[int] = Counter()
+        self._stacks: Counter[tuple[str, ...]] = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler: threading.Thread | None = None
+        self._timer: threading.Timer | None = None
+        self._started = time.perf_counter()
+        self._sampling_started: float | None = None
+
+    def begin(self) -> None:
+        self._started = time.perf_counter()
+        if self.forced:
+            self._start_sampling()
+        elif self.start_after_seconds > 0:
+            self._timer = threading.Timer(self.start_after_seconds, self._start_sampling)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _start_sampling(self) -> None:
+        with self._lock:
+            if self._sampler is not None or self._stop.is_set():
+                return
+            self._sampling_started = time.perf_counter()
+            self._sampler = threading.Thread(target=self._sample_loop, name="request-profiler", daemon=True)
+            self._sampler.start()
+        METRICS.incr("profiled_requests_total", trigger="forced" if self.forced else "slow")
+
+    def _sample_loop(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval_seconds):
+            with self._lock:
+                idents = [ident for ident, depth in self._threads.items() if depth > 0 and ident != own]
+            frames = sys._current_frames()
+            stacks = [_stack(frames[ident]) for ident in idents if ident in frames]
+            with self._lock:
+                self._stacks.update(stacks)
+
+    @contextmanager
+    def attach(self) -> Iterator[None]:
+        """Sample the current thread while the block runs."""
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._threads[ident] -= 1
+
+    def run_attached(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self.attach():
+            return fn(*args)
+
+    def wants_query_profiles(self) -> bool:
+        return self.forced or self.capture_queries
+
+    @contextmanager
+    def query_profiling(self, conn: duckdb.DuckDBPyConnection) -> Iterator[bool]:
+        """Turn DuckDB profiling on for the block when queries are captured; yields whether they are."""
+        if not self.wants_query_profiles():
+            yield False
+            return
+        conn.execute("PRAGMA enable_profiling = 'no_output'")
+        try:
+            yield True
+        finally:
+            # Pooled cursors outlive the request: leave them as they were found.
+            conn.execute("PRAGMA disable_profiling")
+
+    def record_query(self, conn: duckdb.DuckDBPyConnection, sql: str) -> None:
+        """Hold on to DuckDB's profile of the last statement run on `conn`."""
+        try:
+            profile = conn.get_profiling_information(format="json")
+        except duckdb.Error:
+            return
+        with self._lock:
+            self._queries.append((sql, profile))
+
+    @property
+    def queries(self) -> list[dict[str, Any]]:
+        with self._lock:
+            captured = list(self._queries)
+        queries = []
+        for sql, text in captured:
+            try:
+                profile = json.loads(text)
+            except ValueError:
+                continue
+            queries.append({"sql": sql, "latency": profile.get("latency"), "profile": profile})
+        return queries
+
+    def finish(self) -> None:
+        self._stop.set()
+        if self._timer is not None:
+            self._timer.cancel()
+        sampler = self._sampler
+        if sampler is not None and sampler is not threading.current_thread():
+            sampler.join()
+
+    def python_profile(self, top: int = 20) -> dict[str, Any] | None:
+        with self._lock:
+            stacks = Counter(self._stacks)
+            sampling_started = self._sampling_started
+        if sampling_started is None:
+            return None
+        total = sum(stacks.values())
+        self_samples: Counter[str] = Counter()
+        inclusive: Counter[str] = Counter()
+        for stack, count in stacks.items():
+            if stack:
+                self_samples[stack[-1]] += count
+            for label in set(stack):
+                inclusive[label] += count
+        return {
+            "interval_seconds": self.interval_seconds,
+            "started_after_seconds": round(sampling_started - self._started, 6),
+            "samples": total,
+            "top_functions": [
+                {"function": label, "self_samples": self_samples[label], "total_samples": count}
+                for label, count in sorted(inclusive.items(), key=lambda item: (-self_samples[item[0]], -item[1]))[:top]
+            ],
+            # Collapsed "root;...;leaf" stacks, the input format of flamegraph tools.
+            "stacks": [{"stack": ";".join(stack), "samples": count} for stack, count in stacks.most_common(top)],
+        }
+
+    def to_payload(self) -> dict[str, Any]:
+        return {"forced": self.forced, "python": self.python_profile(), "queries": self.queries}
+
+
+class SlowQueryLog:
+    """JSON-lines log of slow or profiled requests, rotated at `max_bytes` into `.1` ... `.backups`."""
+
+    def __init__(self, path: Path, max_bytes: int = 5 * 1024 * 1024, backups: int = 3) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._lock = threading.Lock()
+
+    def _rotate(self) -> None:
+        for index in range(self.backups, 0, -1):
+            source = self.path if index == 1 else self.path.with_name(f"{self.path.name}.{index - 1}")
+            if source.exists():
+                source.replace(self.path.with_name(f"{self.path.name}.{index}"))
+        if self.backups == 0:
+            self.path.unlink(missing_ok=True)
+
+    def write(self, entry: dict[str, Any]) -> None:
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self.path.exists() and self.path.stat().st_size + len(line) > self.max_bytes:
+                self._rotate()
+            with self.path.open("a", encoding="utf-8") as fh:
+                fh.write(line)
+        METRICS.incr("slow_queries_logged_total")
+
+
+def slowlog_entry(payload: dict[str, Any], profile: dict[str, Any]) -> dict[str, Any]:
+    timings = payload.get("timings") or {}
+    return {
+        "logged_at": datetime.now(UTC).isoformat(),
+        "question": payload.get("question"),
+        "sql": payload.get("sql"),
+        "answer_path": payload.get("answer_path"),
+        "total_seconds": timings.get("total_seconds"),
+        "timings": timings,
+        **profile,
+    }
+
+
+def read_slowlog(path: Path) -> list[dict[str, Any]]:
+    """Entries from the log and its rotated backups, oldest first."""
+    backups = [p for p in path.parent.glob(f"{path.name}.*") if p.suffix[1:].isdigit()]
+    files = sorted(backups, key=lambda p: -int(p.suffix[1:]))
+    entries: list[dict[str, Any]] = []
+    for file in [*files, path]:
+        if not file.exists():
+            continue
+        for line in file.read_text(encoding="utf-8").splitlines():
+            if line.strip():
+                entries.append(json.loads(line))
+    return entries
+
+
+def _slowest_operator(profile: dict[str, Any]) -> tuple[str, float] | None:
+    best: tuple[str, float] | None = None
+    pending = list(profile.get("children", []))
+    while pending:
+        node = pending.pop()
+        timing = float(node.get("operator_timing") or 0.0)
+        if best is None or timing > best[1]:
+            best = (str(node.get("operator_name") or node.get("operator_type")), timing)
+        pending.extend(node.get("children", []))
+    return best
+
+
+def _percentile(values: list[float], percent: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def summarize_slowlog(entries: list[dict[str, Any]], top: int = 10) -> dict[str, Any]:
+    """Latency percentiles, where slow requests spend their time, and the slowest requests."""
+    totals = [float(e.get("total_seconds") or 0.0) for e in entries]
+    stage_seconds: Counter[str] = Counter()
+    for entry in entries:
+        for stage, seconds in (entry.get("timings") or {}).get("stages", {}).items():
+            stage_seconds[stage] += float(seconds)
+    slowest = []
+    for entry in sorted(entries, key=lambda e: -float(e.get("total_seconds") or 0.0))[:top]:
+        stages = (entry.get("timings") or {}).get("stages", {})
+        operators = [op for q in entry.get("queries", []) if (op := _slowest_operator(q.get("profile", {})))]
+        slowest.append(
+            {
+                "logged_at": entry.get("logged_at"),
+                "total_seconds": entry.get("total_seconds"),
+                "question": entry.get("question"),
+                "slowest_stage": max(stages, key=stages.get) if stages else None,
+                "slowest_operator": max(operators, key=lambda op: op[1])[0] if operators else None,
+                "profiled": entry.get("python") is not None,
+            }
+        )
+    return {
+        "entries": len(entries),
+        "p50_seconds": _percentile(totals, 50),
+        "p95_seconds": _percentile(totals, 95),
+        "max_seconds": max(totals, default=0.0),
+        "stage_seconds": dict(stage_seconds.most_common()),
+        "slowest": slowest,
+    }
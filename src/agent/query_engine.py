@@ -2,23 +2,46 @@ from __future__ import annotations
 
 import json
 import re
+from contextlib import AbstractContextManager, contextmanager, nullcontext
 from datetime import UTC, datetime
 from pathlib import Path
-from typing import Any, Protocol
+from typing import Any, Iterator, Protocol
 
 import duckdb
 from langchain_openai import ChatOpenAI
 import requests
 
-from agent.models import AgentAnswer, QueryRequest
+from agent.admission import AdmissionTicket
+from agent.db_pool import ReadOnlyConnectionPool
+from agent.evidence import EvidenceBatch, encode_evidence
+from agent.fast_path import FastPathPlan, IntentMatcher, render_fast_path_summary
+from agent.follow_up import build_follow_up_prompt, compose_follow_up_sql, looks_like_follow_up
+from agent.hedging import LLMHedger
+from agent.indexes import FilterUsage
+from agent.metrics import METRICS
+from agent.model_catalog import OPENROUTER_MODELS_URL, ModelCatalog, get_model_catalog
+from agent.models import AgentAnswer, Approximation, QueryRequest
+from agent.profiling import RequestProfiler
+from agent.query_guard import QueryGuard
+from agent.result_cache import ResultCache
+from agent.result_handles import stable_page_sql
+from agent.result_summary import SMALL_GROUP_MAX_ROWS, classify_result_shape, render_template_summary
+from agent.rollups import RollupRewriter
+from agent.sampling import Sampler
 from agent.settings import Settings
 from agent.sql_safety import validate_select_only_sql
+from agent.timings import StageTimings
+from agent.value_index import ValueIndex, ValueMatch, format_value_hints
 
 
 class SupportsInvoke(Protocol):
     def invoke(self, input: Any) -> Any: ...
 
 
+class SupportsStream(Protocol):
+    def stream(self, input: Any) -> Iterator[Any]: ...
+
+
 def _stringify_response(response: Any) -> str:
     if hasattr(response, "content"):
         return str(response.content)
@@ -30,7 +53,11 @@ def build_sql_prompt(
     schema_summary: dict,
     allowed_tables: list[str],
     business_definitions: dict[str, str],
+    value_matches: list[ValueMatch] | None = None,
 ) -> str:
+    value_hints = ""
+    if value_matches:
+        value_hints = f"Values named in the question:\n{format_value_hints(value_matches)}\n"
     return (
         "You are a SQL planner for DuckDB. Output ONLY SQL.\n"
         "Rules:\n"
@@ -40,14 +67,14 @@ def build_sql_prompt(
         "- Prefer explicit column names and deterministic ordering.\n\n"
         f"Allowed tables: {allowed_tables}\n"
         f"Business definitions: {json.dumps(business_definitions)}\n"
-        f"Schema summary: {json.dumps(schema_summary)}\n\n"
+        f"Schema summary: {json.dumps(schema_summary)}\n"
+        f"{value_hints}\n"
         f"Question: {question}\n"
         "SQL:"
     )
 
 
-def build_answer_prompt(question: str, sql: str, rows: list[dict[str, Any]], row_cap: int) -> str:
-    compact_rows = rows[:row_cap]
+def build_answer_prompt(question: str, sql: str, evidence: EvidenceBatch, row_cap: int) -> str:
     return (
         "You are a user-facing assistant. Answer using only provided data.\n"
         "Do not fabricate information.\n"
@@ -55,7 +82,8 @@ def build_answer_prompt(question: str, sql: str, rows: list[dict[str, Any]], row
         "Write simple and clear facts that a non-technical user can understand.\n\n"
         f"Question: {question}\n"
         f"SQL used: {sql}\n"
-        f"Rows (capped): {json.dumps(compact_rows, default=str)}\n\n"
+        "Rows (capped; the first line lists the columns, each following line is one record in that order):\n"
+        f"{encode_evidence(evidence, row_cap)}\n\n"
         "Return ONLY bullet points.\n"
         "Format rules:\n"
         "- 4 to 8 bullets.\n"
@@ -74,12 +102,42 @@ class QueryEngine:
         allowed_tables: list[str],
         business_definitions: dict[str, str],
         llm: SupportsInvoke | None = None,
+        result_cache: ResultCache | None = None,
+        snapshot_id: str | None = None,
+        model_catalog: ModelCatalog | None = None,
+        hedger: LLMHedger | None = None,
+        fast_path: IntentMatcher | None = None,
+        template_summaries: bool = True,
+        query_guard: QueryGuard | None = None,
+        rollups: RollupRewriter | None = None,
+        filter_usage: FilterUsage | None = None,
+        value_index: ValueIndex | None = None,
+        sampler: Sampler | None = None,
+        profiler: RequestProfiler | None = None,
+        admission: AdmissionTicket | None = None,
+        connection_pool: ReadOnlyConnectionPool | None = None,
     ) -> None:
         self.settings = settings
         self.db_path = db_path
         self.schema_summary = schema_summary
         self.allowed_tables = allowed_tables
         self.business_definitions = business_definitions
+        self.result_cache = result_cache
+        self.snapshot_id = snapshot_id
+        self.model_catalog = model_catalog or get_model_catalog()
+        self.hedger = hedger
+        self.fast_path = fast_path
+        self.template_summaries = template_summaries
+        self.query_guard = query_guard or QueryGuard()
+        self.rollups = rollups
+        self.filter_usage = filter_usage
+        self.value_index = value_index
+        self.sampler = sampler
+        self.profiler = profiler
+        self.admission = admission
+        self.connection_pool = connection_pool
+        # Replaced at the start of every answer; engines are built per request.
+        self.timings = StageTimings()
         self.llm = llm or ChatOpenAI(
             model=settings.openrouter_model,
             openai_api_key=settings.openrouter_api_key,
@@ -95,150 +153,485 @@ class QueryEngine:
             temperature=0,
         )
 
-    def _discover_available_mistral_model(self) -> str | None:
-        try:
-            response = requests.get(
-                "https://openrouter.ai/api/v1/models",
-                timeout=20,
-                headers={
-                    "Authorization": f"Bearer {self.settings.openrouter_api_key}"
-                }
-                if self.settings.openrouter_api_key
-                else None,
-            )
-            response.raise_for_status()
-            payload = response.json()
-            models = payload.get("data", [])
-            ids = [m.get("id") for m in models if isinstance(m, dict) and m.get("id")]
-            preferred = [
-                "mistralai/mistral-7b-instruct",
-                "mistralai/mistral-7b-instruct:free",
-            ]
-            for candidate in preferred:
-                if candidate in ids:
-                    return candidate
-            for model_id in ids:
-                if isinstance(model_id, str) and model_id.startswith("mistralai/") and model_id.endswith(":free"):
-                    return model_id
-            for model_id in ids:
-                if isinstance(model_id, str) and model_id.startswith("mistralai/"):
-                    return model_id
-        except Exception:
+    def _models_endpoint_headers(self) -> dict[str, str] | None:
+        if not self.settings.openrouter_api_key:
             return None
+        return {"Authorization": f"Bearer {self.settings.openrouter_api_key}"}
+
+    @staticmethod
+    def _model_ids_from_payload(payload: dict) -> list[str]:
+        models = payload.get("data", [])
+        return [m.get("id") for m in models if isinstance(m, dict) and isinstance(m.get("id"), str)]
+
+    @staticmethod
+    def _pick_mistral_model(ids: list[str]) -> str | None:
+        preferred = [
+            "mistralai/mistral-7b-instruct",
+            "mistralai/mistral-7b-instruct:free",
+        ]
+        for candidate in preferred:
+            if candidate in ids:
+                return candidate
+        for model_id in ids:
+            if model_id.startswith("mistralai/") and model_id.endswith(":free"):
+                return model_id
+        for model_id in ids:
+            if model_id.startswith("mistralai/"):
+                return model_id
         return None
 
+    @staticmethod
+    def _pick_free_models(ids: list[str], limit: int) -> list[str]:
+        free_models = [m for m in ids if m.endswith(":free")]
+        # Prefer mistral family first, then any free model.
+        mistral_first = [m for m in free_models if m.startswith("mistralai/")]
+        others = [m for m in free_models if not m.startswith("mistralai/")]
+        ordered = mistral_first + others
+        return ordered[:limit]
+
+    @staticmethod
+    def _is_model_unavailable_error(exc: Exception) -> bool:
+        msg = str(exc).lower()
+        return (
+            "model_not_available" in msg
+            or "non-serverless model" in msg
+            or "provider returned error" in msg
+            or "no endpoints found" in msg
+        )
+
+    def _fallback_candidates(self, discovered_mistral: str | None, free_models: list[str]) -> list[str]:
+        # Retry configured family first.
+        candidates: list[str] = []
+        if self.settings.openrouter_model != "mistralai/mistral-7b-instruct:free":
+            candidates.append("mistralai/mistral-7b-instruct:free")
+        if discovered_mistral and discovered_mistral not in candidates:
+            candidates.append(discovered_mistral)
+        for model_id in free_models:
+            if model_id not in candidates:
+                candidates.append(model_id)
+        return candidates
+
+    def _discover_model_ids(self) -> list[str]:
+        response = requests.get(
+            OPENROUTER_MODELS_URL,
+            timeout=20,
+            headers=self._models_endpoint_headers(),
+        )
+        response.raise_for_status()
+        return self._model_ids_from_payload(response.json())
+
+    def _discover_available_mistral_model(self) -> str | None:
+        return self._pick_mistral_model(self.model_catalog.model_ids(self._discover_model_ids))
+
     def _discover_available_free_models(self, limit: int = 8) -> list[str]:
-        try:
-            response = requests.get(
-                "https://openrouter.ai/api/v1/models",
-                timeout=20,
-                headers={
-                    "Authorization": f"Bearer {self.settings.openrouter_api_key}"
-                }
-                if self.settings.openrouter_api_key
-                else None,
-            )
-            response.raise_for_status()
-            payload = response.json()
-            models = payload.get("data", [])
-            ids = [m.get("id") for m in models if isinstance(m, dict) and m.get("id")]
-            free_models = [m for m in ids if isinstance(m, str) and m.endswith(":free")]
-
-            # Prefer mistral family first, then any free model.
-            mistral_first = [m for m in free_models if m.startswith("mistralai/")]
-            others = [m for m in free_models if not m.startswith("mistralai/")]
-            ordered = mistral_first + others
-            return ordered[:limit]
-        except Exception:
-            return []
+        return self._pick_free_models(self.model_catalog.model_ids(self._discover_model_ids), limit)
+
+    def _candidate_models(self, ids: list[str]) -> list[str]:
+        candidates = self._fallback_candidates(self._pick_mistral_model(ids), self._pick_free_models(ids, limit=8))
+        candidates = [m for m in candidates if m != self.settings.openrouter_model]
+        return self.model_catalog.order_candidates(candidates)
+
+    @staticmethod
+    def _fallback_error(tried_models: list[str], exc: Exception | None) -> RuntimeError:
+        return RuntimeError(
+            "OpenRouter model invocation failed for configured and fallback models. "
+            f"Tried fallbacks: {tried_models}. Original error: {exc}"
+        )
+
+    def _pick_hedge_backup(self, ids: list[str]) -> str | None:
+        # Claims the half-open probe of the model it picks, like any fallback call.
+        return next((m for m in self._candidate_models(ids) if self.model_catalog.is_available(m)), None)
+
+    def _hedge_backup(self, prompt: str) -> tuple[str, Any] | None:
+        backup = self._pick_hedge_backup(self.model_catalog.model_ids(self._discover_model_ids))
+        if backup is None:
+            return None
+
+        def call() -> Any:
+            # A backup reports its own outcome, won or lost: the caller only learns about the winner.
+            try:
+                response = self._build_llm(backup).invoke(prompt)
+            except Exception:
+                self.model_catalog.record_failure(backup)
+                raise
+            else:
+                self.model_catalog.record_success(backup)
+            finally:
+                self.model_catalog.release_probe(backup)
+            return response
+
+        return backup, call
+
+    def _call_primary(self, prompt: str) -> tuple[str, Any]:
+        """The model that answered, the primary or its hedge backup, and its response."""
+        if self.hedger is None:
+            return self.settings.openrouter_model, self.llm.invoke(prompt)
+        return self.hedger.call(
+            self.settings.openrouter_model,
+            lambda: self.llm.invoke(prompt),
+            lambda: self._hedge_backup(prompt),
+        )
+
+    def _llm_slot(self) -> AbstractContextManager[None]:
+        """One admission slot per logical LLM call, fallbacks included."""
+        return self.admission.slot() if self.admission is not None else nullcontext()
 
     def _invoke_llm(self, prompt: str) -> Any:
-        try:
-            return self.llm.invoke(prompt)
-        except Exception as exc:
-            msg = str(exc).lower()
-            if (
-                "model_not_available" in msg
-                or "non-serverless model" in msg
-                or "provider returned error" in msg
-                or "no endpoints found" in msg
-            ):
-                tried_models: list[str] = []
-
-                # Retry configured family first.
-                candidates: list[str] = []
-                if self.settings.openrouter_model != "mistralai/mistral-7b-instruct:free":
-                    candidates.append("mistralai/mistral-7b-instruct:free")
-
-                discovered_mistral = self._discover_available_mistral_model()
-                if discovered_mistral and discovered_mistral not in candidates:
-                    candidates.append(discovered_mistral)
-
-                for model_id in self._discover_available_free_models(limit=8):
-                    if model_id not in candidates:
-                        candidates.append(model_id)
-
-                for model_id in candidates:
-                    fallback = self._build_llm(model_id)
-                    try:
-                        return fallback.invoke(prompt)
-                    except Exception:
-                        tried_models.append(model_id)
-                        continue
-                raise RuntimeError(
-                    "OpenRouter model invocation failed for configured and fallback models. "
-                    f"Tried fallbacks: {tried_models}. Original error: {exc}"
-                ) from exc
-            raise
+        with self._llm_slot():
+            return self._invoke_llm_with_fallback(prompt)
+
+    def _invoke_llm_with_fallback(self, prompt: str) -> Any:
+        catalog = self.model_catalog
+        primary = self.settings.openrouter_model
+        original: Exception | None = None
+        primary_open = not catalog.is_available(primary)
+        if not primary_open:
+            try:
+                answered, response = self._call_primary(prompt)
+            except Exception as exc:
+                if not self._is_model_unavailable_error(exc):
+                    raise
+                catalog.record_failure(primary)
+                original = exc
+            else:
+                if answered == primary:
+                    catalog.record_success(primary)
+                return response
+            finally:
+                # Errors that say nothing about the model still end a half-open probe.
+                catalog.release_probe(primary)
+
+        tried_models: list[str] = []
+        for model_id in self._candidate_models(catalog.model_ids(self._discover_model_ids)):
+            if not catalog.is_available(model_id):
+                # Another request is already probing this half-open model.
+                continue
+            try:
+                response = self._build_llm(model_id).invoke(prompt)
+            except Exception:
+                catalog.record_failure(model_id)
+                tried_models.append(model_id)
+                continue
+            catalog.record_success(model_id, sticky=True)
+            return response
 
-    def generate_sql(self, request: QueryRequest) -> str:
-        prompt = build_sql_prompt(
+        if primary_open and not tried_models:
+            # Nothing healthy to fall back to; probe the configured model anyway.
+            response = self.llm.invoke(prompt)
+            catalog.record_success(primary)
+            return response
+        raise self._fallback_error(tried_models, original) from original
+
+    @staticmethod
+    def _is_follow_up(request: QueryRequest) -> bool:
+        return bool(request.previous_sql) and looks_like_follow_up(request.question)
+
+    def _sql_prompt(self, request: QueryRequest) -> str:
+        if self._is_follow_up(request):
+            # Only the previous SQL travels with a follow-up, not the whole schema.
+            return build_follow_up_prompt(
+                question=request.question,
+                previous_sql=request.previous_sql or "",
+                previous_columns=request.previous_columns,
+                allowed_tables=self.allowed_tables,
+            )
+        return build_sql_prompt(
             question=request.question,
             schema_summary=self.schema_summary,
             allowed_tables=self.allowed_tables,
             business_definitions=self.business_definitions,
+            value_matches=self.value_index.lookup(request.question) if self.value_index else None,
         )
-        sql = _stringify_response(self._invoke_llm(prompt)).strip()
+
+    @staticmethod
+    def _clean_sql(response: Any) -> str:
+        sql = _stringify_response(response).strip()
         # Strip markdown fences if model returns them.
-        sql = sql.replace("```sql", "").replace("```", "").strip()
+        return sql.replace("```sql", "").replace("```", "").strip()
+
+    def _planned_sql(self, request: QueryRequest, response: Any) -> str:
+        sql = self._clean_sql(response)
+        if self._is_follow_up(request):
+            METRICS.incr("follow_up_queries_total")
+            return compose_follow_up_sql(request.previous_sql or "", sql)
         return sql
 
-    def execute_safe_query(self, sql: str, max_rows: int) -> tuple[list[dict[str, Any]], list[str]]:
-        validation = validate_select_only_sql(sql, allowed_tables=self.allowed_tables)
+    def generate_sql(self, request: QueryRequest) -> str:
+        with self.timings.stage("sql_generation"):
+            prompt = self._sql_prompt(request)
+            response = self._invoke_llm(prompt)
+        self.timings.record_tokens("sql_generation", prompt, response)
+        return self._planned_sql(request, response)
+
+    def _validated_sql(self, sql: str) -> str:
+        with self.timings.stage("validation"):
+            validation = validate_select_only_sql(sql, allowed_tables=self.allowed_tables)
         if not validation.is_safe:
             raise ValueError(f"Unsafe SQL blocked: {validation.reason}")
+        return validation.sql
+
+    def _run_limited(self, validated_sql: str, limit: int, offset: int = 0, paged: bool = False) -> EvidenceBatch:
+        # Rollup rewrites happen after validation: the user-facing SQL keeps naming the base table.
+        executed_sql = (self.rollups.rewrite(validated_sql) if self.rollups else None) or validated_sql
+        return self._execute_limited(executed_sql, limit, offset, stable=paged)
+
+    @contextmanager
+    def _connection(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        if self.connection_pool is not None:
+            with self.connection_pool.connection() as conn:
+                yield conn
+            return
+        conn = self.query_guard.connect(self.db_path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _execute_limited(self, executed_sql: str, limit: int, offset: int = 0, stable: bool = False) -> EvidenceBatch:
+        with self._connection() as conn:
+            if stable:
+                # Planning alone gives the output columns the tiebreaker sorts by.
+                columns = len(conn.execute(f"DESCRIBE {executed_sql.strip().rstrip(';')}").fetchall())
+                executed_sql = stable_page_sql(executed_sql, columns)
+            limited_sql = f"SELECT * FROM ({executed_sql.rstrip(';')}) AS subquery LIMIT {int(limit)}"
+            if offset:
+                limited_sql += f" OFFSET {int(offset)}"
+            if self.profiler is None:
+                return self.query_guard.execute(conn, limited_sql)
+            with self.profiler.query_profiling(conn) as capturing:
+                evidence = self.query_guard.execute(conn, limited_sql)
+                if capturing:
+                    self.profiler.record_query(conn, executed_sql)
+            return evidence
+
+    def execute_evidence(self, sql: str, max_rows: int) -> EvidenceBatch:
+        validated_sql = self._validated_sql(sql)
+        if self.filter_usage is not None:
+            self.filter_usage.record(validated_sql)
+        if self.result_cache is not None:
+            cached = self.result_cache.get(validated_sql, max_rows, self.snapshot_id)
+            self.timings.flag("result_cache", cached is not None)
+            if cached is not None:
+                return cached
+
+        with self.timings.stage("execution"):
+            evidence = self._run_limited(validated_sql, max_rows)
+        if self.result_cache is not None:
+            self.result_cache.put(validated_sql, max_rows, self.snapshot_id, evidence)
+        return evidence
+
+    def execute_approximate(self, sql: str, max_rows: int) -> tuple[EvidenceBatch, Approximation] | None:
+        """Estimate an aggregate from the table's sample; None when ineligible or the interval is too wide."""
+        if not self.sampler:
+            return None
+        sampled = self.sampler.rewrite(self._validated_sql(sql))
+        if sampled is None:
+            return None
+        with self.timings.stage("approximate_execution"):
+            if sampled.missing_groups_sql is not None:
+                missing = self._execute_limited(sampled.missing_groups_sql, 1).table.column("missing")[0].as_py()
+                if missing:
+                    METRICS.incr("approximate_fallbacks_total")
+                    return None
+            batch = self._execute_limited(sampled.sql, max_rows)
+        evidence, bounds = self.sampler.error_bounds(batch, sampled)
+        if not self.sampler.acceptable(bounds):
+            return None
+        approximation = Approximation(
+            sample_fraction=sampled.sample.fraction,
+            confidence=self.sampler.confidence,
+            error_bounds={column: round(bound, 4) for column, bound in bounds.items()},
+        )
+        return evidence, approximation
 
-        conn = duckdb.connect(str(self.db_path), read_only=True)
-        limited_sql = f"SELECT * FROM ({validation.sql.rstrip(';')}) AS subquery LIMIT {max_rows}"
-        cursor = conn.execute(limited_sql)
-        cols = [d[0] for d in cursor.description]
-        rows_raw = cursor.fetchall()
-        rows = [dict(zip(cols, row)) for row in rows_raw]
-        conn.close()
-        return rows, cols
+    def _request_evidence(self, request: QueryRequest, sql: str) -> tuple[EvidenceBatch, Approximation | None]:
+        if request.approximate:
+            approximate = self.execute_approximate(sql, request.max_evidence_rows)
+            if approximate is not None:
+                return approximate
+        return self.execute_evidence(sql=sql, max_rows=request.max_evidence_rows), None
 
-    def answer(self, request: QueryRequest) -> AgentAnswer:
-        sql = self.generate_sql(request)
-        rows, cols = self.execute_safe_query(sql=sql, max_rows=request.max_evidence_rows)
-        answer_prompt = build_answer_prompt(
-            question=request.question,
-            sql=sql,
-            rows=rows,
-            row_cap=request.max_evidence_rows,
-        )
-        summary_raw = _stringify_response(self._invoke_llm(answer_prompt)).strip()
-        summary = self._ensure_bullet_points(summary_raw)
+    def execute_page(self, sql: str, offset: int, page_size: int) -> EvidenceBatch:
+        """One page of the full result for exports; bypasses the evidence cap and the LLM entirely."""
+        return self._run_limited(self._validated_sql(sql), page_size, offset, paged=True)
+
+    def execute_safe_query(self, sql: str, max_rows: int) -> tuple[list[dict[str, Any]], list[str]]:
+        evidence = self.execute_evidence(sql, max_rows)
+        return evidence.to_rows(), evidence.columns
+
+    def _stream_llm(self, prompt: str) -> Iterator[str]:
+        with self._llm_slot():
+            if not hasattr(self.llm, "stream"):
+                yield _stringify_response(self._invoke_llm_with_fallback(prompt))
+                return
+            started = False
+            try:
+                for chunk in self.llm.stream(prompt):
+                    text = _stringify_response(chunk)
+                    if text:
+                        started = True
+                        yield text
+            except Exception:
+                # Before any token is out we can still take the fallback cascade.
+                if started:
+                    raise
+                yield _stringify_response(self._invoke_llm_with_fallback(prompt))
+
+    def _finalize_summary(self, summary_raw: str) -> str:
+        summary = self._ensure_bullet_points(summary_raw.strip())
         summary = self._remove_technical_bullets(summary)
-        summary = self._dedupe_bullets(summary)
+        return self._dedupe_bullets(summary)
+
+    def _build_answer(
+        self,
+        request: QueryRequest,
+        sql: str,
+        summary: str,
+        evidence: EvidenceBatch,
+        answer_path: str = "llm",
+        summary_source: str = "llm",
+        result_shape: str | None = None,
+        approximation: Approximation | None = None,
+    ) -> AgentAnswer:
+        if approximation is not None:
+            worst = max(approximation.error_bounds.values())
+            summary += f"\n- These figures are estimates, accurate to within about ±{worst:.1%}."
         return AgentAnswer(
             question=request.question,
             summary=summary,
             sql=sql,
-            evidence_rows=rows,
-            evidence_columns=cols,
+            evidence=evidence,
+            evidence_columns=evidence.columns,
             generated_at=datetime.now(UTC),
             model=self.settings.openrouter_model,
+            answer_path=answer_path,
+            summary_source=summary_source,
+            result_shape=result_shape,
+            follow_up=self._is_follow_up(request),
+            approximation=approximation,
+            timings=self.timings.to_model(),
+        )
+
+    def _template_answer(
+        self,
+        request: QueryRequest,
+        sql: str,
+        evidence: EvidenceBatch,
+        approximation: Approximation | None = None,
+    ) -> tuple[AgentAnswer | None, str]:
+        """Render simple result shapes without the answer LLM call; returns (answer or None, shape)."""
+        # One row past the group-by limit is enough to classify; wide results are never materialized.
+        rows = evidence.head(SMALL_GROUP_MAX_ROWS + 1).to_rows()
+        cols = evidence.columns
+        shape = classify_result_shape(rows, cols)
+        summary = render_template_summary(shape, rows, cols) if self.template_summaries else None
+        if summary is None:
+            METRICS.incr("answer_llm_calls_total", shape=shape)
+            return None, shape
+        METRICS.incr("answer_llm_skipped_total", shape=shape)
+        answer = self._build_answer(
+            request,
+            sql,
+            summary,
+            evidence,
+            summary_source="template",
+            result_shape=shape,
+            approximation=approximation,
         )
+        return answer, shape
+
+    def _fast_path_plan(self, request: QueryRequest) -> FastPathPlan | None:
+        # "How many of those?" is about the previous answer, not the whole table.
+        if self.fast_path is None or self._is_follow_up(request):
+            return None
+        with self.timings.stage("fast_path"):
+            plan = self.fast_path.match(request.question)
+        if plan is None or plan.confidence < self.fast_path.min_confidence:
+            return None
+        return plan
+
+    def _fast_path_answer(
+        self,
+        request: QueryRequest,
+        plan: FastPathPlan,
+        evidence: EvidenceBatch,
+    ) -> AgentAnswer:
+        rows, cols = evidence.to_rows(), evidence.columns
+        summary = render_fast_path_summary(plan, rows, cols)
+        METRICS.incr("fast_path_answers_total", intent=plan.intent)
+        return self._build_answer(
+            request,
+            plan.sql,
+            summary,
+            evidence,
+            answer_path="fast_path",
+            summary_source="template",
+            result_shape=classify_result_shape(rows, cols),
+        )
+
+    def _try_fast_path(self, request: QueryRequest) -> AgentAnswer | None:
+        plan = self._fast_path_plan(request)
+        if plan is None:
+            return None
+        try:
+            evidence = self.execute_evidence(sql=plan.sql, max_rows=request.max_evidence_rows)
+        except Exception:
+            # A template that does not fit the data is not an error; the LLM path can still answer.
+            return None
+        return self._fast_path_answer(request, plan, evidence)
+
+    @staticmethod
+    def _answer_prompt(request: QueryRequest, sql: str, evidence: EvidenceBatch) -> str:
+        return build_answer_prompt(
+            question=request.question,
+            sql=sql,
+            evidence=evidence,
+            row_cap=request.max_evidence_rows,
+        )
+
+    def answer(self, request: QueryRequest) -> AgentAnswer:
+        self.timings = StageTimings()
+        fast = self._try_fast_path(request)
+        if fast is not None:
+            return fast
+        sql = self.generate_sql(request)
+        evidence, approximation = self._request_evidence(request, sql)
+        templated, shape = self._template_answer(request, sql, evidence, approximation)
+        if templated is not None:
+            return templated
+        answer_prompt = self._answer_prompt(request, sql, evidence)
+        with self.timings.stage("answer_llm"):
+            response = self._invoke_llm(answer_prompt)
+        self.timings.record_tokens("answer_llm", answer_prompt, response)
+        summary = self._finalize_summary(_stringify_response(response))
+        return self._build_answer(request, sql, summary, evidence, result_shape=shape, approximation=approximation)
+
+    def answer_stream(self, request: QueryRequest) -> Iterator[tuple[str, Any]]:
+        """Yield (event, data) pairs: sql_generated, rows_ready, token..., then answer."""
+        self.timings = StageTimings()
+        fast = self._try_fast_path(request)
+        if fast is not None:
+            yield "sql_generated", {"sql": fast.sql}
+            yield "rows_ready", {"row_count": len(fast.evidence), "columns": fast.evidence_columns}
+            yield "answer", fast
+            return
+        sql = self.generate_sql(request)
+        yield "sql_generated", {"sql": sql}
+        evidence, approximation = self._request_evidence(request, sql)
+        yield "rows_ready", {"row_count": evidence.num_rows, "columns": evidence.columns}
+        templated, shape = self._template_answer(request, sql, evidence, approximation)
+        if templated is not None:
+            yield "answer", templated
+            return
+        answer_prompt = self._answer_prompt(request, sql, evidence)
+        parts: list[str] = []
+        with self.timings.stage("answer_llm"):
+            for text in self._stream_llm(answer_prompt):
+                parts.append(text)
+                yield "token", {"text": text}
+        self.timings.record_tokens("answer_llm", answer_prompt, None, "".join(parts))
+        summary = self._finalize_summary("".join(parts))
+        yield "answer", self._build_answer(request, sql, summary, evidence, result_shape=shape, approximation=approximation)
 
     @staticmethod
     def _ensure_bullet_points(text: str) -> str:
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import json
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import duckdb
+
+from agent.evidence import EvidenceBatch, evidence_from_cursor
+from agent.metrics import METRICS
+
+# Operators that must consume their whole input before the outer LIMIT can stop them.
+BLOCKING_OPERATORS = ("GROUP_BY", "AGGREGATE", "ORDER_BY", "TOP_N", "WINDOW", "DISTINCT")
+
+
+class QueryGuardError(RuntimeError):
+    status_code = 422
+    code = "query_rejected"
+
+    def to_detail(self) -> dict[str, Any]:
+        return {"code": self.code, "message": str(self)}
+
+
+class QueryRejectedError(QueryGuardError):
+    code = "query_too_expensive"
+
+    def __init__(self, message: str, estimated_rows: int) -> None:
+        super().__init__(message)
+        self.estimated_rows = estimated_rows
+
+    def to_detail(self) -> dict[str, Any]:
+        return {**super().to_detail(), "estimated_rows": self.estimated_rows}
+
+
+class QueryTimeoutError(QueryGuardError):
+    status_code = 504
+    code = "query_timeout"
+
+    def __init__(self, message: str, timeout_seconds: float) -> None:
+        super().__init__(message)
+        self.timeout_seconds = timeout_seconds
+
+    def to_detail(self) -> dict[str, Any]:
+        return {**super().to_detail(), "timeout_seconds": self.timeout_seconds}
+
+
+@dataclass
+class PlanEstimate:
+    peak_rows: int
+    blocking: bool
+
+
+def _node_rows(node: dict[str, Any]) -> int:
+    raw = (node.get("extra_info") or {}).get("Estimated Cardinality")
+    if raw is not None:
+        try:
+            return int(raw)
+        except (TypeError, ValueError):
+            pass
+    child_rows = [_node_rows(child) for child in node.get("children", [])]
+    if not child_rows:
+        return 0
+    if node.get("name") == "CROSS_PRODUCT":
+        product = 1
+        for rows in child_rows:
+            product *= max(rows, 1)
+        return product
+    return max(child_rows)
+
+
+def _walk(node: dict[str, Any]) -> tuple[int, bool]:
+    peak = _node_rows(node)
+    blocking = any(op in str(node.get("name", "")) for op in BLOCKING_OPERATORS)
+    for child in node.get("children", []):
+        child_peak, child_blocking = _walk(child)
+        peak = max(peak, child_peak)
+        blocking = blocking or child_blocking
+    return peak, blocking
+
+
+def apply_thread_cap(conn: duckdb.DuckDBPyConnection, threads: int) -> None:
+    """Cap DuckDB's worker threads for the database `conn` belongs to.
+
+    `threads` is a database setting, not a connection one: every connection this process holds
+    on the same file shares it. Apply it once, when the handle is opened, with the same value
+    everywhere.
+    """
+    if threads > 0:
+        conn.execute(f"SET threads = {int(threads)}")
+
+
+def estimate_plan(conn: duckdb.DuckDBPyConnection, sql: str) -> PlanEstimate:
+    row = conn.execute(f"EXPLAIN (FORMAT json) {sql}").fetchone()
+    nodes = json.loads(row[1]) if row else []
+    peak, blocking = 0, False
+    for node in nodes:
+        node_peak, node_blocking = _walk(node)
+        peak = max(peak, node_peak)
+        blocking = blocking or node_blocking
+    return PlanEstimate(peak_rows=peak, blocking=blocking)
+
+
+class QueryGuard:
+    """EXPLAIN-based cost check, a process-wide thread cap and a watchdog that interrupts slow queries."""
+
+    def __init__(
+        self,
+        max_estimated_rows: int = 50_000_000,
+        timeout_seconds: float = 10.0,
+        max_threads: int = 2,
+    ) -> None:
+        self.max_estimated_rows = max_estimated_rows
+        self.timeout_seconds = timeout_seconds
+        self.max_threads = max_threads
+
+    def connect(self, db_path: Path) -> duckdb.DuckDBPyConnection:
+        """Open the database read-only with the thread cap applied."""
+        conn = duckdb.connect(str(db_path), read_only=True)
+        apply_thread_cap(conn, self.max_threads)
+        return conn
+
+    def check(self, conn: duckdb.DuckDBPyConnection, limited_sql: str) -> PlanEstimate:
+        estimate = estimate_plan(conn, limited_sql)
+        if estimate.peak_rows <= self.max_estimated_rows:
+            return estimate
+        if not estimate.blocking:
+            # A pure streaming plan is already rewritten behind the evidence LIMIT, so DuckDB
+            # stops after max_rows; the watchdog still covers filters that never fill it.
+            METRICS.incr("query_guard_limited_total")
+            return estimate
+        METRICS.incr("query_guard_rejected_total")
+        raise QueryRejectedError(
+            f"Query rejected: the plan is estimated to touch {estimate.peak_rows:,} rows "
+            f"(limit {self.max_estimated_rows:,}). Try narrowing the question or adding filters.",
+            estimated_rows=estimate.peak_rows,
+        )
+
+    def execute(self, conn: duckdb.DuckDBPyConnection, limited_sql: str) -> EvidenceBatch:
+        self.check(conn, limited_sql)
+        watchdog = threading.Timer(self.timeout_seconds, conn.interrupt) if self.timeout_seconds > 0 else None
+        if watchdog is not None:
+            watchdog.daemon = True
+            watchdog.start()
+        try:
+            return evidence_from_cursor(conn.execute(limited_sql))
+        except duckdb.InterruptException as exc:
+            METRICS.incr("query_guard_timeouts_total")
+            raise QueryTimeoutError(
+                f"Query timed out after {self.timeout_seconds:g}s and was cancelled.",
+                timeout_seconds=self.timeout_seconds,
+            ) from exc
+        finally:
+            if watchdog is not None:
+                watchdog.cancel()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import re
+from collections import OrderedDict
+from threading import Lock
+from typing import Any
+
+from agent.evidence import EvidenceBatch
+
+_LITERAL_RE = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+_PUNCT_SPACE_RE = re.compile(r"\s*([(),=<>+\-*/])\s*")
+
+
+def canonicalize_sql(sql: str) -> str:
+    """Normalize whitespace/case outside string literals so equivalent SQL shares a key."""
+    parts = _LITERAL_RE.split(sql.strip().rstrip(";").strip())
+    out: list[str] = []
+    for idx, part in enumerate(parts):
+        if idx % 2 == 1:
+            # Quoted literal or identifier, keep verbatim.
+            out.append(part)
+            continue
+        clean = " ".join(part.split()).lower()
+        clean = _PUNCT_SPACE_RE.sub(r"\1", clean)
+        out.append(clean)
+    return "".join(out)
+
+
+class ResultCache:
+    """Byte-bounded LRU of query results, scoped to one sync snapshot."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        self._entries: OrderedDict[tuple[str, int], EvidenceBatch] = OrderedDict()
+        self._bytes = 0
+        self._snapshot_id: str | None = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def snapshot_id(self) -> str | None:
+        return self._snapshot_id
+
+    def bind_snapshot(self, snapshot_id: str | None) -> None:
+        with self._lock:
+            if snapshot_id == self._snapshot_id:
+                return
+            # Swap the whole generation in one step so readers never see a mix.
+            self._entries = OrderedDict()
+            self._bytes = 0
+            self._snapshot_id = snapshot_id
+
+    def get(self, sql: str, max_rows: int, snapshot_id: str | None) -> EvidenceBatch | None:
+        key = (canonicalize_sql(sql), max_rows)
+        with self._lock:
+            entry = self._entries.get(key) if snapshot_id == self._snapshot_id else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Arrow tables are immutable, so the cached batch is shared without copying.
+        return entry
+
+    def put(
+        self,
+        sql: str,
+        max_rows: int,
+        snapshot_id: str | None,
+        entry: EvidenceBatch,
+    ) -> None:
+        if entry.nbytes > self.max_bytes:
+            return
+        key = (canonicalize_sql(sql), max_rows)
+        with self._lock:
+            # Results computed against an older snapshot must not leak into the new one.
+            if snapshot_id != self._snapshot_id:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = entry
+            self._bytes += entry.nbytes
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = OrderedDict()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "snapshot_id": self._snapshot_id,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import base64
+import gzip
+import hashlib
+import io
+import json
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Callable
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from agent.evidence import EvidenceBatch
+from agent.result_cache import canonicalize_sql
+
+RESULT_FORMATS = ("json", "arrow", "parquet")
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"")
+_ORDER_BY_RE = re.compile(r"\border\s+by\b", re.IGNORECASE)
+_ORDER_END_RE = re.compile(r"\b(?:limit|offset|fetch)\b", re.IGNORECASE)
+_ORDER_ALL_RE = re.compile(r"^all(?:\s+(?:asc|desc))?(?:\s+nulls\s+(?:first|last))?$", re.IGNORECASE)
+
+
+class ResultHandleError(LookupError):
+    status_code = 404
+    code = "result_not_found"
+
+    def to_detail(self) -> dict[str, Any]:
+        return {"code": self.code, "message": str(self)}
+
+
+class ResultExpiredError(ResultHandleError):
+    status_code = 410
+    code = "result_snapshot_expired"
+
+
+@dataclass(frozen=True)
+class ResultHandle:
+    handle: str
+    sql: str
+    snapshot_id: str | None
+    created_at: float
+
+
+@dataclass
+class ResultPage:
+    handle: str
+    evidence: EvidenceBatch
+    offset: int
+    next_cursor: str | None
+
+
+def _top_level(sql: str) -> str:
+    """`sql` with string literals and everything inside parentheses blanked out, at the same offsets."""
+    text = _LITERAL_RE.sub(lambda m: " " * len(m.group()), sql)
+    depth, top_level = 0, []
+    for ch in text:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        top_level.append(ch if depth == 0 and ch != ")" else " ")
+    return "".join(top_level)
+
+
+def stable_page_sql(sql: str, column_count: int) -> str:
+    """Give the rows a total order, so LIMIT/OFFSET pages neither overlap nor skip rows.
+
+    DuckDB is free to produce rows in a different order on every run wherever the SQL leaves it
+    open: everywhere without ORDER BY, and among ties of the ORDER BY keys. Unordered SQL is sorted
+    by every output column; ordered SQL keeps its keys and breaks ties by every output column.
+    """
+    sql = sql.strip().rstrip(";")
+    top_level = _top_level(sql)
+    orders = list(_ORDER_BY_RE.finditer(top_level))
+    if not orders:
+        return f"SELECT * FROM ({sql}) AS page_source ORDER BY ALL"
+    start = orders[-1].end()
+    tail = _ORDER_END_RE.search(top_level, start)
+    end = tail.start() if tail else len(sql)
+    if _ORDER_ALL_RE.match(sql[start:end].strip()) or column_count <= 0:
+        return sql
+    tiebreak = ", ".join(str(position) for position in range(1, column_count + 1))
+    return f"{sql[:end].rstrip()}, {tiebreak} {sql[end:]}".rstrip()
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"o": offset}).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None) -> int:
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = int(json.loads(base64.urlsafe_b64decode(padded))["o"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise ValueError("Invalid result cursor") from exc
+    if offset < 0:
+        raise ValueError("Invalid result cursor")
+    return offset
+
+
+class ResultHandleRegistry:
+    """Maps opaque handles to the SQL behind an answer, scoped to the snapshot it was asked on."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = Lock()
+        self._entries: OrderedDict[str, ResultHandle] = OrderedDict()
+
+    @staticmethod
+    def handle_for(sql: str, snapshot_id: str | None) -> str:
+        # Deterministic, so re-asking (or an answer-cache hit) hands back the same handle.
+        digest = hashlib.sha256(f"{snapshot_id}\n{canonicalize_sql(sql)}".encode()).hexdigest()
+        return f"r_{digest[:24]}"
+
+    def register(self, sql: str, snapshot_id: str | None) -> str:
+        handle = self.handle_for(sql, snapshot_id)
+        with self._lock:
+            self._entries.pop(handle, None)
+            self._entries[handle] = ResultHandle(handle, sql, snapshot_id, self._clock())
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return handle
+
+    def resolve(self, handle: str, snapshot_id: str | None) -> ResultHandle:
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is not None and self._clock() - entry.created_at > self.ttl_seconds:
+                self._entries.pop(handle, None)
+                entry = None
+        if entry is None:
+            raise ResultHandleError(f"Unknown or expired result handle: {handle}")
+        if entry.snapshot_id != snapshot_id:
+            raise ResultExpiredError("The data has been re-synced since this answer; ask the question again.")
+        return entry
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries}
+
+
+def _compression(value: str | None, supported: tuple[str, ...], default: str | None) -> str | None:
+    if value is None:
+        return default
+    value = value.lower()
+    if value in ("", "none"):
+        return None
+    if value not in supported:
+        raise ValueError(f"Unsupported compression {value!r}; use one of: none, {', '.join(supported)}")
+    return value
+
+
+def encode_page(
+    page: ResultPage,
+    fmt: str,
+    compression: str | None = None,
+    accept_encoding: str = "",
+) -> tuple[bytes, str, dict[str, str]]:
+    """Serialize a page; returns (body, media type, extra headers)."""
+    headers = {"X-Result-Offset": str(page.offset), "X-Row-Count": str(page.evidence.num_rows)}
+    if page.next_cursor:
+        headers["X-Next-Cursor"] = page.next_cursor
+    table = page.evidence.table
+
+    if fmt == "arrow":
+        # Arrow IPC compresses buffers in-band; lz4/zstd readers handle it transparently.
+        codec = _compression(compression, ("zstd", "lz4"), "zstd")
+        if codec and not pa.Codec.is_available(codec):
+            codec = None
+        sink = io.BytesIO()
+        options = pa.ipc.IpcWriteOptions(compression=codec)
+        with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+        return sink.getvalue(), ARROW_MEDIA_TYPE, headers
+
+    if fmt == "parquet":
+        codec = _compression(compression, ("zstd", "gzip", "snappy"), "zstd")
+        sink = io.BytesIO()
+        pq.write_table(table, sink, compression=codec or "none")
+        return sink.getvalue(), PARQUET_MEDIA_TYPE, headers
+
+    if fmt != "json":
+        raise ValueError(f"Unsupported format {fmt!r}; use one of: {', '.join(RESULT_FORMATS)}")
+    body = json.dumps(
+        {
+            "handle": page.handle,
+            "columns": page.evidence.columns,
+            "rows": page.evidence.to_rows(),
+            "offset": page.offset,
+            "next_cursor": page.next_cursor,
+        },
+        default=str,
+    ).encode()
+    if compression is None:
+        wants_gzip = "gzip" in accept_encoding.lower()
+    else:
+        wants_gzip = _compression(compression, ("gzip",), None) == "gzip"
+    if wants_gzip:
+        body = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+    return body, "application/json", headers
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import re
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+
+SCALAR = "scalar"
+SINGLE_ROW = "single_row"
+SMALL_GROUP_BY = "small_group_by"
+WIDE_LIST = "wide_list"
+EMPTY = "empty"
+
+SINGLE_ROW_MAX_COLUMNS = 8
+SMALL_GROUP_MAX_ROWS = 10
+MAX_BULLETS = 8
+
+
+def humanize_column(name: str) -> str:
+    clean = re.sub(r"\(\)$", "", name.strip())
+    clean = re.sub(r"^count_star$", "count", clean, flags=re.IGNORECASE)
+    words = re.sub(r"[_\s]+", " ", clean).strip()
+    return words[:1].upper() + words[1:] if words else name
+
+
+def format_value(value: Any) -> str:
+    if value is None:
+        return "not recorded"
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    if isinstance(value, int):
+        return f"{value:,}"
+    if isinstance(value, (float, Decimal)):
+        number = float(value)
+        if number.is_integer():
+            return f"{int(number):,}"
+        return f"{number:,.2f}".rstrip("0").rstrip(".")
+    if isinstance(value, datetime):
+        return value.strftime("%d %b %Y %H:%M")
+    if isinstance(value, date):
+        return value.strftime("%d %b %Y")
+    return str(value)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+
+def classify_result_shape(rows: list[dict[str, Any]], cols: list[str]) -> str:
+    if not rows:
+        return EMPTY
+    if len(rows) == 1 and len(cols) == 1:
+        return SCALAR
+    if len(rows) == 1 and len(cols) <= SINGLE_ROW_MAX_COLUMNS:
+        return SINGLE_ROW
+    if len(rows) <= SMALL_GROUP_MAX_ROWS and len(cols) == 2:
+        label, measure = cols
+        if all(_is_number(r.get(measure)) or r.get(measure) is None for r in rows) and not all(
+            _is_number(r.get(label)) for r in rows
+        ):
+            return SMALL_GROUP_BY
+    return WIDE_LIST
+
+
+def render_template_summary(shape: str, rows: list[dict[str, Any]], cols: list[str]) -> str | None:
+    """Deterministic bullets for simple result shapes; None means the LLM should summarize."""
+    if shape == EMPTY:
+        return "- No matching details found."
+    if shape == SCALAR:
+        col = cols[0]
+        return f"- {humanize_column(col)}: {format_value(rows[0].get(col))}"
+    if shape == SINGLE_ROW:
+        lines = [
+            f"- {humanize_column(col)}: {format_value(rows[0].get(col))}"
+            for col in cols
+            if rows[0].get(col) not in (None, "")
+        ]
+        return "\n".join(lines[:MAX_BULLETS]) or "- No details recorded."
+    if shape == SMALL_GROUP_BY:
+        label, measure = cols
+        measure_name = humanize_column(measure).lower()
+        lines = [f"- {format_value(r.get(label))}: {measure_name} {format_value(r.get(measure))}" for r in rows]
+        if len(lines) > MAX_BULLETS:
+            lines = lines[:MAX_BULLETS] + [f"- {len(rows) - MAX_BULLETS} more groups not shown."]
+        return "\n".join(lines)
+    return None
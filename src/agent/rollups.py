@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import duckdb
+
+from agent.metrics import METRICS
+from agent.settings import RollupSettings, RollupSpec
+
+ROLLUP_PREFIX = "__rollup_"
+NUMERIC_TYPES = ("INT", "DECIMAL", "DOUBLE", "FLOAT", "REAL", "NUMERIC")
+MAX_AUTO_MEASURES = 8
+
+_IDENT = r"[a-zA-Z_][a-zA-Z0-9_]*"
+_QUERY_RE = re.compile(
+    rf"^\s*select\s+(?P<select>.+?)\s+from\s+(?P<table>{_IDENT})"
+    r"(?:\s+where\s+(?P<where>.+?))?"
+    r"(?:\s+group\s+by\s+(?P<group>.+?))?"
+    r"(?:\s+order\s+by\s+(?P<order>.+?))?"
+    r"(?:\s+limit\s+(?P<limit>\d+))?\s*;?\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+_AGG_RE = re.compile(rf"^(?P<func>count|sum|min|max|avg)\s*\(\s*(?P<arg>\*|{_IDENT})\s*\)$", re.IGNORECASE)
+_ITEM_RE = re.compile(rf"^(?P<expr>.+?)(?:\s+as\s+(?P<alias>\"[^\"]+\"|{_IDENT}))?$", re.IGNORECASE | re.DOTALL)
+_ORDER_ITEM_RE = re.compile(r"^(?P<expr>.+?)(?P<suffix>(?:\s+(?:asc|desc))?(?:\s+nulls\s+(?:first|last))?)$", re.IGNORECASE)
+_UNSUPPORTED_RE = re.compile(r"\b(join|having|union|intersect|except|distinct|over|with|select\s.+\bselect)\b", re.IGNORECASE | re.DOTALL)
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_WHERE_KEYWORDS = {
+    "and", "or", "not", "in", "is", "null", "like", "ilike", "between", "true", "false",
+    "date", "timestamp", "interval", "cast", "as", "varchar", "integer",
+}
+
+
+@dataclass(frozen=True)
+class Rollup:
+    name: str
+    table: str
+    dimensions: tuple[str, ...]
+    measures: tuple[str, ...]
+    row_count: int = 0
+
+
+def rollup_table_name(table: str, dimensions: list[str] | tuple[str, ...]) -> str:
+    return f"{ROLLUP_PREFIX}{table}__{'__'.join(dimensions)}"
+
+
+def _is_numeric(dtype: str) -> bool:
+    return any(kind in dtype.upper() for kind in NUMERIC_TYPES)
+
+
+def _measures_for(table: dict[str, Any], dimensions: list[str]) -> list[str]:
+    keys = {k.lower() for k in table.get("key_columns", [])}
+    out = []
+    for col in table.get("columns", []):
+        name = col["name"]
+        lowered = name.lower()
+        if name in dimensions or lowered in keys or lowered == "id" or lowered.endswith("_id"):
+            continue
+        if _is_numeric(col.get("dtype", "")):
+            out.append(name)
+    return out[:MAX_AUTO_MEASURES]
+
+
+def suggest_rollups(schema_summary: dict, settings: RollupSettings) -> list[RollupSpec]:
+    """Single-dimension rollups over low-cardinality columns of large tables.
+
+    `<base>_by_<column>` report tables (Zoho summary reports) are treated as a strong hint even
+    when the column is not among the lowest-cardinality ones.
+    """
+    tables = {t["table_name"]: t for t in schema_summary.get("tables", [])}
+    hinted: dict[str, set[str]] = {}
+    for name in tables:
+        match = re.match(r"^(?P<base>.+?)_by_(?P<dim>.+)$", name)
+        if not match:
+            continue
+        for base_name, base in tables.items():
+            if base_name == name or not base_name.startswith(match.group("base")):
+                continue
+            for col in base.get("columns", []):
+                if col["name"].lower() == match.group("dim").lower():
+                    hinted.setdefault(base_name, set()).add(col["name"])
+
+    specs: list[RollupSpec] = []
+    for name, table in tables.items():
+        if table.get("row_count", 0) < settings.min_table_rows:
+            continue
+        dims: list[str] = []
+        for col in table.get("columns", []):
+            distinct = col.get("distinct_count_estimate")
+            low_cardinality = distinct is not None and 0 < distinct <= settings.max_dimension_cardinality
+            if col["name"] in hinted.get(name, set()) or (low_cardinality and not _is_numeric(col.get("dtype", ""))):
+                dims.append(col["name"])
+        for dim in dims:
+            specs.append(RollupSpec(table=name, dimensions=[dim], measures=_measures_for(table, [dim])))
+    return specs
+
+
+def resolve_rollup_specs(settings: RollupSettings, schema_summary: dict) -> list[RollupSpec]:
+    if not settings.enabled:
+        return []
+    specs = list(settings.tables)
+    if settings.auto_suggest:
+        seen = {(s.table, tuple(s.dimensions)) for s in specs}
+        for spec in suggest_rollups(schema_summary, settings):
+            if (spec.table, tuple(spec.dimensions)) not in seen:
+                specs.append(spec)
+    return specs
+
+
+def _measure_columns(measure: str) -> list[str]:
+    return [
+        f"SUM({measure}) AS __sum_{measure}",
+        f"COUNT({measure}) AS __cnt_{measure}",
+        f"MIN({measure}) AS __min_{measure}",
+        f"MAX({measure}) AS __max_{measure}",
+    ]
+
+
+def materialize_rollups(db_path: Path, specs: list[RollupSpec]) -> list[Rollup]:
+    """(Re)build every rollup table after a sync and record them in __rollups."""
+    conn = duckdb.connect(str(db_path), read_only=False)
+    built: list[Rollup] = []
+    try:
+        existing = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+        for stale in sorted(t for t in existing if t.startswith(ROLLUP_PREFIX)):
+            conn.execute(f"DROP TABLE {stale}")
+        for spec in specs:
+            if spec.table not in existing:
+                continue
+            columns = {row[0] for row in conn.execute(f"DESCRIBE {spec.table}").fetchall()}
+            dims = [d for d in spec.dimensions if d in columns]
+            measures = [m for m in spec.measures if m in columns and m not in dims]
+            if not dims or len(dims) != len(spec.dimensions):
+                continue
+            name = rollup_table_name(spec.table, dims)
+            select = dims + ["COUNT(*) AS __count"] + [c for m in measures for c in _measure_columns(m)]
+            conn.execute(
+                f"CREATE OR REPLACE TABLE {name} AS SELECT {', '.join(select)} FROM {spec.table} "
+                f"GROUP BY {', '.join(dims)}"
+            )
+            row_count = int(conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0])
+            built.append(Rollup(name, spec.table, tuple(dims), tuple(measures), row_count))
+        conn.execute(
+            "CREATE OR REPLACE TABLE __rollups (name VARCHAR, table_name VARCHAR, definition JSON, built_at TIMESTAMP)"
+        )
+        now = datetime.now(UTC)
+        for rollup in built:
+            definition = {"dimensions": rollup.dimensions, "measures": rollup.measures, "row_count": rollup.row_count}
+            conn.execute("INSERT INTO __rollups VALUES (?, ?, ?, ?)", [rollup.name, rollup.table, json.dumps(definition), now])
+    finally:
+        conn.close()
+    return built
+
+
+def rollups_to_payload(rollups: list[Rollup]) -> list[dict[str, Any]]:
+    return [
+        {
+            "name": r.name,
+            "table": r.table,
+            "dimensions": list(r.dimensions),
+            "measures": list(r.measures),
+            "row_count": r.row_count,
+        }
+        for r in rollups
+    ]
+
+
+def rollups_from_payload(payload: list[dict[str, Any]]) -> list[Rollup]:
+    return [
+        Rollup(p["name"], p["table"], tuple(p["dimensions"]), tuple(p["measures"]), int(p.get("row_count", 0)))
+        for p in payload
+    ]
+
+
+def _split_top_level(text: str) -> list[str]:
+    parts, depth, current = [], 0, []
+    for ch in text:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        current.append(ch)
+    if current:
+        parts.append("".join(current).strip())
+    return parts
+
+
+@dataclass
+class _Plan:
+    select: list[str] = field(default_factory=list)
+    dims_used: set[str] = field(default_factory=set)
+    measures_used: set[str] = field(default_factory=set)
+    aggregates: dict[str, str] = field(default_factory=dict)
+
+
+class RollupRewriter:
+    """Rewrite simple single-table aggregates onto the smallest rollup that can answer them."""
+
+    def __init__(self, rollups: list[Rollup]) -> None:
+        self._by_table: dict[str, list[Rollup]] = {}
+        for rollup in sorted(rollups, key=lambda r: r.row_count):
+            self._by_table.setdefault(rollup.table.lower(), []).append(rollup)
+
+    def __bool__(self) -> bool:
+        return bool(self._by_table)
+
+    @staticmethod
+    def _aggregate(func: str, arg: str, rollup: Rollup) -> str | None:
+        func = func.lower()
+        # SUM over no rollup rows is NULL, but COUNT over no base rows is 0.
+        if arg == "*":
+            return "COALESCE(CAST(SUM(__count) AS BIGINT), 0)" if func == "count" else None
+        if arg in rollup.measures:
+            return {
+                "count": f"COALESCE(CAST(SUM(__cnt_{arg}) AS BIGINT), 0)",
+                "sum": f"SUM(__sum_{arg})",
+                "min": f"MIN(__min_{arg})",
+                "max": f"MAX(__max_{arg})",
+                "avg": f"SUM(__sum_{arg}) / NULLIF(SUM(__cnt_{arg}), 0)",
+            }[func]
+        if arg in rollup.dimensions:
+            if func == "count":
+                return f"COALESCE(CAST(SUM(CASE WHEN {arg} IS NOT NULL THEN __count ELSE 0 END) AS BIGINT), 0)"
+            if func in ("min", "max"):
+                return f"{func.upper()}({arg})"
+        return None
+
+    def _rewrite_with(self, rollup: Rollup, match: re.Match[str]) -> str | None:
+        dims = {d.lower(): d for d in rollup.dimensions}
+        group = [g.strip() for g in _split_top_level(match.group("group") or "")]
+        select_items = _split_top_level(match.group("select"))
+        out_select: list[str] = []
+        aggregates: dict[str, str] = {}
+        for position, item in enumerate(select_items, start=1):
+            parts = _ITEM_RE.match(item)
+            if not parts:
+                return None
+            expr, alias = parts.group("expr").strip(), parts.group("alias")
+            agg = _AGG_RE.match(expr)
+            if agg:
+                rewritten = self._aggregate(agg.group("func"), agg.group("arg"), rollup)
+                if rewritten is None:
+                    return None
+                default_name = "count_star()" if agg.group("arg") == "*" else f"{agg.group('func').lower()}({agg.group('arg')})"
+                out_select.append(f"{rewritten} AS {alias or json.dumps(default_name)}")
+                aggregates[re.sub(r"\s+", "", expr.lower())] = rewritten
+                continue
+            if expr.lower() not in dims:
+                return None
+            if expr not in group and expr.lower() not in {g.lower() for g in group} and str(position) not in group:
+                return None
+            out_select.append(item)
+        for g in group:
+            if not g.isdigit() and g.lower() not in dims:
+                return None
+
+        where = match.group("where")
+        if where:
+            bare = _LITERAL_RE.sub("''", where)
+            for word in re.findall(_IDENT, bare):
+                lowered = word.lower()
+                if lowered not in _WHERE_KEYWORDS and lowered not in dims:
+                    return None
+
+        order = match.group("order")
+        out_order: list[str] = []
+        for item in _split_top_level(order or ""):
+            parts = _ORDER_ITEM_RE.match(item)
+            expr, suffix = (parts.group("expr").strip(), parts.group("suffix")) if parts else (item, "")
+            key = re.sub(r"\s+", "", expr.lower())
+            if _AGG_RE.match(expr):
+                if key not in aggregates:
+                    agg = _AGG_RE.match(expr)
+                    rewritten = self._aggregate(agg.group("func"), agg.group("arg"), rollup)
+                    if rewritten is None:
+                        return None
+                    aggregates[key] = rewritten
+                out_order.append(f"{aggregates[key]}{suffix}")
+            else:
+                out_order.append(item)
+
+        sql = f"SELECT {', '.join(out_select)} FROM {rollup.name}"
+        if where:
+            sql += f" WHERE {where}"
+        if group:
+            sql += f" GROUP BY {', '.join(group)}"
+        if out_order:
+            sql += f" ORDER BY {', '.join(out_order)}"
+        if match.group("limit"):
+            sql += f" LIMIT {match.group('limit')}"
+        return sql
+
+    def rewrite(self, sql: str) -> str | None:
+        if not self._by_table or _UNSUPPORTED_RE.search(_LITERAL_RE.sub("''", sql)):
+            return None
+        match = _QUERY_RE.match(sql)
+        if not match:
+            return None
+        for rollup in self._by_table.get(match.group("table").lower(), []):
+            rewritten = self._rewrite_with(rollup, match)
+            if rewritten is not None:
+                METRICS.incr("rollup_rewrites_total", table=rollup.table)
+                return rewritten
+        return None
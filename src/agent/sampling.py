@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import json
+import math
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from statistics import NormalDist
+from typing import Any
+
+import duckdb
+
+from agent.evidence import EvidenceBatch
+from agent.metrics import METRICS
+from agent.rollups import _AGG_RE, _IDENT, _ITEM_RE, _LITERAL_RE, _QUERY_RE, _UNSUPPORTED_RE, _split_top_level
+from agent.settings import SamplingSettings
+
+SAMPLE_PREFIX = "__sample_"
+SAMPLE_SEED = 42
+# The base table's distinct values of each low-cardinality column, recorded at sync time.
+GROUP_KEYS_TABLE = "__sample_group_keys"
+_SE_PREFIX = "__se_"
+_GROUP_COLUMN_RE = re.compile(rf'^\s*(?:"(?P<quoted>[^"]+)"|(?P<plain>{_IDENT}))\s*$')
+
+
+@dataclass(frozen=True)
+class Sample:
+    name: str
+    table: str
+    fraction: float
+    row_count: int = 0
+    # Columns whose base-table values are in GROUP_KEYS_TABLE, so approximate GROUP BYs on them can be checked.
+    group_columns: tuple[str, ...] = ()
+
+
+@dataclass
+class SampledQuery:
+    sql: str
+    sample: Sample
+    # (output column, standard-error column) per estimated aggregate.
+    estimates: list[tuple[str, str]] = field(default_factory=list)
+    # For grouped queries: counts recorded base-table groups that have no row in the sample.
+    missing_groups_sql: str | None = None
+
+
+def sample_table_name(table: str) -> str:
+    return f"{SAMPLE_PREFIX}{table}"
+
+
+def materialize_samples(db_path: Path, schema_summary: dict, settings: SamplingSettings) -> list[Sample]:
+    """(Re)build a Bernoulli sample of every table with at least `min_table_rows` rows."""
+    conn = duckdb.connect(str(db_path), read_only=False)
+    built: list[Sample] = []
+    try:
+        existing = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+        for stale in sorted(t for t in existing if t.startswith(SAMPLE_PREFIX)):
+            conn.execute(f"DROP TABLE {stale}")
+        if not settings.enabled:
+            return built
+        conn.execute(f"CREATE TABLE {GROUP_KEYS_TABLE} (table_name VARCHAR, column_name VARCHAR, key VARCHAR)")
+        for table in schema_summary.get("tables", []):
+            name, rows = table["table_name"], int(table.get("row_count") or 0)
+            if name not in existing or rows < settings.min_table_rows:
+                continue
+            fraction = min(1.0, settings.sample_rows / rows)
+            sample = sample_table_name(name)
+            conn.execute(
+                f"CREATE OR REPLACE TABLE {sample} AS SELECT * FROM {name} "
+                f"USING SAMPLE {fraction * 100:.6f}% (bernoulli, {SAMPLE_SEED})"
+            )
+            count = int(conn.execute(f"SELECT COUNT(*) FROM {sample}").fetchone()[0])
+            group_columns = tuple(
+                column["name"]
+                for column in table.get("columns", [])
+                if column.get("distinct_count_estimate") is not None
+                and column["distinct_count_estimate"] <= settings.max_group_keys
+            )
+            for column in group_columns:
+                conn.execute(
+                    f'INSERT INTO {GROUP_KEYS_TABLE} SELECT DISTINCT ?, ?, CAST("{column}" AS VARCHAR) FROM {name}',
+                    [name, column],
+                )
+            built.append(Sample(sample, name, fraction, count, group_columns))
+    finally:
+        conn.close()
+    return built
+
+
+def samples_to_payload(samples: list[Sample]) -> list[dict[str, Any]]:
+    return [
+        {
+            "name": s.name,
+            "table": s.table,
+            "fraction": s.fraction,
+            "row_count": s.row_count,
+            "group_columns": list(s.group_columns),
+        }
+        for s in samples
+    ]
+
+
+def samples_from_payload(payload: list[dict[str, Any]]) -> list[Sample]:
+    return [
+        Sample(
+            p["name"],
+            p["table"],
+            float(p["fraction"]),
+            int(p.get("row_count", 0)),
+            tuple(p.get("group_columns") or ()),
+        )
+        for p in payload
+    ]
+
+
+def _sql_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _estimators(func: str, arg: str, f: float) -> tuple[str, str] | None:
+    """(estimate, standard error) SQL for one aggregate over a Bernoulli sample with inclusion probability f."""
+    func = func.lower()
+    if func == "count":
+        counted = "COUNT(*)" if arg == "*" else f"COUNT({arg})"
+        return f"CAST(ROUND({counted} / {f!r}) AS BIGINT)", f"SQRT({counted} * (1 - {f!r})) / {f!r}"
+    if func == "sum":
+        squared = f"SUM(CAST({arg} AS DOUBLE) * CAST({arg} AS DOUBLE))"
+        return f"SUM({arg}) / {f!r}", f"SQRT((1 - {f!r}) * {squared}) / {f!r}"
+    if func == "avg":
+        return f"AVG({arg})", f"STDDEV_SAMP({arg}) / SQRT(COUNT({arg}))"
+    # MIN and MAX have no unbiased estimate from a sample.
+    return None
+
+
+class Sampler:
+    """Rewrite single-table COUNT/SUM/AVG queries onto sync-time samples and bound their error."""
+
+    def __init__(self, samples: list[Sample], confidence: float = 0.95, max_relative_error: float = 0.05) -> None:
+        self._by_table = {s.table.lower(): s for s in samples if s.fraction < 1.0}
+        self.confidence = confidence
+        self.max_relative_error = max_relative_error
+        self._z = NormalDist().inv_cdf((1 + confidence) / 2)
+
+    def __bool__(self) -> bool:
+        return bool(self._by_table)
+
+    def rewrite(self, sql: str) -> SampledQuery | None:
+        if not self._by_table or _UNSUPPORTED_RE.search(_LITERAL_RE.sub("''", sql)):
+            return None
+        match = _QUERY_RE.match(sql)
+        if not match:
+            return None
+        sample = self._by_table.get(match.group("table").lower())
+        if sample is None:
+            return None
+        group = match.group("group")
+        group_column = None
+        if group:
+            # Only a single recorded column can be checked for groups the sample missed without
+            # scanning the base table; other groupings run exactly.
+            items = _split_top_level(group)
+            column = _GROUP_COLUMN_RE.match(items[0]) if len(items) == 1 else None
+            recorded = {c.lower(): c for c in sample.group_columns}
+            if column is None or (column.group("quoted") or column.group("plain")).lower() not in recorded:
+                return None
+            group_column = recorded[(column.group("quoted") or column.group("plain")).lower()]
+
+        out_select: list[str] = []
+        errors: list[str] = []
+        estimates: list[tuple[str, str]] = []
+        for position, item in enumerate(_split_top_level(match.group("select")), start=1):
+            parts = _ITEM_RE.match(item)
+            if not parts:
+                return None
+            expr, alias = parts.group("expr").strip(), parts.group("alias")
+            agg = _AGG_RE.match(expr)
+            if not agg:
+                out_select.append(item)
+                continue
+            estimator = _estimators(agg.group("func"), agg.group("arg"), sample.fraction)
+            if estimator is None:
+                return None
+            default_name = "count_star()" if agg.group("arg") == "*" else f"{agg.group('func').lower()}({agg.group('arg')})"
+            column = alias.strip('"') if alias else default_name
+            se_column = f"{_SE_PREFIX}{position}"
+            out_select.append(f"{estimator[0]} AS {json.dumps(column)}")
+            errors.append(f"{estimator[1]} AS {se_column}")
+            estimates.append((column, se_column))
+        if not estimates:
+            return None
+
+        rewritten = f"SELECT {', '.join(out_select + errors)} FROM {sample.name}"
+        for clause, keyword in (("where", "WHERE"), ("group", "GROUP BY"), ("order", "ORDER BY"), ("limit", "LIMIT")):
+            if match.group(clause):
+                rewritten += f" {keyword} {match.group(clause)}"
+        missing_groups_sql = None
+        if group_column is not None:
+            # A group too rare to land in the sample would silently vanish from the answer. The base
+            # table's groups were recorded at sync time; only the sample is read here. Under a WHERE
+            # this is conservative: a group the filter removes from the base too still counts as missing.
+            where = f" WHERE {match.group('where')}" if match.group("where") else ""
+            missing_groups_sql = (
+                f"SELECT COUNT(*) AS missing FROM (SELECT key FROM {GROUP_KEYS_TABLE} "
+                f"WHERE table_name = {_sql_literal(sample.table)} AND column_name = {_sql_literal(group_column)} "
+                f'EXCEPT SELECT DISTINCT CAST("{group_column}" AS VARCHAR) FROM {sample.name}{where})'
+            )
+        return SampledQuery(rewritten, sample, estimates, missing_groups_sql)
+
+    def error_bounds(self, batch: EvidenceBatch, query: SampledQuery) -> tuple[EvidenceBatch, dict[str, float]]:
+        """Strip the standard-error columns; return the worst relative half-width per estimated column."""
+        bounds: dict[str, float] = {}
+        for column, se_column in query.estimates:
+            # No sampled rows says nothing about rare matches in the full table.
+            worst = 0.0 if batch.num_rows else math.inf
+            for estimate, error in zip(batch.table.column(column).to_pylist(), batch.table.column(se_column).to_pylist()):
+                if estimate is None:
+                    continue
+                if error is None or float(estimate) == 0:
+                    worst = math.inf
+                    break
+                worst = max(worst, self._z * float(error) / abs(float(estimate)))
+            bounds[column] = worst
+        evidence = EvidenceBatch(batch.table.drop_columns([se for _, se in query.estimates]))
+        return evidence, bounds
+
+    def acceptable(self, bounds: dict[str, float]) -> bool:
+        ok = bool(bounds) and max(bounds.values()) <= self.max_relative_error
+        METRICS.incr("approximate_answers_total" if ok else "approximate_fallbacks_total")
+        return ok
@@ -1,11 +1,13 @@
 from __future__ import annotations
 
 import json
+import time
 from datetime import UTC, datetime
 from pathlib import Path
 
 import duckdb
 
+from agent.metrics import METRICS
 from agent.models import ColumnSummary, SchemaSummary
 from agent.settings import AppConfig
 
@@ -71,6 +73,7 @@ def build_schema_summaries(db_path: Path, app_config: AppConfig) -> list[SchemaS
 
     summaries: list[SchemaSummary] = []
     for table in tables:
+        started = time.perf_counter()
         row_count = int(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0])
         describe = conn.execute(f"DESCRIBE {table}").fetchall()
         cols = []
@@ -97,7 +100,9 @@ def build_schema_summaries(db_path: Path, app_config: AppConfig) -> list[SchemaS
             columns=cols,
             join_hints=app_config.join_hints,
             generated_at=datetime.now(UTC),
+            profile_seconds=round(time.perf_counter() - started, 6),
         )
+        METRICS.observe("schema_profile_seconds", summary.profile_seconds, table=table)
         summaries.append(summary)
 
         conn.execute(
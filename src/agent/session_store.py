@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Protocol
+
+from agent.metrics import METRICS
+
+SESSION_BACKENDS = ("memory", "sqlite")
+
+
+@dataclass
+class SessionState:
+    """What a follow-up question needs from earlier turns: recent lines and the last answer's relation."""
+
+    history: list[str] = field(default_factory=list)
+    previous_sql: str | None = None
+    previous_columns: list[str] = field(default_factory=list)
+
+
+class SessionStore(Protocol):
+    def get(self, session_id: str) -> SessionState: ...
+
+    def record(self, session_id: str, lines: list[str], last_result: tuple[str, list[str]] | None) -> None: ...
+
+    def clear(self, session_id: str) -> None: ...
+
+    def stats(self) -> dict[str, Any]: ...
+
+    def close(self) -> None: ...
+
+
+@dataclass
+class _Entry:
+    state: SessionState
+    touched: float
+
+
+class _Shard:
+    __slots__ = ("lock", "entries")
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        # Least recently used first, so TTL and capacity eviction both pop from the front.
+        self.entries: OrderedDict[str, _Entry] = OrderedDict()
+
+
+class InMemorySessionStore:
+    """Per-process sessions, sharded by session id so requests only contend within their own shard.
+
+    Sessions idle for `ttl_seconds` are dropped, and each shard keeps at most its share of
+    `max_sessions`, evicting the least recently used first.
+    """
+
+    def __init__(
+        self, context_window: int = 6, ttl_seconds: float = 86400.0, max_sessions: int = 10_000, shards: int = 16
+    ) -> None:
+        self.context_window = context_window
+        self.ttl_seconds = ttl_seconds
+        self._shards = [_Shard() for _ in range(max(1, shards))]
+        self._shard_capacity = max(1, -(-max_sessions // len(self._shards)))
+
+    def _shard(self, session_id: str) -> _Shard:
+        return self._shards[zlib.crc32(session_id.encode("utf-8")) % len(self._shards)]
+
+    def _expire(self, shard: _Shard, now: float) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        while shard.entries:
+            entry = next(iter(shard.entries.values()))
+            if now - entry.touched < self.ttl_seconds:
+                return
+            shard.entries.popitem(last=False)
+            METRICS.incr("sessions_evicted_total", reason="ttl")
+
+    def get(self, session_id: str) -> SessionState:
+        shard = self._shard(session_id)
+        with shard.lock:
+            self._expire(shard, time.monotonic())
+            entry = shard.entries.get(session_id)
+            if entry is None:
+                return SessionState()
+            state = entry.state
+            return SessionState(list(state.history), state.previous_sql, list(state.previous_columns))
+
+    def record(self, session_id: str, lines: list[str], last_result: tuple[str, list[str]] | None) -> None:
+        shard = self._shard(session_id)
+        now = time.monotonic()
+        with shard.lock:
+            self._expire(shard, now)
+            entry = shard.entries.pop(session_id, None) or _Entry(SessionState(), now)
+            entry.state.history = (entry.state.history + lines)[-self.context_window :]
+            if last_result is not None:
+                entry.state.previous_sql, entry.state.previous_columns = last_result[0], list(last_result[1])
+            entry.touched = now
+            shard.entries[session_id] = entry
+            while len(shard.entries) > self._shard_capacity:
+                shard.entries.popitem(last=False)
+                METRICS.incr("sessions_evicted_total", reason="capacity")
+
+    def clear(self, session_id: str) -> None:
+        shard = self._shard(session_id)
+        with shard.lock:
+            shard.entries.pop(session_id, None)
+
+    def stats(self) -> dict[str, Any]:
+        sessions = 0
+        for shard in self._shards:
+            with shard.lock:
+                sessions += len(shard.entries)
+        return {"backend": "memory", "sessions": sessions}
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteSessionStore:
+    """Sessions in one SQLite file, shared by every worker process on the host.
+
+    Updates are read-modify-write inside `BEGIN IMMEDIATE`, so concurrent turns of one session,
+    from any process, never drop each other's lines. SQLite locks the whole file for that, not
+    the one session: every write on the host is serialized, one short read and upsert at a time.
+    That suits a handful of workers writing once per answered turn; beyond that, use a store with
+    row-level locking. Expired and excess sessions are deleted by a sweep that each process runs
+    at most every `sweep_interval_seconds`.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        context_window: int = 6,
+        ttl_seconds: float = 86400.0,
+        max_sessions: int = 10_000,
+        sweep_interval_seconds: float = 60.0,
+    ) -> None:
+        self.path = path
+        self.context_window = context_window
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._last_sweep = 0.0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, history TEXT NOT NULL, previous_sql TEXT, "
+            "previous_columns TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections are not shareable across threads; keep one per thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def _live_after(self) -> float:
+        return time.time() - self.ttl_seconds if self.ttl_seconds > 0 else 0.0
+
+    def get(self, session_id: str) -> SessionState:
+        row = (
+            self._conn()
+            .execute(
+                "SELECT history, previous_sql, previous_columns FROM sessions WHERE session_id = ? AND updated_at >= ?",
+                (session_id, self._live_after()),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return SessionState()
+        return SessionState(json.loads(row[0]), row[1], json.loads(row[2]))
+
+    def record(self, session_id: str, lines: list[str], last_result: tuple[str, list[str]] | None) -> None:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            state = self.get(session_id)
+            history = (state.history + lines)[-self.context_window :]
+            previous_sql, previous_columns = last_result or (state.previous_sql, state.previous_columns)
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?)",
+                (session_id, json.dumps(history), previous_sql, json.dumps(list(previous_columns)), time.time()),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if time.monotonic() - self._last_sweep >= self.sweep_interval_seconds:
+            self.sweep()
+
+    def sweep(self) -> None:
+        """Delete sessions idle past the TTL, then the least recently used beyond `max_sessions`."""
+        self._last_sweep = time.monotonic()
+        conn = self._conn()
+        expired = conn.execute("DELETE FROM sessions WHERE updated_at < ?", (self._live_after(),)).rowcount
+        excess = conn.execute(
+            "DELETE FROM sessions WHERE session_id IN "
+            "(SELECT session_id FROM sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_sessions,),
+        ).rowcount
+        if expired:
+            METRICS.incr("sessions_evicted_total", expired, reason="ttl")
+        if excess:
+            METRICS.incr("sessions_evicted_total", excess, reason="capacity")
+
+    def clear(self, session_id: str) -> None:
+        self._conn().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def stats(self) -> dict[str, Any]:
+        (sessions,) = (
+            self._conn()
+            .execute("SELECT COUNT(*) FROM sessions WHERE updated_at >= ?", (self._live_after(),))
+            .fetchone()
+        )
+        return {"backend": "sqlite", "path": str(self.path), "sessions": sessions}
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+def create_session_store(
+    backend: str,
+    default_path: Path,
+    context_window: int = 6,
+    ttl_seconds: float = 86400.0,
+    max_sessions: int = 10_000,
+    path: Path | None = None,
+) -> SessionStore:
+    if backend == "memory":
+        return InMemorySessionStore(context_window, ttl_seconds, max_sessions)
+    if backend == "sqlite":
+        return SQLiteSessionStore(path or default_path, context_window, ttl_seconds, max_sessions)
+    raise ValueError(f"Unknown session backend '{backend}'; expected one of {', '.join(SESSION_BACKENDS)}")
@@ -16,6 +16,39 @@ REQUIRED_MODEL_FREE = "mistralai/mistral-7b-instruct:free"
 
 class QuerySettings(BaseModel):
     evidence_row_cap: int = 30
+    result_cache_max_bytes: int = 64 * 1024 * 1024
+    answer_cache_ttl_seconds: float = 30.0
+    answer_cache_max_entries: int = 512
+    db_max_workers: int = 4
+    fast_path_enabled: bool = True
+    fast_path_min_confidence: float = 0.75
+    template_summaries_enabled: bool = True
+    query_timeout_seconds: float = 10.0
+    query_max_threads: int = 2
+    query_max_estimated_rows: int = 50_000_000
+    result_page_size: int = 1000
+    result_page_max_rows: int = 10_000
+    result_handle_ttl_seconds: float = 3600.0
+    result_handle_max_entries: int = 1024
+    batch_max_questions: int = 1000
+    # Distinct batch questions answered at once; their LLM calls still queue behind the limiter.
+    batch_concurrency: int = 8
+
+
+class LLMSettings(BaseModel):
+    model_catalog_ttl_seconds: float = 600.0
+    breaker_failure_threshold: int = 2
+    breaker_reset_seconds: float = 300.0
+    hedging_enabled: bool = False
+    hedge_percentile: float = 0.9
+    hedge_min_samples: int = 20
+    hedge_min_delay_seconds: float = 0.5
+    hedge_max_extra_ratio: float = 0.1
+    # Concurrent LLM calls per process; 0 turns admission control off.
+    max_concurrent_calls: int = 8
+    # Calls allowed to wait for a slot. Past this, lower priorities are shed first, then new calls get a 429.
+    max_queue_depth: int = 64
+    max_queue_wait_seconds: float = 30.0
 
 
 class SchemaSummarySettings(BaseModel):
@@ -27,6 +60,93 @@ class RefreshSettings(BaseModel):
     default_stale_after_hours: int = 24
 
 
+class RollupSpec(BaseModel):
+    table: str
+    dimensions: list[str]
+    measures: list[str] = Field(default_factory=list)
+
+
+class RollupSettings(BaseModel):
+    enabled: bool = True
+    # Suggest single-column rollups from low-cardinality columns and `<table>_by_<column>` reports.
+    auto_suggest: bool = True
+    min_table_rows: int = 100_000
+    max_dimension_cardinality: int = 64
+    tables: list[RollupSpec] = Field(default_factory=list)
+
+
+class IndexSettings(BaseModel):
+    enabled: bool = True
+    # On sync, index columns that executed SQL has filtered on at least `min_filter_uses` times.
+    advisor_enabled: bool = True
+    min_filter_uses: int = 5
+    min_table_rows: int = 10_000
+    # DuckDB only takes an ART index scan when a lookup matches few rows (`index_scan_max_count`).
+    max_rows_per_value: int = 2048
+    usage_flush_every: int = 20
+
+
+class ValueIndexSettings(BaseModel):
+    enabled: bool = True
+    # Text columns up to this many distinct values are indexed for exact lookups.
+    max_column_cardinality: int = 100_000
+    # Columns up to this many distinct values also tolerate one typo per value.
+    fuzzy_max_cardinality: int = 1_000
+    max_value_chars: int = 64
+    max_phrase_words: int = 4
+    max_matches: int = 8
+
+
+class SamplingSettings(BaseModel):
+    enabled: bool = True
+    # Tables this large get a Bernoulli sample of about `sample_rows` rows at sync time.
+    min_table_rows: int = 1_000_000
+    sample_rows: int = 500_000
+    confidence: float = 0.95
+    # Approximate answers whose interval is wider than this (relative) re-run exactly.
+    max_relative_error: float = 0.05
+    # Columns with at most this many distinct values get their groups recorded at sync time; approximate
+    # GROUP BYs are limited to one such column.
+    max_group_keys: int = 10_000
+
+
+class ProfilingSettings(BaseModel):
+    # Requests at least this slow are written to the slow-query log; 0 turns the log off.
+    slow_query_seconds: float = 5.0
+    # Start sampling the Python stack once a request has run this long; 0 samples only on request.
+    profile_after_seconds: float = 0.0
+    sample_interval_seconds: float = 0.005
+    # Profile every query with DuckDB's `no_output` mode and keep the JSON of requests past
+    # `slow_query_seconds`, so slow-log entries show where the plan spent time.
+    capture_query_profiles: bool = True
+    # Honour the X-Agent-Profile header. It is unauthenticated and skips the caches and coalescing,
+    # so leave it off wherever untrusted clients can reach the API.
+    allow_profile_header: bool = False
+    slowlog_max_bytes: int = 5 * 1024 * 1024
+    slowlog_backups: int = 3
+
+
+class SyncSettings(BaseModel):
+    # Records per data API page; Zoho caps `max_records` at 1000.
+    page_size: int = 1000
+    max_concurrent_reports: int = 4
+    # 429 and 5xx responses are retried with exponential backoff, honouring `Retry-After`.
+    max_retries: int = 5
+    retry_backoff_seconds: float = 1.0
+    retry_backoff_max_seconds: float = 30.0
+    bulk_poll_seconds: float = 2.0
+    bulk_timeout_seconds: float = 600.0
+
+
+class SessionSettings(BaseModel):
+    # "memory" keeps history per process; "sqlite" shares it between uvicorn workers through one file.
+    backend: str = "memory"
+    # SQLite file; defaults to sessions.sqlite in the app's cache directory.
+    path: str | None = None
+    ttl_seconds: float = 86400.0
+    max_sessions: int = 10_000
+
+
 class AppConfig(BaseModel):
     app_name: str
     reports: list[dict[str, Any]] = Field(default_factory=list)
@@ -35,7 +155,15 @@ class AppConfig(BaseModel):
     business_definitions: dict[str, str] = Field(default_factory=dict)
     refresh: RefreshSettings = Field(default_factory=RefreshSettings)
     query: QuerySettings = Field(default_factory=QuerySettings)
+    llm: LLMSettings = Field(default_factory=LLMSettings)
     schema_summary: SchemaSummarySettings = Field(default_factory=SchemaSummarySettings)
+    rollups: RollupSettings = Field(default_factory=RollupSettings)
+    indexes: IndexSettings = Field(default_factory=IndexSettings)
+    value_index: ValueIndexSettings = Field(default_factory=ValueIndexSettings)
+    sampling: SamplingSettings = Field(default_factory=SamplingSettings)
+    profiling: ProfilingSettings = Field(default_factory=ProfilingSettings)
+    sync: SyncSettings = Field(default_factory=SyncSettings)
+    sessions: SessionSettings = Field(default_factory=SessionSettings)
 
     @property
     def report_models(self) -> list[AppReport]:
@@ -41,10 +41,16 @@ def _starts_with_select(sql: str) -> bool:
     return upper.startswith("SELECT") or upper.startswith("WITH")
 
 
+# `WITH [RECURSIVE] name [(col, ...)] AS [NOT] [MATERIALIZED] (`, or the same after a comma.
+_CTE_RE = re.compile(
+    r"(?:\bWITH\s+(?:RECURSIVE\s+)?|,\s*)([a-zA-Z_][a-zA-Z0-9_]*)\s*(?:\([^()]*\)\s*)?"
+    r"AS\s*(?:NOT\s+)?(?:MATERIALIZED\s*)?\(",
+    flags=re.IGNORECASE,
+)
+
+
 def _extract_cte_names(sql: str) -> set[str]:
-    names = set(re.findall(r"\bWITH\s+([a-zA-Z_][a-zA-Z0-9_]*)\s+AS\b", sql, flags=re.IGNORECASE))
-    names.update(re.findall(r",\s*([a-zA-Z_][a-zA-Z0-9_]*)\s+AS\b", sql, flags=re.IGNORECASE))
-    return {n.lower() for n in names}
+    return {n.lower() for n in _CTE_RE.findall(sql)}
 
 
 def _extract_from_join_sources(sql: str) -> list[tuple[str, bool]]:
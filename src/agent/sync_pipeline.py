@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from agent.cache_manager import CacheManager
+from agent.fast_path import IntentMatcher
+from agent.indexes import (
+    FilterUsage,
+    IndexInfo,
+    advise_indexes,
+    build_indexes,
+    indexes_to_payload,
+    load_filter_usage,
+    read_index_catalog,
+)
+from agent.models import SchemaSummary, SyncSnapshot
+from agent.query_guard import QueryGuard
+from agent.rollups import (
+    Rollup,
+    RollupRewriter,
+    materialize_rollups,
+    resolve_rollup_specs,
+    rollups_from_payload,
+    rollups_to_payload,
+)
+from agent.sampling import Sample, Sampler, materialize_samples, samples_from_payload, samples_to_payload
+from agent.schema_summary import build_schema_summaries, schema_summaries_to_json_payload
+from agent.settings import AppConfig
+from agent.timings import timed
+from agent.value_index import ValueIndex, build_value_index
+
+
+@dataclass
+class SyncArtifacts:
+    """What a sync built on top of the ingested tables."""
+
+    summaries: list[SchemaSummary]
+    rollups: list[Rollup]
+    indexes: list[IndexInfo]
+    value_index_entries: int | None
+    samples: list[Sample]
+
+
+def finish_sync(
+    cache: CacheManager,
+    app_config: AppConfig,
+    snapshot: SyncSnapshot,
+    stages: dict[str, float],
+    fetch: dict[str, float] | None = None,
+) -> SyncArtifacts:
+    """Build the schema summary, rollups, indexes, value index and samples, then publish the snapshot."""
+    with timed(stages, "schema_summary"):
+        summaries = build_schema_summaries(cache.db_path, app_config)
+        payload = schema_summaries_to_json_payload(summaries, app_config.app_name)
+        cache.write_schema_summary(payload)
+
+    with timed(stages, "rollups"):
+        rollups = materialize_rollups(cache.db_path, resolve_rollup_specs(app_config.rollups, payload))
+        cache.write_rollups(rollups_to_payload(rollups))
+
+    index_settings = app_config.indexes
+    with timed(stages, "indexes"):
+        advised = []
+        if index_settings.enabled and index_settings.advisor_enabled:
+            usage = load_filter_usage(cache.filter_usage_file)
+            advised = build_indexes(cache.db_path, advise_indexes(usage, payload, index_settings))
+        cache.write_indexes(indexes_to_payload(read_index_catalog(cache.db_path)))
+
+    values = None
+    if app_config.value_index.enabled:
+        with timed(stages, "value_index"):
+            values = build_value_index(cache.db_path, payload, app_config.value_index)
+
+    with timed(stages, "samples"):
+        samples = materialize_samples(cache.db_path, payload, app_config.sampling)
+        cache.write_samples(samples_to_payload(samples))
+
+    # Publish the snapshot only now: a new snapshot id tells the service to rebuild its per-snapshot
+    # state, which must find the rollups, indexes, value index and samples of this sync already there.
+    snapshot.timings.update(
+        profile={s.table_name: s.profile_seconds or 0.0 for s in summaries},
+        fetch=fetch or {},
+        stages=stages,
+    )
+    cache.write_snapshot(snapshot)
+    return SyncArtifacts(summaries, rollups, advised, values, samples)
+
+
+def engine_options(app_config: AppConfig, cache: CacheManager) -> dict[str, Any]:
+    """QueryEngine keyword arguments for answering locally against the synced DuckDB."""
+    schema_summary = cache.read_schema_summary()
+    filter_usage = None
+    if app_config.indexes.enabled:
+        filter_usage = FilterUsage(cache.filter_usage_file, flush_every=app_config.indexes.usage_flush_every)
+        filter_usage.bind(schema_summary, cache.read_indexes())
+    fast_path = None
+    if app_config.query.fast_path_enabled:
+        fast_path = IntentMatcher.from_schema(
+            schema_summary,
+            app_config.allowed_tables,
+            app_config.business_definitions,
+            min_confidence=app_config.query.fast_path_min_confidence,
+        )
+    return {
+        "schema_summary": schema_summary,
+        "allowed_tables": app_config.allowed_tables,
+        "business_definitions": app_config.business_definitions,
+        "fast_path": fast_path,
+        "template_summaries": app_config.query.template_summaries_enabled,
+        "query_guard": QueryGuard(
+            max_estimated_rows=app_config.query.query_max_estimated_rows,
+            timeout_seconds=app_config.query.query_timeout_seconds,
+            max_threads=app_config.query.query_max_threads,
+        ),
+        "rollups": RollupRewriter(rollups_from_payload(cache.read_rollups())),
+        "filter_usage": filter_usage,
+        "value_index": (
+            ValueIndex.from_db(
+                cache.db_path,
+                max_phrase_words=app_config.value_index.max_phrase_words,
+                max_matches=app_config.value_index.max_matches,
+            )
+            if app_config.value_index.enabled
+            else None
+        ),
+        "sampler": Sampler(
+            samples_from_payload(cache.read_samples()),
+            confidence=app_config.sampling.confidence,
+            max_relative_error=app_config.sampling.max_relative_error,
+        ),
+    }
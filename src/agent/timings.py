@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import math
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from agent.metrics import METRICS
+from agent.models import AnswerTimings
+
+# Without provider usage data, ~4 characters per token is close enough for a latency breakdown.
+CHARS_PER_TOKEN = 4
+
+
+def _usage(response: Any) -> tuple[int, int] | None:
+    usage = getattr(response, "usage_metadata", None)
+    if isinstance(usage, dict) and "input_tokens" in usage:
+        return int(usage["input_tokens"]), int(usage.get("output_tokens", 0))
+    token_usage = (getattr(response, "response_metadata", None) or {}).get("token_usage")
+    if isinstance(token_usage, dict) and "prompt_tokens" in token_usage:
+        return int(token_usage["prompt_tokens"]), int(token_usage.get("completion_tokens", 0))
+    return None
+
+
+def _estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+@contextmanager
+def timed(into: dict[str, float], name: str) -> Iterator[None]:
+    """Add the block's wall seconds to `into[name]`; used for sync steps recorded on the snapshot."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        into[name] = round(into.get(name, 0.0) + time.perf_counter() - started, 6)
+
+
+class StageTimings:
+    """Monotonic per-stage timers, LLM token counts and cache flags for one answer.
+
+    Every stage is also observed in the `agent_stage_seconds` histogram so `/metrics`
+    carries the same breakdown across requests.
+    """
+
+    def __init__(self) -> None:
+        self._started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+        self.tokens: dict[str, dict[str, Any]] = {}
+        self.cache: dict[str, bool] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name: str, seconds: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+        METRICS.observe("agent_stage_seconds", seconds, stage=name)
+
+    def record_tokens(self, stage: str, prompt: str, response: Any, text: str | None = None) -> None:
+        usage = _usage(response)
+        estimated = usage is None
+        if usage is None:
+            usage = (_estimate_tokens(prompt), _estimate_tokens(text if text is not None else str(response)))
+        self.tokens[stage] = {"input": usage[0], "output": usage[1], "estimated": estimated}
+        METRICS.incr("llm_tokens_total", usage[0], stage=stage, kind="input")
+        METRICS.incr("llm_tokens_total", usage[1], stage=stage, kind="output")
+
+    def flag(self, name: str, hit: bool) -> None:
+        self.cache[name] = hit
+        METRICS.incr("cache_lookups_total", cache=name, result="hit" if hit else "miss")
+
+    def to_model(self) -> AnswerTimings:
+        return AnswerTimings(
+            total_seconds=round(time.perf_counter() - self._started, 6),
+            stages={name: round(seconds, 6) for name, seconds in self.stages.items()},
+            tokens=dict(self.tokens),
+            cache=dict(self.cache),
+        )
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+import duckdb
+
+from agent.metrics import METRICS
+from agent.settings import ValueIndexSettings
+
+VALUE_INDEX_TABLE = "__value_index"
+TEXT_TYPES = ("VARCHAR", "TEXT", "STRING", "CHAR")
+MIN_VALUE_CHARS = 2
+# Phrases shorter than this only match exactly: one edit away from "won" is half the dictionary.
+MIN_FUZZY_CHARS = 5
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how in is it me my no not of on or show the to was were what "
+    "when where which who why with yes all any each list many much give tell".split()
+)
+
+# Mirrors the SQL normalization in build_value_index so question phrases and stored values compare equal.
+_NORMALIZE_RE = re.compile(r"[^0-9a-z+#]+")
+_SQL_NORMALIZE = "trim(regexp_replace(lower(value), '[^0-9a-z+#]+', ' ', 'g'))"
+
+
+def normalize_value(text: str) -> str:
+    return _NORMALIZE_RE.sub(" ", text.lower()).strip()
+
+
+def _deletes(text: str) -> set[str]:
+    return {text[:i] + text[i + 1 :] for i in range(len(text))}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """One insertion, deletion, substitution or adjacent transposition apart."""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    prefix = 0
+    while prefix < min(len(a), len(b)) and a[prefix] == b[prefix]:
+        prefix += 1
+    a, b = a[prefix:], b[prefix:]
+    if len(a) == len(b):
+        return a[1:] == b[1:] or (a[:2] == b[1::-1] and a[2:] == b[2:])
+    return a[1:] == b if len(a) > len(b) else b[1:] == a
+
+
+@dataclass(frozen=True)
+class ValueMatch:
+    term: str
+    value: str
+    table: str
+    column: str
+    exact: bool = True
+
+
+def _text_columns(schema_summary: dict, settings: ValueIndexSettings) -> list[tuple[str, str, bool]]:
+    """(table, column, fuzzy) for text columns of low or medium cardinality."""
+    out = []
+    for table in schema_summary.get("tables", []):
+        keys = {k.lower() for k in table.get("key_columns", [])}
+        for col in table.get("columns", []):
+            distinct = col.get("distinct_count_estimate") or 0
+            if col["name"].lower() in keys or not any(t in col.get("dtype", "").upper() for t in TEXT_TYPES):
+                continue
+            if 0 < distinct <= settings.max_column_cardinality:
+                out.append((table["table_name"], col["name"], distinct <= settings.fuzzy_max_cardinality))
+    return out
+
+
+def build_value_index(db_path: Path, schema_summary: dict, settings: ValueIndexSettings) -> int:
+    """(Re)build __value_index from the distinct values of every eligible text column; returns its row count."""
+    columns = _text_columns(schema_summary, settings)
+    conn = duckdb.connect(str(db_path), read_only=False)
+    try:
+        conn.execute(
+            f"CREATE OR REPLACE TABLE {VALUE_INDEX_TABLE} "
+            "(norm VARCHAR, value VARCHAR, table_name VARCHAR, column_name VARCHAR, fuzzy BOOLEAN)"
+        )
+        for table, column, fuzzy in columns:
+            conn.execute(
+                f"""
+                INSERT INTO {VALUE_INDEX_TABLE}
+                SELECT {_SQL_NORMALIZE} AS norm, value, ?, ?, ?
+                FROM (SELECT DISTINCT CAST("{column}" AS VARCHAR) AS value FROM {table} WHERE "{column}" IS NOT NULL)
+                WHERE length(value) BETWEEN ? AND ?
+                """,
+                [table, column, fuzzy, MIN_VALUE_CHARS, settings.max_value_chars],
+            )
+        conn.execute(f"DELETE FROM {VALUE_INDEX_TABLE} WHERE length(norm) < {MIN_VALUE_CHARS}")
+        return int(conn.execute(f"SELECT COUNT(*) FROM {VALUE_INDEX_TABLE}").fetchone()[0])
+    finally:
+        conn.close()
+
+
+class ValueIndex:
+    """In-memory view of __value_index for question-time grounding.
+
+    Exact phrases resolve with one dict lookup. Typos in values of low-cardinality
+    columns resolve through a one-deletion neighbourhood (SymSpell style), so each
+    question phrase costs a handful of dict probes however many values are indexed.
+    """
+
+    def __init__(
+        self,
+        rows: list[tuple[str, str, str, str, bool]],
+        max_phrase_words: int = 4,
+        max_matches: int = 8,
+    ) -> None:
+        self.max_phrase_words = max_phrase_words
+        self.max_matches = max_matches
+        self._exact: dict[str, list[tuple[str, str, str]]] = {}
+        self._fuzzy: dict[str, set[str]] = {}
+        for norm, value, table, column, fuzzy in rows:
+            self._exact.setdefault(norm, []).append((value, table, column))
+            if fuzzy and len(norm) >= MIN_FUZZY_CHARS:
+                self._fuzzy.setdefault(norm, set()).add(norm)
+                for variant in _deletes(norm):
+                    self._fuzzy.setdefault(variant, set()).add(norm)
+
+    @classmethod
+    def from_db(cls, db_path: Path, max_phrase_words: int = 4, max_matches: int = 8) -> ValueIndex:
+        conn = duckdb.connect(str(db_path), read_only=True)
+        try:
+            tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
+            if VALUE_INDEX_TABLE not in tables:
+                return cls([], max_phrase_words, max_matches)
+            rows = conn.execute(f"SELECT norm, value, table_name, column_name, fuzzy FROM {VALUE_INDEX_TABLE}").fetchall()
+        finally:
+            conn.close()
+        return cls(rows, max_phrase_words, max_matches)
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    @property
+    def approx_bytes(self) -> int:
+        """Rough in-memory size: per-key dict, tuple and string overhead dominates for short values."""
+        return len(self._exact) * 320 + len(self._fuzzy) * 200
+
+    def _fuzzy_norm(self, phrase: str) -> str | None:
+        # A shared one-deletion variant is necessary for one edit; the edit check makes it sufficient.
+        candidates: set[str] = set(self._fuzzy.get(phrase, ()))
+        for variant in _deletes(phrase):
+            candidates.update(self._fuzzy.get(variant, ()))
+        candidates = {c for c in candidates if _within_one_edit(phrase, c)}
+        return min(candidates, key=lambda c: (abs(len(c) - len(phrase)), c)) if candidates else None
+
+    def lookup(self, question: str) -> list[ValueMatch]:
+        """Longest question phrases that name an indexed value, exact matches first."""
+        if not self._exact:
+            return []
+        tokens = normalize_value(question).split()
+        used = [False] * len(tokens)
+        matches: list[ValueMatch] = []
+        for exact_pass in (True, False):
+            for size in range(min(self.max_phrase_words, len(tokens)), 0, -1):
+                for start in range(len(tokens) - size + 1):
+                    if any(used[start : start + size]):
+                        continue
+                    phrase = " ".join(tokens[start : start + size])
+                    if size == 1 and phrase in STOPWORDS:
+                        continue
+                    if exact_pass:
+                        norm = phrase if phrase in self._exact else None
+                    else:
+                        norm = self._fuzzy_norm(phrase) if len(phrase) >= MIN_FUZZY_CHARS else None
+                    if norm is None:
+                        continue
+                    used[start : start + size] = [True] * size
+                    matches.extend(ValueMatch(phrase, value, table, column, exact_pass) for value, table, column in self._exact[norm])
+        METRICS.incr("value_index_lookups_total")
+        if matches:
+            METRICS.incr("value_index_hits_total")
+        return matches[: self.max_matches]
+
+
+def format_value_hints(matches: list[ValueMatch]) -> str:
+    return "\n".join(
+        f"- \"{m.term}\" is a value of {m.table}.{m.column} (stored as '{m.value}')" for m in matches
+    )
@@ -1,12 +1,21 @@
 from __future__ import annotations
 
+import io
+import random
 import re
+import threading
 import time
-from typing import Any
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Iterator
 
 import requests
 
-from agent.settings import Settings
+from agent.metrics import METRICS
+from agent.settings import Settings, SyncSettings
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
 
 
 class ZohoConfigError(RuntimeError):
@@ -18,14 +27,21 @@ class ZohoCreatorClient:
 
     Uses:
     - metadata endpoint to list reports
-    - data endpoint to fetch report rows
+    - data endpoint to fetch report rows, page by page via `record_cursor`
+    - bulk read endpoint to export whole reports as CSV
+
+    429 and 5xx responses are retried with exponential backoff. The client is safe to share
+    between the threads of `fetch_reports`.
     """
 
-    def __init__(self, settings: Settings, timeout: int = 30) -> None:
+    def __init__(self, settings: Settings, timeout: int = 30, sync: SyncSettings | None = None) -> None:
         self.s = settings
         self.timeout = timeout
+        self.sync = sync or SyncSettings()
         self._access_token: str | None = None
         self._token_expires_at: float = 0.0
+        self._token_lock = threading.Lock()
+        self._http = requests.Session()
 
     def _require_config(self) -> None:
         required = {
@@ -62,46 +78,64 @@ class ZohoCreatorClient:
         expires_in = int(payload.get("expires_in") or payload.get("expires_in_sec") or 3600)
         return token, expires_in
 
-    def _get_access_token(self, force_refresh: bool = False) -> str:
-        now = time.time()
-        if (
-            not force_refresh
-            and self._access_token is not None
-            and now < self._token_expires_at
-        ):
-            return self._access_token
-
-        token, expires_in = self._fetch_access_token()
-        # Refresh slightly early to avoid edge-expiry during requests.
-        refresh_buffer = min(60, max(5, expires_in // 10))
-        self._access_token = token
-        self._token_expires_at = now + max(1, expires_in - refresh_buffer)
-        return token
-
-    def _headers(self, force_refresh: bool = False) -> dict[str, str]:
+    def _get_access_token(self, force_refresh: bool = False, stale: str | None = None) -> str:
+        with self._token_lock:
+            now = time.time()
+            # Concurrent fetches that hit 401 with the same token refresh it once.
+            fresh = self._access_token is not None and self._access_token != stale
+            if (not force_refresh or fresh) and self._access_token is not None and now < self._token_expires_at:
+                return self._access_token
+
+            token, expires_in = self._fetch_access_token()
+            # Refresh slightly early to avoid edge-expiry during requests.
+            refresh_buffer = min(60, max(5, expires_in // 10))
+            self._access_token = token
+            self._token_expires_at = now + max(1, expires_in - refresh_buffer)
+            return token
+
+    def _headers(self, force_refresh: bool = False, stale: str | None = None) -> dict[str, str]:
         return {
-            "Authorization": f"Zoho-oauthtoken {self._get_access_token(force_refresh=force_refresh)}",
+            "Authorization": f"Zoho-oauthtoken {self._get_access_token(force_refresh=force_refresh, stale=stale)}",
             "Accept": "application/json",
         }
 
-    def _request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
-        response = requests.request(
-            method=method,
-            url=url,
-            headers=self._headers(force_refresh=False),
-            timeout=self.timeout,
-            **kwargs,
-        )
-        if response.status_code in {401, 403}:
-            response = requests.request(
+    def _retry_delay(self, response: requests.Response, attempt: int) -> float:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(self.sync.retry_backoff_max_seconds, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        delay = min(self.sync.retry_backoff_max_seconds, self.sync.retry_backoff_seconds * 2**attempt)
+        # Jitter keeps concurrent report fetches from retrying in lockstep.
+        return delay * random.uniform(0.5, 1.0)
+
+    def _request(
+        self, method: str, url: str, headers: dict[str, str] | None = None, **kwargs: Any
+    ) -> requests.Response:
+        attempt = 0
+        refreshed = False
+        request_headers = {**self._headers(), **(headers or {})}
+        while True:
+            response = self._http.request(
                 method=method,
                 url=url,
-                headers=self._headers(force_refresh=True),
+                headers=request_headers,
                 timeout=self.timeout,
                 **kwargs,
             )
-        response.raise_for_status()
-        return response
+            if response.status_code in {401, 403} and not refreshed:
+                refreshed = True
+                stale = request_headers["Authorization"].removeprefix("Zoho-oauthtoken ")
+                request_headers = {**self._headers(force_refresh=True, stale=stale), **(headers or {})}
+                continue
+            if response.status_code in RETRY_STATUSES and attempt < self.sync.max_retries:
+                METRICS.incr("zoho_retries_total", status=str(response.status_code))
+                time.sleep(self._retry_delay(response, attempt))
+                attempt += 1
+                continue
+            response.raise_for_status()
+            return response
 
     def _creator_v21_base(self) -> str:
         return f"{self.s.zoho_base_url}/creator/v2.1"
@@ -181,11 +215,99 @@ class ZohoCreatorClient:
             return [r for r in rows if isinstance(r, dict)]
         return []
 
-    def fetch_report_rows(self, report_link_name: str) -> list[dict[str, Any]]:
+    def iter_report_pages(self, report_link_name: str) -> Iterator[list[dict[str, Any]]]:
+        """Pages of report rows, following the `record_cursor` header until the report is exhausted."""
         self._require_config()
         owner = self.s.zoho_account_owner
         app = self.s.zoho_app_link_name
         url = f"{self._creator_v21_base()}/data/{owner}/{app}/report/{report_link_name}"
-        response = self._request("GET", url)
-        payload = response.json()
-        return self._extract_report_rows(payload)
+        cursor: str | None = None
+        while True:
+            response = self._request(
+                "GET",
+                url,
+                headers={"record_cursor": cursor} if cursor else None,
+                params={"max_records": self.sync.page_size},
+            )
+            rows = self._extract_report_rows(response.json())
+            METRICS.incr("zoho_pages_fetched_total")
+            if rows:
+                yield rows
+            cursor = response.headers.get("record_cursor")
+            if not cursor or not rows:
+                return
+
+    def fetch_report_rows(self, report_link_name: str) -> list[dict[str, Any]]:
+        rows: list[dict[str, Any]] = []
+        for page in self.iter_report_pages(report_link_name):
+            rows.extend(page)
+        return rows
+
+    def fetch_reports(
+        self, report_link_names: list[str], fetch_seconds: dict[str, float] | None = None
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Fetch several reports, up to `sync.max_concurrent_reports` at once."""
+        self._require_config()
+
+        def fetch(link_name: str) -> tuple[str, list[dict[str, Any]], float]:
+            started = time.perf_counter()
+            rows = self.fetch_report_rows(link_name)
+            return link_name, rows, time.perf_counter() - started
+
+        payloads: dict[str, list[dict[str, Any]]] = {}
+        workers = max(1, min(self.sync.max_concurrent_reports, len(report_link_names)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="zoho-fetch") as pool:
+            for link_name, rows, seconds in pool.map(fetch, report_link_names):
+                payloads[link_name] = rows
+                if fetch_seconds is not None:
+                    fetch_seconds[link_name] = round(seconds, 6)
+        return payloads
+
+    def _wait_for_bulk_job(self, job_url: str) -> dict[str, Any]:
+        deadline = time.monotonic() + self.sync.bulk_timeout_seconds
+        while True:
+            details = self._request("GET", job_url).json().get("details") or {}
+            status = str(details.get("status") or "").lower()
+            if status == "completed":
+                return details
+            if status == "failed":
+                raise RuntimeError(f"Zoho bulk read job failed: {job_url}")
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Zoho bulk read job did not finish in {self.sync.bulk_timeout_seconds}s: {job_url}")
+            time.sleep(self.sync.bulk_poll_seconds)
+
+    def bulk_export_report(self, report_link_name: str, dest: Path) -> int:
+        """Export a report through bulk read jobs into one CSV at `dest`; returns the record count.
+
+        Each job returns up to 200,000 records and a `record_cursor` for the next job.
+        """
+        self._require_config()
+        owner = self.s.zoho_account_owner
+        app = self.s.zoho_app_link_name
+        read_url = f"{self._creator_v21_base()}/bulk/{owner}/{app}/report/{report_link_name}/read"
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        total = 0
+        header_written = False
+        cursor: str | None = None
+        with dest.open("wb") as out:
+            while True:
+                query: dict[str, Any] = {"max_records": 200_000}
+                if cursor:
+                    query["record_cursor"] = cursor
+                job = self._request("POST", read_url, json={"query": query}).json().get("details") or {}
+                details = self._wait_for_bulk_job(f"{read_url}/{job['id']}")
+                result = details.get("result") or {}
+                download_url = str(result.get("download_url") or f"{read_url}/{job['id']}/result")
+                if download_url.startswith("/"):
+                    download_url = self.s.zoho_base_url + download_url
+                archive = self._request("GET", download_url).content
+                with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+                    member = next(name for name in zf.namelist() if name.lower().endswith(".csv"))
+                    lines = zf.read(member).splitlines(keepends=True)
+                # Later jobs repeat the header row.
+                out.writelines(lines[1:] if header_written else lines)
+                header_written = header_written or bool(lines)
+                total += int(result.get("count") or max(0, len(lines) - 1))
+                cursor = result.get("record_cursor")
+                if not cursor:
+                    return total
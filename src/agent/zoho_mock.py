@@ -0,0 +1,312 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import io
+import random
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Iterator
+
+import duckdb
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from agent.bench import synthetic_tables
+
+API_PREFIX = "/creator/v2.1"
+
+
+@dataclass
+class MockZohoSettings:
+    rows: int = 10_000
+    wide_columns: int = 10
+    seed: int = 42
+    # Added to every response, token calls included.
+    latency_ms: float = 0.0
+    # Largest `max_records` honoured by the data endpoint; Zoho's own cap is 1000.
+    max_page_size: int = 1000
+    # Fractions of Creator API calls answered with 429 (with `Retry-After`) or 500.
+    rate_limit_rate: float = 0.0
+    retry_after_seconds: float = 1.0
+    error_rate: float = 0.0
+    token_ttl_seconds: int = 3600
+    # How long a bulk read job reports "In-progress" before its download is ready.
+    bulk_job_seconds: float = 0.0
+    bulk_max_records: int = 200_000
+
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _encode_cursor(row_id: int) -> str:
+    return base64.urlsafe_b64encode(str(row_id).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> int:
+    return int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+
+
+class MockZohoState:
+    """Synthetic reports in an in-memory DuckDB, plus tokens, bulk jobs and request counters."""
+
+    def __init__(self, settings: MockZohoSettings) -> None:
+        self.settings = settings
+        self.conn = duckdb.connect()
+        # report link name -> (display name, table)
+        self.reports: dict[str, tuple[str, str]] = {}
+        for name, sql in synthetic_tables(settings.rows, settings.wide_columns, settings.seed).items():
+            table = name.lower()
+            self.conn.execute(f"CREATE TABLE {table} AS {sql}")
+            self.reports[f"All_{name.removesuffix('_Report')}"] = (name.replace("_", " "), table)
+        self.tokens: dict[str, float] = {}
+        self.jobs: dict[str, dict[str, Any]] = {}
+        self.stats: Counter[str] = Counter()
+        self._rng = random.Random(settings.seed)
+        self._lock = threading.Lock()
+
+    def count(self, key: str, value: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += value
+
+    def snapshot_stats(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+    def issue_token(self) -> str:
+        token = f"mock-{uuid.uuid4().hex}"
+        with self._lock:
+            self.tokens[token] = time.time() + self.settings.token_ttl_seconds
+            self.stats["tokens_issued"] += 1
+        return token
+
+    def token_valid(self, authorization: str | None) -> bool:
+        token = (authorization or "").removeprefix("Zoho-oauthtoken ").strip()
+        with self._lock:
+            return self.tokens.get(token, 0.0) > time.time()
+
+    def draw_fault(self) -> int | None:
+        with self._lock:
+            draw = self._rng.random()
+        if draw < self.settings.rate_limit_rate:
+            return 429
+        if draw < self.settings.rate_limit_rate + self.settings.error_rate:
+            return 500
+        return None
+
+    def add_job(self, job: dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self.jobs[job_id] = job
+            self.stats["bulk_jobs"] += 1
+        return job_id
+
+    def row_total(self, table: str) -> int:
+        cursor = self.conn.cursor()
+        try:
+            return int(cursor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0])
+        finally:
+            cursor.close()
+
+    def read_rows(self, table: str, start: int, limit: int) -> tuple[list[dict[str, Any]], int | None]:
+        """Rows with `rowid` in [start, start + limit), and the next start if more remain."""
+        cursor = self.conn.cursor()
+        try:
+            result = cursor.execute(
+                f"SELECT * FROM {table} WHERE rowid >= ? AND rowid < ? ORDER BY rowid", [start, start + limit]
+            )
+            columns = [d[0] for d in result.description]
+            rows = [{c: _json_value(v) for c, v in zip(columns, row)} for row in result.fetchall()]
+        finally:
+            cursor.close()
+        return rows, (start + limit if start + limit < self.row_total(table) else None)
+
+    def export_zip(self, link_name: str, table: str, start: int, limit: int) -> tuple[bytes, int]:
+        cursor = self.conn.cursor()
+        try:
+            with tempfile.TemporaryDirectory(prefix="zoho-mock-") as tmp:
+                csv_path = Path(tmp) / f"{link_name}.csv"
+                cursor.execute(
+                    f"COPY (SELECT * FROM {table} WHERE rowid >= {int(start)} AND rowid < {int(start + limit)} "
+                    f"ORDER BY rowid) TO '{csv_path}' (HEADER)"
+                )
+                count = cursor.execute(
+                    f"SELECT COUNT(*) FROM {table} WHERE rowid >= ? AND rowid < ?", [start, start + limit]
+                ).fetchone()[0]
+                buffer = io.BytesIO()
+                with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+                    zf.write(csv_path, arcname=csv_path.name)
+        finally:
+            cursor.close()
+        return buffer.getvalue(), int(count)
+
+
+def _error(status: int, code: int, message: str, headers: dict[str, str] | None = None) -> JSONResponse:
+    return JSONResponse({"code": code, "message": message}, status_code=status, headers=headers)
+
+
+def create_mock_app(settings: MockZohoSettings | None = None) -> FastAPI:
+    """FastAPI app serving the Zoho Creator v2.1 endpoints `ZohoCreatorClient` calls.
+
+    Point `ZOHO_ACCOUNTS_URL` and `ZOHO_BASE_URL` at it; any client id, secret and refresh token are accepted.
+    """
+    state = MockZohoState(settings or MockZohoSettings())
+    app = FastAPI(title="Zoho Creator v2.1 mock")
+    app.state.zoho = state
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next: Any) -> Response:
+        state.count("requests")
+        if state.settings.latency_ms > 0:
+            await asyncio.sleep(state.settings.latency_ms / 1000)
+        if request.url.path.startswith(API_PREFIX):
+            if not state.token_valid(request.headers.get("Authorization")):
+                state.count("unauthorized")
+                return _error(401, 1030, "Authorization Failure. The access token is either invalid or has expired.")
+            fault = state.draw_fault()
+            if fault == 429:
+                state.count("rate_limited")
+                return _error(
+                    429,
+                    2955,
+                    "You have reached the API call limit.",
+                    headers={"Retry-After": f"{state.settings.retry_after_seconds:g}"},
+                )
+            if fault == 500:
+                state.count("errors")
+                return _error(500, 2945, "Internal error.")
+        return await call_next(request)
+
+    @app.post("/oauth/v2/token")
+    def token(request: Request) -> JSONResponse:
+        params = request.query_params
+        if params.get("grant_type") != "refresh_token" or not params.get("refresh_token"):
+            return JSONResponse({"error": "invalid_code"})
+        return JSONResponse(
+            {
+                "access_token": state.issue_token(),
+                "api_domain": str(request.base_url).rstrip("/"),
+                "token_type": "Bearer",
+                "expires_in": state.settings.token_ttl_seconds,
+            }
+        )
+
+    @app.get(API_PREFIX + "/meta/{owner}/{app_link_name}/reports")
+    def reports(owner: str, app_link_name: str) -> JSONResponse:
+        return JSONResponse(
+            {
+                "code": 3000,
+                "reports": [
+                    {"display_name": display, "link_name": link, "type": 1}
+                    for link, (display, _table) in state.reports.items()
+                ],
+            }
+        )
+
+    @app.get(API_PREFIX + "/data/{owner}/{app_link_name}/report/{report}")
+    async def data(owner: str, app_link_name: str, report: str, request: Request, max_records: int = 200) -> Response:
+        if report not in state.reports:
+            return _error(404, 3100, f"No report named '{report}' found.")
+        cursor = request.headers.get("record_cursor")
+        try:
+            start = _decode_cursor(cursor) if cursor else 0
+        except ValueError:
+            return _error(400, 3020, "Invalid record_cursor.")
+        limit = max(1, min(max_records, state.settings.max_page_size))
+        rows, next_start = await asyncio.to_thread(state.read_rows, state.reports[report][1], start, limit)
+        state.count("pages")
+        state.count("records", len(rows))
+        if not rows:
+            return JSONResponse({"code": 9280, "message": "No records found for the given criteria."})
+        headers = {"record_cursor": _encode_cursor(next_start)} if next_start is not None else None
+        return JSONResponse({"code": 3000, "data": rows}, headers=headers)
+
+    bulk_path = API_PREFIX + "/bulk/{owner}/{app_link_name}/report/{report}/read"
+
+    @app.post(bulk_path)
+    async def create_bulk_job(owner: str, app_link_name: str, report: str, request: Request) -> Response:
+        if report not in state.reports:
+            return _error(404, 3100, f"No report named '{report}' found.")
+        body = await request.json() if await request.body() else {}
+        query = body.get("query") or {}
+        cursor = query.get("record_cursor")
+        job_id = state.add_job(
+            {
+                "report": report,
+                "start": _decode_cursor(cursor) if cursor else 0,
+                "limit": max(1, min(int(query.get("max_records") or 200_000), state.settings.bulk_max_records)),
+                "created": time.monotonic(),
+            }
+        )
+        return JSONResponse(
+            {"code": 3000, "details": {"id": job_id, "operation": "read", "created_by": owner, "status": "In-progress"}}
+        )
+
+    @app.get(bulk_path + "/{job_id}")
+    def bulk_job(owner: str, app_link_name: str, report: str, job_id: str) -> Response:
+        job = state.jobs.get(job_id)
+        if job is None or job["report"] != report:
+            return _error(404, 3100, f"No bulk read job '{job_id}'.")
+        details: dict[str, Any] = {"id": job_id, "operation": "read", "status": "In-progress"}
+        if time.monotonic() - job["created"] >= state.settings.bulk_job_seconds:
+            total = state.row_total(state.reports[report][1])
+            end = job["start"] + job["limit"]
+            result: dict[str, Any] = {
+                "count": max(0, min(end, total) - job["start"]),
+                "download_url": f"{API_PREFIX}/bulk/{owner}/{app_link_name}/report/{report}/read/{job_id}/result",
+            }
+            if end < total:
+                result["record_cursor"] = _encode_cursor(end)
+            details.update(status="Completed", result=result)
+        return JSONResponse({"code": 3000, "details": details})
+
+    @app.get(bulk_path + "/{job_id}/result")
+    async def bulk_result(owner: str, app_link_name: str, report: str, job_id: str) -> Response:
+        job = state.jobs.get(job_id)
+        if job is None or job["report"] != report:
+            return _error(404, 3100, f"No bulk read job '{job_id}'.")
+        content, count = await asyncio.to_thread(
+            state.export_zip, report, state.reports[report][1], job["start"], job["limit"]
+        )
+        state.count("records", count)
+        return Response(content, media_type="application/zip")
+
+    @app.get("/__mock/stats")
+    def stats() -> dict[str, int]:
+        return state.snapshot_stats()
+
+    return app
+
+
+@contextmanager
+def serve_mock_in_thread(app: FastAPI, host: str = "127.0.0.1", port: int = 0) -> Iterator[str]:
+    """Run `app` with uvicorn on a background thread; yields its base URL."""
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=server.run, name="zoho-mock", daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if not thread.is_alive() or time.monotonic() > deadline:
+            raise RuntimeError("Zoho mock server did not start")
+        time.sleep(0.01)
+    bound_port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        yield f"http://{host}:{bound_port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
@@ -0,0 +1,37 @@
+from pathlib import Path
+
+import pytest
+import yaml
+
+from agent.cache_manager import CacheManager
+from agent.ingestion import ingest_report_payloads_to_duckdb
+from agent.schema_summary import build_schema_summaries, schema_summaries_to_json_payload
+from agent.settings import AppConfig
+
+DEALS = [
+    {"id": 1, "stage": "won", "amount": 300},
+    {"id": 2, "stage": "lost", "amount": 100},
+    {"id": 3, "stage": "won", "amount": 200},
+]
+
+
+@pytest.fixture()
+def synced_config(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Write an app config for a small `deals` table and sync it under tmp_path/.cache."""
+    monkeypatch.chdir(tmp_path)
+    payload = {
+        "app_name": "test_app",
+        "reports": [
+            {"name": "Deals", "report_link_name": "All_Deals", "table_name": "deals", "key_columns": ["id"]}
+        ],
+        "allowed_tables": ["deals"],
+    }
+    config_path = tmp_path / "app.yaml"
+    config_path.write_text(yaml.safe_dump(payload), encoding="utf-8")
+    cfg = AppConfig.model_validate(payload)
+    cache = CacheManager(Path(".cache") / cfg.app_name)
+    snapshot = ingest_report_payloads_to_duckdb({"All_Deals": DEALS}, cache.db_path, cfg)
+    cache.write_snapshot(snapshot)
+    summaries = build_schema_summaries(cache.db_path, cfg)
+    cache.write_schema_summary(schema_summaries_to_json_payload(summaries, cfg.app_name))
+    return config_path
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from agent.admission import AdmissionRejected, LLMAdmission
+from apps.zoho_agent_service.api.main import create_app
+from apps.zoho_agent_service.api.service import AgentService
+
+
+def _wait_for_queued(admission: LLMAdmission, priority: str, count: int) -> None:
+    deadline = time.monotonic() + 5
+    while admission.stats()["queued"][priority] != count:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def _queue(admission: LLMAdmission, session_id: str, priority: str, outcomes: list) -> threading.Thread:
+    def run() -> None:
+        try:
+            with admission.ticket(session_id, priority).slot():
+                outcomes.append(f"{priority}:{session_id}")
+        except AdmissionRejected as exc:
+            outcomes.append(f"rejected:{exc.reason}:{priority}:{session_id}")
+
+    queued = admission.stats()["queued"][priority]
+    thread = threading.Thread(target=run)
+    thread.start()
+    _wait_for_queued(admission, priority, queued + 1)
+    return thread
+
+
+def test_waiters_are_served_by_priority_then_round_robin_across_sessions() -> None:
+    admission = LLMAdmission(max_concurrent=1, max_queue_depth=10)
+    order: list[str] = []
+    admission.acquire("holder", "api")
+    threads = [
+        _queue(admission, "s1", "batch", order),
+        _queue(admission, "s1", "api", order),
+        _queue(admission, "s1", "api", order),
+        _queue(admission, "s2", "api", order),
+        _queue(admission, "s3", "interactive", order),
+    ]
+    assert admission.stats()["queued"] == {"interactive": 1, "api": 3, "batch": 1}
+
+    admission.release(0.01)
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert order == ["interactive:s3", "api:s1", "api:s2", "api:s1", "batch:s1"]
+    assert admission.stats() == {
+        "max_concurrent": 1,
+        "in_flight": 0,
+        "queue_depth": 0,
+        "queued": {"interactive": 0, "api": 0, "batch": 0},
+        "queued_sessions": 0,
+    }
+
+
+def test_full_queue_evicts_lower_priority_then_sheds_new_calls() -> None:
+    admission = LLMAdmission(max_concurrent=1, max_queue_depth=1)
+    outcomes: list[str] = []
+    admission.acquire("holder", "api")
+    batch = _queue(admission, "b", "batch", outcomes)
+
+    # An API call takes the batch call's place in the queue.
+    api = _queue(admission, "a", "api", outcomes)
+    batch.join(timeout=5)
+    assert outcomes == ["rejected:evicted:batch:b"]
+
+    # Nothing below it to evict: shed at once, with a Retry-After hint.
+    with pytest.raises(AdmissionRejected) as excinfo:
+        admission.acquire("c", "api")
+    assert excinfo.value.reason == "queue_full"
+    assert excinfo.value.retry_after_seconds >= 1
+
+    admission.release(0.01)
+    api.join(timeout=5)
+    assert outcomes[-1] == "api:a"
+
+
+def test_async_waiters_time_out() -> None:
+    admission = LLMAdmission(max_concurrent=1, max_queue_depth=4, max_wait_seconds=0.05)
+
+    async def run() -> str:
+        await admission.aacquire("holder", "api")
+        try:
+            await admission.aacquire("late", "batch")
+        except AdmissionRejected as exc:
+            return exc.reason
+        return "admitted"
+
+    assert asyncio.run(run()) == "timeout"
+    assert admission.stats()["queue_depth"] == 0
+
+
+class _SlowAsyncLLM:
+    async def ainvoke(self, prompt: str) -> str:
+        await asyncio.sleep(0.2)
+        if "SQL:" in prompt:
+            return "SELECT stage, SUM(amount) AS total FROM deals GROUP BY stage"
+        return "- Won deals bring in the most."
+
+
+def test_overloaded_chat_gets_a_fast_429_and_metrics_show_the_queue(synced_config: Path) -> None:
+    service = AgentService(config_path=synced_config, llm=_SlowAsyncLLM())
+    service.llm_admission = LLMAdmission(max_concurrent=1, max_queue_depth=0)
+    app = create_app(service)
+
+    async def run() -> tuple[list[httpx.Response], httpx.Response]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+            responses = await asyncio.gather(
+                *[
+                    client.post(
+                        "/chat", json={"question": f"Which stages matter most, take {i}?", "session_id": f"s{i}"}
+                    )
+                    for i in range(3)
+                ]
+            )
+            return responses, await client.get("/metrics")
+
+    responses, metrics = asyncio.run(run())
+
+    assert sorted(r.status_code for r in responses) == [200, 429, 429]
+    rejected = next(r for r in responses if r.status_code == 429)
+    assert int(rejected.headers["Retry-After"]) >= 1
+    assert rejected.json()["detail"]["code"] == "llm_overloaded"
+    assert 'llm_admission_rejected_total{priority="api",reason="queue_full"}' in metrics.text
+    assert 'llm_queue_wait_seconds_count{priority="api"}' in metrics.text
+    assert 'llm_queue_depth{app="test_app",priority="interactive"} 0' in metrics.text
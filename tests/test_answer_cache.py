@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from agent.answer_cache import AnswerCache, AsyncSingleFlight, SingleFlight, answer_cache_key
+from agent.metrics import METRICS
+from apps.zoho_agent_service.api.service import AgentService
+
+
+class _SlowLLM:
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def invoke(self, prompt: str) -> str:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if "SQL:" in prompt:
+            return "SELECT stage, COUNT(*) AS deals, SUM(amount) AS total FROM deals GROUP BY stage ORDER BY stage"
+        return "- Two stages have deals."
+
+
+def test_answer_cache_key_separates_conversation_context() -> None:
+    plain = answer_cache_key("How many deals?", 30, "s1")
+    assert plain == answer_cache_key("how many  deals", 30, "s1")
+    assert plain != answer_cache_key("How many deals?", 30, "s2")
+    assert plain != answer_cache_key("How many deals?", 30, "s1", ["User: earlier question"])
+
+
+def test_answer_cache_expires_entries() -> None:
+    cache = AnswerCache(ttl_seconds=0.05)
+    cache.put("k", {"summary": "x"})
+    assert cache.get("k") == {"summary": "x"}
+    time.sleep(0.06)
+    assert cache.get("k") is None
+
+
+def test_single_flight_runs_once_for_concurrent_callers() -> None:
+    flight = SingleFlight()
+    calls = 0
+    release = threading.Event()
+
+    def work() -> int:
+        nonlocal calls
+        calls += 1
+        release.wait(1)
+        return 42
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(flight.do, "k", work) for _ in range(8)]
+        time.sleep(0.05)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert calls == 1
+    assert all(value == 42 for value, _ in results)
+    assert sum(1 for _, shared in results if shared) == 7
+
+
+def test_async_single_flight_survives_a_cancelled_leader() -> None:
+    flight = AsyncSingleFlight()
+    runs = 0
+
+    async def work() -> int:
+        nonlocal runs
+        runs += 1
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def scenario() -> tuple:
+        leader = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        result = await follower
+
+        # With every caller gone, the shared run is cancelled too.
+        lonely = asyncio.create_task(flight.do("other", work))
+        await asyncio.sleep(0.01)
+        lonely.cancel()
+        await asyncio.gather(lonely, return_exceptions=True)
+        await asyncio.sleep(0)
+        return leader.cancelled(), result, flight.in_flight()
+
+    leader_cancelled, result, in_flight = asyncio.run(scenario())
+
+    assert leader_cancelled
+    assert result == (42, True)
+    assert runs == 2
+    assert in_flight == 0
+
+
+@pytest.fixture()
+def service(synced_config: Path) -> AgentService:
+    return AgentService(config_path=synced_config, llm=_SlowLLM(delay=0.1))
+
+
+def test_service_coalesces_and_caches_identical_questions(service: AgentService) -> None:
+    METRICS.reset()
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        futures = [pool.submit(service.ask, "Which stage is doing best?", f"s{i}") for i in range(6)]
+        payloads = [f.result() for f in futures]
+
+    assert service.llm.calls == 2
+    assert all(p["sql"] == payloads[0]["sql"] for p in payloads)
+    assert METRICS.get("answer_computed_total") == 1
+    assert METRICS.get("answer_coalesced_total") == 5
+
+    service.ask("Which stage is doing best?", "fresh-session")
+    assert METRICS.get("answer_cache_hits_total") == 1
+    assert service.llm.calls == 2
+
+
+def test_repeats_in_one_session_hit_the_cache_unless_they_follow_up(service: AgentService) -> None:
+    METRICS.reset()
+    service.ask("Which stage is doing best?", "s1")
+    service.ask("Which stage is doing best?", "s1")
+    service.ask("Which stage is doing best?")
+    service.ask("Which stage is doing best?")
+
+    assert METRICS.get("answer_computed_total") == 1
+    assert METRICS.get("answer_cache_hits_total") == 3
+
+    # A real follow-up reads the session's previous result, so it is keyed by that context.
+    service.ask("sort them by total", "s1")
+    service.ask("sort them by total", "s2")
+    assert METRICS.get("answer_computed_total") == 3
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+from agent.async_query_engine import AsyncQueryEngine, get_db_executor
+from agent.models import QueryRequest
+from agent.settings import Settings
+from apps.zoho_agent_service.api.main import create_app
+from apps.zoho_agent_service.api.service import AgentService
+
+
+class _AsyncStubLLM:
+    """Stub LLM with a fixed await latency that records peak concurrency."""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def ainvoke(self, prompt: str) -> str:
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        if "SQL:" in prompt:
+            return "SELECT stage, COUNT(*) AS deals, SUM(amount) AS total FROM deals GROUP BY stage ORDER BY stage"
+        return "- Two stages have deals."
+
+    def invoke(self, prompt: str) -> str:  # pragma: no cover - async path only
+        raise AssertionError("sync invoke must not be used on the async path")
+
+
+def test_async_engine_answers_without_sync_invoke(synced_config: Path) -> None:
+    db_path = synced_config.parent / ".cache" / "test_app" / "agent.duckdb"
+    engine = AsyncQueryEngine(
+        settings=Settings.model_validate({"OPENROUTER_MODEL": "mistralai/mistral-7b-instruct"}),
+        db_path=db_path,
+        schema_summary={},
+        allowed_tables=["deals"],
+        business_definitions={},
+        llm=_AsyncStubLLM(latency=0),
+    )
+    answer = asyncio.run(engine.aanswer(QueryRequest(question="Deals per stage?")))
+    assert answer.evidence_columns == ["stage", "deals", "total"]
+    assert answer.summary == "- Two stages have deals."
+
+
+def test_single_worker_holds_many_concurrent_questions(synced_config: Path) -> None:
+    concurrency = 200
+    latency = 0.2
+    llm = _AsyncStubLLM(latency=latency)
+    service = AgentService(config_path=synced_config, llm=llm)
+    # This measures the event loop alone; LLM admission control would queue most of these by design.
+    service.llm_admission = None
+    app = create_app(service)
+
+    async def run() -> list[httpx.Response]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+            return await asyncio.gather(
+                *[
+                    client.post("/chat", json={"question": f"Which stage is doing best, variant {i}?", "session_id": f"s{i}"})
+                    for i in range(concurrency)
+                ]
+            )
+
+    started = time.perf_counter()
+    responses = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+
+    assert all(r.status_code == 200 for r in responses)
+    # Every question is parked on the LLM at once instead of queueing behind a threadpool.
+    assert llm.peak_in_flight == concurrency
+    # Two LLM round trips each; serial execution would take concurrency * 2 * latency.
+    assert elapsed < concurrency * 2 * latency / 10
+
+
+def test_a_new_snapshot_is_loaded_off_the_event_loop(synced_config: Path) -> None:
+    service = AgentService(config_path=synced_config, llm=_AsyncStubLLM(latency=0.0))
+    readers: list[int] = []
+    read = service.cache.read_schema_summary
+
+    def tracked() -> dict:
+        readers.append(threading.get_ident())
+        return read()
+
+    service.cache.read_schema_summary = tracked
+
+    async def run() -> int:
+        await service.aask("How many deals per stage?", session_id="s1")
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run())
+
+    assert len(readers) == 1 and loop_thread not in readers
+
+
+def test_db_executors_are_shared_per_size() -> None:
+    assert get_db_executor(3) is get_db_executor(3)
+    assert get_db_executor(5) is not get_db_executor(3)
+    assert get_db_executor(5)._max_workers == 5
+
+
+def test_status_and_metrics_are_built_off_the_event_loop(synced_config: Path) -> None:
+    service = AgentService(config_path=synced_config, llm=_AsyncStubLLM(latency=0.0))
+    builders: list[int] = []
+    status, gauges = service.status, service.metrics_gauges
+
+    def tracked(build):
+        def wrapper() -> dict:
+            builders.append(threading.get_ident())
+            return build()
+
+        return wrapper
+
+    service.status, service.metrics_gauges = tracked(status), tracked(gauges)
+    app = create_app(service)
+
+    async def run() -> int:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+            assert (await client.get("/status")).status_code == 200
+            assert (await client.get("/metrics")).status_code == 200
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run())
+
+    assert len(builders) == 2 and loop_thread not in builders
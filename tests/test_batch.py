@@ -0,0 +1,158 @@
+import asyncio
+import json
+import threading
+import time
+from pathlib import Path
+
+import duckdb
+import httpx
+import pytest
+from typer.testing import CliRunner
+
+from agent.batch import dedupe_questions
+from agent.cli import app as cli_app
+from agent.db_pool import ReadOnlyConnectionPool
+from apps.zoho_agent_service.api.main import create_app
+from apps.zoho_agent_service.api.service import AgentService
+
+GOOD_SQL = "SELECT stage, SUM(amount) AS total FROM deals GROUP BY stage"
+
+
+def _sql_for(prompt: str) -> str:
+    question = prompt.rsplit("Question:", 1)[-1]
+    return "DELETE FROM deals" if "drop" in question.lower() else GOOD_SQL
+
+
+class _SlowAsyncLLM:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def ainvoke(self, prompt: str) -> str:
+        self.calls += 1
+        await asyncio.sleep(0.2)
+        if "SQL:" in prompt:
+            return _sql_for(prompt)
+        return "- Won deals bring in the most."
+
+
+class _StubLLM:
+    def invoke(self, prompt: str) -> str:
+        return _sql_for(prompt) if "SQL:" in prompt else "- Won deals bring in the most."
+
+
+def test_dedupe_ignores_case_and_whitespace_and_drops_blanks() -> None:
+    items = dedupe_questions(["Top stages?", "  top   STAGES? ", "", "Lost deals?", "Top stages?"])
+    assert [(item.question, item.indexes) for item in items] == [("Top stages?", [0, 1, 4]), ("Lost deals?", [3])]
+
+
+def test_batch_endpoint_streams_ndjson_and_runs_questions_concurrently(synced_config: Path) -> None:
+    llm = _SlowAsyncLLM()
+    service = AgentService(config_path=synced_config, llm=llm)
+    app = create_app(service)
+    questions = [f"Which stages matter most, take {i}?" for i in range(8)]
+    questions += ["which stages  matter most, take 0?", "Drop the deals, then which stages matter most?"]
+
+    async def run() -> tuple[httpx.Response, float]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+            started = time.perf_counter()
+            response = await client.post("/chat/batch", json={"questions": questions})
+            return response, time.perf_counter() - started
+
+    response, elapsed = asyncio.run(run())
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    results, summary = lines[:-1], lines[-1]
+    assert summary == {**summary, "type": "summary", "questions": 10, "unique": 9, "failed": 1}
+    assert sorted(i for line in results for i in line["indexes"]) == list(range(10))
+    failed = next(line for line in results if not line["ok"])
+    assert failed["indexes"] == [9] and "Unsafe SQL" in failed["error"]
+    answered = next(line for line in results if 0 in line["indexes"])
+    assert answered["indexes"] == [0, 8]
+    assert answered["answer"]["sql"] == GOOD_SQL and answered["answer"]["result_handle"]
+    # Nine distinct questions at 0.2s per LLM call: run one at a time this would take well over 1.8s.
+    assert llm.calls >= 9
+    assert elapsed < 1.5
+
+
+def test_a_chat_request_survives_a_disconnected_batch_asking_the_same(synced_config: Path) -> None:
+    service = AgentService(config_path=synced_config, llm=_SlowAsyncLLM())
+    question = "Which stages matter most?"
+
+    async def drain() -> None:
+        async for _ in service.aask_batch([question]):
+            pass
+
+    async def run() -> dict:
+        batch = asyncio.ensure_future(drain())
+        await asyncio.sleep(0.05)
+        chat = asyncio.ensure_future(service.aask(question, session_id="s"))
+        await asyncio.sleep(0.05)
+        # The batch client goes away, closing the batch's connection pool.
+        batch.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await batch
+        return await chat
+
+    assert asyncio.run(run())["sql"] == GOOD_SQL
+
+
+def test_batch_endpoint_rejects_oversized_batches(synced_config: Path) -> None:
+    service = AgentService(config_path=synced_config, llm=_StubLLM())
+    service.app_config.query.batch_max_questions = 2
+    transport = httpx.ASGITransport(app=create_app(service))
+
+    async def post() -> httpx.Response:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/chat/batch", json={"questions": ["a?", "b?", "c?"]})
+
+    assert asyncio.run(post()).status_code == 422
+
+
+def test_ask_batch_command_writes_ndjson(synced_config: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("agent.query_engine.ChatOpenAI", lambda **kwargs: _StubLLM())
+    questions_file = Path("questions.txt")
+    questions_file.write_text("Which stages matter most?\nwhich stages matter most?\n\nWhat is the total amount?\n")
+    output = Path("answers.ndjson")
+
+    result = CliRunner().invoke(
+        cli_app, ["ask-batch", str(questions_file), "--config", str(synced_config), "--output", str(output)]
+    )
+
+    assert result.exit_code == 0, result.output
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert lines[-1]["type"] == "summary"
+    assert (lines[-1]["questions"], lines[-1]["unique"], lines[-1]["failed"]) == (4, 2, 0)
+    assert sorted(line["indexes"] for line in lines[:-1]) == [[0, 1], [3]]
+
+
+def test_closing_the_pool_interrupts_borrowed_cursors_before_closing_the_handle(tmp_path: Path) -> None:
+    db_path = tmp_path / "pool.duckdb"
+    duckdb.connect(str(db_path)).close()
+    pool = ReadOnlyConnectionPool(db_path, size=2)
+    started, outcome = threading.Event(), []
+
+    def long_query() -> None:
+        with pool.connection() as conn:
+            started.set()
+            try:
+                conn.execute("SELECT SUM(a.range * b.range) FROM range(200000) a, range(200000) b").fetchall()
+                outcome.append("finished")
+            except duckdb.InterruptException:
+                outcome.append("interrupted")
+
+    worker = threading.Thread(target=long_query)
+    worker.start()
+    started.wait(5)
+    time.sleep(0.05)
+    began = time.perf_counter()
+    pool.close()
+    worker.join(5)
+
+    assert outcome == ["interrupted"]
+    assert time.perf_counter() - began < 5
+    with pytest.raises(RuntimeError, match="closed"):
+        with pool.connection():
+            pass
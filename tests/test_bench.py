@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import duckdb
+import pytest
+
+from agent.bench import QUESTIONS, compare_reports, latency_summary, run_benchmark
+
+
+def test_benchmark_report_covers_sync_profile_and_ask(tmp_path: Path) -> None:
+    report = run_benchmark(tmp_path, rows=2_000, wide_columns=4, iterations=10, concurrency=2)
+
+    assert report["sync"]["tables"] == {"appointments_report": 2_000, "patients_report": 200, "doctors_report": 10}
+    assert set(report["profile"]["tables"]) == set(report["sync"]["tables"])
+    # The bench syncs like `agent sync`, derived artifacts included.
+    assert {"ingest", "schema_summary", "rollups", "indexes", "value_index", "samples"} <= set(report["sync"]["stages"])
+    overall = report["ask"]["overall"]
+    assert overall["count"] == 10
+    assert overall["p50_ms"] <= overall["p95_ms"] <= overall["p99_ms"] <= overall["max_ms"]
+    assert set(report["ask"]["questions"]) == {q.name for q in QUESTIONS}
+
+    conn = duckdb.connect(str(tmp_path / ".cache" / "bench_app" / "agent.duckdb"), read_only=True)
+    columns = [row[0] for row in conn.execute("DESCRIBE appointments_report").fetchall()]
+    # Lookup fields carry both the display value and the referenced record's ID.
+    assert {"Patient", "Patient_ID", "Doctor", "Doctor_ID", "Custom_Text_0", "Custom_Number_3"} <= set(columns)
+    orphans = conn.execute(
+        "SELECT COUNT(*) FROM appointments_report a ANTI JOIN patients_report p ON a.Patient_ID = p.Patient_ID"
+    ).fetchone()[0]
+    conn.close()
+    assert orphans == 0
+
+
+def test_percentiles_and_regression_check() -> None:
+    summary = latency_summary([i / 1000 for i in range(1, 101)], wall_seconds=2.0)
+    assert (summary["p50_ms"], summary["p95_ms"], summary["p99_ms"]) == (50.0, 95.0, 99.0)
+    assert summary["throughput_per_s"] == 50.0
+
+    baseline = {"sync": {"seconds": 10.0}, "ask": {"overall": {"p95_ms": 100.0, "throughput_per_s": 50.0}}}
+    current = {"sync": {"seconds": 11.0}, "ask": {"overall": {"p95_ms": 130.0, "throughput_per_s": 30.0}}}
+    assert [r["metric"] for r in compare_reports(baseline, current, max_regression=0.2)] == [
+        "ask.overall.throughput_per_s",
+        "ask.overall.p95_ms",
+    ]
+
+
+def test_reports_with_different_settings_are_not_compared() -> None:
+    baseline = {"version": 2, "config": {"rows": 1_000_000, "concurrency": 8}, "ask": {"overall": {"p95_ms": 100.0}}}
+    current = {"version": 2, "config": {"rows": 2_000, "concurrency": 8}, "ask": {"overall": {"p95_ms": 1.0}}}
+
+    with pytest.raises(ValueError, match="rows: 1000000 -> 2000"):
+        compare_reports(baseline, current)
+    with pytest.raises(ValueError, match="versions differ"):
+        compare_reports({**baseline, "version": 1}, baseline)
+    assert compare_reports(baseline, {**baseline, "generated_at": "later"}) == []
@@ -0,0 +1,32 @@
+from datetime import UTC, date, datetime
+from decimal import Decimal
+
+from agent.evidence import EvidenceBatch, encode_evidence
+from agent.models import AgentAnswer
+
+
+def test_prompt_encoding_sends_column_names_once() -> None:
+    rows = [{"patient": f"P-{i}", "visit": date(2026, 1, i + 1), "fee": Decimal("120.50")} for i in range(3)]
+    encoded = encode_evidence(EvidenceBatch.from_rows(rows, ["patient", "visit", "fee"]), row_cap=2)
+    assert encoded.splitlines() == [
+        '["patient", "visit", "fee"]',
+        '["P-0", "2026-01-01", 120.5]',
+        '["P-1", "2026-01-02", 120.5]',
+    ]
+
+
+def test_answer_builds_row_dicts_only_when_serialized() -> None:
+    evidence = EvidenceBatch.from_rows([{"stage": "Won", "deals": 2}], ["stage", "deals"])
+    answer = AgentAnswer(
+        question="q",
+        summary="- ok",
+        sql="SELECT 1",
+        evidence=evidence,
+        evidence_columns=evidence.columns,
+        generated_at=datetime.now(UTC),
+        model="m",
+    )
+    assert "evidence_rows" not in answer.__dict__
+    payload = answer.model_dump(mode="json")
+    assert payload["evidence_rows"] == [{"stage": "Won", "deals": 2}]
+    assert "evidence" not in payload
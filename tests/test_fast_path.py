@@ -0,0 +1,153 @@
+from pathlib import Path
+
+import duckdb
+import pytest
+
+from agent.fast_path import IntentMatcher
+from agent.models import QueryRequest
+from agent.query_engine import QueryEngine
+from agent.schema_summary import build_schema_summaries, schema_summaries_to_json_payload
+from agent.settings import AppConfig, Settings
+
+TABLES = ["patients_report", "bills_report", "patients_by_blood_group"]
+
+
+class _NoLLM:
+    def invoke(self, prompt: str) -> str:
+        raise AssertionError("fast path should not call the LLM")
+
+
+@pytest.fixture()
+def hospital(tmp_path: Path) -> tuple[Path, dict]:
+    db_path = tmp_path / "hospital.duckdb"
+    conn = duckdb.connect(str(db_path))
+    conn.execute(
+        "CREATE TABLE patients_report AS SELECT * FROM (VALUES "
+        "('P-1041', 'Sarah Wilson', 'B+', 39), ('P-1042', 'Omar Khan', 'O+', 51), ('P-1043', 'Li Wei', 'O+', 28)"
+        ") t(patient_id, patient_name, blood_group, age)"
+    )
+    conn.execute(
+        "CREATE TABLE bills_report AS SELECT * FROM (VALUES "
+        "('B-1', 'UPI', 120.0), ('B-2', 'Card', 300.0), ('B-3', 'UPI', 80.0)"
+        ") t(bill_id, payment_mode, amount)"
+    )
+    conn.execute("CREATE TABLE patients_by_blood_group AS SELECT * FROM (VALUES ('O+', 2), ('B+', 1)) t(blood_group, total)")
+    conn.close()
+    cfg = AppConfig.model_validate(
+        {
+            "app_name": "hospital",
+            "reports": [
+                {"name": "Patients", "report_link_name": "p", "table_name": "patients_report", "key_columns": ["patient_id"]},
+            ],
+            "allowed_tables": TABLES,
+        }
+    )
+    payload = schema_summaries_to_json_payload(build_schema_summaries(db_path, cfg), cfg.app_name)
+    return db_path, payload
+
+
+def _matcher(payload: dict, **kwargs) -> IntentMatcher:
+    return IntentMatcher.from_schema(payload, TABLES, kwargs.pop("business_definitions", {}), **kwargs)
+
+
+def test_compiles_counts_with_value_filters(hospital: tuple[Path, dict]) -> None:
+    _, payload = hospital
+    matcher = _matcher(payload)
+
+    plan = matcher.match("How many patients are there?")
+    assert plan is not None and plan.intent == "count" and plan.confidence >= 0.75
+    assert plan.sql == "SELECT COUNT(*) AS count FROM patients_report"
+
+    plan = matcher.match("How many patients have blood group O+?")
+    assert plan is not None
+    assert plan.table == "patients_report"
+    assert plan.sql.endswith("""WHERE "blood_group" = 'O+'""")
+
+
+def test_compiles_group_totals_top_n_and_lookups(hospital: tuple[Path, dict]) -> None:
+    _, payload = hospital
+    matcher = _matcher(payload, business_definitions={"revenue": "bills_report.amount"})
+
+    plan = matcher.match("Total revenue by payment mode")
+    assert plan is not None and plan.intent == "total_by"
+    assert plan.measure_column == "amount" and plan.group_column == "payment_mode"
+
+    plan = matcher.match("top 1 payment mode by amount")
+    assert plan is not None and plan.intent == "top_n" and plan.sql.endswith("LIMIT 1")
+
+    plan = matcher.match("Show details of patient P-1042")
+    assert plan is not None and plan.intent == "lookup"
+    assert plan.filters == [("patient_id", "P-1042")]
+
+
+def test_complex_questions_stay_below_threshold(hospital: tuple[Path, dict]) -> None:
+    _, payload = hospital
+    plan = _matcher(payload).match("Why did the total amount drop last month compared to March?")
+    assert plan is None or plan.confidence < 0.75
+
+
+def test_engine_answers_fast_path_without_llm(hospital: tuple[Path, dict]) -> None:
+    db_path, payload = hospital
+    engine = QueryEngine(
+        settings=Settings.model_validate({"OPENROUTER_MODEL": "mistralai/mistral-7b-instruct"}),
+        db_path=db_path,
+        schema_summary=payload,
+        allowed_tables=TABLES,
+        business_definitions={},
+        llm=_NoLLM(),
+        fast_path=_matcher(payload),
+    )
+    answer = engine.answer(QueryRequest(question="How many patients have blood group O+?"))
+    assert answer.answer_path == "fast_path"
+    assert answer.summary == "- There are 2 patients with blood group O+."
+
+    answer = engine.answer(QueryRequest(question="Total amount by payment mode"))
+    assert answer.summary == "- Card: total amount 300\n- UPI: total amount 200"
+
+
+@pytest.fixture()
+def deals_payload(tmp_path: Path) -> dict:
+    db_path = tmp_path / "crm.duckdb"
+    conn = duckdb.connect(str(db_path))
+    conn.execute(
+        "CREATE TABLE deals AS SELECT * FROM (VALUES (1, 'won', 300), (2, 'lost', 100), (3, 'won', 200)) "
+        "t(deal_id, stage, amount)"
+    )
+    conn.close()
+    cfg = AppConfig.model_validate(
+        {
+            "app_name": "crm",
+            "reports": [{"name": "Deals", "report_link_name": "d", "table_name": "deals", "key_columns": ["deal_id"]}],
+            "allowed_tables": ["deals"],
+        }
+    )
+    return schema_summaries_to_json_payload(build_schema_summaries(db_path, cfg), cfg.app_name)
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "How many deals are over 200?",
+        "How many deals are in Chennai?",
+        "How many deals are in 2024?",
+        "How many deals were created in March",
+        "How many deals did Ravi close?",
+        "Total amount for wonderful deals",
+    ],
+)
+def test_unexplained_qualifiers_keep_questions_off_the_fast_path(deals_payload: dict, question: str) -> None:
+    matcher = IntentMatcher.from_schema(deals_payload, ["deals"])
+    plan = matcher.match(question)
+    assert plan is None or plan.confidence < matcher.min_confidence
+
+
+def test_fully_explained_questions_still_match(deals_payload: dict) -> None:
+    matcher = IntentMatcher.from_schema(deals_payload, ["deals"])
+
+    plan = matcher.match("How many deals are won?")
+    assert plan is not None and plan.confidence >= matcher.min_confidence
+    assert plan.filters == [("stage", "won")] and plan.unexplained == []
+
+    plan = matcher.match("Total amount for won deals")
+    assert plan is not None and plan.confidence >= matcher.min_confidence
+    assert plan.sql == """SELECT SUM("amount") AS total FROM deals WHERE "stage" = 'won'"""
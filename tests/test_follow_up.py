@@ -0,0 +1,96 @@
+from pathlib import Path
+
+import duckdb
+import pytest
+
+from agent.follow_up import compose_follow_up_sql, looks_like_follow_up
+from agent.sql_safety import validate_select_only_sql
+from apps.zoho_agent_service.api.service import AgentService
+
+
+class _PlannerLLM:
+    def __init__(self) -> None:
+        self.sql_prompts: list[str] = []
+
+    def invoke(self, prompt: str) -> str:
+        if "SQL:" not in prompt:
+            return "- Deals are listed."
+        self.sql_prompts.append(prompt)
+        if "previous_result" in prompt:
+            return "SELECT id, stage, amount FROM previous_result WHERE stage = 'won' ORDER BY amount DESC"
+        return "SELECT id, stage, amount FROM deals WHERE amount >= 200 ORDER BY id"
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "only the ones from last week",
+        "Sort those by amount",
+        "sort by amount",
+        "limit it to 5",
+        "Which of them were won?",
+        "What about the above, per month?",
+    ],
+)
+def test_follow_up_detection(question: str) -> None:
+    assert looks_like_follow_up(question)
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "How many patients have blood group O+?",
+        "Last 7 days appointments",
+        "Now show revenue by department",
+        "Then list the doctors by experience",
+        "And how many bills were paid by card?",
+        "Top 5 doctors by revenue",
+        "First 10 patients registered",
+        "Sort doctors by experience",
+        "Remove cancelled appointments and count the rest",
+        "Which of our departments earns the most?",
+    ],
+)
+def test_fresh_questions_are_not_follow_ups(question: str) -> None:
+    assert not looks_like_follow_up(question)
+
+
+def test_compose_merges_follow_up_ctes() -> None:
+    sql = compose_follow_up_sql("SELECT id FROM deals;", "WITH t AS (SELECT id FROM previous_result) SELECT * FROM t")
+    assert sql == (
+        "WITH previous_result AS MATERIALIZED (SELECT id FROM deals), t AS (SELECT id FROM previous_result) SELECT * FROM t"
+    )
+
+
+def test_composed_recursive_follow_up_passes_validation_and_runs() -> None:
+    conn = duckdb.connect()
+    conn.execute("CREATE TABLE deals AS SELECT range AS id FROM range(3)")
+    sql = compose_follow_up_sql(
+        "SELECT COUNT(*) AS n FROM deals",
+        "WITH RECURSIVE r(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM r, previous_result WHERE i < n) SELECT i FROM r",
+    )
+
+    validated = validate_select_only_sql(sql, ["deals"])
+
+    assert validated.is_safe, validated.reason
+    assert conn.execute(validated.sql).fetchall() == [(1,), (2,), (3,)]
+
+
+def test_follow_up_refines_previous_result(synced_config: Path) -> None:
+    llm = _PlannerLLM()
+    service = AgentService(config_path=synced_config, llm=llm)
+
+    first = service.ask("List the big deals", session_id="s1")
+    assert not first["follow_up"]
+    second = service.ask("only the ones that were won, sorted by amount", session_id="s1")
+
+    assert second["follow_up"]
+    assert second["sql"].startswith("WITH previous_result AS MATERIALIZED (SELECT id, stage, amount FROM deals")
+    assert [row["id"] for row in second["evidence_rows"]] == [1, 3]
+    # The follow-up prompt carries the previous SQL instead of the schema summary.
+    assert "Schema summary" not in llm.sql_prompts[-1]
+    assert first["sql"] in llm.sql_prompts[-1]
+
+    # Another session has no previous result, so the same words plan from the base tables.
+    other = service.ask("only the ones that were won, sorted by amount", session_id="s2")
+    assert not other["follow_up"]
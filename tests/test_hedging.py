@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+from agent.hedging import HedgePolicy, LatencyTracker, LLMHedger
+
+
+class _ScriptedLLM:
+    """Stub whose calls take scripted latencies (one per call, last one repeats)."""
+
+    def __init__(self, name: str, latencies: list[float]) -> None:
+        self.name = name
+        self.latencies = latencies
+        self.calls = 0
+        self.cancelled = 0
+
+    def _next_latency(self) -> float:
+        latency = self.latencies[min(self.calls, len(self.latencies) - 1)]
+        self.calls += 1
+        return latency
+
+    def invoke(self, prompt: str) -> str:
+        time.sleep(self._next_latency())
+        return self.name
+
+    async def ainvoke(self, prompt: str) -> str:
+        try:
+            await asyncio.sleep(self._next_latency())
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self.name
+
+
+def _primed(policy: HedgePolicy, seconds: float = 0.02) -> LLMHedger:
+    hedger = LLMHedger(policy)
+    for _ in range(policy.min_samples):
+        hedger.latencies.record("primary", seconds)
+    return hedger
+
+
+def test_latency_percentile_needs_min_samples() -> None:
+    tracker = LatencyTracker()
+    for value in [0.1, 0.2, 0.3, 0.4, 1.0]:
+        tracker.record("m", value)
+    assert tracker.percentile("m", 0.9, min_samples=10) is None
+    assert tracker.percentile("m", 0.8, min_samples=5) == 0.4
+
+
+def test_slow_primary_is_hedged_and_backup_wins() -> None:
+    hedger = _primed(HedgePolicy(min_samples=3, min_delay_seconds=0.05, max_extra_ratio=1.0))
+    primary = _ScriptedLLM("primary", [0.6])
+    backup = _ScriptedLLM("backup", [0.02])
+
+    started = time.monotonic()
+    result = hedger.call("primary", lambda: primary.invoke("q"), lambda: ("backup", lambda: backup.invoke("q")))
+    assert result == ("backup", "backup")
+    assert time.monotonic() - started < 0.3
+
+
+def test_fast_primary_never_fires_backup() -> None:
+    hedger = _primed(HedgePolicy(min_samples=3, min_delay_seconds=0.2, max_extra_ratio=1.0))
+    primary = _ScriptedLLM("primary", [0.01])
+    backup = _ScriptedLLM("backup", [0.01])
+    answered, _ = hedger.call("primary", lambda: primary.invoke("q"), lambda: ("backup", lambda: backup.invoke("q")))
+    assert answered == "primary"
+    assert backup.calls == 0
+
+
+def test_extra_spend_is_capped_by_budget() -> None:
+    hedger = _primed(HedgePolicy(min_samples=3, min_delay_seconds=0.02, max_extra_ratio=0.0, burst=1.0))
+    primary = _ScriptedLLM("primary", [0.15])
+    backup = _ScriptedLLM("backup", [0.0])
+
+    def ask() -> str:
+        return hedger.call("primary", lambda: primary.invoke("q"), lambda: ("backup", lambda: backup.invoke("q")))[1]
+
+    assert ask() == "backup"
+    # The single burst token is spent; the next slow call just waits for the primary.
+    assert ask() == "primary"
+    assert backup.calls == 1
+
+
+def test_async_hedge_cancels_the_losing_primary() -> None:
+    hedger = _primed(HedgePolicy(min_samples=3, min_delay_seconds=0.05, max_extra_ratio=1.0))
+    primary = _ScriptedLLM("primary", [1.0])
+    backup = _ScriptedLLM("backup", [0.01])
+
+    async def backup_factory():
+        return "backup", lambda: backup.ainvoke("q")
+
+    async def run() -> tuple[str, str]:
+        result = await hedger.acall("primary", lambda: primary.ainvoke("q"), backup_factory)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(run()) == ("backup", "backup")
+    assert primary.cancelled == 1
+
+
+def test_a_cancelled_loser_still_counts_as_a_slow_sample() -> None:
+    hedger = _primed(HedgePolicy(min_samples=3, min_delay_seconds=0.05, max_extra_ratio=1.0))
+    primary = _ScriptedLLM("primary", [1.0])
+    backup = _ScriptedLLM("backup", [0.01])
+
+    async def backup_factory():
+        return "backup", lambda: backup.ainvoke("q")
+
+    assert asyncio.run(hedger.acall("primary", lambda: primary.ainvoke("q"), backup_factory)) == ("backup", "backup")
+
+    # The primary was cancelled after the hedge delay plus the backup's latency.
+    assert hedger.latencies.percentile("primary", 1.0) >= 0.05
+    assert hedger.latencies.percentile("backup", 1.0) < 0.05
+
+
+def test_a_sync_loser_leaves_one_censored_sample() -> None:
+    hedger = _primed(HedgePolicy(min_samples=3, min_delay_seconds=0.05, max_extra_ratio=1.0))
+    primary = _ScriptedLLM("primary", [0.3])
+    backup = _ScriptedLLM("backup", [0.01])
+
+    answered, _ = hedger.call("primary", lambda: primary.invoke("q"), lambda: ("backup", lambda: backup.invoke("q")))
+    assert answered == "backup"
+    # Recorded when the backup won, while the primary thread was still running.
+    assert hedger.latencies.percentile("primary", 1.0) >= 0.05
+
+    time.sleep(0.35)
+    # The primary ran to completion without adding a second sample.
+    assert hedger.latencies.percentile("primary", 1.0, min_samples=4) < 0.3
+    assert hedger.latencies.percentile("primary", 1.0, min_samples=5) is None
@@ -0,0 +1,118 @@
+import threading
+from pathlib import Path
+
+import duckdb
+
+from agent.cache_manager import CacheManager
+from agent.indexes import (
+    FilterUsage,
+    advise_indexes,
+    build_indexes,
+    filtered_columns,
+    indexes_to_payload,
+    load_filter_usage,
+    read_index_catalog,
+)
+from agent.settings import IndexSettings
+from apps.zoho_agent_service.api.service import AgentService
+
+COLUMNS = {
+    "patients": {"patient_id": "patient_id", "name": "name", "blood_group": "blood_group"},
+    "appointments": {"patient_id": "patient_id", "status": "status", "fee": "fee"},
+}
+
+
+class _LookupLLM:
+    def invoke(self, prompt: str) -> str:
+        if "SQL:" in prompt:
+            return "SELECT id, stage, amount FROM deals WHERE id = 2 AND stage = 'lost'"
+        return "- Deal 2 was lost."
+
+
+def test_filtered_columns_resolve_aliases_and_ignore_literals() -> None:
+    sql = (
+        "SELECT p.name, COUNT(*) FROM patients p JOIN appointments AS a ON a.patient_id = p.patient_id "
+        "WHERE a.status IN ('Cancelled', 'fee = 1') AND p.blood_group = 'O+' AND lower(name) LIKE 'a%' "
+        "GROUP BY p.name ORDER BY 2 DESC"
+    )
+    assert filtered_columns(sql, COLUMNS) == {("appointments", "status"), ("patients", "blood_group")}
+    assert filtered_columns("SELECT * FROM patients WHERE patient_id = 'P-1042'", COLUMNS) == {("patients", "patient_id")}
+    assert filtered_columns("SELECT * FROM patients WHERE unknown = 1", COLUMNS) == set()
+
+
+def test_advisor_indexes_frequent_selective_filters(tmp_path: Path) -> None:
+    db_path = tmp_path / "hospital.duckdb"
+    conn = duckdb.connect(str(db_path))
+    conn.execute(
+        "CREATE TABLE patients AS SELECT 'P-' || range AS patient_id, 'Name ' || range AS name, "
+        "['A+', 'O+'][range % 2 + 1] AS blood_group FROM range(20000)"
+    )
+    conn.close()
+    summary = {
+        "tables": [
+            {
+                "table_name": "patients",
+                "row_count": 20000,
+                "columns": [
+                    {"name": "patient_id", "distinct_count_estimate": 20000},
+                    {"name": "name", "distinct_count_estimate": 20000},
+                    {"name": "blood_group", "distinct_count_estimate": 2},
+                ],
+            }
+        ]
+    }
+    usage = {"filters": {"patients.patient_id": 9, "patients.blood_group": 40, "patients.name": 2}}
+
+    targets = advise_indexes(usage, summary, IndexSettings(min_filter_uses=5))
+    # blood_group is filtered most but matches half the table, so a scan stays cheaper.
+    assert [(t.table, t.column) for t in targets] == [("patients", "patient_id")]
+
+    built = build_indexes(db_path, targets)
+    assert [i.name for i in built] == ["idx_patients__patient_id"]
+    assert built[0].table_rows == 20000 and built[0].build_ms >= 0
+    assert build_indexes(db_path, targets) == []
+    assert [i.reason for i in read_index_catalog(db_path)] == ["filter"]
+
+
+def test_workers_flushing_the_same_file_keep_every_count(tmp_path: Path) -> None:
+    path = tmp_path / "filter_usage.json"
+    tables = [{"table_name": name, "columns": [{"name": c} for c in cols]} for name, cols in COLUMNS.items()]
+    schema = {"tables": tables}
+    # One FilterUsage per worker, each with its own in-process lock, as in separate processes.
+    workers = [FilterUsage(path, flush_every=1) for _ in range(4)]
+    for usage in workers:
+        usage.bind(schema, [])
+
+    def run(usage: FilterUsage) -> None:
+        for _ in range(50):
+            usage.record("SELECT * FROM patients WHERE blood_group = 'O+'")
+
+    threads = [threading.Thread(target=run, args=(usage,)) for usage in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert load_filter_usage(path)["filters"] == {"patients.blood_group": 200}
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == ".tmp"] == []
+
+
+def test_sync_indexes_key_columns_and_service_counts_hits(synced_config: Path) -> None:
+    cache = CacheManager(Path(".cache") / "test_app")
+    catalog = read_index_catalog(cache.db_path)
+    assert [(i.name, i.column, i.reason) for i in catalog] == [("idx_deals__id", "id", "key")]
+    conn = duckdb.connect(str(cache.db_path), read_only=True)
+    assert conn.execute("SELECT index_name FROM duckdb_indexes()").fetchall() == [("idx_deals__id",)]
+    conn.close()
+    cache.write_indexes(indexes_to_payload(catalog))
+
+    service = AgentService(config_path=synced_config, llm=_LookupLLM())
+    service.filter_usage = FilterUsage(cache.filter_usage_file, flush_every=2)
+    service.ask("details of deal 2", session_id="a")
+    service.ask("is deal 2 lost?", session_id="b")
+
+    usage = load_filter_usage(cache.filter_usage_file)
+    assert usage["filters"] == {"deals.id": 2, "deals.stage": 2}
+    status = service.status()["indexes"]
+    assert status["indexes"][0]["uses"] == 2
+    assert status["unindexed_filters"] == {"deals.stage": 2}
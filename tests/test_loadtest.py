@@ -0,0 +1,40 @@
+from pathlib import Path
+
+import pytest
+
+from apps.zoho_agent_service.loadtest import find_saturation, run_loadtest
+
+
+def test_inprocess_sweep_reports_each_level_and_mix(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.chdir(tmp_path)
+    report = run_loadtest(tmp_path / "work", rows=1_000, levels=[1, 4], requests_per_level=24, llm_latency_ms=0)
+
+    assert [(level["mix"], level["concurrency"]) for level in report["levels"]] == [
+        ("repeat", 1),
+        ("repeat", 4),
+        ("unique", 1),
+        ("unique", 4),
+    ]
+    for level in report["levels"]:
+        assert level["requests"] == 24 and level["count"] == 24
+        assert level["error_rate"] == 0.0
+        assert level["throughput_per_s"] > 0 and level["p95_ms"] >= level["p50_ms"]
+        assert level["peak_rss_mb"] > 0
+        assert set(level["endpoints"]) <= {"chat", "status", "clear"}
+        assert level["endpoints"]["chat"]["outcomes"] == {"200": level["endpoints"]["chat"]["count"]}
+    assert set(report["saturation"]) == {"repeat", "unique"}
+    assert Path.cwd() == tmp_path
+
+
+def test_saturation_is_the_first_level_near_peak_throughput() -> None:
+    levels = [
+        {"mix": "unique", "concurrency": 1, "throughput_per_s": 10.0, "p95_ms": 100.0},
+        {"mix": "unique", "concurrency": 4, "throughput_per_s": 38.0, "p95_ms": 110.0},
+        {"mix": "unique", "concurrency": 8, "throughput_per_s": 40.0, "p95_ms": 200.0},
+        {"mix": "unique", "concurrency": 16, "throughput_per_s": 39.0, "p95_ms": 410.0},
+    ]
+
+    knee = find_saturation(levels)["unique"]
+
+    assert knee["concurrency"] == 4
+    assert knee["best_throughput_per_s"] == 40.0
@@ -0,0 +1,65 @@
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from agent.metrics import MetricsRegistry, gauge_key
+from apps.zoho_agent_service.api.main import create_app
+from apps.zoho_agent_service.api.service import AgentService
+
+
+class _StubLLM:
+    def invoke(self, prompt: str) -> str:
+        if "SQL:" in prompt:
+            return "SELECT stage, SUM(amount) AS total FROM deals GROUP BY stage ORDER BY total DESC"
+        return "- Won deals bring in the most."
+
+
+def test_prometheus_text_has_counters_histograms_and_gauges() -> None:
+    registry = MetricsRegistry()
+    registry.incr("answer_computed_total")
+    registry.observe("agent_stage_seconds", 0.02, stage="execution")
+    registry.observe("agent_stage_seconds", 3.0, stage="execution")
+
+    text = registry.render_prometheus({gauge_key("sync_table_load_seconds", table="deals"): 0.5})
+
+    assert "# TYPE answer_computed_total counter\nanswer_computed_total 1\n" in text
+    assert "# TYPE agent_stage_seconds histogram" in text
+    assert 'agent_stage_seconds_bucket{stage="execution",le="0.025"} 1' in text
+    assert 'agent_stage_seconds_bucket{stage="execution",le="+Inf"} 2' in text
+    assert 'agent_stage_seconds_count{stage="execution"} 2' in text
+    assert 'sync_table_load_seconds{table="deals"} 0.5' in text
+    assert registry.snapshot()["agent_stage_seconds_count{stage=execution}"] == 2
+
+
+def test_answers_carry_stage_timings_tokens_and_cache_flags(synced_config: Path) -> None:
+    service = AgentService(config_path=synced_config, llm=_StubLLM())
+    service.app_config.query.template_summaries_enabled = False
+
+    first = service.ask("Which stages matter most to us?", session_id="first")
+    timings = first["timings"]
+    for stage in ("sql_generation", "validation", "execution", "answer_llm", "write_last_answer"):
+        assert timings["stages"][stage] >= 0
+    assert timings["total_seconds"] >= sum(v for k, v in timings["stages"].items() if k != "write_last_answer")
+    assert timings["tokens"]["sql_generation"]["estimated"] is True
+    assert timings["tokens"]["sql_generation"]["input"] > 0
+    assert timings["cache"] == {"result_cache": False, "answer_cache": False}
+
+    # A cache hit reports what this call did, not the stages of the request that filled the cache.
+    second = service.ask("Which stages matter most to us?", session_id="second")
+    assert second["timings"]["cache"] == {"answer_cache": True}
+    assert set(second["timings"]["stages"]) == {"write_last_answer"}
+
+
+def test_metrics_endpoint_exports_request_and_sync_metrics(synced_config: Path) -> None:
+    client = TestClient(create_app(AgentService(config_path=synced_config, llm=_StubLLM())))
+    assert client.post("/chat", json={"question": "Which stages matter most to us?"}).json()["timings"]
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'agent_stage_seconds_bucket{stage="sql_generation",le="+Inf"}' in response.text
+    assert 'agent_ask_seconds_count{answer_cache="miss",mode="async"}' in response.text
+    assert 'last_sync_table_load_seconds{app="test_app",table="deals"}' in response.text
+    # The last sync's load gauge is not a second type for the process-wide load histogram.
+    types = [line for line in response.text.splitlines() if line.startswith("# TYPE ")]
+    assert len(types) == len({line.split()[2] for line in types})
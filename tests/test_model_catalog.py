@@ -0,0 +1,193 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from agent.hedging import HedgePolicy, LLMHedger
+from agent.model_catalog import ModelCatalog, get_model_catalog
+from agent.query_engine import QueryEngine
+from agent.settings import Settings
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _Unavailable:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def invoke(self, prompt: str) -> str:
+        self.calls += 1
+        raise RuntimeError("Provider returned error: model_not_available")
+
+
+class _Works:
+    def __init__(self, name: str, log: list[str]) -> None:
+        self.name = name
+        self.log = log
+
+    def invoke(self, prompt: str) -> str:
+        self.log.append(self.name)
+        if self.name == "other/broken:free":
+            raise RuntimeError("no endpoints found")
+        return f"answer from {self.name}"
+
+
+def _engine(catalog: ModelCatalog, primary: _Unavailable, log: list[str], monkeypatch: pytest.MonkeyPatch) -> QueryEngine:
+    engine = QueryEngine(
+        settings=Settings.model_validate({"OPENROUTER_MODEL": "mistralai/mistral-7b-instruct"}),
+        db_path=Path("unused.duckdb"),
+        schema_summary={},
+        allowed_tables=[],
+        business_definitions={},
+        llm=primary,
+        model_catalog=catalog,
+    )
+    monkeypatch.setattr(engine, "_build_llm", lambda model_id: _Works(model_id, log))
+    return engine
+
+
+def test_outage_costs_one_discovery_call_per_ttl() -> None:
+    clock = _Clock()
+    catalog = ModelCatalog(ttl_seconds=60, clock=clock)
+    fetches = 0
+
+    def fetch() -> list[str]:
+        nonlocal fetches
+        fetches += 1
+        raise ConnectionError("openrouter down")
+
+    for _ in range(5):
+        assert catalog.model_ids(fetch) == []
+    assert fetches == 1
+    clock.now += 61
+    catalog.model_ids(fetch)
+    assert fetches == 2
+
+
+def test_breakers_skip_bad_models_and_last_good_model_sticks(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = _Clock()
+    catalog = ModelCatalog(ttl_seconds=600, failure_threshold=1, reset_after_seconds=300, clock=clock)
+    log: list[str] = []
+    primary = _Unavailable()
+    engine = _engine(catalog, primary, log, monkeypatch)
+    ids = ["other/broken:free", "other/good:free"]
+    monkeypatch.setattr(engine, "_discover_model_ids", lambda: ids)
+    # Keep the configured mistral fallbacks out so the test controls the candidate list.
+    monkeypatch.setattr(engine, "_fallback_candidates", lambda mistral, free: list(free))
+
+    assert engine._invoke_llm("q") == "answer from other/good:free"
+    assert log == ["other/broken:free", "other/good:free"]
+    assert catalog.sticky_model == "other/good:free"
+
+    log.clear()
+    assert engine._invoke_llm("q") == "answer from other/good:free"
+    # Primary and the broken model are both behind open breakers now.
+    assert primary.calls == 1
+    assert log == ["other/good:free"]
+    assert catalog.discovery_calls == 1
+
+    clock.now += 301
+    assert catalog.is_available("mistralai/mistral-7b-instruct")
+
+
+def test_half_open_breaker_lets_one_probe_through_until_it_reports() -> None:
+    clock = _Clock()
+    catalog = ModelCatalog(failure_threshold=1, reset_after_seconds=300, clock=clock)
+    catalog.record_failure("m")
+    clock.now += 301
+
+    assert catalog.is_available("m")
+    assert not catalog.is_available("m")
+    assert catalog.order_candidates(["m"]) == []
+
+    catalog.record_failure("m")
+    clock.now += 301
+    assert catalog.is_available("m")
+    # A probe that never reports back stops blocking after another cool-down.
+    clock.now += 301
+    assert catalog.is_available("m")
+    catalog.record_success("m")
+    assert catalog.is_available("m") and catalog.is_available("m")
+
+
+def test_catalogs_are_shared_per_configuration() -> None:
+    assert get_model_catalog() is get_model_catalog(ttl_seconds=600)
+    assert get_model_catalog(failure_threshold=5) is not get_model_catalog()
+    assert get_model_catalog(failure_threshold=5).failure_threshold == 5
+
+
+class _Slow:
+    def invoke(self, prompt: str) -> str:
+        time.sleep(0.3)
+        return "answer from primary"
+
+
+def test_a_hedge_is_booked_against_the_model_that_answered(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = _Clock()
+    catalog = ModelCatalog(failure_threshold=2, reset_after_seconds=300, clock=clock)
+    primary, backup = "mistralai/mistral-7b-instruct", "other/good:free"
+    hedger = LLMHedger(HedgePolicy(min_samples=3, min_delay_seconds=0.05, max_extra_ratio=1.0))
+    # Enough fast samples that the unhedged slow call below leaves the hedge delay short.
+    for _ in range(20):
+        hedger.latencies.record(primary, 0.02)
+    log: list[str] = []
+    engine = _engine(catalog, _Slow(), log, monkeypatch)
+    engine.hedger = hedger
+    monkeypatch.setattr(engine, "_discover_model_ids", lambda: [backup])
+    monkeypatch.setattr(engine, "_fallback_candidates", lambda mistral, free: list(free))
+
+    catalog.record_failure(backup)
+    catalog.record_failure(backup)
+    # The backup's breaker is open: no hedge, the slow primary answers.
+    assert engine._invoke_llm("q") == "answer from primary"
+    assert log == []
+
+    catalog.record_failure(primary)
+    clock.now += 301
+    assert engine._invoke_llm("q") == f"answer from {backup}"
+    # The backup's half-open probe succeeded; the primary, which did not answer, was not credited,
+    # so its earlier failure still counts towards opening its breaker.
+    assert catalog.is_available(backup) and catalog.is_available(backup)
+    catalog.record_failure(primary)
+    assert not catalog.is_available(primary)
+
+
+def test_async_discovery_works_from_every_event_loop() -> None:
+    catalog = ModelCatalog(ttl_seconds=0)
+
+    async def fetch() -> list[str]:
+        await asyncio.sleep(0.01)
+        return ["m"]
+
+    async def contended() -> list[list[str]]:
+        return list(await asyncio.gather(catalog.amodel_ids(fetch), catalog.amodel_ids(fetch)))
+
+    # Each asyncio.run is a new loop, as in a test suite or a worker restarting its loop.
+    assert asyncio.run(contended()) == [["m"], ["m"]]
+    assert asyncio.run(contended()) == [["m"], ["m"]]
+
+
+class _BadPrompt:
+    def invoke(self, prompt: str) -> str:
+        raise ValueError("prompt too long")
+
+
+def test_a_probe_without_a_verdict_is_released(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = _Clock()
+    catalog = ModelCatalog(failure_threshold=1, reset_after_seconds=300, clock=clock)
+    primary = "mistralai/mistral-7b-instruct"
+    engine = _engine(catalog, _BadPrompt(), [], monkeypatch)
+    catalog.record_failure(primary)
+    clock.now += 301
+
+    with pytest.raises(ValueError):
+        engine._invoke_llm("q")
+    # The error was about the prompt, not the model: the next request may probe it right away.
+    assert catalog.is_available(primary)
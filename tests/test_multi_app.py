@@ -0,0 +1,179 @@
+import asyncio
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+import yaml
+
+from agent.cache_manager import CacheManager
+from agent.ingestion import ingest_report_payloads_to_duckdb
+from agent.schema_summary import build_schema_summaries, schema_summaries_to_json_payload
+from agent.settings import AppConfig
+from apps.zoho_agent_service.api.main import create_app
+from apps.zoho_agent_service.api.registry import AppRegistry
+from apps.zoho_agent_service.api.service import AgentService
+
+QUESTION = "Which stages matter most?"
+
+
+class _StubLLM:
+    def invoke(self, prompt: str) -> str:
+        if "SQL:" in prompt:
+            return "SELECT stage, SUM(amount) AS total FROM deals GROUP BY stage"
+        return "- Won deals bring in the most."
+
+
+def _sync_app(root: Path, app_name: str, amount: int) -> Path:
+    payload = {
+        "app_name": app_name,
+        "reports": [{"name": "Deals", "report_link_name": "All_Deals", "table_name": "deals", "key_columns": ["id"]}],
+        "allowed_tables": ["deals"],
+    }
+    config_path = root / f"{app_name}.yaml"
+    config_path.write_text(yaml.safe_dump(payload), encoding="utf-8")
+    cfg = AppConfig.model_validate(payload)
+    cache = CacheManager(Path(".cache") / app_name)
+    rows = [{"id": 1, "stage": "won", "amount": amount}, {"id": 2, "stage": "lost", "amount": 1}]
+    cache.write_snapshot(ingest_report_payloads_to_duckdb({"All_Deals": rows}, cache.db_path, cfg))
+    cache.write_schema_summary(schema_summaries_to_json_payload(build_schema_summaries(cache.db_path, cfg), app_name))
+    return config_path
+
+
+@pytest.fixture()
+def two_apps(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> list[Path]:
+    monkeypatch.chdir(tmp_path)
+    return [_sync_app(tmp_path, "sales", 300), _sync_app(tmp_path, "support", 7)]
+
+
+def _registry(paths: list[Path], load_delay: dict[str, float] | None = None, **kwargs) -> AppRegistry:
+    def factory(path: Path, sessions=None) -> AgentService:
+        time.sleep((load_delay or {}).get(path.stem, 0.0))
+        return AgentService(config_path=path, llm=_StubLLM(), sessions=sessions)
+
+    return AppRegistry.from_paths(paths, factory=factory, **kwargs)
+
+
+async def _post(client: httpx.AsyncClient, path: str, session_id: str = "s") -> httpx.Response:
+    return await client.post(path, json={"question": QUESTION, "session_id": session_id})
+
+
+def _run(registry: AppRegistry, scenario) -> object:
+    async def run() -> object:
+        transport = httpx.ASGITransport(app=create_app(registry=registry))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+            return await scenario(client)
+
+    return asyncio.run(run())
+
+
+def test_requests_are_routed_by_app_name(two_apps: list[Path]) -> None:
+    registry = _registry(two_apps)
+
+    async def scenario(client: httpx.AsyncClient) -> tuple:
+        return (
+            await _post(client, "/apps/sales/chat"),
+            await _post(client, "/apps/support/chat"),
+            await _post(client, "/chat"),
+            await _post(client, "/apps/billing/chat"),
+            await client.get("/apps"),
+        )
+
+    sales, support, default, unknown, apps = _run(registry, scenario)
+
+    assert {row["stage"]: int(row["total"]) for row in sales.json()["evidence_rows"]}["won"] == 300
+    assert {row["stage"]: int(row["total"]) for row in support.json()["evidence_rows"]}["won"] == 7
+    assert default.json()["evidence_rows"] == sales.json()["evidence_rows"]
+    assert unknown.status_code == 404
+    assert unknown.json()["detail"]["apps"] == ["sales", "support"]
+    assert apps.json()["default_app"] == "sales"
+    assert {name: app["loaded"] for name, app in apps.json()["apps"].items()} == {"sales": True, "support": True}
+
+
+def test_idle_apps_are_evicted_lru_under_the_budget_and_reloaded_on_demand(two_apps: list[Path]) -> None:
+    # A one-byte budget leaves room for just the app that served last.
+    registry = _registry(two_apps, memory_budget_bytes=1)
+
+    async def scenario(client: httpx.AsyncClient) -> list[dict]:
+        snapshots = []
+        for path in ["/apps/sales/chat", "/apps/support/chat", "/apps/sales/chat"]:
+            assert (await _post(client, path)).status_code == 200
+            snapshots.append({name: (app["loaded"], app["loads"]) for name, app in registry.stats()["apps"].items()})
+        snapshots.append({"metrics": (await client.get("/metrics")).text})
+        return snapshots
+
+    after_sales, after_support, after_sales_again, metrics = _run(registry, scenario)
+
+    assert after_sales == {"sales": (True, 1), "support": (False, 0)}
+    assert after_support == {"sales": (False, 1), "support": (True, 1)}
+    assert after_sales_again == {"sales": (True, 2), "support": (False, 1)}
+    assert 'apps_evicted_total{app="sales",reason="memory"}' in metrics["metrics"]
+    assert 'app_memory_bytes{app="sales"}' in metrics["metrics"]
+
+
+def test_a_slow_app_load_does_not_block_other_apps(two_apps: list[Path]) -> None:
+    registry = _registry(two_apps, load_delay={"support": 1.0})
+    registry.get("sales")
+
+    async def scenario(client: httpx.AsyncClient) -> tuple[float, float]:
+        async def timed(path: str) -> float:
+            started = time.perf_counter()
+            assert (await _post(client, path)).status_code == 200
+            return time.perf_counter() - started
+
+        slow = asyncio.create_task(timed("/apps/support/chat"))
+        await asyncio.sleep(0.05)
+        fast = await timed("/apps/sales/chat")
+        return fast, await slow
+
+    fast, slow = _run(registry, scenario)
+
+    assert slow >= 1.0
+    assert fast < 0.8
+
+
+def test_conversations_survive_eviction_and_idle_requests_skip_the_memory_walk(
+    two_apps: list[Path], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    registry = _registry(two_apps, memory_budget_bytes=1, eviction_interval_seconds=3600)
+    sizings: list[str] = []
+    original = AgentService.memory_bytes
+
+    def counted(self: AgentService) -> int:
+        sizings.append(self.app_config.app_name)
+        return original(self)
+
+    monkeypatch.setattr(AgentService, "memory_bytes", counted)
+
+    async def scenario(client: httpx.AsyncClient) -> list[int]:
+        walks = []
+        for path in ["/apps/sales/chat", "/apps/sales/chat", "/apps/support/chat", "/apps/sales/chat"]:
+            assert (await _post(client, path, session_id="s1")).status_code == 200
+            walks.append(len(sizings))
+        return walks
+
+    walks = _run(registry, scenario)
+
+    # Only requests that loaded an app sized the loaded apps; the repeat request did not.
+    assert walks[1] == walks[0]
+    assert walks[2] > walks[1] and walks[3] > walks[2]
+    assert registry.stats()["apps"]["sales"]["loads"] == 2
+    history = registry.get("sales").sessions.get("s1").history
+    assert [line for line in history if line.startswith("User: ")] == [f"User: {QUESTION}"] * 3
+
+
+def test_a_lease_counts_in_flight_before_eviction_can_see_the_app(two_apps: list[Path]) -> None:
+    registry = _registry(two_apps, max_loaded_apps=1)
+
+    async def scenario() -> tuple[int, list[str]]:
+        async with registry.lease("sales"):
+            async with registry.lease("support"):
+                in_flight = registry.stats()["apps"]["sales"]["in_flight"]
+                evicted = registry.evict_over_budget()
+        return in_flight, evicted
+
+    in_flight, evicted = asyncio.run(scenario())
+
+    assert in_flight == 1
+    assert evicted == []
+    assert registry.stats()["apps"]["sales"]["in_flight"] == 0
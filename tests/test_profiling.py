@@ -0,0 +1,128 @@
+import time
+from pathlib import Path
+
+import duckdb
+from fastapi.testclient import TestClient
+
+from agent.profiling import PROFILE_HEADER, RequestProfiler, SlowQueryLog, read_slowlog, summarize_slowlog
+from apps.zoho_agent_service.api.main import create_app
+from apps.zoho_agent_service.api.service import AgentService
+
+
+class _SlowLLM:
+    def invoke(self, prompt: str) -> str:
+        time.sleep(0.05)
+        if "SQL:" in prompt:
+            return "SELECT stage, SUM(amount) AS total FROM deals GROUP BY stage"
+        return "- Won deals bring in the most."
+
+
+def test_forced_profile_samples_python_and_keeps_duckdb_profiles(synced_config: Path) -> None:
+    service = AgentService(config_path=synced_config, llm=_SlowLLM())
+    service.ask("Which stages matter most to us?", session_id="warm")
+
+    # The same question again would be an answer-cache hit; a forced profile runs it anyway.
+    payload = service.ask("Which stages matter most to us?", session_id="profiled", profile=True)
+
+    profile = payload["profile"]
+    assert profile["forced"] is True
+    assert profile["python"]["samples"] > 0
+    stacks = [item["stack"] for item in profile["python"]["stacks"]]
+    assert any("invoke (" in stack and "test_profiling.py" in stack for stack in stacks)
+    [query] = profile["queries"]
+    assert query["sql"].startswith("SELECT stage")
+    assert query["profile"]["children"]
+    [entry] = read_slowlog(service.cache.slowlog_file)
+    assert entry["question"] == "Which stages matter most to us?"
+    assert entry["queries"][0]["profile"]["children"]
+
+
+def test_slow_requests_are_logged_without_the_header(synced_config: Path) -> None:
+    service = AgentService(config_path=synced_config, llm=_SlowLLM())
+    service.app_config.profiling.slow_query_seconds = 0.05
+    client = TestClient(create_app(service))
+
+    fast = client.post("/chat", json={"question": "Which stages matter most to us?"}, headers={PROFILE_HEADER: "0"})
+    assert fast.json()["profile"] is None
+
+    entries = read_slowlog(service.cache.slowlog_file)
+    assert [e["question"] for e in entries] == ["Which stages matter most to us?"]
+    assert entries[0]["python"] is None
+    assert entries[0]["timings"]["stages"]["sql_generation"] >= 0.05
+    assert entries[0]["queries"][0]["profile"]["children"]
+
+
+def test_profile_header_is_ignored_unless_the_config_allows_it(synced_config: Path) -> None:
+    service = AgentService(config_path=synced_config, llm=_SlowLLM())
+    client = TestClient(create_app(service))
+
+    ignored = client.post("/chat", json={"question": "Which stages matter most?"}, headers={PROFILE_HEADER: "1"})
+    assert ignored.json()["profile"] is None
+
+    service.app_config.profiling.allow_profile_header = True
+    honoured = client.post("/chat", json={"question": "Which stages matter most?"}, headers={PROFILE_HEADER: "1"})
+    assert honoured.json()["profile"]["forced"] is True
+
+
+def test_queries_are_profiled_from_the_start_when_captured() -> None:
+    conn = duckdb.connect()
+    profiler = RequestProfiler(capture_queries=True)
+    profiler.begin()
+    with profiler.query_profiling(conn) as capturing:
+        conn.execute("SELECT 42").fetchall()
+        profiler.record_query(conn, "SELECT 42")
+    assert capturing is True
+    assert [q["sql"] for q in profiler.queries] == ["SELECT 42"]
+
+    off = RequestProfiler()
+    off.begin()
+    with off.query_profiling(conn) as capturing:
+        assert capturing is False
+
+
+class _SlowQueryLLM:
+    def invoke(self, prompt: str) -> str:
+        if "SQL:" in prompt:
+            # Fast to plan, slow to run: the request is slow because of its one query.
+            return "SELECT stage, SUM(amount * r.range) AS total FROM deals, range(10000000) AS r GROUP BY stage"
+        return "- Won deals bring in the most."
+
+
+def test_a_slow_query_leaves_its_plan_in_the_slowlog(synced_config: Path) -> None:
+    service = AgentService(config_path=synced_config, llm=_SlowQueryLLM())
+    service.app_config.profiling.slow_query_seconds = 0.2
+
+    payload = service.ask("Which stages matter most to us?")
+
+    assert payload["timings"]["stages"]["execution"] >= 0.2
+    [entry] = read_slowlog(service.cache.slowlog_file)
+    [query] = entry["queries"]
+    assert query["sql"].startswith("SELECT stage")
+    assert query["profile"]["children"]
+
+
+def test_slowlog_rotates_and_summarizes(tmp_path: Path) -> None:
+    log = SlowQueryLog(tmp_path / "slowlog.jsonl", max_bytes=400, backups=2)
+    for i in range(12):
+        log.write(
+            {
+                "question": f"q{i}",
+                "total_seconds": float(i),
+                "timings": {"stages": {"sql_generation": i * 0.75, "execution": i * 0.25}},
+                "queries": [{"profile": {"children": [{"operator_name": "HASH_JOIN", "operator_timing": 0.2}]}}],
+                "python": None,
+            }
+        )
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["slowlog.jsonl", "slowlog.jsonl.1", "slowlog.jsonl.2"]
+    entries = read_slowlog(tmp_path / "slowlog.jsonl")
+    questions = [e["question"] for e in entries]
+    assert questions == sorted(questions, key=lambda q: int(q[1:]))
+    assert questions[-1] == "q11"
+
+    report = summarize_slowlog(entries, top=3)
+    assert report["max_seconds"] == 11.0
+    assert list(report["stage_seconds"]) == ["sql_generation", "execution"]
+    assert [item["question"] for item in report["slowest"]] == ["q11", "q10", "q9"]
+    assert report["slowest"][0]["slowest_stage"] == "sql_generation"
+    assert report["slowest"][0]["slowest_operator"] == "HASH_JOIN"
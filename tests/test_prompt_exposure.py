@@ -1,3 +1,4 @@
+from agent.evidence import EvidenceBatch
 from agent.query_engine import QueryEngine, build_answer_prompt, build_sql_prompt
 
 
@@ -14,10 +15,12 @@ def test_sql_prompt_uses_schema_not_full_rows() -> None:
 
 
 def test_answer_prompt_caps_rows() -> None:
-    rows = [{"id": i} for i in range(100)]
-    prompt = build_answer_prompt("How many?", "SELECT id FROM leads", rows, row_cap=10)
-    assert '"id": 9' in prompt
-    assert '"id": 10' not in prompt
+    evidence = EvidenceBatch.from_rows([{"id": i, "name": f"lead-{i}"} for i in range(100)], ["id", "name"])
+    prompt = build_answer_prompt("How many?", "SELECT id FROM leads", evidence, row_cap=10)
+    # Column names appear once in the header, not on every row.
+    assert prompt.count('"name"') == 1
+    assert '[9, "lead-9"]' in prompt
+    assert '[10, "lead-10"]' not in prompt
     assert "Return ONLY bullet points" in prompt
     assert "Do NOT mention technical words" in prompt
 
@@ -0,0 +1,65 @@
+from pathlib import Path
+
+import duckdb
+import pytest
+from fastapi.testclient import TestClient
+
+from agent.query_guard import QueryGuard, QueryRejectedError, QueryTimeoutError, estimate_plan
+from apps.zoho_agent_service.api.main import create_app
+from apps.zoho_agent_service.api.service import AgentService
+
+EXPENSIVE = "SELECT * FROM (SELECT SUM(a.range * b.range) AS s FROM range(100000) a, range(100000) b) q LIMIT 5"
+
+
+class _CrossJoinLLM:
+    def invoke(self, prompt: str) -> str:
+        return "SELECT a.stage, COUNT(*) AS n FROM deals a, deals b, deals c GROUP BY a.stage"
+
+
+def test_cross_product_estimate_multiplies_inputs() -> None:
+    conn = duckdb.connect()
+    estimate = estimate_plan(conn, EXPENSIVE)
+    assert estimate.peak_rows == 10_000_000_000
+    assert estimate.blocking
+
+
+def test_expensive_blocking_plan_is_rejected() -> None:
+    with pytest.raises(QueryRejectedError) as exc:
+        QueryGuard(max_estimated_rows=1_000).execute(duckdb.connect(), EXPENSIVE)
+    assert exc.value.to_detail()["estimated_rows"] == 10_000_000_000
+
+
+def test_streaming_plan_runs_behind_the_limit() -> None:
+    sql = "SELECT * FROM (SELECT a.range AS x, b.range AS y FROM range(100000) a, range(100000) b) q LIMIT 2"
+    evidence = QueryGuard(max_estimated_rows=1_000).execute(duckdb.connect(), sql)
+    assert evidence.columns == ["x", "y"]
+    assert evidence.num_rows == 2
+
+
+def test_watchdog_interrupts_slow_query() -> None:
+    guard = QueryGuard(max_estimated_rows=10**15, timeout_seconds=0.1, max_threads=1)
+    with pytest.raises(QueryTimeoutError) as exc:
+        guard.execute(duckdb.connect(), EXPENSIVE)
+    assert exc.value.status_code == 504
+    assert exc.value.to_detail()["code"] == "query_timeout"
+
+
+def test_api_returns_structured_rejection(synced_config: Path) -> None:
+    service = AgentService(config_path=synced_config, llm=_CrossJoinLLM())
+    service.query_guard = QueryGuard(max_estimated_rows=10)
+    response = TestClient(create_app(service)).post("/chat", json={"question": "Which stage is doing best?"})
+    assert response.status_code == 422
+    assert response.json()["detail"]["code"] == "query_too_expensive"
+
+
+def test_thread_cap_is_set_when_the_database_is_opened_not_per_query(tmp_path: Path) -> None:
+    db_path = tmp_path / "threads.duckdb"
+    duckdb.connect(str(db_path)).close()
+    guard = QueryGuard(max_threads=1)
+
+    conn = guard.connect(db_path)
+    assert conn.execute("SELECT current_setting('threads')").fetchone() == (1,)
+    conn.execute("SET threads = 3")
+    guard.execute(conn, "SELECT 1")
+    assert conn.execute("SELECT current_setting('threads')").fetchone() == (3,)
+    conn.close()
@@ -0,0 +1,63 @@
+from pathlib import Path
+
+import duckdb
+
+from agent.evidence import EvidenceBatch
+from agent.query_engine import QueryEngine
+from agent.result_cache import ResultCache, canonicalize_sql
+from agent.settings import Settings
+
+
+def test_canonicalize_ignores_whitespace_and_keyword_case() -> None:
+    a = canonicalize_sql("SELECT  stage,\n COUNT(*) FROM deals WHERE stage = 'Won';")
+    b = canonicalize_sql("select stage , count( * ) from deals where stage='Won'")
+    assert a == b
+    assert canonicalize_sql("SELECT 'Won'") != canonicalize_sql("SELECT 'won'")
+
+
+def test_cache_is_bounded_by_bytes() -> None:
+    cache = ResultCache(max_bytes=4000)
+    cache.bind_snapshot("s1")
+    batch = EvidenceBatch.from_rows([{"id": i, "name": f"name-{i}"} for i in range(30)], ["id", "name"])
+    for i in range(20):
+        cache.put(f"SELECT {i}", 10, "s1", batch)
+    stats = cache.stats()
+    assert 0 < stats["entries"] < 20
+    assert stats["bytes"] <= 4000
+    assert cache.get("SELECT 19", 10, "s1") is batch
+    assert cache.get("SELECT 0", 10, "s1") is None
+
+
+def test_new_snapshot_drops_cache_and_ignores_stale_writes() -> None:
+    cache = ResultCache()
+    cache.bind_snapshot("s1")
+    cache.put("SELECT 1", 5, "s1", EvidenceBatch.from_rows([{"x": 1}], ["x"]))
+    cache.bind_snapshot("s2")
+    assert cache.get("SELECT 1", 5, "s2") is None
+    cache.put("SELECT 1", 5, "s1", EvidenceBatch.from_rows([{"x": 1}], ["x"]))
+    assert cache.stats()["entries"] == 0
+
+
+def test_engine_serves_repeated_sql_from_cache(tmp_path: Path) -> None:
+    db_path = tmp_path / "test.duckdb"
+    conn = duckdb.connect(str(db_path))
+    conn.execute("CREATE TABLE deals AS SELECT * FROM (VALUES (1, 'won'), (2, 'lost')) t(id, stage)")
+    conn.close()
+
+    settings = Settings.model_validate({"OPENROUTER_MODEL": "mistralai/mistral-7b-instruct"})
+    cache = ResultCache()
+    cache.bind_snapshot("snap")
+    engine = QueryEngine(
+        settings=settings,
+        db_path=db_path,
+        schema_summary={},
+        allowed_tables=["deals"],
+        business_definitions={},
+        llm=object(),  # type: ignore[arg-type]
+        result_cache=cache,
+        snapshot_id="snap",
+    )
+    first = engine.execute_safe_query("SELECT id, stage FROM deals ORDER BY id", max_rows=10)
+    second = engine.execute_safe_query("select id,stage from deals order by id;", max_rows=10)
+    assert first == second
+    assert cache.stats()["hits"] == 1
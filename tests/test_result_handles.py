@@ -0,0 +1,102 @@
+import io
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from fastapi.testclient import TestClient
+
+from agent.result_handles import ResultExpiredError, ResultHandleError, ResultHandleRegistry, stable_page_sql
+from apps.zoho_agent_service.api.main import create_app
+from apps.zoho_agent_service.api.service import AgentService
+
+
+class _ListingLLM:
+    def __init__(self, sql: str = "SELECT id, stage, amount FROM deals ORDER BY id") -> None:
+        self.sql = sql
+
+    def invoke(self, prompt: str) -> str:
+        if "SQL:" in prompt:
+            return self.sql
+        return "- Three deals are listed."
+
+
+def test_registry_scopes_handles_to_snapshot() -> None:
+    now = [0.0]
+    registry = ResultHandleRegistry(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+    handle = registry.register("SELECT 1", "s1")
+    assert registry.register("select 1;", "s1") == handle
+    assert registry.resolve(handle, "s1").sql == "select 1;"
+    with pytest.raises(ResultExpiredError):
+        registry.resolve(handle, "s2")
+    now[0] = 11.0
+    with pytest.raises(ResultHandleError):
+        registry.resolve(handle, "s1")
+
+
+def test_results_endpoint_pages_full_result(synced_config: Path) -> None:
+    client = TestClient(create_app(AgentService(config_path=synced_config, llm=_ListingLLM())))
+    answer = client.post("/chat", json={"question": "List the deals", "max_rows": 1}).json()
+    assert len(answer["evidence_rows"]) == 1
+    handle = answer["result_handle"]
+
+    first = client.get(f"/results/{handle}", params={"page_size": 2}).json()
+    assert [row["id"] for row in first["rows"]] == [1, 2]
+    second = client.get(f"/results/{handle}", params={"page_size": 2, "cursor": first["next_cursor"]}).json()
+    assert [row["id"] for row in second["rows"]] == [3]
+    assert second["next_cursor"] is None
+
+
+def test_results_endpoint_serves_arrow_and_parquet(synced_config: Path) -> None:
+    client = TestClient(create_app(AgentService(config_path=synced_config, llm=_ListingLLM())))
+    handle = client.post("/chat", json={"question": "List the deals"}).json()["result_handle"]
+
+    arrow = client.get(f"/results/{handle}", params={"format": "arrow", "compression": "zstd"})
+    assert arrow.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    table = pa.ipc.open_stream(arrow.content).read_all()
+    assert table.column_names == ["id", "stage", "amount"]
+    assert table.num_rows == 3
+
+    parquet = client.get(f"/results/{handle}", params={"format": "parquet", "page_size": 2})
+    assert parquet.headers["x-next-cursor"]
+    assert pq.read_table(io.BytesIO(parquet.content)).num_rows == 2
+
+    assert client.get("/results/r_missing").status_code == 404
+
+
+def test_unordered_results_are_paged_in_a_stable_order(synced_config: Path) -> None:
+    assert stable_page_sql(
+        "SELECT stage, row_number() OVER (ORDER BY amount) AS n FROM deals WHERE stage <> 'order by'", 2
+    ).endswith(") AS page_source ORDER BY ALL")
+    assert stable_page_sql("SELECT id FROM deals ORDER BY ALL;", 1) == "SELECT id FROM deals ORDER BY ALL"
+
+    llm = _ListingLLM("SELECT stage, amount FROM deals")
+    client = TestClient(create_app(AgentService(config_path=synced_config, llm=llm)))
+    handle = client.post("/chat", json={"question": "List the deals"}).json()["result_handle"]
+
+    first = client.get(f"/results/{handle}", params={"page_size": 2}).json()
+    second = client.get(f"/results/{handle}", params={"page_size": 2, "cursor": first["next_cursor"]}).json()
+    assert [(row["stage"], row["amount"]) for row in first["rows"] + second["rows"]] == [
+        ("lost", 100),
+        ("won", 200),
+        ("won", 300),
+    ]
+
+
+def test_ties_in_the_sort_keys_are_broken_by_every_column(synced_config: Path) -> None:
+    assert stable_page_sql("SELECT stage, amount FROM deals ORDER BY stage DESC LIMIT 10;", 2) == (
+        "SELECT stage, amount FROM deals ORDER BY stage DESC, 1, 2 LIMIT 10"
+    )
+
+    # Both won deals tie on the only sort key.
+    llm = _ListingLLM("SELECT stage, amount FROM deals ORDER BY stage DESC")
+    client = TestClient(create_app(AgentService(config_path=synced_config, llm=llm)))
+    handle = client.post("/chat", json={"question": "List the deals, highest stage first"}).json()["result_handle"]
+
+    rows, cursor = [], None
+    for _ in range(3):
+        page = client.get(f"/results/{handle}", params={"page_size": 1, "cursor": cursor}).json()
+        rows += [(row["stage"], row["amount"]) for row in page["rows"]]
+        cursor = page["next_cursor"]
+    assert rows == [("won", 200), ("won", 300), ("lost", 100)]
+    assert cursor is None
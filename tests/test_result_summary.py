@@ -0,0 +1,85 @@
+from pathlib import Path
+
+from agent.metrics import METRICS
+from agent.models import QueryRequest
+from agent.query_engine import QueryEngine
+from agent.result_summary import (
+    EMPTY,
+    SCALAR,
+    SINGLE_ROW,
+    SMALL_GROUP_BY,
+    WIDE_LIST,
+    classify_result_shape,
+    render_template_summary,
+)
+from agent.settings import Settings
+
+
+class _SqlOnlyLLM:
+    def __init__(self, sql: str) -> None:
+        self.sql = sql
+        self.prompts: list[str] = []
+
+    def invoke(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        if "SQL:" in prompt:
+            return self.sql
+        return "- Summarized by the model."
+
+
+def _engine(synced_config: Path, llm: _SqlOnlyLLM, **kwargs) -> QueryEngine:
+    return QueryEngine(
+        settings=Settings.model_validate({"OPENROUTER_MODEL": "mistralai/mistral-7b-instruct"}),
+        db_path=synced_config.parent / ".cache" / "test_app" / "agent.duckdb",
+        schema_summary={},
+        allowed_tables=["deals"],
+        business_definitions={},
+        llm=llm,
+        **kwargs,
+    )
+
+
+def test_classify_result_shapes() -> None:
+    assert classify_result_shape([], ["x"]) == EMPTY
+    assert classify_result_shape([{"n": 3}], ["n"]) == SCALAR
+    assert classify_result_shape([{"id": 1, "stage": "Won"}], ["id", "stage"]) == SINGLE_ROW
+    rows = [{"stage": "Won", "n": 2}, {"stage": "Lost", "n": 1}]
+    assert classify_result_shape(rows, ["stage", "n"]) == SMALL_GROUP_BY
+    wide = [{"id": i, "stage": "Won", "amount": 1} for i in range(3)]
+    assert classify_result_shape(wide, ["id", "stage", "amount"]) == WIDE_LIST
+
+
+def test_render_template_humanizes_columns() -> None:
+    assert render_template_summary(SCALAR, [{"total_amount": 1250.5}], ["total_amount"]) == "- Total amount: 1,250.5"
+    rows = [{"stage": "Won", "deal_count": 2}, {"stage": "Lost", "deal_count": 1}]
+    assert render_template_summary(SMALL_GROUP_BY, rows, ["stage", "deal_count"]) == (
+        "- Won: deal count 2\n- Lost: deal count 1"
+    )
+    assert render_template_summary(WIDE_LIST, rows, ["stage", "deal_count"]) is None
+
+
+def test_scalar_answer_skips_second_llm_call(synced_config: Path) -> None:
+    METRICS.reset()
+    llm = _SqlOnlyLLM("SELECT SUM(amount) AS total_amount FROM deals")
+    answer = _engine(synced_config, llm).answer(QueryRequest(question="What is the pipeline worth?"))
+
+    assert len(llm.prompts) == 1
+    assert answer.summary_source == "template"
+    assert answer.result_shape == SCALAR
+    assert answer.summary.startswith("- Total amount:")
+    assert METRICS.get("answer_llm_skipped_total", shape=SCALAR) == 1
+
+
+def test_wide_result_still_uses_the_llm(synced_config: Path) -> None:
+    METRICS.reset()
+    llm = _SqlOnlyLLM("SELECT id, stage, amount FROM deals ORDER BY id")
+    engine = _engine(synced_config, llm)
+    answer = engine.answer(QueryRequest(question="List every deal"))
+
+    assert len(llm.prompts) == 2
+    assert answer.summary_source == "llm"
+    assert answer.result_shape == WIDE_LIST
+    assert METRICS.get("answer_llm_calls_total", shape=WIDE_LIST) == 1
+
+    disabled = _engine(synced_config, _SqlOnlyLLM("SELECT COUNT(*) AS deals FROM deals"), template_summaries=False)
+    assert disabled.answer(QueryRequest(question="How big is the pipeline?")).summary_source == "llm"
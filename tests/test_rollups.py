@@ -0,0 +1,78 @@
+from decimal import Decimal
+from pathlib import Path
+
+import duckdb
+import pytest
+
+from agent.rollups import RollupRewriter, materialize_rollups, resolve_rollup_specs, suggest_rollups
+from agent.schema_summary import build_schema_summaries, schema_summaries_to_json_payload
+from agent.settings import AppConfig, RollupSettings, RollupSpec
+
+
+def _rounded(value: object) -> object:
+    return round(float(value), 6) if isinstance(value, (float, Decimal)) else value
+
+
+@pytest.fixture()
+def appointments_db(tmp_path: Path) -> tuple[Path, dict]:
+    db_path = tmp_path / "hospital.duckdb"
+    conn = duckdb.connect(str(db_path))
+    conn.execute(
+        """
+        CREATE TABLE appointments_report AS
+        SELECT
+            range AS appointment_id,
+            ['Scheduled', 'Completed', 'Cancelled'][range % 3 + 1] AS status,
+            ['Cardiology', 'Neurology'][range % 2 + 1] AS department,
+            CAST(100 + range % 50 AS DECIMAL(10, 2)) AS fee
+        FROM range(600)
+        """
+    )
+    conn.execute("CREATE TABLE appointments_by_status AS SELECT status, COUNT(*) AS total FROM appointments_report GROUP BY 1")
+    conn.close()
+    cfg = AppConfig.model_validate({"app_name": "hospital", "allowed_tables": ["appointments_report"]})
+    summary = schema_summaries_to_json_payload(build_schema_summaries(db_path, cfg), "hospital")
+    return db_path, summary
+
+
+def test_suggestions_use_low_cardinality_columns_and_by_reports(appointments_db: tuple[Path, dict]) -> None:
+    _, summary = appointments_db
+    specs = suggest_rollups(summary, RollupSettings(min_table_rows=100, max_dimension_cardinality=5))
+    dims = {(s.table, tuple(s.dimensions)) for s in specs}
+    assert ("appointments_report", ("status",)) in dims
+    assert ("appointments_report", ("department",)) in dims
+    status = next(s for s in specs if s.dimensions == ["status"])
+    assert status.measures == ["fee"]
+
+
+def test_rewritten_aggregates_match_base_table(appointments_db: tuple[Path, dict]) -> None:
+    db_path, summary = appointments_db
+    settings = RollupSettings(
+        min_table_rows=100,
+        max_dimension_cardinality=5,
+        tables=[RollupSpec(table="appointments_report", dimensions=["department", "status"], measures=["fee"])],
+    )
+    rewriter = RollupRewriter(materialize_rollups(db_path, resolve_rollup_specs(settings, summary)))
+    conn = duckdb.connect(str(db_path), read_only=True)
+
+    queries = [
+        "SELECT status, COUNT(*) AS visits, SUM(fee) AS revenue FROM appointments_report GROUP BY status ORDER BY status",
+        "SELECT status, AVG(fee) FROM appointments_report WHERE status <> 'Cancelled' GROUP BY status ORDER BY AVG(fee) DESC",
+        "SELECT department, status, MAX(fee) AS top_fee FROM appointments_report GROUP BY department, status ORDER BY 1, 2",
+        "SELECT COUNT(*) FROM appointments_report",
+        # Nothing matches: counts stay 0 rather than NULL, sums stay NULL.
+        "SELECT COUNT(*), COUNT(fee), COUNT(department), SUM(fee) FROM appointments_report WHERE status = 'zzz'",
+    ]
+    for sql in queries:
+        rewritten = rewriter.rewrite(sql)
+        assert rewritten is not None and "__rollup_appointments_report" in rewritten, sql
+        base = conn.execute(sql)
+        base_cols, base_rows = [d[0] for d in base.description], base.fetchall()
+        rolled = conn.execute(rewritten)
+        assert [d[0] for d in rolled.description] == base_cols
+        assert [tuple(map(_rounded, row)) for row in rolled.fetchall()] == [tuple(map(_rounded, row)) for row in base_rows]
+
+    # Filters or groupings on columns a rollup does not keep stay on the base table.
+    assert rewriter.rewrite("SELECT status, COUNT(*) FROM appointments_report WHERE fee > 120 GROUP BY status") is None
+    assert rewriter.rewrite("SELECT appointment_id, fee FROM appointments_report") is None
+    assert rewriter.rewrite("SELECT COUNT(DISTINCT status) FROM appointments_report") is None
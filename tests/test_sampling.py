@@ -0,0 +1,119 @@
+from pathlib import Path
+
+import duckdb
+import pytest
+
+from agent.models import QueryRequest
+from agent.query_engine import QueryEngine
+from agent.sampling import Sampler, materialize_samples
+from agent.settings import SamplingSettings, Settings
+
+ROWS = 200_000
+
+
+class _StubLLM:
+    def __init__(self, sql: str) -> None:
+        self.sql = sql
+
+    def invoke(self, prompt: str) -> str:
+        return self.sql if "SQL:" in prompt else "- Card is the most common payment mode."
+
+
+@pytest.fixture()
+def bills_engine(tmp_path: Path):
+    db_path = tmp_path / "billing.duckdb"
+    conn = duckdb.connect(str(db_path))
+    conn.execute(
+        f"""
+        CREATE TABLE bills AS
+        SELECT
+            range AS bill_id,
+            CASE WHEN range % 10 < 6 THEN 'Card' WHEN range % 10 < 9 THEN 'Cash' ELSE 'UPI' END AS payment_mode,
+            CAST(100 + range % 400 AS DECIMAL(10, 2)) AS amount,
+            CASE WHEN range % 5000 = 0 THEN 'Refunded' ELSE 'Paid' END AS status
+        FROM range({ROWS})
+        """
+    )
+    conn.close()
+    columns = [
+        {"name": "bill_id", "distinct_count_estimate": ROWS},
+        {"name": "payment_mode", "distinct_count_estimate": 3},
+        {"name": "status", "distinct_count_estimate": 2},
+    ]
+    summary = {"tables": [{"table_name": "bills", "row_count": ROWS, "columns": columns}]}
+    samples = materialize_samples(db_path, summary, SamplingSettings(min_table_rows=100_000, sample_rows=20_000))
+    assert [(s.name, s.fraction, s.group_columns) for s in samples] == [
+        ("__sample_bills", 0.1, ("payment_mode", "status"))
+    ]
+    assert 18_000 < samples[0].row_count < 22_000
+
+    def build(sql: str) -> QueryEngine:
+        return QueryEngine(
+            settings=Settings.model_validate({"OPENROUTER_MODEL": "mistralai/mistral-7b-instruct"}),
+            db_path=db_path,
+            schema_summary=summary,
+            allowed_tables=["bills"],
+            business_definitions={},
+            llm=_StubLLM(sql),
+            sampler=Sampler(samples, max_relative_error=0.05),
+        )
+
+    return build
+
+
+def test_approximate_aggregates_report_error_bounds(bills_engine) -> None:
+    sql = (
+        "SELECT payment_mode, COUNT(*) AS bills, SUM(amount) AS revenue, AVG(amount) "
+        "FROM bills GROUP BY payment_mode ORDER BY bills DESC"
+    )
+    engine = bills_engine(sql)
+    exact = engine.answer(QueryRequest(question="Bills by payment mode"))
+    approx = engine.answer(QueryRequest(question="Roughly, bills by payment mode", approximate=True))
+
+    assert exact.approximation is None
+    assert approx.approximation is not None
+    assert approx.approximation.sample_fraction == 0.1
+    assert set(approx.approximation.error_bounds) == {"bills", "revenue", "avg(amount)"}
+    assert approx.evidence_columns == exact.evidence_columns
+    assert "estimates" in approx.summary
+    assert approx.sql == sql
+    for want, got in zip(exact.evidence_rows, approx.evidence_rows):
+        assert got["payment_mode"] == want["payment_mode"]
+        for column, bound in approx.approximation.error_bounds.items():
+            # Two and a half half-widths keeps the seeded sample comfortably inside the check.
+            assert abs(float(got[column]) - float(want[column])) <= 2.5 * bound * float(want[column])
+
+
+def test_wide_intervals_and_ineligible_queries_run_exactly(bills_engine) -> None:
+    # Forty refunds in 200k bills leave a handful in the sample: the interval is far wider than 5%.
+    rare = bills_engine("SELECT COUNT(*) AS refunds FROM bills WHERE status = 'Refunded'")
+    answer = rare.answer(QueryRequest(question="About how many refunds?", approximate=True))
+    assert answer.approximation is None
+    assert answer.evidence_rows == [{"refunds": 40}]
+
+    assert bills_engine("").sampler.rewrite("SELECT MAX(amount) FROM bills") is None
+    assert bills_engine("").sampler.rewrite("SELECT bill_id, amount FROM bills") is None
+
+
+def test_grouped_queries_run_exactly_when_a_group_is_missing_from_the_sample(bills_engine) -> None:
+    sql = "SELECT status, COUNT(*) AS bills FROM bills GROUP BY status"
+    engine = bills_engine(sql)
+    sampled = engine.sampler.rewrite(sql)
+    # The check reads the groups recorded at sync time and the sample, never the base table.
+    assert "FROM bills" not in sampled.missing_groups_sql
+    conn = duckdb.connect(str(engine.db_path))
+    conn.execute("DELETE FROM __sample_bills WHERE status = 'Refunded'")
+    conn.close()
+
+    answer = engine.answer(QueryRequest(question="Bills by status", approximate=True))
+
+    assert answer.approximation is None
+    assert sorted((row["status"], row["bills"]) for row in answer.evidence_rows) == [("Paid", ROWS - 40), ("Refunded", 40)]
+
+
+def test_only_single_recorded_group_columns_are_approximated(bills_engine) -> None:
+    sampler = bills_engine("").sampler
+    assert sampler.rewrite("SELECT bill_id, COUNT(*) FROM bills GROUP BY bill_id") is None
+    assert sampler.rewrite("SELECT status, payment_mode, COUNT(*) FROM bills GROUP BY status, payment_mode") is None
+    assert sampler.rewrite("SELECT amount > 200, COUNT(*) FROM bills GROUP BY amount > 200") is None
+    assert sampler.rewrite('SELECT "status", COUNT(*) FROM bills GROUP BY "status"') is not None
@@ -0,0 +1,121 @@
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+import yaml
+
+from agent.session_store import InMemorySessionStore, SQLiteSessionStore, create_session_store
+from apps.zoho_agent_service.api.service import AgentService
+
+
+class _StubLLM:
+    def invoke(self, prompt: str) -> str:
+        if "SQL:" in prompt:
+            return "SELECT stage, SUM(amount) AS total FROM deals GROUP BY stage"
+        return "- Won deals bring in the most."
+
+
+def test_memory_store_keeps_the_window_and_evicts_idle_then_least_recent(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = [1000.0]
+    monkeypatch.setattr("agent.session_store.time.monotonic", lambda: clock[0])
+    store = InMemorySessionStore(context_window=3, ttl_seconds=60, max_sessions=2, shards=1)
+
+    store.record("a", ["User: one", "Assistant: 1"], ("SELECT 1", ["x"]))
+    store.record("a", ["User: two", "Assistant: 2"], None)
+    state = store.get("a")
+    assert state.history == ["Assistant: 1", "User: two", "Assistant: 2"]
+    assert (state.previous_sql, state.previous_columns) == ("SELECT 1", ["x"])
+
+    store.record("b", ["User: b"], None)
+    store.get("a")  # reads do not refresh; "a" was written first, so it is the one evicted
+    store.record("c", ["User: c"], None)
+    assert store.get("a").history == [] and store.get("b").history == ["User: b"]
+
+    clock[0] += 61
+    assert store.get("c").history == []
+    assert store.stats() == {"backend": "memory", "sessions": 0}
+
+
+def test_sqlite_store_is_shared_between_workers_without_losing_turns(tmp_path: Path) -> None:
+    path = tmp_path / "sessions.sqlite"
+    # Two stores over one file stand in for two uvicorn worker processes.
+    workers = [SQLiteSessionStore(path, context_window=1000), SQLiteSessionStore(path, context_window=1000)]
+
+    def turns(store: SQLiteSessionStore, worker: int) -> None:
+        for turn in range(25):
+            store.record("shared", [f"User: {worker}-{turn}"], (f"SELECT {worker}", ["x"]))
+
+    threads = [threading.Thread(target=turns, args=(store, i)) for i, store in enumerate(workers * 2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+
+    history = workers[1].get("shared").history
+    assert len(history) == 100
+    workers[0].clear("shared")
+    assert workers[1].get("shared").history == []
+    for store in workers:
+        store.close()
+
+
+def test_sqlite_sweep_drops_expired_and_excess_sessions(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    store = SQLiteSessionStore(
+        tmp_path / "sessions.sqlite", ttl_seconds=60, max_sessions=2, sweep_interval_seconds=3600
+    )
+    clock = [1_000_000.0]
+    monkeypatch.setattr("agent.session_store.time.time", lambda: clock[0])
+    for session_id in ["old", "a", "b", "c"]:
+        store.record(session_id, [f"User: {session_id}"], None)
+        clock[0] += 70 if session_id == "old" else 1
+
+    clock[0] += 5
+    assert store.get("old").history == []  # past the TTL already, before any sweep
+    store.sweep()
+    assert store.stats()["sessions"] == 2
+    assert [store.get(s).history for s in ["a", "b", "c"]] == [[], ["User: b"], ["User: c"]]
+    store.close()
+
+
+def test_services_sharing_a_sqlite_store_see_each_others_turns(synced_config: Path) -> None:
+    config = yaml.safe_load(synced_config.read_text(encoding="utf-8"))
+    config["sessions"] = {"backend": "sqlite"}
+    synced_config.write_text(yaml.safe_dump(config), encoding="utf-8")
+    first = AgentService(config_path=synced_config, llm=_StubLLM())
+    second = AgentService(config_path=synced_config, llm=_StubLLM())
+
+    first.ask("Which stages matter most?", session_id="s1")
+    state = second.sessions.get("s1")
+
+    assert state.history[0] == "User: Which stages matter most?"
+    assert state.history[1].startswith("Assistant: ")
+    assert state.previous_sql == "SELECT stage, SUM(amount) AS total FROM deals GROUP BY stage"
+    assert second.status()["sessions"]["sessions"] == 1
+
+
+def test_async_requests_read_sessions_off_the_event_loop(synced_config: Path) -> None:
+    service = AgentService(config_path=synced_config, llm=_StubLLM())
+    readers: list[int] = []
+    read = service.sessions.get
+
+    def tracked(session_id: str):
+        readers.append(threading.get_ident())
+        return read(session_id)
+
+    service.sessions.get = tracked
+
+    async def run() -> int:
+        await service.aask("Which stages matter most?", session_id="s1")
+        async for _ in service.aask_stream("Which stages matter most, again?", session_id="s1"):
+            pass
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run())
+
+    assert len(readers) == 2 and loop_thread not in readers
+
+
+def test_unknown_session_backend_is_rejected(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="Unknown session backend"):
+        create_session_store("redis", tmp_path / "sessions.sqlite")
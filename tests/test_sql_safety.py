@@ -33,3 +33,16 @@ def test_allows_cte_alias_reference() -> None:
     sql = "WITH x AS (SELECT * FROM leads) SELECT * FROM x"
     result = validate_select_only_sql(sql, allowed_tables=["leads"])
     assert result.is_safe
+
+
+def test_allows_recursive_column_list_and_materialized_ctes() -> None:
+    sql = (
+        "WITH RECURSIVE base AS NOT MATERIALIZED (SELECT * FROM leads), r(i) AS (SELECT 1 UNION ALL "
+        "SELECT i + 1 FROM r WHERE i < 3), m AS MATERIALIZED (SELECT * FROM base) SELECT * FROM r, m"
+    )
+    assert validate_select_only_sql(sql, allowed_tables=["leads"]).is_safe
+
+
+def test_select_aliases_are_not_cte_names() -> None:
+    sql = "SELECT id, deals AS total FROM deals"
+    assert not validate_select_only_sql(sql, allowed_tables=["leads"]).is_safe
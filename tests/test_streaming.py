@@ -0,0 +1,51 @@
+import json
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from apps.zoho_agent_service.api.main import create_app
+from apps.zoho_agent_service.api.service import AgentService
+
+
+class _StreamingLLM:
+    def invoke(self, prompt: str) -> str:
+        return "SELECT stage, COUNT(*) AS deals, SUM(amount) AS total FROM deals GROUP BY stage ORDER BY total DESC"
+
+    def stream(self, prompt: str):
+        yield "- Won deals total 500.\n"
+        yield "- Lost deals total 100."
+
+
+def _parse_sse(text: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_chat_stream_emits_stages_then_tokens_then_answer(synced_config: Path) -> None:
+    client = TestClient(create_app(AgentService(config_path=synced_config, llm=_StreamingLLM())))
+    response = client.post("/chat/stream", json={"question": "Total by stage?", "session_id": "s1"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = _parse_sse(response.text)
+    names = [name for name, _ in events]
+    assert names == ["sql_generated", "rows_ready", "token", "token", "answer"]
+    assert events[1][1]["row_count"] == 2
+    final = events[-1][1]
+    assert final["summary"] == "- Won deals total 500.\n- Lost deals total 100."
+    assert final["evidence_rows"][0]["stage"] == "won"
+
+
+def test_chat_stream_reports_errors_as_events(synced_config: Path) -> None:
+    class _BadSQL(_StreamingLLM):
+        def invoke(self, prompt: str) -> str:
+            return "DELETE FROM deals"
+
+    client = TestClient(create_app(AgentService(config_path=synced_config, llm=_BadSQL())))
+    response = client.post("/chat/stream", json={"question": "Drop it"})
+    events = _parse_sse(response.text)
+    assert events[-1][0] == "error"
+    assert "Unsafe SQL blocked" in events[-1][1]["detail"]
@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import duckdb
+
+from agent.cache_manager import CacheManager
+from agent.schema_summary import build_schema_summaries, schema_summaries_to_json_payload
+from agent.settings import AppConfig, ValueIndexSettings
+from agent.value_index import ValueIndex, build_value_index
+from apps.zoho_agent_service.api.service import AgentService
+
+
+class _PromptLLM:
+    def __init__(self) -> None:
+        self.prompts: list[str] = []
+
+    def invoke(self, prompt: str) -> str:
+        self.prompts.append(prompt)
+        if "SQL:" in prompt:
+            return "SELECT id, stage, amount FROM deals WHERE stage = 'lost'"
+        return "- One deal was lost."
+
+
+def test_value_index_grounds_exact_and_misspelled_values(tmp_path: Path) -> None:
+    db_path = tmp_path / "hospital.duckdb"
+    conn = duckdb.connect(str(db_path))
+    conn.execute(
+        """
+        CREATE TABLE appointments_report AS
+        SELECT
+            'A-' || range AS appointment_id,
+            ['Cardiology', 'Neurology', 'ENT'][range % 3 + 1] AS department,
+            ['UPI', 'Cash'][range % 2 + 1] AS payment_mode,
+            ['O+', 'AB-'][range % 2 + 1] AS blood_group,
+            ['No Show', 'Completed'][range % 2 + 1] AS status,
+            'Patient ' || range AS patient_name
+        FROM range(300)
+        """
+    )
+    conn.close()
+    cfg = AppConfig.model_validate(
+        {
+            "app_name": "hospital",
+            "reports": [
+                {
+                    "name": "Appointments",
+                    "report_link_name": "All_Appointments",
+                    "table_name": "appointments_report",
+                    "key_columns": ["appointment_id"],
+                }
+            ],
+        }
+    )
+    summary = schema_summaries_to_json_payload(build_schema_summaries(db_path, cfg), "hospital")
+
+    entries = build_value_index(db_path, summary, ValueIndexSettings(max_column_cardinality=200, fuzzy_max_cardinality=10))
+    # Key columns and columns above max_column_cardinality stay out of the index.
+    assert entries == 3 + 2 + 2 + 2
+
+    index = ValueIndex.from_db(db_path)
+    found = {(m.column, m.value, m.exact) for m in index.lookup("UPI payments in cardiolgy for O+ no-show patients")}
+    assert found == {
+        ("payment_mode", "UPI", True),
+        ("blood_group", "O+", True),
+        ("status", "No Show", True),
+        ("department", "Cardiology", False),
+    }
+    assert index.lookup("how many were completed?")[0].value == "Completed"
+    assert index.lookup("list all departments") == []
+
+
+def test_sql_prompt_names_matched_columns(synced_config: Path) -> None:
+    cache = CacheManager(Path(".cache") / "test_app")
+    build_value_index(cache.db_path, cache.read_schema_summary(), ValueIndexSettings())
+    llm = _PromptLLM()
+    service = AgentService(config_path=synced_config, llm=llm)
+
+    service.ask("which deals were lost?")
+
+    sql_prompt = next(p for p in llm.prompts if "SQL:" in p)
+    assert "- \"lost\" is a value of deals.stage (stored as 'lost')" in sql_prompt
+    hints = sql_prompt.split("Values named in the question:")[1].split("Question:")[0]
+    assert "won" not in hints
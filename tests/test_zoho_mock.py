@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import pytest
+import yaml
+from typer.testing import CliRunner
+
+from agent.bench import synthetic_app_config
+from agent.cache_manager import CacheManager
+from agent.cli import app
+from agent.settings import Settings, SyncSettings
+from agent.zoho_client import ZohoCreatorClient
+from agent.zoho_mock import MockZohoSettings, create_mock_app, serve_mock_in_thread
+
+ZOHO_ENV = {
+    "ZOHO_CLIENT_ID": "id",
+    "ZOHO_CLIENT_SECRET": "secret",
+    "ZOHO_REFRESH_TOKEN": "refresh",
+    "ZOHO_ACCOUNT_OWNER": "owner",
+    "ZOHO_APP_LINK_NAME": "bench",
+}
+
+
+def test_client_pages_and_retries_through_injected_faults() -> None:
+    mock = create_mock_app(
+        MockZohoSettings(rows=2_000, max_page_size=300, rate_limit_rate=0.2, retry_after_seconds=0, error_rate=0.1)
+    )
+    with serve_mock_in_thread(mock) as base_url:
+        settings = Settings(**ZOHO_ENV, ZOHO_ACCOUNTS_URL=base_url, ZOHO_BASE_URL=base_url)
+        client = ZohoCreatorClient(settings, sync=SyncSettings(page_size=500, max_retries=20, retry_backoff_seconds=0))
+
+        links = [r["report_link_name"] for r in client.list_reports()]
+        assert links == ["All_Doctors", "All_Patients", "All_Appointments"]
+        fetch_seconds: dict[str, float] = {}
+        payloads = client.fetch_reports(["All_Appointments", "All_Patients", "All_Doctors"], fetch_seconds)
+
+    appointments = payloads["All_Appointments"]
+    assert len(appointments) == 2_000
+    assert len({row["Appointment_ID"] for row in appointments}) == 2_000
+    assert (len(payloads["All_Patients"]), len(payloads["All_Doctors"])) == (200, 10)
+    assert set(fetch_seconds) == set(payloads)
+    stats = mock.state.zoho.snapshot_stats()
+    # 300-row pages: 7 + 1 + 1 successful data calls.
+    assert stats["pages"] == 9
+    assert stats["rate_limited"] > 0 and stats["errors"] > 0
+    assert stats["tokens_issued"] == 1
+
+
+@pytest.mark.parametrize("extra_args", [[], ["--bulk"]])
+def test_sync_command_runs_against_the_mock(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, extra_args: list[str]
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    config = synthetic_app_config()
+    config["sync"] = {"retry_backoff_seconds": 0}
+    config_path = tmp_path / "app.yaml"
+    config_path.write_text(yaml.safe_dump(config), encoding="utf-8")
+    # Small bulk jobs, so the export has to follow record_cursor across several jobs.
+    mock = create_mock_app(
+        MockZohoSettings(rows=1_000, rate_limit_rate=0.1, retry_after_seconds=0, bulk_max_records=300)
+    )
+
+    with serve_mock_in_thread(mock) as base_url:
+        for key, value in {**ZOHO_ENV, "ZOHO_ACCOUNTS_URL": base_url, "ZOHO_BASE_URL": base_url}.items():
+            monkeypatch.setenv(key, value)
+        result = CliRunner().invoke(app, ["sync", "--config", str(config_path), *extra_args])
+
+    assert result.exit_code == 0, result.output
+    snapshot = CacheManager(Path(".cache") / config["app_name"]).read_snapshot()
+    assert snapshot.row_counts == {"appointments_report": 1_000, "patients_report": 100, "doctors_report": 10}
+    assert set(snapshot.timings["fetch"]) == {"All_Appointments", "All_Patients", "All_Doctors"}
+    if extra_args:
+        assert mock.state.zoho.snapshot_stats()["bulk_jobs"] == 4 + 1 + 1